@@ -4,6 +4,16 @@ echo   CREANDO ARCHIVO .EXE
 echo ========================================
 echo.
 
+REM Uso: crear_exe.bat          -> un solo archivo (dist\Git-Automation.exe)
+REM      crear_exe.bat carpeta  -> carpeta (dist\Git-Automation\Git-Automation.exe):
+REM      arranca más rápido porque no se descomprime en cada inicio
+set MODO=--onefile
+set EXE=dist\Git-Automation.exe
+if /i "%~1"=="carpeta" (
+    set MODO=--onedir
+    set EXE=dist\Git-Automation\Git-Automation.exe
+)
+
 cd /d "%~dp0"
 echo [1/4] Cambiando al directorio del proyecto...
 echo Directorio: %CD%
@@ -39,7 +49,7 @@ echo.
 if exist "dist" rmdir /s /q dist
 if exist "build" rmdir /s /q build
 
-pyinstaller --onefile --windowed --name "Git-Automation" --clean git_automation_gui.py
+pyinstaller %MODO% --windowed --name "Git-Automation" --clean git_automation_gui.py
 
 if errorlevel 1 (
     echo.
@@ -54,10 +64,15 @@ echo ========================================
 echo   ¡COMPLETADO EXITOSAMENTE!
 echo ========================================
 echo.
-if exist "dist\Git-Automation.exe" (
-    echo ✓ Archivo creado: dist\Git-Automation.exe
+if exist "%EXE%" (
+    echo ✓ Archivo creado: %EXE%
     echo.
-    echo Puedes copiar ese .exe a cualquier lugar y ejecutarlo directamente.
+    if "%MODO%"=="--onedir" (
+        echo Copia la carpeta dist\Git-Automation completa: el .exe necesita los archivos de al lado.
+    ) else (
+        echo Puedes copiar ese .exe a cualquier lugar y ejecutarlo directamente.
+    )
+    echo Para medir el arranque: python git_arranque.py --exe %EXE%
 ) else (
     echo ✗ ERROR: El archivo .exe no se creó correctamente
     echo Revisa los mensajes de error arriba
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tiempo de arranque de la aplicación
+La ventana se pinta primero y el estado (proyectos registrados, git status,
+servicios en segundo plano) se carga después. Aquí se anotan las fases del
+arranque, contadas desde que el sistema creó el proceso (en el .exe de un
+solo archivo, desde que arrancó el lanzador que lo descomprime):
+
+- modulos: terminaron los imports y empieza main()
+- ventana: la ventana ya está en pantalla y dibujada (primer <Map> de la
+  ventana y la siguiente vez que Tk queda libre: time-to-first-paint)
+- interactivo: los botones responden (time-to-interactive); nunca antes
+  que 'ventana', aunque el proyecto se haya cargado antes de verse
+- estado: se mostró el estado de Git del proyecto
+
+Las fases se registran en las métricas (arranque_segundos). Para medir
+varias veces seguidas y compararlo con un presupuesto:
+    python git_arranque.py --repeticiones 5
+    python git_arranque.py --exe dist\\Git-Automation.exe --presupuesto-interactivo 2
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+from git_metricas import METRICAS
+
+VARIABLE_MEDICION = "GIT_AUTOMATIZADO_ARRANQUE"
+FASES = ("modulos", "ventana", "interactivo", "estado")
+PRESUPUESTO_PINTADO = 1.5
+PRESUPUESTO_INTERACTIVO = 3.0
+
+
+def _creacion_proceso(pid):
+    """Momento (como time.time()) en que el sistema creó el proceso pid, o None"""
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+            kernel32 = ctypes.windll.kernel32
+            # PROCESS_QUERY_LIMITED_INFORMATION
+            proceso = kernel32.OpenProcess(0x1000, False, pid)
+            if not proceso:
+                return None
+            try:
+                tiempos = [wintypes.FILETIME() for _ in range(4)]
+                if not kernel32.GetProcessTimes(proceso, *(ctypes.byref(t) for t in tiempos)):
+                    return None
+            finally:
+                kernel32.CloseHandle(proceso)
+            # FILETIME: intervalos de 100 ns desde 1601-01-01
+            intervalos = (tiempos[0].dwHighDateTime << 32) | tiempos[0].dwLowDateTime
+            return intervalos / 1e7 - 11644473600
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            # Campo 22 (starttime); el nombre del proceso puede tener espacios, se corta en ')'
+            campos = f.read().rsplit(')', 1)[1].split()
+        with open("/proc/stat", 'r') as f:
+            arranque_sistema = next(int(l.split()[1]) for l in f if l.startswith("btime"))
+        return arranque_sistema + int(campos[19]) / os.sysconf('SC_CLK_TCK')
+    except Exception:
+        return None
+
+
+def inicio_proceso():
+    """Cuándo empezó a arrancar la aplicación
+
+    En el .exe de un solo archivo, PyInstaller descomprime todo en una carpeta
+    temporal desde un proceso lanzador y luego arranca Python en un hijo: ese
+    tiempo también lo espera el usuario, así que se cuenta desde el padre.
+    """
+    pid = os.getpid()
+    carpeta_temporal = getattr(sys, '_MEIPASS', None)
+    if getattr(sys, 'frozen', False) and carpeta_temporal and os.path.basename(carpeta_temporal).startswith("_MEI"):
+        pid = os.getppid()
+    return _creacion_proceso(pid)
+
+
+class MedidorArranque:
+    """Fases del arranque en segundos desde el inicio del proceso"""
+
+    def __init__(self):
+        self.inicio = inicio_proceso() or time.time()
+        self.marcas = {}
+        # Solo al medir con este módulo: dónde dejar el resultado y cerrar la aplicación
+        self.destino = os.environ.get(VARIABLE_MEDICION)
+
+    def marcar(self, fase):
+        if fase in self.marcas:
+            return
+        ahora = time.time()
+        self.marcas[fase] = {'segundos': round(ahora - self.inicio, 3), 'ts': ahora}
+        METRICAS.observar('arranque_segundos', ahora - self.inicio, fase=fase)
+
+    def completo(self):
+        return all(fase in self.marcas for fase in FASES)
+
+    def segundos(self, fase):
+        marca = self.marcas.get(fase)
+        return marca['segundos'] if marca else None
+
+    def guardar(self, ruta=None):
+        ruta = ruta or self.destino
+        if not ruta:
+            return
+        temporal = ruta + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({'inicio': self.inicio, 'marcas': self.marcas}, f, indent=4)
+        os.replace(temporal, ruta)
+
+
+ARRANQUE = MedidorArranque()
+
+
+def medir_una_vez(comando, timeout=60, cwd=None):
+    """Arranca la aplicación, espera a que termine de cargar y devuelve {fase: segundos}
+
+    Los segundos se cuentan desde que se lanzó el comando (incluye descomprimir el .exe).
+    """
+    descriptor, ruta = tempfile.mkstemp(prefix="arranque-", suffix=".json")
+    os.close(descriptor)
+    os.remove(ruta)
+    entorno = dict(os.environ, **{VARIABLE_MEDICION: ruta})
+    lanzamiento = time.time()
+    proceso = subprocess.Popen(comando, cwd=cwd, env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        limite = lanzamiento + timeout
+        while not os.path.exists(ruta):
+            if proceso.poll() is not None or time.time() > limite:
+                return None
+            time.sleep(0.02)
+        with open(ruta, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        return {fase: round(marca['ts'] - lanzamiento, 3) for fase, marca in datos['marcas'].items()}
+    finally:
+        try:
+            proceso.wait(10)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+
+def _percentil(valores, porcentaje):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(porcentaje / 100 * (len(ordenados) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el tiempo de arranque (primer pintado e interactivo)")
+    parser.add_argument("--exe", help="ejecutable a medir (por defecto git_automation_gui.py con este Python)")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--presupuesto-pintado", type=float, default=PRESUPUESTO_PINTADO)
+    parser.add_argument("--presupuesto-interactivo", type=float, default=PRESUPUESTO_INTERACTIVO)
+    parser.add_argument("--json", help="guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    if args.exe:
+        comando = [os.path.abspath(args.exe)]
+    else:
+        comando = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "git_automation_gui.py")]
+    resultados = []
+    for numero in range(1, args.repeticiones + 1):
+        medicion = medir_una_vez(comando, args.timeout)
+        if medicion is None:
+            print(f"✗ Arranque {numero}: la aplicación no terminó de cargar en {args.timeout:.0f} s")
+            return 1
+        resultados.append(medicion)
+        print(f"   Arranque {numero}: " + ", ".join(f"{fase} {medicion[fase]:.2f} s" for fase in FASES if fase in medicion))
+
+    print(f"\nArranque ({len(resultados)} repeticiones, desde el lanzamiento):")
+    resumen = {}
+    for fase in FASES:
+        valores = [r[fase] for r in resultados if fase in r]
+        if valores:
+            resumen[fase] = {'p50': _percentil(valores, 50), 'max': max(valores)}
+            print(f"   {fase:<12} p50 {resumen[fase]['p50']:.2f} s · máx {resumen[fase]['max']:.2f} s")
+
+    dentro = True
+    for fase, presupuesto, nombre in (('ventana', args.presupuesto_pintado, "Primer pintado"),
+                                      ('interactivo', args.presupuesto_interactivo, "Interactivo")):
+        if fase not in resumen:
+            continue
+        cumple = resumen[fase]['p50'] <= presupuesto
+        dentro = dentro and cumple
+        print(f"{'✓' if cumple else '✗'} {nombre}: {resumen[fase]['p50']:.2f} s (presupuesto {presupuesto:.2f} s)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'comando': comando, 'repeticiones': resultados, 'resumen': resumen}, f, indent=4)
+    return 0 if dentro else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,10 +10,41 @@ import subprocess
 import json
 import sys
 import threading
+import time
+import io
+from collections import OrderedDict
 from datetime import datetime
 from tkinter import *
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 
+from git_cola_push import ColaPush, es_error_de_red, registrar_pendiente, pendientes
+import git_operaciones
+from git_indice import contar_cambios_rapido
+from git_conjunto_cambios import ConjuntoCambios, SIN_CARGAR, BINARIO
+import git_parches
+import git_worktrees
+import git_sincronizacion
+import git_especulativo
+import git_remotos
+from git_bloqueos import locks_obsoletos, eliminar_lock, EDAD_LOCK_OBSOLETO
+from git_push_por_partes import (
+    conviene_por_partes, subir_por_partes, commits_sin_subir, es_error_de_tamano, LIMITE_TRAMO, MAX_COMMITS_TRAMO
+)
+from git_metricas import METRICAS, limpiar_progreso, ruta_por_defecto
+from git_arranque import ARRANQUE
+from git_recursos import POLITICA, FONDO
+from git_diagnostico import MONITOR, UMBRAL_POR_REPETICION, medir_repeticiones, es_plano, describir
+# Los módulos de arriba se usan al arrancar o son ligeros (biblioteca estándar y lo
+# que ya cargan git_trabajos y git_cola_push). git_servicio, git_rendimiento,
+# git_bundles, git_submodulos, git_verificaciones, git_directorios_pesados,
+# git_descubrimiento y git_checkout_parcial se importan dentro de las funciones
+# que los usan: no hacen falta para pintar la ventana y retrasaban el arranque
+# (sobre todo en el .exe)
+from git_trabajos import (
+    GestorTrabajos, TrabajoCancelado, ejecutar_proceso, directorio_git,
+    PRIORIDAD_INTERACTIVA, PRIORIDAD_FONDO, EN_COLA, EJECUTANDO, CANCELADO, TIEMPO_AGOTADO
+)
+
 # Para Windows: ocultar ventana de consola
 if sys.platform == 'win32':
     STARTUPINFO = subprocess.STARTUPINFO()
@@ -22,28 +53,26 @@ if sys.platform == 'win32':
 else:
     STARTUPINFO = None
 
-CONFIG_FILE = "git_config.json"
+# git_config.json vive en la carpeta del programa (la misma que lee git_servicio),
+# no en la del proyecto: la interfaz hace os.chdir al cambiar de proyecto
+CARPETA_PROGRAMA = (os.path.dirname(sys.executable) if getattr(sys, 'frozen', False)
+                    else os.path.dirname(os.path.abspath(__file__)))
+CONFIG_FILE = os.path.join(CARPETA_PROGRAMA, "git_config.json")
 HISTORIAL_FILE = "historial_proyectos.txt"
 PROYECTOS_FILE = "proyectos_guardados.json"
 HISTORIAL_OPERACIONES = "historial_operaciones.txt"
 
 
-def ejecutar_comando(comando):
-    """Ejecuta un comando en segundo plano sin mostrar ventana de consola"""
+def ejecutar_comando(comando, cwd=None, timeout=None):
+    """Ejecuta un comando en segundo plano sin mostrar ventana de consola
+
+    Cada comando tiene un tiempo límite (según el subcomando de git) para que un
+    push esperando credenciales o una red caída no bloqueen el hilo para siempre.
+    """
     try:
-        resultado = subprocess.run(
-            comando, 
-            shell=True, 
-            capture_output=True, 
-            text=True,
-            encoding='utf-8', 
-            errors='ignore',
-            startupinfo=STARTUPINFO,
-            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
-        )
-        salida = resultado.stdout.strip() if resultado.stdout else ""
-        error = resultado.stderr.strip() if resultado.stderr else ""
-        return resultado.returncode == 0, salida, error
+        return ejecutar_proceso(comando, cwd=cwd, timeout=timeout)
+    except TrabajoCancelado:
+        raise
     except:
         return False, "", ""
 
@@ -66,21 +95,26 @@ def configurar_git_automatico():
 
 
 def es_primera_vez():
-    """Verifica si es la primera vez"""
-    if not os.path.exists(".git") or not os.path.exists(CONFIG_FILE):
-        return True
-    try:
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            return not json.load(f).get('configurado', False)
-    except:
+    """Verifica si es la primera vez (el proyecto actual no tiene .git o nunca se configuró)"""
+    if not os.path.exists(".git"):
         return True
+    return not cargar_configuracion().get('configurado', False)
 
 
 def guardar_configuracion(config):
-    """Guarda la configuración"""
+    """Guarda la configuración
+
+    Mezcla las claves de config con las que ya había en git_config.json: las
+    secciones opcionales (verificaciones, métricas, servicio...) no se pierden
+    al volver a configurar un proyecto.
+    """
     try:
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=4, ensure_ascii=False)
+        datos = cargar_configuracion()
+        datos.update(config)
+        temporal = CONFIG_FILE + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, indent=4, ensure_ascii=False)
+        os.replace(temporal, CONFIG_FILE)
         return True
     except:
         return False
@@ -116,8 +150,9 @@ def guardar_proyecto(ruta, url_remoto=None):
         # Normalizar ruta para evitar duplicados
         ruta_normalizada = os.path.normpath(ruta)
         
-        # Guardar proyecto
+        # Guardar proyecto (conservando los demás datos registrados: ajustes, remotos, etc.)
         proyectos[ruta_normalizada] = {
+            **proyectos.get(ruta_normalizada, {}),
             'ruta': ruta_normalizada,
             'url_remoto': url_remoto,
             'fecha_ultimo_acceso': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -141,6 +176,79 @@ def guardar_proyecto(ruta, url_remoto=None):
         return False
 
 
+def guardar_proyectos_en_lote(repositorios):
+    """Registra varios proyectos de una vez (una sola lectura y escritura del registro)
+
+    repositorios: [{'ruta', 'url'}]. Los ya registrados conservan sus datos
+    (solo se completa el remoto si no tenían). Devuelve cuántos son nuevos.
+    """
+    try:
+        proyectos = {}
+        if os.path.exists(PROYECTOS_FILE):
+            try:
+                with open(PROYECTOS_FILE, 'r', encoding='utf-8') as f:
+                    proyectos = json.load(f)
+            except:
+                proyectos = {}
+        
+        ahora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        nuevos = []
+        for repo in repositorios:
+            ruta_normalizada = os.path.normpath(repo['ruta'])
+            if not os.path.isdir(ruta_normalizada):
+                continue
+            datos = proyectos.get(ruta_normalizada)
+            if datos is None:
+                # Sin fecha de último acceso: no pasan por delante del proyecto que se usa
+                proyectos[ruta_normalizada] = {
+                    'ruta': ruta_normalizada,
+                    'url_remoto': repo.get('url'),
+                    'fecha_creacion': ahora,
+                }
+                nuevos.append(ruta_normalizada)
+            elif not datos.get('url_remoto') and repo.get('url'):
+                datos['url_remoto'] = repo['url']
+        
+        with open(PROYECTOS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(proyectos, f, indent=4, ensure_ascii=False)
+        
+        if nuevos:
+            with open(HISTORIAL_FILE, 'a', encoding='utf-8') as f:
+                f.write(f"[{ahora}] Proyectos encontrados al buscar repositorios: {len(nuevos)}\n")
+                for ruta in nuevos:
+                    f.write(f"  {ruta}\n")
+                f.write("\n")
+        return len(nuevos)
+    except Exception:
+        return 0
+
+
+def actualizar_datos_proyecto(ruta, **campos):
+    """Actualiza campos de un proyecto ya registrado (None borra el campo)"""
+    try:
+        proyectos = {}
+        if os.path.exists(PROYECTOS_FILE):
+            with open(PROYECTOS_FILE, 'r', encoding='utf-8') as f:
+                proyectos = json.load(f)
+        ruta_normalizada = os.path.normpath(ruta)
+        datos = proyectos.setdefault(ruta_normalizada, {'ruta': ruta_normalizada, 'url_remoto': None})
+        for clave, valor in campos.items():
+            if valor is None:
+                datos.pop(clave, None)
+            else:
+                datos[clave] = valor
+        with open(PROYECTOS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(proyectos, f, indent=4, ensure_ascii=False)
+        return True
+    except:
+        return False
+
+
+def obtener_datos_proyecto(ruta):
+    """Datos registrados de un proyecto ({} si no está registrado)"""
+    return cargar_proyectos().get(os.path.normpath(ruta), {})
+
+
 def cargar_proyectos():
     """Carga todos los proyectos guardados"""
     if not os.path.exists(PROYECTOS_FILE):
@@ -207,6 +315,303 @@ def obtener_rama_actual():
     return "master"
 
 
+def ejecutar_git_binario(argumentos, cwd=None):
+    """Ejecuta git con una lista de argumentos y devuelve la salida sin procesar (bytes)"""
+    try:
+        resultado = subprocess.run(
+            ["git"] + list(argumentos),
+            cwd=cwd,
+            capture_output=True,
+            startupinfo=STARTUPINFO,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        )
+        error = resultado.stderr.decode('utf-8', errors='ignore').strip()
+        return resultado.returncode == 0, resultado.stdout, error
+    except:
+        return False, b"", ""
+
+
+def _decodificar_ruta(ruta_bytes):
+    """Convierte una ruta devuelta por git (bytes) a texto"""
+    return ruta_bytes.decode('utf-8', errors='surrogateescape')
+
+
+def parsear_status_z(datos):
+    """Parsea la salida de 'git status --porcelain -z' en una lista de (estado, archivo)"""
+    entradas = []
+    campos = datos.split(b'\0')
+    i = 0
+    while i < len(campos):
+        campo = campos[i]
+        i += 1
+        if len(campo) < 4:
+            continue
+        estado = campo[:2].decode('ascii', errors='ignore')
+        entradas.append((estado, _decodificar_ruta(campo[3:])))
+        # En renombres/copias el siguiente campo es la ruta de origen
+        if 'R' in estado or 'C' in estado:
+            i += 1
+    return entradas
+
+
+def parsear_diff_raw_numstat_z(datos):
+    """Parsea 'git diff --raw --numstat -z' en un dict {archivo: datos del cambio}"""
+    cambios = {}
+    campos = datos.split(b'\0')
+    i = 0
+    while i < len(campos):
+        campo = campos[i]
+        i += 1
+        if not campo:
+            continue
+        if campo.startswith(b':'):
+            # Registro raw: ":modo_a modo_b oid_a oid_b estado" + ruta(s)
+            partes = campo[1:].split()
+            if len(partes) < 5:
+                continue
+            dos_rutas = partes[4][:1] in (b'R', b'C')
+            ruta = campos[i + 1] if dos_rutas else campos[i]
+            i += 2 if dos_rutas else 1
+            datos_archivo = cambios.setdefault(_decodificar_ruta(ruta), {})
+            datos_archivo['oid_a'] = partes[2].decode('ascii')
+            datos_archivo['oid_b'] = partes[3].decode('ascii')
+        else:
+            # Registro numstat: "añadidas\teliminadas\truta" (ruta vacía si es renombre)
+            partes = campo.split(b'\t', 2)
+            if len(partes) < 3:
+                continue
+            if partes[2]:
+                ruta = partes[2]
+            else:
+                ruta = campos[i + 1]
+                i += 2
+            datos_archivo = cambios.setdefault(_decodificar_ruta(ruta), {})
+            if partes[0] == b'-':
+                datos_archivo['binario'] = True
+                datos_archivo['añadidas'] = datos_archivo['eliminadas'] = None
+            else:
+                datos_archivo['binario'] = False
+                datos_archivo['añadidas'] = int(partes[0])
+                datos_archivo['eliminadas'] = int(partes[1])
+    return cambios
+
+
+def contar_lineas_archivo(ruta):
+    """Cuenta las líneas de un archivo no rastreado y detecta si es binario (sin llamar a git)"""
+    try:
+        with open(ruta, 'rb') as f:
+            bloque = f.read(8000)
+            # Mismo criterio que git: un byte nulo al principio indica binario
+            if b'\0' in bloque:
+                return None, True
+            lineas = bloque.count(b'\n')
+            ultimo = bloque[-1:]
+            while True:
+                bloque = f.read(1 << 20)
+                if not bloque:
+                    break
+                lineas += bloque.count(b'\n')
+                ultimo = bloque[-1:]
+            if ultimo and ultimo != b'\n':
+                lineas += 1
+            return lineas, False
+    except OSError:
+        return None, False
+
+
+def obtener_estadisticas_cambios(cwd=None, rutas=None):
+    """Obtiene los archivos con cambios y sus estadísticas con un número fijo de llamadas a git
+
+    Con rutas solo se consultan esos archivos (p. ej. la página visible del selector).
+    """
+    filtro = ["--"] + list(rutas) if rutas else []
+    exito, salida_status, _ = ejecutar_git_binario(["status", "--porcelain", "-z"] + filtro, cwd)
+    if not exito:
+        return []
+    # Una llamada para el árbol de trabajo y otra para el índice, sin importar cuántos archivos haya
+    _, salida_trabajo, _ = ejecutar_git_binario(["diff", "--raw", "--numstat", "--no-abbrev", "-z"] + filtro, cwd)
+    _, salida_indice, _ = ejecutar_git_binario(["diff", "--cached", "--raw", "--numstat", "--no-abbrev", "-z"] + filtro, cwd)
+    cambios_trabajo = parsear_diff_raw_numstat_z(salida_trabajo)
+    cambios_indice = parsear_diff_raw_numstat_z(salida_indice)
+    
+    archivos = []
+    for estado, archivo in parsear_status_z(salida_status):
+        info = {
+            'archivo': archivo,
+            'estado': estado,
+            'añadidas': 0,
+            'eliminadas': 0,
+            'binario': False,
+            'preparado': archivo in cambios_indice,
+            'sin_seguimiento': estado == '??',
+        }
+        if estado == '??':
+            ruta_completa = os.path.join(cwd or os.getcwd(), archivo)
+            lineas, binario = contar_lineas_archivo(ruta_completa)
+            info['añadidas'] = lineas
+            info['binario'] = binario
+        else:
+            for parte in (cambios_indice.get(archivo), cambios_trabajo.get(archivo)):
+                if not parte:
+                    continue
+                if parte.get('binario'):
+                    info['binario'] = True
+                elif info['añadidas'] is not None and 'añadidas' in parte:
+                    info['añadidas'] += parte['añadidas']
+                    info['eliminadas'] += parte['eliminadas']
+        if info['binario']:
+            info['añadidas'] = info['eliminadas'] = None
+        info['clave_diff'] = _clave_diff(archivo, cambios_indice.get(archivo), cambios_trabajo.get(archivo), cwd)
+        archivos.append(info)
+    return archivos
+
+
+def _clave_diff(archivo, parte_indice, parte_trabajo, cwd=None):
+    """Construye la clave de caché del diff a partir del par de blobs (y del estado en disco)"""
+    clave = [archivo]
+    if parte_indice:
+        clave += [parte_indice.get('oid_a'), parte_indice.get('oid_b')]
+    if parte_trabajo:
+        clave.append(parte_trabajo.get('oid_a'))
+    if parte_trabajo or not parte_indice:
+        # El blob del árbol de trabajo no está calculado por git (oid nulo): usar mtime y tamaño
+        try:
+            st = os.stat(os.path.join(cwd or os.getcwd(), archivo))
+            clave += [st.st_mtime_ns, st.st_size]
+        except OSError:
+            clave.append(None)
+    return tuple(clave)
+
+
+def formatear_estadisticas(info):
+    """Texto corto con las líneas añadidas/eliminadas de un archivo"""
+    if info['binario']:
+        return "binario"
+    if info['añadidas'] is None:
+        return ""
+    if info['sin_seguimiento']:
+        return f"+{info['añadidas']} (nuevo)"
+    return f"+{info['añadidas']} −{info['eliminadas']}"
+
+
+class LectorDiffPaginado:
+    """Lee el diff de un archivo por páginas, sin cargarlo entero en memoria"""
+    
+    def __init__(self, info, cwd=None, lineas_por_pagina=200, saltar=0):
+        self.info = info
+        self.cwd = cwd
+        self.lineas_por_pagina = lineas_por_pagina
+        self.terminado = False
+        self._fuentes = self._crear_fuentes()
+        self._proceso = None
+        self._archivo = None
+        # Al reabrir un diff ya parcialmente leído se salta lo que está en caché
+        for _ in range(saltar):
+            if self._siguiente_linea() is None:
+                break
+    
+    def _crear_fuentes(self):
+        """Lista de orígenes del diff: comandos git o el propio archivo si no tiene seguimiento"""
+        archivo = self.info['archivo']
+        if self.info['sin_seguimiento']:
+            return [('archivo', archivo)]
+        fuentes = []
+        if self.info['preparado']:
+            fuentes.append(('git', ["diff", "--cached", "--", archivo]))
+        fuentes.append(('git', ["diff", "--", archivo]))
+        return fuentes
+    
+    def _abrir_siguiente_fuente(self):
+        self.cerrar_fuente_actual()
+        if not self._fuentes:
+            return False
+        tipo, valor = self._fuentes.pop(0)
+        if tipo == 'archivo':
+            try:
+                self._archivo = open(os.path.join(self.cwd or os.getcwd(), valor), 'r',
+                                     encoding='utf-8', errors='replace')
+                self._prefijo = '+'
+            except OSError:
+                return self._abrir_siguiente_fuente()
+        else:
+            try:
+                self._proceso = subprocess.Popen(
+                    ["git"] + valor,
+                    cwd=self.cwd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    startupinfo=STARTUPINFO,
+                    creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+                )
+            except OSError:
+                return self._abrir_siguiente_fuente()
+            self._archivo = io.TextIOWrapper(self._proceso.stdout, encoding='utf-8', errors='replace')
+            self._prefijo = ''
+        return True
+    
+    def _siguiente_linea(self):
+        while True:
+            if self._archivo is None and not self._abrir_siguiente_fuente():
+                self.terminado = True
+                return None
+            linea = self._archivo.readline()
+            if linea:
+                return self._prefijo + linea.rstrip('\n')
+            self.cerrar_fuente_actual()
+    
+    def siguiente_pagina(self):
+        """Devuelve la siguiente página de líneas (lista vacía si ya no hay más)"""
+        pagina = []
+        while len(pagina) < self.lineas_por_pagina:
+            linea = self._siguiente_linea()
+            if linea is None:
+                break
+            pagina.append(linea)
+        return pagina
+    
+    def cerrar_fuente_actual(self):
+        if self._archivo is not None:
+            try:
+                self._archivo.close()
+            except OSError:
+                pass
+            self._archivo = None
+        if self._proceso is not None:
+            if self._proceso.poll() is None:
+                self._proceso.kill()
+            self._proceso.wait()
+            self._proceso = None
+    
+    def cerrar(self):
+        """Libera el proceso o archivo abierto"""
+        self.cerrar_fuente_actual()
+        self._fuentes = []
+
+
+class CacheDiffs:
+    """Caché de páginas de diff por par de blobs: reabrir un archivo no vuelve a llamar a git"""
+    
+    def __init__(self, max_entradas=256):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+    
+    def obtener(self, clave):
+        entrada = self._entradas.get(clave)
+        if entrada is not None:
+            self._entradas.move_to_end(clave)
+        return entrada
+    
+    def crear(self, clave):
+        entrada = {'lineas': [], 'completo': False}
+        self._entradas[clave] = entrada
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+        return entrada
+
+
+CACHE_DIFFS = CacheDiffs()
+
+
 class GitAutomationGUI:
     def __init__(self, root):
         self.root = root
@@ -220,20 +625,118 @@ class GitAutomationGUI:
         self.directorio_actual = os.getcwd()
         self.ruta_proyecto_usuario = None
         
+        # Cola de operaciones git (tiempos límite, cancelación, una a la vez por repositorio)
+        self.gestor_trabajos = GestorTrabajos()
+        # Prioridad baja y límite de procesos para lo que corre en segundo plano (ver git_recursos.py)
+        POLITICA.configurar(cargar_configuracion().get('recursos'))
+        self._refresco_trabajos = None
+        
+        # Pushes pendientes por falta de conexión (se arranca tras el primer pintado)
+        self.cola_push = ColaPush(
+            self.gestor_trabajos,
+            lambda: list(cargar_proyectos().keys()),
+            al_subir=lambda repo, rama, exito, detalle: self.root.after(
+                0, lambda: self.push_pendiente_terminado(repo, rama, exito, detalle))
+        )
+        self.prefetch = None
+        self.servicio = None
+        # Bloqueos abandonados por los que ya se preguntó (no se insiste en cada consulta)
+        self.locks_preguntados = set()
+        self.gestor_trabajos.suscribir(lambda t: self.root.after(0, lambda: self.trabajo_actualizado(t)))
+        
+        # Primero se pinta la ventana; el registro de proyectos, git status y los
+        # servicios en segundo plano se cargan después (ver git_arranque.py)
         self.crear_interfaz()
+        self.log("⏳ Cargando proyecto...", "info")
+        # La fase 'ventana' se anota cuando la ventana ya está en pantalla (ver ventana_mostrada)
+        self.fases_pendientes = []
+        self.ventana_vista = False
+        self.root.bind("<Map>", self.ventana_mostrada, add="+")
+        if cargar_configuracion().get('arranque', {}).get('asincrono', True):
+            self.root.after(0, self.cargar_estado_inicial)
+        else:
+            self.estado_inicial_cargado(obtener_ultimo_proyecto())
+    
+    def cargar_estado_inicial(self):
+        """Lee el registro de proyectos en un hilo (comprueba cada ruta en disco)"""
+        def cargar():
+            ultimo_proyecto = obtener_ultimo_proyecto()
+            self.root.after(0, lambda: self.estado_inicial_cargado(ultimo_proyecto))
         
-        # Intentar cargar último proyecto usado
-        ultimo_proyecto = obtener_ultimo_proyecto()
+        threading.Thread(target=cargar, daemon=True).start()
+    
+    def estado_inicial_cargado(self, ultimo_proyecto):
+        """Muestra el último proyecto usado (o pide uno) y arranca lo que corre en segundo plano"""
+        self.iniciar_servicios_fondo()
         if ultimo_proyecto:
             self.ruta_proyecto_usuario = ultimo_proyecto['ruta']
             self.ruta_proyecto.set(ultimo_proyecto['ruta'])
             if ultimo_proyecto.get('url_remoto'):
                 self.url_remoto.set(ultimo_proyecto['url_remoto'])
             self.log(f"✓ Proyecto cargado: {ultimo_proyecto['ruta']}", "success")
-            self.mostrar_interfaz_principal()
+            self.mostrar_interfaz_principal(al_cargar_estado=lambda: self.marcar_arranque('estado'))
+            self.marcar_arranque('interactivo')
         else:
             # Si no hay proyecto guardado, pedir selección
             self.seleccionar_carpeta_proyecto_inicio()
+            self.marcar_arranque('interactivo')
+            self.marcar_arranque('estado')
+    
+    def ventana_mostrada(self, event):
+        """Primer <Map> de la ventana: se anota 'ventana' cuando Tk termina de dibujarla"""
+        # Sin unbind: antes de Python 3.13, unbind("<Map>", funcid) quita todos
+        # los <Map> de la ventana, no solo este
+        if event.widget is not self.root or self.ventana_vista:
+            return
+        self.ventana_vista = True
+        
+        def pintada():
+            ARRANQUE.marcar('ventana')
+            # Lo que se cargó antes de verse la ventana cuenta desde que se ve
+            for fase in self.fases_pendientes:
+                self.marcar_arranque(fase)
+            self.fases_pendientes = []
+        
+        self.root.after_idle(pintada)
+    
+    def marcar_arranque(self, fase):
+        if ARRANQUE.segundos('ventana') is None:
+            self.fases_pendientes.append(fase)
+            return
+        ARRANQUE.marcar(fase)
+        if ARRANQUE.destino and ARRANQUE.completo():
+            # Medición con git_arranque.py: se guardan los tiempos y se cierra la aplicación
+            ARRANQUE.guardar()
+            self.root.after(100, self.root.destroy)
+    
+    def iniciar_servicios_fondo(self):
+        """Cola sin conexión, prefetch, exportación de métricas y servicio residente (tras el primer pintado)"""
+        config = cargar_configuracion()
+        
+        # Pushes pendientes por falta de conexión: se suben solos cuando vuelve la red
+        self.cola_push.iniciar()
+        
+        # Prefetch periódico de las ramas remotas: el fetch antes de cada push es casi gratis
+        config_sincronizacion = config.get('sincronizacion', {})
+        if config_sincronizacion.get('prefetch', True) and self.prefetch is None:
+            self.prefetch = git_sincronizacion.PrefetchPeriodico(
+                self.gestor_trabajos,
+                lambda: list(cargar_proyectos().keys()),
+                intervalo=int(config_sincronizacion.get('intervalo_minutos', 15)) * 60
+            )
+            self.prefetch.iniciar()
+        
+        # Exportación automática de métricas (si está configurada en git_config.json)
+        config_metricas = config.get('metricas', {})
+        METRICAS.configurar_exportacion(config_metricas.get('textfile'), config_metricas.get('json'))
+        
+        # Diagnóstico de memoria (opcional, ver git_diagnostico.py)
+        if MONITOR.configurar(config.get('diagnostico')):
+            MONITOR.iniciar(self.root)
+        
+        # Servicio residente (opcional): consultas con el motor ya caliente
+        if config.get('servicio', {}).get('activo'):
+            threading.Thread(target=self.conectar_servicio, daemon=True).start()
     
     def crear_interfaz(self):
         """Crea la interfaz"""
@@ -260,12 +763,235 @@ class GitAutomationGUI:
             fg="#4caf50",
             state=DISABLED
         )
-        self.output.pack(fill=BOTH, expand=True, pady=(0, 15))
+        self.output.pack(fill=BOTH, expand=True, pady=(0, 5))
+        
+        # Barra de estado de trabajos en segundo plano
+        self.trabajos_frame = Frame(main_frame)
+        self.trabajos_frame.pack(fill=X, pady=(0, 10))
+        
+        self.estado_trabajos = Label(
+            self.trabajos_frame,
+            text="",
+            font=("Arial", 9),
+            fg="#666",
+            anchor=W
+        )
+        self.estado_trabajos.pack(side=LEFT, fill=X, expand=True)
+        
+        self.btn_cancelar_trabajo = Button(
+            self.trabajos_frame,
+            text="⏹ Cancelar operación",
+            command=self.cancelar_trabajos,
+            bg="#f44336",
+            fg="white",
+            font=("Arial", 9, "bold"),
+            padx=10,
+            cursor="hand2"
+        )
         
         # Frame de botones
         self.btn_frame = ttk.Frame(main_frame)
         self.btn_frame.pack()
     
+    def trabajo_actualizado(self, trabajo):
+        """Refleja en la interfaz el estado de los trabajos (se llama en el hilo de Tk)"""
+        if trabajo.estado == CANCELADO:
+            self.log(f"   ⏹ Operación cancelada: {trabajo.descripcion}", "warning")
+        elif trabajo.estado == TIEMPO_AGOTADO:
+            self.log(f"   ⏱ Tiempo agotado: {trabajo.descripcion}", "error")
+        
+        activos = self.gestor_trabajos.activos()
+        if activos:
+            ejecutando = [t for t in activos if t.estado == EJECUTANDO]
+            en_cola = [t for t in activos if t.estado == EN_COLA]
+            partes = []
+            if ejecutando:
+                partes.append(f"⏳ {ejecutando[0].descripcion} ({int(ejecutando[0].duracion())} s)")
+            if en_cola:
+                partes.append(f"{len(en_cola)} en cola")
+            self.estado_trabajos.config(text=" · ".join(partes))
+            self.btn_cancelar_trabajo.pack(side=RIGHT)
+            # Refrescar el contador de segundos mientras haya trabajo en curso
+            if ejecutando and not self._refresco_trabajos:
+                def refrescar():
+                    self._refresco_trabajos = None
+                    if ejecutando[0].estado == EJECUTANDO:
+                        self.trabajo_actualizado(ejecutando[0])
+                self._refresco_trabajos = self.root.after(1000, refrescar)
+        else:
+            self.estado_trabajos.config(text="")
+            self.btn_cancelar_trabajo.pack_forget()
+    
+    def push_pendiente_terminado(self, repo, rama, exito, detalle):
+        """Informa del resultado de un push que estaba en la cola sin conexión"""
+        if exito:
+            self.log(f"\n☁️ Pendientes subidos: {os.path.basename(repo)} ({rama})", "success")
+            guardar_operacion("Push pendiente realizado", f"Rama: {rama}, Proyecto: {repo}")
+        elif not es_error_de_red(detalle):
+            self.log(f"\n✗ No se pudieron subir los pendientes de {os.path.basename(repo)} ({rama})", "error")
+            self.log(f"   Detalles: {detalle[:400]}", "error")
+    
+    def encolar_sin_conexion(self, ruta_repo, rama, detalle):
+        """Deja la rama en la cola de salida en lugar de mostrar un error largo"""
+        registrar_pendiente(ruta_repo, rama, motivo=detalle)
+        guardar_operacion("Push en cola (sin conexión)", f"Rama: {rama}")
+        self.log("   📴 Sin conexión: los commits quedaron en cola", "warning")
+        self.log("   💡 Se subirán automáticamente cuando vuelva la conexión", "info")
+    
+    def subir_en_tramos(self, ruta_repo, rama, forzar=False):
+        """Push por partes si el historial pendiente es grande (o si hay uno a medias)
+
+        Devuelve (exito, salida, error), o None si no hace falta partir el push.
+        Se llama desde el hilo del trabajo.
+        """
+        config = cargar_configuracion().get('push_por_partes', {})
+        limite = int(config.get('limite_mb', LIMITE_TRAMO // (1024 * 1024))) * 1024 * 1024
+        max_commits = int(config.get('max_commits', MAX_COMMITS_TRAMO))
+        if forzar:
+            if len(commits_sin_subir(ruta_repo, rama)) < 2:
+                return None
+        elif not conviene_por_partes(ruta_repo, rama, limite_bytes=limite, max_commits=max_commits):
+            return None
+        from git_directorios_pesados import formatear_bytes
+        self.root.after(0, lambda: self.log("   📦 Historial grande: subiendo por partes...", "info"))
+        
+        def al_avanzar(subidos, total, bytes_tramo):
+            self.root.after(0, lambda: self.log(
+                f"   ✓ Tramo aceptado: {subidos}/{total} commit(s) ({formatear_bytes(bytes_tramo)})", "success"))
+        
+        return subir_por_partes(ruta_repo, rama, limite_bytes=limite, max_commits=max_commits,
+                                al_avanzar=al_avanzar)
+    
+    def subir_sincronizado(self, ruta_repo, rama):
+        """fetch → rebase/merge → push de la rama (se llama desde el hilo del trabajo)
+
+        Devuelve (exito, salida, error, integracion); ver git_sincronizacion.integrar.
+        """
+        modo = cargar_configuracion().get('sincronizacion', {}).get('modo', 'rebase')
+        espejos = git_remotos.espejos(git_remotos.remotos_del_proyecto(obtener_datos_proyecto(ruta_repo)))
+        
+        def empujar():
+            por_partes = self.subir_en_tramos(ruta_repo, rama)
+            if por_partes:
+                return por_partes
+            exito, salida, error = ejecutar_comando(f"git push --progress origin {rama} 2>&1", cwd=ruta_repo)
+            salida = limpiar_progreso(salida)
+            # Demasiado grande para el servidor: reintentar por partes (los errores de
+            # red no: se quedan en la cola sin conexión)
+            detalle = error or salida
+            if not exito and not es_error_de_red(detalle) and es_error_de_tamano(detalle):
+                por_partes = self.subir_en_tramos(ruta_repo, rama, forzar=True)
+                if por_partes:
+                    return por_partes
+            return exito, salida, error
+        
+        self.root.after(0, lambda: self.log(f"   🔄 Sincronizando con origin/{rama} ({modo})...", "info"))
+        inicio = time.perf_counter()
+        exito, salida, error, integracion = git_sincronizacion.sincronizar(ruta_repo, rama, empujar, modo=modo)
+        if espejos and exito:
+            # Solo cuando el principal aceptó el push: la integración (rebase o merge, quizá
+            # repetida tras un rechazo) ya no cambia la rama y los espejos reciben ese mismo commit
+            principal = {'nombre': "origin", 'rol': git_remotos.ROL_PRINCIPAL, 'exito': exito,
+                         'segundos': round(time.perf_counter() - inicio, 2), 'error': ""}
+            envio = git_remotos.subir_a_espejos(
+                ruta_repo, rama, espejos,
+                al_terminar=lambda r: self.root.after(0, lambda: self.log(
+                    f"   🪞 {git_remotos.resumen([r])[0]}", "success" if r['exito'] else "warning")))
+            threading.Thread(target=self.informar_remotos, args=(principal, envio), daemon=True).start()
+        elif espejos:
+            self.root.after(0, lambda: self.log(
+                f"   🪞 No se subió a {len(espejos)} espejo(s): falló el push a origin", "warning"))
+        nivel = "error" if integracion['accion'] in ('conflicto', 'error') else "info"
+        self.root.after(0, lambda: self.log(f"   {git_sincronizacion.describir(integracion, rama)}", nivel))
+        for archivo in integracion['conflictos'][:20]:
+            self.root.after(0, lambda a=archivo: self.log(f"      ⚔ {a}", "error"))
+        return exito, salida, error, integracion
+    
+    def informar_remotos(self, principal, envio):
+        """Cuando terminan los espejos, muestra juntos los resultados de todos los remotos"""
+        pendientes = envio.esperar()
+        lineas = git_remotos.resumen([principal] + envio.lista(), pendientes)
+        
+        def mostrar():
+            self.log("   📡 Resultado por remoto:", "info")
+            for linea in lineas:
+                self.log(f"      {linea}", "error" if linea.startswith("✗") else "info")
+        
+        self.root.after(0, mostrar)
+    
+    def mostrar_conflicto_sincronizacion(self, rama, integracion):
+        """Explica un conflicto con la rama remota (la integración ya se deshizo)"""
+        archivos = integracion['conflictos']
+        lista = "\n".join(f"• {a}" for a in archivos[:15])
+        if len(archivos) > 15:
+            lista += f"\n… y {len(archivos) - 15} más"
+        messagebox.showerror(
+            "Conflicto con GitHub",
+            f"Alguien subió cambios a '{rama}' que chocan con los tuyos en:\n\n{lista}\n\n"
+            "No se subió nada y tu proyecto quedó como estaba (tu commit sigue guardado).\n"
+            f"Resuelve el conflicto con 'git pull --rebase origin {rama}' y vuelve a intentarlo."
+        )
+    
+    def conectar_servicio(self):
+        """Se conecta al servicio local (arrancándolo si hace falta); corre en un hilo"""
+        import git_servicio
+        try:
+            # Con tiempo límite: un servicio colgado no debe dejar la interfaz esperando
+            self.servicio = git_servicio.asegurar_servicio(timeout=git_servicio.TIMEOUT_INTERFAZ)
+        except Exception:
+            self.servicio = None
+    
+    def estado_desde_servicio(self, ruta):
+        """Estado del repositorio pedido al servicio (None si no hay servicio, tarda o falla: se usa git)"""
+        servicio = self.servicio
+        if servicio is None:
+            return None
+        import git_servicio
+        try:
+            return servicio.llamar('estado', ruta=ruta)
+        except (git_servicio.ErrorServicio, OSError, ValueError):
+            servicio.cerrar()
+            self.servicio = None
+            return None
+    
+    def guardar_submodulos(self, ruta_repo, mensaje):
+        """Commit de los submódulos con cambios antes del commit del proyecto principal"""
+        import git_submodulos
+        modulos = git_submodulos.descubrir(ruta_repo)
+        if not modulos:
+            return True
+        self.log(f"   🧩 {len(modulos)} submódulo(s): guardando sus cambios primero...", "info")
+        resultados = git_submodulos.hacer_commits(ruta_repo, mensaje, modulos=modulos)
+        for linea in git_submodulos.resumen(resultados):
+            self.log(f"      {linea}", "error" if linea.startswith("✗") else "info")
+        if any(r['error'] for r in resultados):
+            self.log("   ✗ No se guardó el proyecto: falló un submódulo", "error")
+            return False
+        return True
+    
+    def subir_submodulos(self, ruta_repo):
+        """Push de los submódulos antes del proyecto principal (se llama desde el hilo del trabajo)
+
+        Devuelve el texto del error si algún submódulo no se pudo subir, None si todo fue bien.
+        """
+        import git_submodulos
+        modulos = git_submodulos.descubrir(ruta_repo)
+        if not modulos:
+            return None
+        self.root.after(0, lambda: self.log(f"   🧩 Subiendo {len(modulos)} submódulo(s) primero...", "info"))
+        resultados = git_submodulos.subir(ruta_repo, modulos=modulos)
+        for linea in git_submodulos.resumen(resultados):
+            self.root.after(0, lambda l=linea: self.log(f"      {l}", "error" if l.startswith("✗") else "info"))
+        errores = [f"{r['relativa']}: {r['error']}" for r in resultados if r['error']]
+        return "\n".join(errores) or None
+    
+    def cancelar_trabajos(self):
+        """Cancela las operaciones en curso del proyecto actual (mata el proceso git)"""
+        repo = self.ruta_proyecto_usuario or os.getcwd()
+        if self.gestor_trabajos.cancelar_repo(repo) == 0:
+            for trabajo in self.gestor_trabajos.activos():
+                self.gestor_trabajos.cancelar(trabajo.id)
+    
     def log(self, mensaje, tipo="info"):
         """Agrega mensaje"""
         self.output.config(state=NORMAL)
@@ -380,6 +1106,18 @@ class GitAutomationGUI:
         )
         btn_seleccionar.pack(side=LEFT)
         
+        Button(
+            ruta_frame,
+            text="🔎 Buscar repositorios...",
+            command=self.buscar_repositorios,
+            bg="#607d8b",
+            fg="white",
+            font=("Arial", 10),
+            padx=10,
+            pady=8,
+            cursor="hand2"
+        ).pack(side=LEFT, padx=(5, 0))
+        
         # Botón para continuar (siempre visible)
         btn_continuar = Button(
             self.btn_frame,
@@ -494,6 +1232,66 @@ class GitAutomationGUI:
             self.ruta_proyecto.set(carpeta)
             self.log(f"✓ Carpeta seleccionada: {carpeta}", "success")
     
+    def buscar_repositorios(self):
+        """Busca todos los repositorios git dentro de una carpeta y los registra de una vez"""
+        raiz = filedialog.askdirectory(
+            title="Carpeta donde buscar repositorios (p. ej. la que tiene todos tus proyectos)",
+            initialdir=os.path.expanduser("~")
+        )
+        if not raiz:
+            return
+        if not os.path.isdir(raiz):
+            messagebox.showerror("Error", "La ruta seleccionada no es una carpeta válida")
+            return
+        
+        from git_descubrimiento import buscar_repositorios, PROFUNDIDAD_MAXIMA, LIMITE_SEGUNDOS
+        config = cargar_configuracion().get('descubrimiento', {})
+        self.log(f"\n🔎 Buscando repositorios en {raiz}...", "info")
+        self.root.update()
+        
+        def buscar():
+            resultado = buscar_repositorios(
+                raiz,
+                profundidad_maxima=int(config.get('profundidad', PROFUNDIDAD_MAXIMA)),
+                limite_segundos=float(config.get('segundos', LIMITE_SEGUNDOS)),
+                incluir_ocultas=bool(config.get('ocultas', False))
+            )
+            self.root.after(0, lambda: self.repositorios_encontrados(raiz, resultado))
+        
+        threading.Thread(target=buscar, daemon=True).start()
+    
+    def repositorios_encontrados(self, raiz, resultado):
+        """Muestra lo encontrado y lo registra en el historial de proyectos"""
+        repositorios = resultado['repositorios']
+        self.log(f"   {len(repositorios)} repositorio(s) en {resultado['segundos']} s "
+                 f"({resultado['carpetas']} carpeta(s) revisadas, {resultado['saltadas']} saltada(s))", "info")
+        if not resultado['completo']:
+            self.log("   ⚠ Búsqueda incompleta (límite de tiempo o de profundidad): "
+                     "elige una carpeta más concreta si falta alguno", "warning")
+        if not repositorios:
+            messagebox.showinfo("Info", f"No se encontraron repositorios git en:\n{raiz}")
+            return
+        
+        registrados = cargar_proyectos()
+        nuevos = [r for r in repositorios if os.path.normpath(r['ruta']) not in registrados]
+        for repo in nuevos[:20]:
+            self.log(f"   📁 {repo['ruta']}" + (f"  ({repo['url']})" if repo['url'] else ""), "info")
+        if len(nuevos) > 20:
+            self.log(f"   ... y {len(nuevos) - 20} más", "info")
+        if not nuevos:
+            self.log("   ✓ Todos ya estaban registrados", "success")
+            return
+        
+        if not messagebox.askyesno(
+            "¿Registrar proyectos?",
+            f"Se encontraron {len(repositorios)} repositorio(s), {len(nuevos)} sin registrar.\n\n"
+            f"¿Agregarlos a tus proyectos guardados?"
+        ):
+            return
+        agregados = guardar_proyectos_en_lote(repositorios)
+        self.log(f"✓ {agregados} proyecto(s) agregados a tus proyectos guardados", "success")
+        guardar_operacion("Repositorios encontrados y registrados", f"{agregados} en {raiz}")
+    
     def seleccionar_proyecto_guardado(self, ruta):
         """Selecciona un proyecto del historial"""
         # Validación de seguridad
@@ -600,8 +1398,10 @@ class GitAutomationGUI:
             'ruta_proyecto': ruta
         })
         
-        # Guardar proyecto en historial
+        # Guardar proyecto en historial (con sus espejos, si ya tenía)
         guardar_proyecto(ruta, url)
+        remotos = git_remotos.con_principal(git_remotos.remotos_del_proyecto(obtener_datos_proyecto(ruta)), url)
+        actualizar_datos_proyecto(ruta, remotos=remotos)
         
         self.log("\n" + "="*60, "success")
         self.log("✅ ¡CONFIGURACIÓN COMPLETADA!", "success")
@@ -617,37 +1417,99 @@ class GitAutomationGUI:
         # Mostrar interfaz principal
         self.mostrar_interfaz_principal()
     
-    def consultar_estado_git(self):
-        """Consulta el estado de Git para ver qué hay configurado"""
+    def consultar_estado_git(self, al_terminar=None):
+        """Consulta el estado de Git en segundo plano y lo muestra al terminar (la ventana sigue respondiendo)"""
         ruta = self.ruta_proyecto_usuario or os.getcwd()
         
+        def consultar():
+            try:
+                lineas = self.lineas_estado_git(ruta)
+            except Exception as e:
+                lineas = [(f"No se pudo consultar Git: {e}", "warning")]
+            
+            def mostrar():
+                for texto, tipo in lineas:
+                    self.log(texto, tipo)
+                self.ofrecer_quitar_locks(ruta)
+                if al_terminar:
+                    al_terminar()
+            
+            self.root.after(0, mostrar)
+        
+        threading.Thread(target=consultar, daemon=True).start()
+    
+    def ofrecer_quitar_locks(self, ruta):
+        """Pregunta antes de borrar cada .lock abandonado: un git lento puede seguir usándolo"""
+        if not os.path.exists(os.path.join(ruta, ".git")):
+            return
+        for ruta_lock in locks_obsoletos(directorio_git(ruta)):
+            if ruta_lock in self.locks_preguntados:
+                continue
+            self.locks_preguntados.add(ruta_lock)
+            if not messagebox.askyesno(
+                    "Bloqueo abandonado",
+                    f"{os.path.basename(ruta_lock)} lleva más de {EDAD_LOCK_OBSOLETO // 60} minutos sin cambiar.\n\n"
+                    "Si no hay otro programa usando git en este repositorio (IDE, terminal, "
+                    "un rebase a medias) se puede quitar.\n\n¿Quitarlo ahora?"):
+                continue
+            if eliminar_lock(ruta_lock):
+                self.log(f"🔓 Bloqueo quitado: {os.path.basename(ruta_lock)}", "success")
+            else:
+                self.log(f"⚠ No se quitó {os.path.basename(ruta_lock)} (ya no existe o volvió a usarse)", "warning")
+    
+    def lineas_estado_git(self, ruta):
+        """Qué hay configurado en el repositorio: lista de (texto, tipo) para el registro"""
+        lineas = []
+        
         # Verificar si es un repositorio Git
         if os.path.exists(os.path.join(ruta, ".git")):
-            self.log("✓ Repositorio Git detectado", "success")
+            lineas.append(("✓ Repositorio Git detectado", "success"))
             
-            # Consultar remoto
-            exito, remotos, _ = ejecutar_comando("git remote -v")
-            if exito and remotos.strip():
-                self.log(f"✓ Remoto configurado: {remotos.split()[1] if remotos else 'N/A'}", "success")
+            estado = self.estado_desde_servicio(ruta)
+            if estado is not None:
+                # Respuesta del servicio residente: remoto, rama y cambios en una sola consulta
+                if estado['remoto']:
+                    lineas.append((f"✓ Remoto configurado: {estado['remoto']}", "success"))
+                else:
+                    lineas.append(("⚠ No hay remoto configurado", "warning"))
+                lineas.append((f"✓ Rama actual: {estado['rama']}", "success"))
+                if estado['cambios']:
+                    lineas.append((f"ℹ {estado['cambios']} archivo(s) con cambios pendientes", "info"))
+                else:
+                    lineas.append(("ℹ No hay cambios pendientes", "info"))
             else:
-                self.log("⚠ No hay remoto configurado", "warning")
+                # Consultar remoto
+                exito, remotos, _ = ejecutar_comando("git remote -v", cwd=ruta)
+                if exito and remotos.strip():
+                    lineas.append((f"✓ Remoto configurado: {remotos.split()[1] if remotos else 'N/A'}", "success"))
+                else:
+                    lineas.append(("⚠ No hay remoto configurado", "warning"))
+                
+                # Consultar rama actual
+                exito, rama, _ = ejecutar_comando("git branch --show-current", cwd=ruta)
+                if exito and rama.strip():
+                    lineas.append((f"✓ Rama actual: {rama.strip()}", "success"))
+                
+                # Consultar cambios pendientes: se lee el índice directamente y git
+                # solo confirma los archivos que probablemente cambiaron
+                num_cambios = contar_cambios_rapido(ruta)
+                if num_cambios:
+                    lineas.append((f"ℹ {num_cambios} archivo(s) con cambios pendientes", "info"))
+                else:
+                    lineas.append(("ℹ No hay cambios pendientes", "info"))
             
-            # Consultar rama actual
-            exito, rama, _ = ejecutar_comando("git branch --show-current")
-            if exito and rama.strip():
-                self.log(f"✓ Rama actual: {rama.strip()}", "success")
+            # Avisar de bloqueos abandonados por un git que terminó a medias
+            for ruta_lock in locks_obsoletos(directorio_git(ruta)):
+                lineas.append((f"⚠ Bloqueo abandonado: {os.path.basename(ruta_lock)} (revisa que no haya otro git abierto)", "warning"))
             
-            # Consultar cambios pendientes
-            exito, cambios, _ = ejecutar_comando("git status --porcelain")
-            if exito and cambios.strip():
-                num_cambios = len(cambios.strip().split('\n'))
-                self.log(f"ℹ {num_cambios} archivo(s) con cambios pendientes", "info")
-            else:
-                self.log("ℹ No hay cambios pendientes", "info")
+            # Consultar pushes en cola por falta de conexión
+            for rama_pendiente, num_commits in pendientes(ruta).items():
+                lineas.append((f"📴 {num_commits} commit(s) en cola para subir a '{rama_pendiente}'", "warning"))
         else:
-            self.log("⚠ No es un repositorio Git (se inicializará automáticamente)", "warning")
+            lineas.append(("⚠ No es un repositorio Git (se inicializará automáticamente)", "warning"))
+        return lineas
     
-    def mostrar_interfaz_principal(self):
+    def mostrar_interfaz_principal(self, al_cargar_estado=None):
         """Interfaz principal simplificada"""
         # Limpiar
         for w in self.btn_frame.winfo_children():
@@ -663,8 +1525,8 @@ class GitAutomationGUI:
         else:
             self.log("⚠ Sin conexión a GitHub (puedes trabajar localmente)", "warning")
         
-        # Consultar Git para ver qué hay configurado
-        self.consultar_estado_git()
+        # Consultar Git para ver qué hay configurado (en segundo plano)
+        self.consultar_estado_git(al_cargar_estado)
         
         # Frame de información
         info_frame = Frame(self.btn_frame, bg="#e3f2fd", relief=SOLID, borderwidth=1)
@@ -714,6 +1576,781 @@ class GitAutomationGUI:
             justify=CENTER
         )
         btn_especificos.pack(pady=5)
+        
+        # Herramientas adicionales (botones pequeños)
+        self.herramientas_frame = Frame(self.btn_frame)
+        self.herramientas_frame.pack(pady=(10, 0))
+        
+        Button(
+            self.herramientas_frame,
+            text="⚡ Optimizar rendimiento",
+            command=self.mostrar_optimizador_rendimiento,
+            bg="#607d8b",
+            fg="white",
+            font=("Arial", 9),
+            padx=10,
+            pady=4,
+            cursor="hand2"
+        ).pack(side=LEFT, padx=3)
+        
+        Button(
+            self.herramientas_frame,
+            text="📊 Exportar métricas",
+            command=self.exportar_metricas,
+            bg="#607d8b",
+            fg="white",
+            font=("Arial", 9),
+            padx=10,
+            pady=4,
+            cursor="hand2"
+        ).pack(side=LEFT, padx=3)
+        
+        Button(
+            self.herramientas_frame,
+            text="🔗 Remotos",
+            command=self.mostrar_remotos,
+            bg="#607d8b",
+            fg="white",
+            font=("Arial", 9),
+            padx=10,
+            pady=4,
+            cursor="hand2"
+        ).pack(side=LEFT, padx=3)
+        
+        Button(
+            self.herramientas_frame,
+            text="📦 Bundles",
+            command=self.mostrar_bundles,
+            bg="#607d8b",
+            fg="white",
+            font=("Arial", 9),
+            padx=10,
+            pady=4,
+            cursor="hand2"
+        ).pack(side=LEFT, padx=3)
+        
+        Button(
+            self.herramientas_frame,
+            text="🌲 Checkout parcial",
+            command=self.mostrar_checkout_parcial,
+            bg="#607d8b",
+            fg="white",
+            font=("Arial", 9),
+            padx=10,
+            pady=4,
+            cursor="hand2"
+        ).pack(side=LEFT, padx=3)
+        
+        Button(
+            self.herramientas_frame,
+            text="🩺 Diagnóstico",
+            command=self.mostrar_diagnostico,
+            bg="#607d8b",
+            fg="white",
+            font=("Arial", 9),
+            padx=10,
+            pady=4,
+            cursor="hand2"
+        ).pack(side=LEFT, padx=3)
+        
+        self.limpiar_worktrees(ruta_actual)
+    
+    def limpiar_worktrees(self, ruta):
+        """Elimina en segundo plano los worktrees de la aplicación que llevan tiempo sin usarse"""
+        config = cargar_configuracion().get('worktrees', {})
+        if not config.get('activo') or not os.path.exists(os.path.join(ruta, ".git")):
+            return
+        dias = config.get('dias_sin_uso', git_worktrees.DIAS_SIN_USO)
+        
+        def podar(trabajo):
+            principal = git_worktrees.repositorio_principal(ruta)
+            git_worktrees.marcar_uso(principal, ruta)
+            for eliminado in git_worktrees.podar(principal, dias, actual=ruta):
+                self.root.after(0, lambda e=eliminado: self.log(f"🧹 Worktree sin usar eliminado: {e}", "info"))
+        
+        self.gestor_trabajos.encolar(ruta, "Limpiar worktrees", podar, prioridad=PRIORIDAD_FONDO)
+    
+    def cambiar_a_worktree(self, ruta_worktree, rama):
+        """Registra el worktree como proyecto y pasa a trabajar en esa carpeta"""
+        principal = git_worktrees.repositorio_principal(ruta_worktree)
+        datos_principal = obtener_datos_proyecto(principal)
+        guardar_proyecto(ruta_worktree, datos_principal.get('url_remoto'))
+        actualizar_datos_proyecto(ruta_worktree, worktree_de=principal, rama=rama)
+        worktrees = dict(datos_principal.get('worktrees', {}))
+        worktrees[rama] = os.path.normpath(ruta_worktree)
+        actualizar_datos_proyecto(principal, worktrees=worktrees)
+        
+        self.ruta_proyecto_usuario = ruta_worktree
+        self.ruta_proyecto.set(ruta_worktree)
+        os.chdir(ruta_worktree)
+        self.log(f"📂 Rama '{rama}' abierta en su carpeta: {ruta_worktree}", "success")
+        guardar_operacion(f"Worktree abierto: {rama}", ruta_worktree)
+    
+    def exportar_metricas(self):
+        """Exporta las métricas (Prometheus y JSON) y muestra un resumen"""
+        config_metricas = cargar_configuracion().get('metricas', {})
+        ruta_textfile = config_metricas.get('textfile') or ruta_por_defecto("git_automatizado.prom")
+        ruta_json = config_metricas.get('json') or ruta_por_defecto("git_automatizado.json")
+        try:
+            escritas = METRICAS.exportar(ruta_textfile, ruta_json)
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudieron exportar las métricas.\n\n{e}")
+            return
+        
+        self.log("\n📊 Métricas exportadas:", "success")
+        for ruta in escritas:
+            self.log(f"   {ruta}", "info")
+        for h in METRICAS.instantanea()['histogramas']:
+            etiquetas = h['etiquetas']
+            if h['nombre'] == 'operacion_segundos':
+                self.log(f"   git {etiquetas.get('operacion')} ({etiquetas.get('proyecto')}): "
+                         f"{h['cuenta']} vez/veces, media {h['media'] * 1000:.0f} ms, p95 ≤ {h['p95']} s", "info")
+            elif h['nombre'] == 'proceso_espera_segundos':
+                self.log(f"   Espera de turno ({etiquetas.get('clase')}): {h['cuenta']} proceso(s), "
+                         f"media {h['media'] * 1000:.0f} ms", "info")
+        recursos = POLITICA.resumen()
+        self.log(f"   Recursos: máx. {recursos['limite_procesos']} git a la vez, {recursos['nucleos']} núcleo(s), "
+                 f"hilos en segundo plano: {recursos['hilos_git'][FONDO] or 'los de git'}", "info")
+    
+    def mostrar_remotos(self):
+        """Remotos del proyecto: el principal (origin) y los espejos a los que también se sube"""
+        ruta_repo = self.ruta_proyecto_usuario or os.getcwd()
+        if not os.path.exists(os.path.join(ruta_repo, ".git")):
+            messagebox.showinfo("Info", "Este proyecto todavía no es un repositorio Git")
+            return
+        remotos = git_remotos.remotos_del_proyecto(obtener_datos_proyecto(ruta_repo))
+        
+        dialog = Toplevel(self.root)
+        dialog.title("🔗 Remotos")
+        dialog.geometry("560x380")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        Label(dialog, text="🔗 Remotos del proyecto", font=("Arial", 12, "bold")).pack(pady=(15, 5))
+        Label(dialog, text="Los espejos reciben cada push a la vez que el principal, sin retrasarlo.",
+              font=("Arial", 9), fg="#666").pack(pady=(0, 5))
+        
+        lista = Listbox(dialog, font=("Consolas", 9), height=8)
+        lista.pack(fill=BOTH, expand=True, padx=20, pady=5)
+        
+        def refrescar():
+            lista.delete(0, END)
+            for remoto in remotos:
+                lista.insert(END, f"{remoto['nombre']:<12} {remoto['rol']:<10} {remoto['url']}")
+        
+        def guardar():
+            errores = git_remotos.configurar(ruta_repo, remotos)
+            actualizar_datos_proyecto(ruta_repo, remotos=remotos)
+            if errores:
+                messagebox.showerror("Error", "No se pudo configurar:\n\n" + "\n".join(errores), parent=dialog)
+        
+        formulario = Frame(dialog)
+        formulario.pack(pady=5)
+        Label(formulario, text="Nombre:", font=("Arial", 9)).grid(row=0, column=0, sticky=W)
+        nombre_var = StringVar()
+        Entry(formulario, textvariable=nombre_var, width=14).grid(row=0, column=1, padx=5)
+        Label(formulario, text="URL:", font=("Arial", 9)).grid(row=0, column=2, sticky=W)
+        url_var = StringVar()
+        Entry(formulario, textvariable=url_var, width=40).grid(row=0, column=3, padx=5)
+        
+        def agregar():
+            nombre, url = nombre_var.get().strip(), url_var.get().strip()
+            if not nombre or not url or any(c.isspace() for c in nombre):
+                messagebox.showwarning("Advertencia", "Escribe un nombre (sin espacios) y la URL del espejo", parent=dialog)
+                return
+            if any(r['nombre'] == nombre for r in remotos):
+                messagebox.showwarning("Advertencia", f"Ya hay un remoto llamado '{nombre}'", parent=dialog)
+                return
+            remotos.append({'nombre': nombre, 'url': url, 'rol': git_remotos.ROL_ESPEJO})
+            guardar()
+            self.log(f"🔗 Espejo agregado: {nombre} ({url})", "success")
+            nombre_var.set("")
+            url_var.set("")
+            refrescar()
+        
+        def quitar():
+            if not lista.curselection():
+                return
+            remoto = remotos[lista.curselection()[0]]
+            if remoto['rol'] == git_remotos.ROL_PRINCIPAL:
+                messagebox.showwarning("Advertencia", "El remoto principal se cambia en la configuración inicial", parent=dialog)
+                return
+            if not messagebox.askyesno("Quitar espejo", f"¿Dejar de subir a '{remoto['nombre']}'?", parent=dialog):
+                return
+            remotos.remove(remoto)
+            git_remotos.quitar(ruta_repo, remoto['nombre'])
+            actualizar_datos_proyecto(ruta_repo, remotos=remotos)
+            self.log(f"🔗 Espejo quitado: {remoto['nombre']}", "info")
+            refrescar()
+        
+        botones = Frame(dialog)
+        botones.pack(pady=10)
+        Button(botones, text="➕ Agregar espejo", command=agregar, bg="#4CAF50", fg="white",
+               font=("Arial", 10), padx=12, pady=4, cursor="hand2").pack(side=LEFT, padx=5)
+        Button(botones, text="🗑 Quitar", command=quitar, bg="#f44336", fg="white",
+               font=("Arial", 10), padx=12, pady=4, cursor="hand2").pack(side=LEFT, padx=5)
+        Button(botones, text="Cerrar", command=dialog.destroy,
+               font=("Arial", 10), padx=12, pady=4, cursor="hand2").pack(side=LEFT, padx=5)
+        
+        refrescar()
+    
+    def mostrar_checkout_parcial(self):
+        """Perfiles de checkout parcial (sparse-checkout en modo cono) del proyecto"""
+        ruta_repo = self.ruta_proyecto_usuario or os.getcwd()
+        if not os.path.exists(os.path.join(ruta_repo, ".git")):
+            messagebox.showinfo("Info", "Este proyecto todavía no es un repositorio Git")
+            return
+        import git_checkout_parcial
+        perfiles, activo = git_checkout_parcial.perfiles_del_proyecto(obtener_datos_proyecto(ruta_repo))
+        
+        dialog = Toplevel(self.root)
+        dialog.title("🌲 Checkout parcial")
+        dialog.geometry("640x560")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        Label(dialog, text="🌲 Checkout parcial (solo algunas carpetas)", font=("Arial", 12, "bold")).pack(pady=(15, 5))
+        Label(dialog, text="git status, agregar archivos y el selector solo ven las carpetas del perfil activo.",
+              font=("Arial", 9), fg="#666").pack(pady=(0, 5))
+        estado_label = Label(dialog, text="⏳ Midiendo...", font=("Consolas", 9), fg="#1976D2", justify=LEFT)
+        estado_label.pack(pady=(0, 5))
+        
+        def mostrar_estado():
+            def medir():
+                actual = git_checkout_parcial.estado(ruta_repo)
+                medicion = git_checkout_parcial.medir(ruta_repo)
+                
+                def pintar():
+                    if not dialog.winfo_exists():
+                        return
+                    if actual['activo']:
+                        nombre = f"perfil '{activo}'" if activo else "sin perfil guardado"
+                        texto = f"Parcial ({nombre}): {', '.join(actual['carpetas']) or 'solo la raíz'}"
+                    else:
+                        texto = "Checkout completo"
+                    estado_label.config(text=f"{texto}\n📄 {medicion['archivos']} de {medicion['total']} archivo(s) "
+                                             f"en la carpeta · ⏱ git status: {medicion['status_segundos']:.3f} s")
+                
+                self.root.after(0, pintar)
+            
+            threading.Thread(target=medir, daemon=True).start()
+        
+        lista = Listbox(dialog, font=("Consolas", 9), height=6)
+        lista.pack(fill=X, padx=20, pady=5)
+        
+        def refrescar():
+            lista.delete(0, END)
+            for nombre, carpetas in perfiles.items():
+                marca = "▶" if nombre == activo else " "
+                lista.insert(END, f"{marca} {nombre:<16} {', '.join(carpetas)}")
+        
+        formulario = Frame(dialog)
+        formulario.pack(fill=BOTH, expand=True, padx=20, pady=5)
+        Label(formulario, text="Nombre:", font=("Arial", 9)).grid(row=0, column=0, sticky=W)
+        nombre_var = StringVar()
+        Entry(formulario, textvariable=nombre_var, width=20).grid(row=0, column=1, sticky=W, padx=5)
+        Label(formulario, text="Carpetas (una por línea):", font=("Arial", 9)).grid(row=1, column=0, sticky=NW, pady=(5, 0))
+        carpetas_texto = Text(formulario, height=7, width=36, font=("Consolas", 9))
+        carpetas_texto.grid(row=1, column=1, sticky=NSEW, padx=5, pady=(5, 0))
+        Label(formulario, text="Carpetas del proyecto:", font=("Arial", 9)).grid(row=0, column=2, sticky=W)
+        disponibles = Listbox(formulario, font=("Consolas", 9), height=7, selectmode=EXTENDED)
+        disponibles.grid(row=1, column=2, sticky=NSEW, pady=(5, 0))
+        formulario.columnconfigure(1, weight=1)
+        formulario.columnconfigure(2, weight=1)
+        for carpeta in git_checkout_parcial.carpetas_disponibles(ruta_repo):
+            disponibles.insert(END, carpeta)
+        
+        def expandir(event):
+            # Doble clic: se muestran también las subcarpetas
+            seleccion = disponibles.curselection()
+            if not seleccion:
+                return
+            indice = seleccion[0]
+            base = disponibles.get(indice)
+            for desplazamiento, carpeta in enumerate(git_checkout_parcial.carpetas_disponibles(ruta_repo, base), 1):
+                if carpeta not in disponibles.get(0, END):
+                    disponibles.insert(indice + desplazamiento, carpeta)
+        
+        disponibles.bind("<Double-Button-1>", expandir)
+        
+        def anadir_elegidas():
+            actuales = carpetas_texto.get("1.0", END).strip()
+            nuevas = [disponibles.get(i) for i in disponibles.curselection()]
+            carpetas = git_checkout_parcial.normalizar_carpetas(actuales.splitlines() + nuevas)
+            carpetas_texto.delete("1.0", END)
+            carpetas_texto.insert("1.0", "\n".join(carpetas))
+        
+        Button(formulario, text="⬅ Añadir", command=anadir_elegidas, font=("Arial", 9),
+               cursor="hand2").grid(row=2, column=2, sticky=W, pady=3)
+        
+        def perfil_elegido(event=None):
+            if not lista.curselection():
+                return
+            nombre = list(perfiles)[lista.curselection()[0]]
+            nombre_var.set(nombre)
+            carpetas_texto.delete("1.0", END)
+            carpetas_texto.insert("1.0", "\n".join(perfiles[nombre]))
+        
+        lista.bind("<<ListboxSelect>>", perfil_elegido)
+        
+        def guardar_perfiles():
+            actualizar_datos_proyecto(ruta_repo, perfiles_sparse=perfiles, perfil_sparse=activo)
+        
+        def guardar():
+            nombre = nombre_var.get().strip()
+            carpetas = git_checkout_parcial.normalizar_carpetas(carpetas_texto.get("1.0", END))
+            if not nombre or not carpetas:
+                messagebox.showwarning("Advertencia", "Escribe un nombre y al menos una carpeta", parent=dialog)
+                return None
+            perfiles[nombre] = carpetas
+            guardar_perfiles()
+            self.log(f"🌲 Perfil de checkout parcial guardado: {nombre} ({', '.join(carpetas)})", "success")
+            refrescar()
+            return nombre
+        
+        def eliminar():
+            nonlocal activo
+            nombre = nombre_var.get().strip()
+            if nombre not in perfiles:
+                return
+            if not messagebox.askyesno("Eliminar perfil", f"¿Eliminar el perfil '{nombre}'?", parent=dialog):
+                return
+            del perfiles[nombre]
+            if activo == nombre:
+                # Las carpetas siguen como estaban: solo se olvida el nombre
+                activo = None
+            guardar_perfiles()
+            refrescar()
+        
+        def cambiar(nombre, carpetas):
+            # git status recorre todo el monorepo: se consulta en un hilo y se pregunta al terminar
+            estado_label.config(text="⏳ Revisando cambios pendientes...")
+            
+            def revisar():
+                fuera = git_checkout_parcial.cambios_fuera_del_cono(ruta_repo, carpetas)
+                self.root.after(0, lambda: confirmar_cambio(nombre, carpetas, fuera))
+            
+            threading.Thread(target=revisar, daemon=True).start()
+        
+        def confirmar_cambio(nombre, carpetas, fuera):
+            if not dialog.winfo_exists():
+                return
+            if fuera and not messagebox.askyesno(
+                "Cambios fuera del perfil",
+                f"{len(fuera)} archivo(s) con cambios quedan fuera de estas carpetas "
+                f"(p. ej. {fuera[0]}).\n\nSe quedarán en tu carpeta, pero conviene guardarlos antes. ¿Continuar?",
+                parent=dialog
+            ):
+                mostrar_estado()
+                return
+            descripcion = f"Checkout parcial: {nombre}" if nombre else "Checkout completo"
+            self.log(f"\n🌲 {descripcion}...", "info")
+            
+            def terminado(trabajo):
+                resultado = trabajo.resultado
+                
+                def informar():
+                    nonlocal activo
+                    if resultado is None:
+                        return
+                    for linea in git_checkout_parcial.describir_cambio(resultado):
+                        self.log(f"   {linea}", "error" if linea.startswith("✗") else "info")
+                    if resultado['exito']:
+                        activo = nombre
+                        guardar_perfiles()
+                        guardar_operacion(descripcion, ", ".join(carpetas) or "todas las carpetas")
+                        if dialog.winfo_exists():
+                            refrescar()
+                            mostrar_estado()
+                
+                self.root.after(0, informar)
+            
+            estado_label.config(text="⏳ Cambiando y midiendo...")
+            self.gestor_trabajos.encolar(
+                ruta_repo, descripcion,
+                lambda trabajo: git_checkout_parcial.cambiar(ruta_repo, carpetas),
+                prioridad=PRIORIDAD_INTERACTIVA, al_terminar=terminado
+            )
+        
+        def activar():
+            nombre = guardar()
+            if nombre:
+                cambiar(nombre, perfiles[nombre])
+        
+        botones = Frame(dialog)
+        botones.pack(pady=10)
+        Button(botones, text="💾 Guardar perfil", command=guardar, bg="#2196F3", fg="white",
+               font=("Arial", 10), padx=12, pady=4, cursor="hand2").pack(side=LEFT, padx=5)
+        Button(botones, text="▶ Activar", command=activar, bg="#4CAF50", fg="white",
+               font=("Arial", 10), padx=12, pady=4, cursor="hand2").pack(side=LEFT, padx=5)
+        Button(botones, text="🌳 Checkout completo", command=lambda: cambiar(None, []), bg="#607d8b", fg="white",
+               font=("Arial", 10), padx=12, pady=4, cursor="hand2").pack(side=LEFT, padx=5)
+        Button(botones, text="🗑 Eliminar", command=eliminar, bg="#f44336", fg="white",
+               font=("Arial", 10), padx=12, pady=4, cursor="hand2").pack(side=LEFT, padx=5)
+        Button(botones, text="Cerrar", command=dialog.destroy,
+               font=("Arial", 10), padx=12, pady=4, cursor="hand2").pack(side=LEFT, padx=5)
+        
+        refrescar()
+        mostrar_estado()
+    
+    def mostrar_diagnostico(self):
+        """Panel de diagnóstico: memoria, widgets, callbacks e hilos a lo largo de la sesión"""
+        dialog = Toplevel(self.root)
+        dialog.title("🩺 Diagnóstico")
+        dialog.geometry("760x620")
+        dialog.transient(self.root)
+        
+        Label(dialog, text="🩺 Memoria y recursos de esta sesión", font=("Arial", 13, "bold")).pack(pady=(15, 5))
+        Label(dialog, text=f"Cada muestra se guarda en {MONITOR.archivo}", font=("Arial", 9), fg="#666").pack()
+        
+        texto = scrolledtext.ScrolledText(dialog, wrap=NONE, font=("Consolas", 9), state=DISABLED)
+        texto.tag_config("titulo", font=("Consolas", 9, "bold"))
+        texto.tag_config("aviso", foreground="#e65100")
+        texto.pack(fill=BOTH, expand=True, padx=15, pady=10)
+        
+        def escribir(lineas):
+            texto.config(state=NORMAL)
+            texto.delete("1.0", END)
+            for linea, tag in lineas:
+                texto.insert(END, linea + "\n", tag)
+            texto.config(state=DISABLED)
+        
+        def megas(valor):
+            return "?" if valor is None else f"{valor / 1024 / 1024:.1f} MB"
+        
+        def refrescar(_muestra=None):
+            if not dialog.winfo_exists():
+                return
+            muestra = MONITOR.ultima()
+            if not MONITOR.activo:
+                escribir([("El diagnóstico está apagado. Actívalo para empezar a tomar muestras", ()),
+                          ("(tracemalloc hace la aplicación algo más lenta mientras está activo).", ())])
+            elif muestra is None:
+                escribir([("⏳ Tomando la primera muestra...", ())])
+            else:
+                lineas = [
+                    (f"⏱ {muestra['segundos'] / 60:.1f} min · {len(MONITOR.muestras)} muestra(s) cada {MONITOR.intervalo} s", ()),
+                    (f"🐍 Python: {megas(muestra['memoria_python'])} (pico {megas(muestra['pico_python'])}) · "
+                     f"proceso: {megas(muestra['memoria_proceso'])} · objetos: {muestra['objetos_gc']}", ()),
+                    (f"🪟 Widgets: {muestra.get('widgets', '?')} · after pendientes: {muestra.get('callbacks_after', '?')} · "
+                     f"comandos Tcl de Python: {muestra.get('comandos_python', '?')}", ()),
+                    (f"🧵 Hilos: {muestra['hilos']} (" + ", ".join(
+                        f"{nombre} {cuenta}" for nombre, cuenta in sorted(muestra['hilos_por_nombre'].items())) + ")", ()),
+                ]
+                crece_memoria = MONITOR.tendencia('memoria_python', ultimas=20)
+                crece_widgets = MONITOR.tendencia('widgets', ultimas=20)
+                aviso = "aviso" if crece_memoria > UMBRAL_POR_REPETICION or crece_widgets >= 0.5 else ()
+                lineas.append((f"📈 Últimas 20 muestras: {crece_memoria / 1024:+.1f} KB y "
+                               f"{crece_widgets:+.2f} widgets por muestra", aviso))
+                lineas.append(("", ()))
+                lineas.append(("Lo que más creció desde que se activó:", "titulo"))
+                for linea in muestra['crecimiento_desde_inicio']:
+                    lineas.append((f"   {linea['lugar']:<40} +{linea['crecimiento'] / 1024:8.1f} KB "
+                                   f"({linea['bloques']:+d} bloques)", ()))
+                lineas.append(("", ()))
+                lineas.append(("Widgets por clase:", "titulo"))
+                lineas.append(("   " + ", ".join(f"{clase} {cuenta}" for clase, cuenta in muestra.get('widgets_por_clase', {}).items()), ()))
+                lineas.append(("", ()))
+                lineas.append((f"{'min':>7} {'python':>10} {'proceso':>10} {'widgets':>8} {'after':>6} {'tcl':>6} {'hilos':>6}", "titulo"))
+                for m in list(MONITOR.muestras)[-15:]:
+                    lineas.append((f"{m['segundos'] / 60:7.1f} {megas(m['memoria_python']):>10} {megas(m['memoria_proceso']):>10} "
+                                   f"{m.get('widgets', '?'):>8} {m.get('callbacks_after', '?'):>6} "
+                                   f"{m.get('comandos_python', '?'):>6} {m['hilos']:>6}", ()))
+                escribir(lineas)
+            btn_activar.config(text="⏹ Detener" if MONITOR.activo else "▶ Activar")
+        
+        anular_suscripcion = MONITOR.suscribir(refrescar)
+        
+        def activar():
+            if MONITOR.activo:
+                MONITOR.detener()
+                self.log("🩺 Diagnóstico detenido", "info")
+            else:
+                MONITOR.configurar(cargar_configuracion().get('diagnostico'))
+                MONITOR.iniciar(self.root)
+                self.log(f"🩺 Diagnóstico activado (una muestra cada {MONITOR.intervalo} s)", "info")
+            refrescar()
+        
+        def muestra_ahora():
+            if MONITOR.activo:
+                MONITOR.muestrear()
+                refrescar()
+        
+        def exportar():
+            if not MONITOR.muestras:
+                messagebox.showinfo("Info", "Todavía no hay muestras", parent=dialog)
+                return
+            ruta = filedialog.asksaveasfilename(parent=dialog, defaultextension=".json",
+                                                initialfile="diagnostico.json", filetypes=[("JSON", "*.json")])
+            if ruta:
+                MONITOR.exportar(ruta)
+                self.log(f"🩺 Diagnóstico exportado: {ruta}", "success")
+        
+        def cerrar():
+            anular_suscripcion()
+            dialog.destroy()
+        
+        btn_frame = Frame(dialog)
+        btn_frame.pack(pady=(0, 15))
+        btn_activar = Button(btn_frame, text="▶ Activar", command=activar, bg="#2196F3", fg="white",
+                             font=("Arial", 10), padx=15, pady=6, cursor="hand2")
+        btn_activar.pack(side=LEFT, padx=5)
+        Button(btn_frame, text="📸 Muestra ahora", command=muestra_ahora, bg="#607d8b", fg="white",
+               font=("Arial", 10), padx=15, pady=6, cursor="hand2").pack(side=LEFT, padx=5)
+        Button(btn_frame, text="🔁 Prueba de fugas", command=lambda: self.prueba_fugas_dialogos(dialog),
+               bg="#607d8b", fg="white", font=("Arial", 10), padx=15, pady=6, cursor="hand2").pack(side=LEFT, padx=5)
+        Button(btn_frame, text="💾 Exportar", command=exportar, bg="#607d8b", fg="white",
+               font=("Arial", 10), padx=15, pady=6, cursor="hand2").pack(side=LEFT, padx=5)
+        Button(btn_frame, text="✗ Cerrar", command=cerrar, bg="#f44336", fg="white",
+               font=("Arial", 10), padx=15, pady=6, cursor="hand2").pack(side=LEFT, padx=5)
+        dialog.protocol("WM_DELETE_WINDOW", cerrar)
+        refrescar()
+    
+    def prueba_fugas_dialogos(self, panel=None, repeticiones=10):
+        """Abre y cierra cada diálogo varias veces y comprueba que no queda nada acumulado"""
+        def abrir_y_cerrar(abrir):
+            def cerrar_dialogo():
+                abiertos = [w for w in self.root.winfo_children() if isinstance(w, Toplevel) and w is not panel]
+                if abiertos:
+                    abiertos[-1].destroy()
+                else:
+                    self.root.after(50, cerrar_dialogo)
+            
+            self.root.after(150, cerrar_dialogo)
+            abrir()
+        
+        pruebas = [("Mensaje del commit", lambda: self.pedir_mensaje_commit())]
+        ruta = self.ruta_proyecto_usuario
+        if ruta and os.path.exists(os.path.join(ruta, ".git")):
+            os.chdir(ruta)
+            pruebas.append(("Selector de ramas", self.seleccionar_o_crear_rama))
+            # Sin cambios el selector solo muestra un aviso (que no se puede cerrar desde aquí)
+            if len(ConjuntoCambios.desde_git(ruta)):
+                pruebas.append(("Selector de archivos", self.seleccionar_archivos_especificos))
+        
+        self.log(f"\n🔁 Prueba de fugas: cada diálogo se abre y se cierra {repeticiones} veces...", "info")
+        todo_plano = True
+        for nombre, abrir in pruebas:
+            resultado = medir_repeticiones(lambda: abrir_y_cerrar(abrir), repeticiones, calentamiento=2, raiz=self.root)
+            todo_plano = todo_plano and es_plano(resultado)
+            for linea in describir(nombre, resultado):
+                self.log(f"   {linea}", "success" if linea.startswith("✓") else "warning" if linea.startswith("⚠") else "info")
+        if todo_plano:
+            self.log("✓ La memoria, los widgets y los callbacks se mantienen planos", "success")
+    
+    def mostrar_bundles(self):
+        """Exporta/importa cambios como git bundle (para enlaces lentos o sin conexión)"""
+        import git_bundles
+        ruta_repo = self.ruta_proyecto_usuario or os.getcwd()
+        if not os.path.exists(os.path.join(ruta_repo, ".git")):
+            messagebox.showinfo("Info", "Este proyecto todavía no es un repositorio Git")
+            return
+        
+        dialog = Toplevel(self.root)
+        dialog.title("📦 Bundles")
+        dialog.geometry("460x300")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        Label(dialog, text="📦 Transferir cambios sin conexión", font=("Arial", 12, "bold")).pack(pady=(15, 5))
+        Label(
+            dialog,
+            text="Exporta solo los commits que le faltan al remoto en un archivo\n"
+                 "para llevarlo a otro equipo, o aplica uno que te hayan traído.",
+            font=("Arial", 9),
+            justify=CENTER
+        ).pack(pady=(0, 10))
+        
+        def exportar():
+            salida = filedialog.asksaveasfilename(
+                parent=dialog, title="Guardar bundle", defaultextension=".bundle",
+                initialfile=f"{os.path.basename(ruta_repo)}-{datetime.now().strftime('%Y%m%d-%H%M')}.bundle",
+                filetypes=[("Git bundle", "*.bundle"), ("Todos", "*.*")]
+            )
+            if not salida:
+                return
+            dialog.destroy()
+            self.log("\n📦 Creando bundle con lo que falta en el remoto...", "info")
+            try:
+                informe = self.ejecutar_en_hilo(lambda: git_bundles.exportar(ruta_repo, salida))
+            except git_bundles.ErrorBundle as e:
+                self.log(f"✗ No se pudo crear el bundle: {e}", "error")
+                messagebox.showerror("Error", f"No se pudo crear el bundle.\n\n{e}")
+                return
+            if informe is None:
+                self.log("✓ El remoto ya tiene todos los commits: no hace falta bundle", "success")
+                return
+            self.log(f"✓ Bundle creado: {informe['bundle']}", "success")
+            for linea in git_bundles.resumen(informe):
+                self.log(f"   {linea}", "info")
+            guardar_operacion(f"Bundle exportado ({informe['commits']} commits)", ruta_repo)
+        
+        def importar():
+            bundle = filedialog.askopenfilename(
+                parent=dialog, title="Elegir bundle",
+                filetypes=[("Git bundle", "*.bundle"), ("Todos", "*.*")]
+            )
+            if not bundle:
+                return
+            dialog.destroy()
+            self.log(f"\n📥 Verificando bundle {os.path.basename(bundle)}...", "info")
+            try:
+                resultado = self.ejecutar_en_hilo(lambda: git_bundles.aplicar(ruta_repo, bundle))
+            except git_bundles.ErrorBundle as e:
+                self.log(f"✗ Bundle no válido o no aplicable:\n{e}", "error")
+                messagebox.showerror("Error", f"No se pudo aplicar el bundle.\n\n{e}")
+                return
+            self.log(f"✓ Bundle aplicado: {len(resultado['ramas'])} rama(s) en refs/remotes/bundle/", "success")
+            for ref, oid in resultado['ramas'].items():
+                self.log(f"   {oid[:10]} {ref}", "info")
+            guardar_operacion("Bundle aplicado", ruta_repo)
+        
+        def entregado():
+            bundle = filedialog.askopenfilename(
+                parent=dialog, title="Bundle ya aplicado en el otro equipo",
+                filetypes=[("Git bundle", "*.bundle"), ("Todos", "*.*")]
+            )
+            if not bundle:
+                return
+            dialog.destroy()
+            ramas = git_bundles.marcar_entregado(ruta_repo, bundle)
+            self.log(f"✓ Bundle marcado como entregado ({', '.join(ramas) or 'sin ramas'}): "
+                     "el siguiente solo llevará lo nuevo", "success")
+        
+        for texto, comando, color in (
+            ("📤 Exportar lo que falta en el remoto", exportar, "#2196F3"),
+            ("📥 Verificar y aplicar un bundle", importar, "#4CAF50"),
+            ("✔ Marcar un bundle como entregado", entregado, "#607d8b"),
+        ):
+            Button(dialog, text=texto, command=comando, bg=color, fg="white",
+                   font=("Arial", 10), width=34, pady=5, cursor="hand2").pack(pady=4)
+    
+    def ejecutar_en_hilo(self, funcion):
+        """Ejecuta funcion() en otro hilo manteniendo la ventana activa; devuelve su resultado"""
+        resultado = [None, None]
+        
+        def envoltura():
+            try:
+                resultado[0] = funcion()
+            except Exception as e:
+                resultado[1] = e
+        
+        hilo = threading.Thread(target=envoltura, daemon=True)
+        hilo.start()
+        while hilo.is_alive():
+            self.root.update()
+            hilo.join(0.05)
+        if resultado[1] is not None:
+            raise resultado[1]
+        return resultado[0]
+    
+    def mostrar_optimizador_rendimiento(self):
+        """Analiza el repositorio y permite aplicar (o revertir) ajustes de rendimiento"""
+        import git_rendimiento
+        ruta_repo = self.ruta_proyecto_usuario or os.getcwd()
+        if not os.path.exists(os.path.join(ruta_repo, ".git")):
+            messagebox.showinfo("Info", "Este proyecto todavía no es un repositorio Git")
+            return
+        
+        self.log("\n⚡ Analizando el rendimiento del repositorio...", "info")
+        info = self.ejecutar_en_hilo(lambda: git_rendimiento.inspeccionar(ruta_repo))
+        recomendaciones = git_rendimiento.recomendar(ruta_repo, info)
+        registro_previo = obtener_datos_proyecto(ruta_repo).get('ajustes_rendimiento')
+        
+        dialog = Toplevel(self.root)
+        dialog.title("⚡ Optimizar rendimiento")
+        dialog.geometry("600x520")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        Label(dialog, text="⚡ Rendimiento del repositorio", font=("Arial", 12, "bold")).pack(pady=(15, 5))
+        
+        resumen = (
+            f"Archivos rastreados: {info['archivos']}\n"
+            f"Índice: {info['tamano_indice'] // 1024} KB (versión {info['version_indice'] or '-'})\n"
+            f"Packs: {info['packs']} ({info['tamano_packs_kb'] // 1024} MB), objetos sueltos: {info['objetos_sueltos']}\n"
+            f"Commits en la rama actual: {info['commits']}\n"
+            f"Commit-graph: {'sí' if info['commit_graph'] else 'no'} · Split index: {'sí' if info['split_index'] else 'no'}"
+        )
+        Label(dialog, text=resumen, font=("Consolas", 9), justify=LEFT, anchor=W).pack(fill=X, padx=20, pady=5)
+        
+        recomendaciones_frame = ttk.LabelFrame(dialog, text="Ajustes recomendados", padding="10")
+        recomendaciones_frame.pack(fill=BOTH, expand=True, padx=20, pady=5)
+        
+        seleccion = []
+        if recomendaciones:
+            for rec in recomendaciones:
+                var = BooleanVar(value=True)
+                seleccion.append((rec, var))
+                Checkbutton(
+                    recomendaciones_frame,
+                    text=f"{rec['clave']} = {rec['valor']}\n    {rec['motivo']}",
+                    variable=var,
+                    font=("Arial", 9),
+                    anchor=W,
+                    justify=LEFT
+                ).pack(fill=X, anchor=W)
+        else:
+            Label(recomendaciones_frame, text="✓ No hay ajustes que recomendar para este tamaño de repositorio",
+                  font=("Arial", 9), fg="#2e7d32").pack(anchor=W)
+        
+        def aplicar():
+            elegidas = [rec for rec, var in seleccion if var.get()]
+            if not elegidas:
+                messagebox.showwarning("Advertencia", "Selecciona al menos un ajuste", parent=dialog)
+                return
+            dialog.destroy()
+            self.log("   ⏱ Midiendo antes de aplicar...", "info")
+            antes = self.ejecutar_en_hilo(lambda: git_rendimiento.medir(ruta_repo))
+            self.log("   🔧 Aplicando ajustes...", "info")
+            registro = self.ejecutar_en_hilo(lambda: git_rendimiento.aplicar(ruta_repo, elegidas))
+            self.log("   ⏱ Midiendo después de aplicar...", "info")
+            despues = self.ejecutar_en_hilo(lambda: git_rendimiento.medir(ruta_repo))
+            registro['medicion_antes'] = antes
+            registro['medicion_despues'] = despues
+            # Conservar los valores originales si ya se habían aplicado ajustes antes
+            if registro_previo:
+                originales = {a['clave']: a['anterior'] for a in registro_previo.get('ajustes', [])}
+                for ajuste in registro['ajustes']:
+                    if ajuste['clave'] in originales:
+                        ajuste['anterior'] = originales.pop(ajuste['clave'])
+                registro['ajustes'] = [a for a in registro_previo.get('ajustes', [])
+                                       if a['clave'] in originales] + registro['ajustes']
+                registro['version_indice_anterior'] = registro_previo.get('version_indice_anterior')
+            actualizar_datos_proyecto(ruta_repo, ajustes_rendimiento=registro)
+            for ajuste in registro['ajustes']:
+                self.log(f"   ✓ {ajuste['clave']} = {ajuste['nuevo']}", "success")
+            for error in registro['errores']:
+                self.log(f"   ✗ {error}", "error")
+            lineas = git_rendimiento.comparar(antes, despues)
+            for linea in lineas:
+                self.log(f"   📊 {linea}", "info")
+            guardar_operacion("Ajustes de rendimiento aplicados", "; ".join(lineas))
+            messagebox.showinfo("Rendimiento", "Ajustes aplicados.\n\n" + "\n".join(lineas))
+        
+        def revertir():
+            dialog.destroy()
+            errores = self.ejecutar_en_hilo(lambda: git_rendimiento.revertir(ruta_repo, registro_previo))
+            actualizar_datos_proyecto(ruta_repo, ajustes_rendimiento=None)
+            for error in errores:
+                self.log(f"   ✗ {error}", "error")
+            self.log("   ↩ Ajustes de rendimiento revertidos", "success")
+            guardar_operacion("Ajustes de rendimiento revertidos")
+        
+        btn_frame = Frame(dialog)
+        btn_frame.pack(pady=15)
+        
+        if recomendaciones:
+            Button(btn_frame, text="✓ Aplicar y medir", command=aplicar,
+                   bg="#4caf50", fg="white", font=("Arial", 10, "bold"),
+                   padx=15, pady=6, cursor="hand2").pack(side=LEFT, padx=5)
+        if registro_previo:
+            Button(btn_frame, text="↩ Revertir ajustes", command=revertir,
+                   bg="#FF9800", fg="white", font=("Arial", 10),
+                   padx=15, pady=6, cursor="hand2").pack(side=LEFT, padx=5)
+        Button(btn_frame, text="✗ Cerrar", command=dialog.destroy,
+               bg="#f44336", fg="white", font=("Arial", 10),
+               padx=15, pady=6, cursor="hand2").pack(side=LEFT, padx=5)
     
     
     def actualizar_automatico(self):
@@ -740,6 +2377,9 @@ class GitAutomationGUI:
         self.log("🚀 INICIANDO ACTUALIZACIÓN AUTOMÁTICA", "info")
         self.log("="*60, "info")
         
+        # Antes de agregar todo, revisar si hay carpetas pesadas que deberían ignorarse
+        self.revisar_carpetas_pesadas()
+        
         # PASO 1: Agregar TODOS los archivos
         self.log("\n📋 PASO 1: Agregando todos los archivos...", "info")
         self.log("   Comando: git add .", "info")
@@ -756,33 +2396,46 @@ class GitAutomationGUI:
         self.log(f"   📁 {num_archivos} archivo(s) preparado(s)", "info")
         guardar_operacion(f"Archivos agregados (todos)", f"{num_archivos} archivo(s)")
         
+        if not self.verificar_antes_de_commit():
+            return
+        
+        # Mientras el usuario responde los diálogos se adelanta el trabajo que no depende de él
+        config = cargar_configuracion()
+        especulacion = self.iniciar_especulacion(os.getcwd(), config)
+        
         # PASO 2: Commit con mensaje del usuario
         self.log("\n💾 PASO 2: Guardando cambios...", "info")
         self.log("   Necesitamos un mensaje para guardar tus cambios", "info")
         
-        mensaje = self.pedir_mensaje_commit()
+        mensaje = self.pedir_mensaje_commit(especulacion)
         if not mensaje:
             self.log("   ⚠ Guardado cancelado", "warning")
+            especulacion.descartar()
             return
         
         self.log(f"   Mensaje: {mensaje}", "info")
+        self.log_resumen_cambios(especulacion)
+        if not self.guardar_submodulos(os.getcwd(), mensaje):
+            especulacion.descartar()
+            return
         self.log("   Comando: git commit -m \"mensaje\"", "info")
         
-        exito, _, error = ejecutar_comando(f'git commit -m "{mensaje}"')
+        exito, _, error = git_operaciones.hacer_commit(os.getcwd(), mensaje)
         if exito:
             self.log("   ✓ Cambios guardados", "success")
             guardar_operacion(f"Commit realizado", f"Mensaje: {mensaje}")
         else:
             self.log(f"   ✗ Error: {error}", "error")
+            especulacion.descartar()
             return
         
         # PASO 3: Seleccionar rama y preguntar si hacer push
-        config = cargar_configuracion()
         if config.get('url_remoto'):
             # Seleccionar o crear rama
-            rama_seleccionada = self.seleccionar_o_crear_rama()
+            rama_seleccionada = self.seleccionar_o_crear_rama(especulacion.resultado('ramas'))
             if not rama_seleccionada:
                 self.log("   ⚠ Operación cancelada", "warning")
+                especulacion.descartar()
                 return
             
             self.log(f"   📍 Rama seleccionada: {rama_seleccionada}", "info")
@@ -796,34 +2449,46 @@ class GitAutomationGUI:
                 self.log("\n☁️ PASO 3: Subiendo a GitHub...", "info")
                 self.log("   ⏳ Por favor espera, esto puede tardar unos segundos...", "info")
                 self.log(f"   Comando: git push origin {rama_seleccionada}", "info")
+                self.log_especulacion_remota(especulacion)
                 self.root.update()  # Actualizar la interfaz para mostrar el mensaje
                 
-                # Ejecutar push en un hilo separado para no bloquear la interfaz
-                def hacer_push():
+                ruta_repo = self.ruta_proyecto_usuario
+                
+                # Ejecutar push como trabajo en segundo plano (con tiempo límite y cancelable)
+                def hacer_push(trabajo):
                     rama = rama_seleccionada
                     
                     self.root.after(0, lambda: self.log(f"   📍 Rama actual detectada: {rama}", "info"))
                     
                     # Verificar remoto
-                    exito_remoto, remoto_info, _ = ejecutar_comando("git remote -v")
+                    exito_remoto, remoto_info, _ = ejecutar_comando("git remote -v", cwd=ruta_repo)
                     if remoto_info:
                         url_remoto = remoto_info.split()[1] if len(remoto_info.split()) > 1 else "N/A"
                         self.root.after(0, lambda: self.log(f"   🔗 Remoto: {url_remoto}", "info"))
                     
                     # Verificar si hay commits para subir
-                    exito_log, log_info, _ = ejecutar_comando("git log origin/" + rama + "..HEAD --oneline 2>&1")
+                    exito_log, log_info, _ = ejecutar_comando("git log origin/" + rama + "..HEAD --oneline 2>&1", cwd=ruta_repo)
                     if log_info and "fatal" not in log_info.lower():
                         num_commits = len([l for l in log_info.strip().split('\n') if l.strip()])
                         self.root.after(0, lambda: self.log(f"   📦 {num_commits} commit(s) para subir", "info"))
                     else:
                         # Si no hay rama remota, verificar commits locales
-                        exito_log2, log_info2, _ = ejecutar_comando("git log --oneline -5")
+                        exito_log2, log_info2, _ = ejecutar_comando("git log --oneline -5", cwd=ruta_repo)
                         if log_info2:
                             self.root.after(0, lambda: self.log("   📦 Verificando commits locales...", "info"))
                     
                     # Intentar push con la rama actual primero
-                    self.root.after(0, lambda: self.log(f"   🔄 Intentando subir a '{rama}'...", "info"))
-                    exito, salida, error = ejecutar_comando(f"git push origin {rama} 2>&1")
+                    # Los submódulos van antes: si alguno falla no se sube el proyecto principal
+                    error_submodulos = self.subir_submodulos(ruta_repo)
+                    if error_submodulos:
+                        self.root.after(0, lambda: self.log("   ✗ No se subió el proyecto: falló un submódulo", "error"))
+                        self.root.after(0, lambda: messagebox.showerror(
+                            "Error al Subir",
+                            f"No se pudo subir un submódulo, así que el proyecto no se subió\n"
+                            f"(apuntaría a commits que nadie más puede descargar).\n\n{error_submodulos[:600]}"))
+                        return
+                    
+                    exito, salida, error, integracion = self.subir_sincronizado(ruta_repo, rama)
                     
                     # Mostrar resultado inmediatamente
                     if salida:
@@ -831,23 +2496,7 @@ class GitAutomationGUI:
                     if error and error not in salida:
                         self.root.after(0, lambda: self.log(f"   ⚠ Error: {error[:400]}", "warning"))
                     
-                    # Si falla, intentar con main
-                    if not exito and rama != "main":
-                        self.root.after(0, lambda: self.log("   ⚠ Intentando con 'main'...", "warning"))
-                        exito2, salida2, error2 = ejecutar_comando("git push origin main 2>&1")
-                        if exito2:
-                            exito, salida, error = exito2, salida2, error2
-                            if salida:
-                                self.root.after(0, lambda: self.log(f"   📤 Respuesta: {salida[:400]}", "info"))
-                    
-                    # Si aún falla, intentar con master
-                    if not exito and rama != "master":
-                        self.root.after(0, lambda: self.log("   ⚠ Intentando con 'master'...", "warning"))
-                        exito3, salida3, error3 = ejecutar_comando("git push origin master 2>&1")
-                        if exito3:
-                            exito, salida, error = exito3, salida3, error3
-                            if salida:
-                                self.root.after(0, lambda: self.log(f"   📤 Respuesta: {salida[:400]}", "info"))
+                    sin_red = not exito and es_error_de_red(error or salida)
                     
                     # Verificar resultado final
                     if exito:
@@ -857,6 +2506,10 @@ class GitAutomationGUI:
                         self.root.after(0, lambda: self.log("   💡 Recarga tu página de GitHub para ver los cambios", "info"))
                         guardar_operacion(f"Push realizado a GitHub", f"Rama: {rama}, Repositorio: {config.get('url_remoto', 'N/A')}")
                         self.root.after(0, lambda: messagebox.showinfo("Éxito", "¡Cambios subidos a GitHub correctamente!\n\nTu código ya está disponible en internet.\n\nRecarga tu página de GitHub para ver los cambios."))
+                    elif sin_red:
+                        self.root.after(0, lambda: self.encolar_sin_conexion(ruta_repo, rama, error or salida))
+                    elif integracion['accion'] == 'conflicto':
+                        self.root.after(0, lambda: self.mostrar_conflicto_sincronizacion(rama, integracion))
                     else:
                         # Mostrar error completo
                         self.root.after(0, lambda: self.log("   ✗ ✗✗✗ ERROR AL SUBIR A GITHUB ✗✗✗", "error"))
@@ -873,19 +2526,14 @@ class GitAutomationGUI:
                         self.root.after(0, lambda: self.log(f"   Detalles del error: {error[:500] if error else 'Sin detalles'}", "error"))
                         self.root.after(0, lambda: messagebox.showerror("Error al Subir", mensaje_error))
                 
-                # Iniciar el push en un hilo separado
-                thread = threading.Thread(target=hacer_push, daemon=True)
-                thread.start()
-                
-                # Actualizar la interfaz periódicamente mientras se ejecuta
-                def actualizar_interfaz():
-                    if thread.is_alive():
-                        self.root.update()
-                        self.root.after(100, actualizar_interfaz)
-                
-                actualizar_interfaz()
+                # Encolar el push: se serializa con otras operaciones del mismo repositorio
+                self.gestor_trabajos.encolar(
+                    ruta_repo, f"Subir a GitHub ({rama_seleccionada})", hacer_push,
+                    prioridad=PRIORIDAD_INTERACTIVA
+                )
             else:
                 self.log("\n⚠ Push cancelado por el usuario", "warning")
+                especulacion.descartar()
         else:
             self.log("\n⚠ No hay repositorio configurado para subir", "warning")
             self.log("   💡 Puedes configurar GitHub después si lo necesitas", "info")
@@ -894,11 +2542,143 @@ class GitAutomationGUI:
         self.log("✅ ¡COMPLETADO!", "success")
         self.log("="*60, "success")
     
-    def pedir_mensaje_commit(self):
-        """Pide el mensaje del commit"""
+    def revisar_carpetas_pesadas(self):
+        """Busca carpetas generadas (node_modules, venv, build...) y ofrece ignorarlas"""
+        from git_directorios_pesados import (
+            explorar, carpetas_a_avisar, proponer_entradas_gitignore, agregar_a_gitignore, formatear_bytes
+        )
+        ruta_repo = self.ruta_proyecto_usuario or os.getcwd()
+        resultado = [None]
+        
+        def explorar_proyecto():
+            try:
+                exploracion = explorar(ruta_repo)
+                resultado[0] = (exploracion, carpetas_a_avisar(ruta_repo, exploracion))
+            except Exception:
+                resultado[0] = None
+        
+        # Explorar en otro hilo para que la ventana siga respondiendo
+        hilo = threading.Thread(target=explorar_proyecto, daemon=True)
+        hilo.start()
+        while hilo.is_alive():
+            self.root.update()
+            hilo.join(0.05)
+        
+        if not resultado[0]:
+            return
+        exploracion, carpetas = resultado[0]
+        if not carpetas:
+            return
+        
+        self.log("\n📦 Carpetas pesadas detectadas (no están en .gitignore):", "warning")
+        lineas = []
+        for carpeta in carpetas:
+            mas = "+" if carpeta.get('acotado') else ""
+            linea = (f"{carpeta['ruta']}/ — {carpeta['tipo']}: {carpeta['archivos']}{mas} archivo(s), "
+                     f"{formatear_bytes(carpeta['bytes'])}{mas}")
+            lineas.append(linea)
+            self.log(f"   {linea}", "warning")
+        self.log(f"   ⏱ Exploración: {exploracion['segundos']:.2f} s "
+                 f"({exploracion['listadas']} carpeta(s) leídas, {exploracion['desde_cache']} desde caché, "
+                 f"{exploracion['ignoradas']} ya ignorada(s))", "info")
+        
+        entradas = proponer_entradas_gitignore(carpetas)
+        respuesta = messagebox.askyesno(
+            "Carpetas pesadas",
+            "Estas carpetas se generan automáticamente y harían lento cada 'git add' y 'git status':\n\n" +
+            "\n".join(lineas[:10]) + ("\n..." if len(lineas) > 10 else "") +
+            "\n\n¿Agregarlas a .gitignore?\n\n" + "\n".join(entradas[:10])
+        )
+        if respuesta:
+            nuevas = agregar_a_gitignore(ruta_repo, entradas)
+            self.log(f"   ✓ {len(nuevas)} entrada(s) agregada(s) a .gitignore", "success")
+            guardar_operacion("Carpetas pesadas ignoradas", ", ".join(nuevas))
+        else:
+            self.log("   ⚠ Se agregarán tal cual (puede tardar)", "warning")
+    
+    def verificar_antes_de_commit(self):
+        """Ejecuta las verificaciones configuradas sobre lo preparado; True si se puede seguir"""
+        from git_verificaciones import cargar_verificaciones, ejecutar_verificaciones, resumen_informe
+        verificaciones = cargar_verificaciones(cargar_configuracion())
+        if not verificaciones:
+            return True
+        
+        self.log("\n🔎 Verificando archivos preparados...", "info")
+        self.log(f"   Herramientas: {', '.join(v['nombre'] for v in verificaciones)}", "info")
+        
+        ruta_repo = self.ruta_proyecto_usuario or os.getcwd()
+        resultado = [None]
+        
+        def verificar():
+            try:
+                resultado[0] = ejecutar_verificaciones(ruta_repo, verificaciones)
+            except Exception as e:
+                resultado[0] = {'ok': False, 'herramientas': {}, 'tiempo_total': 0, 'error': str(e)}
+        
+        # Verificar en otro hilo para que la ventana siga respondiendo
+        hilo = threading.Thread(target=verificar, daemon=True)
+        hilo.start()
+        while hilo.is_alive():
+            self.root.update()
+            hilo.join(0.05)
+        
+        informe = resultado[0]
+        for linea in resumen_informe(informe):
+            self.log(f"   {linea}", "success" if linea.startswith("✓") else "warning")
+        self.log(f"   ⏱ Tiempo total: {informe['tiempo_total']:.2f} s", "info")
+        
+        if informe['ok']:
+            return True
+        
+        problemas = []
+        if informe.get('error'):
+            problemas.append(informe['error'])
+        for nombre, datos in informe['herramientas'].items():
+            for archivo, salida in datos['fallidos']:
+                problemas.append(f"[{nombre}] {archivo}")
+                self.log(f"   ✗ [{nombre}] {archivo}", "error")
+                if salida:
+                    self.log(f"      {salida[:400]}", "error")
+        
+        continuar = messagebox.askyesno(
+            "Verificaciones con problemas",
+            "Algunas verificaciones encontraron problemas:\n\n" + "\n".join(problemas[:10]) +
+            ("\n..." if len(problemas) > 10 else "") +
+            "\n\n¿Deseas guardar los cambios de todos modos?"
+        )
+        if not continuar:
+            self.log("   ⚠ Guardado cancelado por las verificaciones", "warning")
+        return continuar
+    
+    def iniciar_especulacion(self, ruta_repo, config):
+        """Empieza en segundo plano el resumen de cambios, el índice de ramas y el prefetch"""
+        remoto = "origin" if config.get('url_remoto') else None
+        return git_especulativo.Especulacion(self.gestor_trabajos, ruta_repo, remoto=remoto).iniciar()
+    
+    def log_resumen_cambios(self, especulacion):
+        """Muestra el diffstat si ya se calculó (no espera por él)"""
+        resumen = especulacion.resultado('resumen')
+        if not resumen or not resumen['archivos']:
+            return
+        self.log(f"   📊 {resumen['archivos']} archivo(s): +{resumen['inserciones']} −{resumen['borrados']} líneas", "info")
+        lineas = resumen['diffstat'].splitlines()
+        for linea in lineas[:-1][:10]:
+            self.log(f"      {linea.strip()}", "info")
+        if len(lineas) > 11:
+            self.log(f"      … y {len(lineas) - 11} archivo(s) más", "info")
+    
+    def log_especulacion_remota(self, especulacion):
+        """Informa del prefetch hecho mientras el usuario respondía"""
+        especulacion.usar()
+        if especulacion.listo('remoto') and especulacion.segundos('remoto') is not None:
+            self.log(f"   ⚡ El remoto ya se consultó mientras respondías "
+                     f"({especulacion.segundos('remoto')} s ahorrados)", "info")
+    
+    def pedir_mensaje_commit(self, especulacion=None):
+        """Pide el mensaje del commit (mostrando el resumen de cambios cuando esté listo)"""
         dialog = Toplevel(self.root)
         dialog.title("📝 Mensaje del Commit")
-        dialog.geometry("550x220")
+        dialog.geometry("550x250")
         dialog.resizable(False, False)
         dialog.transient(self.root)
         dialog.grab_set()
@@ -906,8 +2686,8 @@ class GitAutomationGUI:
         # Centrar ventana
         dialog.update_idletasks()
         x = (dialog.winfo_screenwidth() // 2) - (550 // 2)
-        y = (dialog.winfo_screenheight() // 2) - (220 // 2)
-        dialog.geometry(f"550x220+{x}+{y}")
+        y = (dialog.winfo_screenheight() // 2) - (250 // 2)
+        dialog.geometry(f"550x250+{x}+{y}")
         
         mensaje_var = StringVar()
         mensaje_var.set(f"Actualización - {datetime.now().strftime('%Y-%m-%d %H:%M')}")
@@ -922,6 +2702,23 @@ class GitAutomationGUI:
         entry.select_range(0, END)
         entry.focus()
         
+        # Resumen de cambios calculado en segundo plano mientras se escribe
+        resumen_label = Label(dialog, text="", font=("Consolas", 9), fg="#666")
+        resumen_label.pack()
+        
+        def mostrar_resumen():
+            if especulacion is None or not dialog.winfo_exists():
+                return
+            if not especulacion.listo('resumen'):
+                dialog.after(150, mostrar_resumen)
+                return
+            resumen = especulacion.resultado('resumen')
+            if resumen and resumen['archivos']:
+                resumen_label.config(text=f"📊 {resumen['archivos']} archivo(s): "
+                                          f"+{resumen['inserciones']} −{resumen['borrados']} líneas")
+        
+        mostrar_resumen()
+        
         resultado = [None]
         
         def aceptar():
@@ -948,14 +2745,20 @@ class GitAutomationGUI:
         dialog.wait_window()
         return resultado[0]
     
-    def seleccionar_o_crear_rama(self):
-        """Permite seleccionar una rama existente o crear una nueva"""
-        ramas = obtener_ramas()
-        rama_actual = obtener_rama_actual()
+    def seleccionar_o_crear_rama(self, indice=None):
+        """Permite seleccionar una rama existente o crear una nueva
+
+        indice: ramas ya leídas en segundo plano ({'ramas', 'actual'}), si las hay.
+        """
+        if indice and indice['actual'] in indice['ramas']:
+            ramas, rama_actual = indice['ramas'], indice['actual']
+        else:
+            ramas = obtener_ramas()
+            rama_actual = obtener_rama_actual()
         
         dialog = Toplevel(self.root)
         dialog.title("🌿 Seleccionar o Crear Rama")
-        dialog.geometry("500x400")
+        dialog.geometry("500x440")
         dialog.resizable(False, False)
         dialog.transient(self.root)
         dialog.grab_set()
@@ -963,8 +2766,8 @@ class GitAutomationGUI:
         # Centrar ventana
         dialog.update_idletasks()
         x = (dialog.winfo_screenwidth() // 2) - (500 // 2)
-        y = (dialog.winfo_screenheight() // 2) - (400 // 2)
-        dialog.geometry(f"500x400+{x}+{y}")
+        y = (dialog.winfo_screenheight() // 2) - (440 // 2)
+        dialog.geometry(f"500x440+{x}+{y}")
         
         resultado = [None]
         
@@ -1003,9 +2806,24 @@ class GitAutomationGUI:
         entry_nueva.insert(0, "nombre-de-la-rama")
         entry_nueva.bind("<FocusIn>", lambda e: entry_nueva.delete(0, END) if entry_nueva.get() == "nombre-de-la-rama" else None)
         
+        # En proyectos grandes: cada rama en su carpeta (worktree) en vez de checkout
+        usar_worktree = BooleanVar(value=cargar_configuracion().get('worktrees', {}).get('activo', False))
+        Checkbutton(dialog, text="📂 Abrir la rama en su propia carpeta (sin reescribir esta)",
+                    variable=usar_worktree, font=("Arial", 9)).pack()
+        
+        def abrir_en_worktree(rama, crear):
+            ruta, error = git_worktrees.abrir_rama(os.getcwd(), rama, crear=crear)
+            if ruta is None:
+                messagebox.showerror("Error", f"No se pudo abrir la rama en su carpeta.\n\nError: {error[:200]}")
+                return False
+            self.cambiar_a_worktree(ruta, rama)
+            return True
+        
         def usar_existente():
             if lista_ramas and lista_ramas.curselection():
                 seleccionada = lista_ramas.get(lista_ramas.curselection()[0])
+                if usar_worktree.get() and seleccionada != rama_actual and not abrir_en_worktree(seleccionada, False):
+                    return
                 resultado[0] = seleccionada
                 dialog.destroy()
             else:
@@ -1014,6 +2832,13 @@ class GitAutomationGUI:
         def crear_nueva():
             nueva_rama = nueva_rama_var.get().strip()
             if nueva_rama and nueva_rama != "nombre-de-la-rama":
+                if usar_worktree.get():
+                    # La rama nace en HEAD, en su carpeta; esta carpeta no se toca
+                    if abrir_en_worktree(nueva_rama, True):
+                        resultado[0] = nueva_rama
+                        guardar_operacion(f"Rama creada: {nueva_rama}")
+                        dialog.destroy()
+                    return
                 # Crear la rama
                 exito, _, error = ejecutar_comando(f'git checkout -b "{nueva_rama}"')
                 if exito:
@@ -1052,6 +2877,204 @@ class GitAutomationGUI:
         dialog.wait_window()
         return resultado[0] if resultado[0] else rama_actual
     
+    def seleccionar_fragmentos(self, cwd, archivo, padre=None):
+        """Elegir fragmentos (hunks) o líneas sueltas de un archivo y agregarlos al índice
+
+        Los fragmentos se leen de git por páginas a medida que se baja; se
+        dibujan en un único Text al que solo se le añaden líneas. Devuelve las
+        líneas agregadas (0 si se canceló o falló).
+        """
+        POR_PAGINA = 20
+        # Los fragmentos enormes se muestran recortados y solo se eligen enteros
+        LINEAS_MAXIMAS = 500
+        
+        dialog = Toplevel(padre or self.root)
+        dialog.title(f"✂ Fragmentos de {archivo}")
+        dialog.geometry("900x700")
+        dialog.transient(padre or self.root)
+        dialog.grab_set()
+        
+        Label(dialog, text=f"✂ Elige qué cambios de {archivo} agregar:",
+              font=("Arial", 13, "bold")).pack(pady=(15, 5))
+        Label(dialog, text="Clic en la cabecera @@: todo el fragmento · clic en una línea + o −: solo esa línea",
+              font=("Arial", 9), fg="#666").pack()
+        contador = Label(dialog, text="", font=("Arial", 10, "bold"), fg="#1976D2")
+        contador.pack(pady=(5, 0))
+        
+        texto = scrolledtext.ScrolledText(dialog, wrap=NONE, font=("Consolas", 9), bg="#1e1e1e",
+                                          fg="#dddddd", cursor="hand2", state=DISABLED)
+        texto.tag_config("cabecera", foreground="#29b6f6", background="#263238")
+        texto.tag_config("añadida", foreground="#4caf50")
+        texto.tag_config("eliminada", foreground="#f44336")
+        texto.tag_config("descartada", foreground="#757575")
+        texto.tag_config("aviso", foreground="#ffb74d")
+        texto.pack(fill=BOTH, expand=True, padx=15, pady=10)
+        
+        fragmentos = []
+        # Línea del Text (desde 1) -> (fragmento, línea del fragmento o None para la cabecera)
+        mapa_lineas = [None]
+        # Línea del Text donde está la cabecera de cada fragmento y de cada línea con cambios
+        posicion_cabecera = []
+        posicion_linea = {}
+        enteros = set()
+        lector = git_parches.LectorFragmentos(cwd, [archivo])
+        estado = {'cargando': False, 'cerrado': False}
+        
+        def visible(linea):
+            # Tk no admite los bytes sueltos que no son UTF-8
+            return linea.encode('utf-8', 'surrogateescape').decode('utf-8', 'replace')
+        
+        def marca_cabecera(k):
+            f = fragmentos[k]
+            elegidas = f.seleccionadas()
+            return "☑" if elegidas and elegidas == f.cambios() else ("◪" if elegidas else "☐")
+        
+        def tag_de(f, j):
+            if not f.seleccion[j]:
+                return "descartada"
+            return "añadida" if f.lineas[j][:1] == '+' else "eliminada"
+        
+        def actualizar_contador():
+            con_seleccion, elegidas, total = git_parches.resumen(fragmentos)
+            mas = "" if lector.terminado else " (bajando se cargan más)"
+            contador.config(text=f"{elegidas} de {total} líneas elegidas · {con_seleccion} de "
+                                 f"{len(fragmentos)} fragmentos{mas}")
+        
+        def dibujar_pagina(pagina):
+            """Añade los fragmentos al final del Text (lo ya dibujado no se toca)"""
+            texto.config(state=NORMAL)
+            for f in pagina:
+                k = len(fragmentos)
+                fragmentos.append(f)
+                entero = len(f.lineas) > LINEAS_MAXIMAS
+                if entero:
+                    enteros.add(k)
+                posicion_cabecera.append(len(mapa_lineas))
+                texto.insert(END, f"{marca_cabecera(k)} {visible(f.cabecera_texto())}\n", "cabecera")
+                mapa_lineas.append((k, None))
+                for j, linea in enumerate(f.lineas[:LINEAS_MAXIMAS]):
+                    if f.es_cambio(j):
+                        posicion_linea[(k, j)] = len(mapa_lineas)
+                        texto.insert(END, f"  {visible(linea)}\n", tag_de(f, j))
+                    else:
+                        texto.insert(END, f"  {visible(linea)}\n")
+                    mapa_lineas.append((k, j))
+                if entero:
+                    texto.insert(END, f"  … {len(f.lineas) - LINEAS_MAXIMAS} líneas más: este fragmento "
+                                      f"solo se puede elegir entero\n", "aviso")
+                    mapa_lineas.append((k, None))
+            texto.config(state=DISABLED)
+            actualizar_contador()
+        
+        def cargar_mas():
+            if estado['cargando'] or lector.terminado or estado['cerrado']:
+                return
+            estado['cargando'] = True
+            
+            def trabajo():
+                pagina = lector.siguientes(POR_PAGINA)
+                
+                def mostrar():
+                    estado['cargando'] = False
+                    if estado['cerrado']:
+                        lector.cerrar()
+                        return
+                    dibujar_pagina(pagina)
+                    if not fragmentos and lector.terminado:
+                        contador.config(text="Este archivo no tiene fragmentos que se puedan agregar")
+                    # Si todo cabe en pantalla no habrá desplazamiento que pida la siguiente página
+                    elif texto.yview()[1] > 0.9:
+                        cargar_mas()
+                
+                self.root.after(0, mostrar)
+            
+            threading.Thread(target=trabajo, daemon=True).start()
+        
+        def al_desplazar(primero, ultimo):
+            texto.vbar.set(primero, ultimo)
+            if float(ultimo) > 0.9:
+                cargar_mas()
+        
+        texto.config(yscrollcommand=al_desplazar)
+        
+        def redibujar_fragmento(k):
+            f = fragmentos[k]
+            texto.config(state=NORMAL)
+            n = posicion_cabecera[k]
+            texto.delete(f"{n}.0", f"{n}.1")
+            texto.insert(f"{n}.0", marca_cabecera(k), "cabecera")
+            for j in range(min(len(f.lineas), LINEAS_MAXIMAS)):
+                n = posicion_linea.get((k, j))
+                if n is not None:
+                    for tag in ("añadida", "eliminada", "descartada"):
+                        texto.tag_remove(tag, f"{n}.0", f"{n}.end")
+                    texto.tag_add(tag_de(f, j), f"{n}.0", f"{n}.end")
+            texto.config(state=DISABLED)
+            actualizar_contador()
+        
+        def clic(event):
+            n = int(texto.index(f"@{event.x},{event.y}").split('.')[0])
+            if n >= len(mapa_lineas) or mapa_lineas[n] is None:
+                return
+            k, j = mapa_lineas[n]
+            f = fragmentos[k]
+            if j is None or k in enteros:
+                f.seleccionar_todo(f.seleccionadas() != f.cambios())
+            elif f.es_cambio(j):
+                f.alternar(j)
+            else:
+                return
+            redibujar_fragmento(k)
+        
+        texto.bind("<Button-1>", clic)
+        
+        def elegir_todo(valor):
+            for k, f in enumerate(fragmentos):
+                f.seleccionar_todo(valor)
+                redibujar_fragmento(k)
+        
+        resultado = [0]
+        
+        def cerrar():
+            estado['cerrado'] = True
+            # Si hay una página leyéndose, el hilo cierra el lector al terminar
+            if not estado['cargando']:
+                lector.cerrar()
+            dialog.destroy()
+        
+        def aceptar():
+            con_seleccion, elegidas, _ = git_parches.resumen(fragmentos)
+            if not elegidas:
+                messagebox.showwarning("Advertencia", "Elige al menos una línea o un fragmento", parent=dialog)
+                return
+            exito, lineas, error = git_parches.aplicar_en_indice(cwd, fragmentos)
+            if not exito:
+                messagebox.showerror("Error", f"No se pudo agregar la selección:\n\n{error[:500]}", parent=dialog)
+                return
+            self.log(f"✂ {archivo}: {lineas} línea(s) de {con_seleccion} fragmento(s) agregadas", "success")
+            guardar_operacion("Fragmentos agregados", f"{archivo}: {lineas} línea(s) en {con_seleccion} fragmento(s)")
+            resultado[0] = lineas
+            cerrar()
+        
+        btn_frame = Frame(dialog)
+        btn_frame.pack(pady=(0, 15))
+        Button(btn_frame, text="✓ Todo lo cargado", command=lambda: elegir_todo(True),
+               bg="#2196F3", fg="white", font=("Arial", 10), padx=15, pady=6, cursor="hand2").pack(side=LEFT, padx=5)
+        Button(btn_frame, text="✗ Nada", command=lambda: elegir_todo(False),
+               bg="#FF9800", fg="white", font=("Arial", 10), padx=15, pady=6, cursor="hand2").pack(side=LEFT, padx=5)
+        Button(btn_frame, text="✓ Agregar selección", command=aceptar,
+               bg="#4caf50", fg="white", font=("Arial", 12, "bold"), padx=25, pady=10, cursor="hand2").pack(side=LEFT, padx=10)
+        Button(btn_frame, text="✗ Cancelar", command=cerrar,
+               bg="#f44336", fg="white", font=("Arial", 11), padx=25, pady=10, cursor="hand2").pack(side=LEFT, padx=5)
+        dialog.protocol("WM_DELETE_WINDOW", cerrar)
+        
+        cargar_mas()
+        dialog.wait_window()
+        if padre is not None and padre.winfo_exists():
+            # El selector de archivos vuelve a ser modal
+            padre.grab_set()
+        return resultado[0]
+    
     def seleccionar_archivos_especificos(self):
         """Permite seleccionar archivos específicos para agregar con checkboxes"""
         # Verificar que hay una carpeta seleccionada
@@ -1065,73 +3088,296 @@ class GitAutomationGUI:
         
         os.chdir(self.ruta_proyecto_usuario)
         
-        # Obtener lista de archivos modificados
-        exito, cambios, _ = ejecutar_comando("git status --porcelain")
-        if not exito or not cambios.strip():
+        # Conjunto compacto de cambios: una sola llamada a git; las estadísticas se piden por página
+        cwd = os.getcwd()
+        conjunto = ConjuntoCambios.desde_git(cwd)
+        if not len(conjunto):
             messagebox.showinfo("Info", "No hay archivos modificados para seleccionar")
             return
         
         # Crear ventana de selección más grande
         dialog = Toplevel(self.root)
         dialog.title("📁 Seleccionar Archivos Específicos")
-        dialog.geometry("800x600")
+        dialog.geometry("900x750")
         dialog.transient(self.root)
         dialog.grab_set()
         
         # Centrar ventana
         dialog.update_idletasks()
-        x = (dialog.winfo_screenwidth() // 2) - (800 // 2)
-        y = (dialog.winfo_screenheight() // 2) - (600 // 2)
-        dialog.geometry(f"800x600+{x}+{y}")
+        x = (dialog.winfo_screenwidth() // 2) - (900 // 2)
+        y = (dialog.winfo_screenheight() // 2) - (750 // 2)
+        dialog.geometry(f"900x750+{x}+{y}")
         
         # Título
         Label(dialog, text="📁 Selecciona los archivos que quieres agregar:", 
-              font=("Arial", 14, "bold")).pack(pady=(20, 15))
+              font=("Arial", 14, "bold")).pack(pady=(20, 10))
+        
+        # Filtro por texto y contador de seleccionados
+        filtro_frame = Frame(dialog)
+        filtro_frame.pack(fill=X, padx=20)
+        Label(filtro_frame, text="🔍 Filtrar:", font=("Arial", 10)).pack(side=LEFT)
+        filtro_var = StringVar()
+        Entry(filtro_frame, textvariable=filtro_var, font=("Consolas", 10)).pack(side=LEFT, fill=X, expand=True, padx=5)
+        contador = Label(filtro_frame, text="", font=("Arial", 10, "bold"), fg="#1976D2")
+        contador.pack(side=RIGHT, padx=(10, 0))
         
         # Frame principal con scrollbar
         main_frame = Frame(dialog)
         main_frame.pack(fill=BOTH, expand=True, padx=20, pady=10)
         
-        # Canvas para scroll
-        canvas = Canvas(main_frame, bg="white")
-        scrollbar = Scrollbar(main_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = Frame(canvas)
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+        # Lista virtual: solo se dibujan las filas visibles (la barra no depende del canvas)
+        canvas = Canvas(main_frame, bg="white", highlightthickness=0)
+        scrollbar = Scrollbar(main_frame, orient="vertical")
+        ALTO_FILA = 24
+        vista = {'indices': conjunto.indices(conjunto.mascara_todos()), 'mascara': conjunto.mascara_todos(),
+                 'primera': 0}
+        claves_diff = {}
+        pendientes_estadisticas = set()
+        
+        def filas_visibles():
+            return max(1, canvas.winfo_height() // ALTO_FILA)
+        
+        def actualizar_contador():
+            texto = f"{conjunto.contar_seleccionados()} de {len(conjunto)} seleccionados"
+            if len(vista['indices']) != len(conjunto):
+                texto += f" · {len(vista['indices'])} con el filtro"
+            contador.config(text=texto)
+        
+        def dibujar():
+            canvas.delete("fila")
+            total = len(vista['indices'])
+            visibles = filas_visibles()
+            vista['primera'] = max(0, min(vista['primera'], total - visibles))
+            ancho = canvas.winfo_width()
+            sin_estadisticas = []
+            for fila, i in enumerate(vista['indices'][vista['primera']:vista['primera'] + visibles + 1]):
+                y = fila * ALTO_FILA
+                canvas.create_rectangle(0, y, ancho, y + ALTO_FILA, fill="white" if fila % 2 else "#fafafa",
+                                        outline="#eeeeee", tags="fila")
+                canvas.create_text(10, y + ALTO_FILA // 2, text="☑" if conjunto.esta_seleccionado(i) else "☐",
+                                   anchor=W, font=("Arial", 12), fill="#1976D2", tags="fila")
+                canvas.create_text(34, y + ALTO_FILA // 2, text=conjunto.ruta(i), anchor=W,
+                                   font=("Consolas", 10), tags="fila")
+                if conjunto.estadisticas_cargadas(i):
+                    info = info_de(i)
+                    canvas.create_text(ancho - 10, y + ALTO_FILA // 2, text=formatear_estadisticas(info), anchor=E,
+                                       font=("Consolas", 9), fill="#9e9e9e" if info['binario'] else "#2e7d32",
+                                       tags="fila")
+                elif i not in pendientes_estadisticas:
+                    sin_estadisticas.append(i)
+            if total:
+                scrollbar.set(vista['primera'] / total, min(1.0, (vista['primera'] + visibles) / total))
+            else:
+                scrollbar.set(0, 1)
+            if sin_estadisticas:
+                cargar_estadisticas(sin_estadisticas)
+        
+        def cargar_estadisticas(indices):
+            """+añadidas −eliminadas solo de la página visible, en segundo plano"""
+            pendientes_estadisticas.update(indices)
+            rutas = {conjunto.ruta(i): i for i in indices}
+            
+            def trabajo():
+                cambios = obtener_estadisticas_cambios(cwd, list(rutas))
+                
+                def aplicar():
+                    for info in cambios:
+                        i = rutas.get(info['archivo'])
+                        if i is not None:
+                            conjunto.guardar_estadisticas(i, info['añadidas'], info['eliminadas'], info['binario'])
+                            claves_diff[i] = info['clave_diff']
+                    for i in indices:
+                        pendientes_estadisticas.discard(i)
+                        if not conjunto.estadisticas_cargadas(i):
+                            conjunto.guardar_estadisticas(i, None, None, False)
+                    if dialog.winfo_exists():
+                        dibujar()
+                
+                self.root.after(0, aplicar)
+            
+            threading.Thread(target=trabajo, daemon=True).start()
+        
+        def info_de(i):
+            """Datos del archivo i en el formato que usan el diff y formatear_estadisticas"""
+            anadidas, eliminadas = conjunto.anadidas[i], conjunto.eliminadas[i]
+            binario = anadidas == BINARIO
+            return {
+                'archivo': conjunto.ruta(i),
+                'estado': conjunto.estado(i),
+                'añadidas': None if binario or anadidas == SIN_CARGAR else anadidas,
+                'eliminadas': None if binario or eliminadas == SIN_CARGAR else eliminadas,
+                'binario': binario,
+                'preparado': conjunto.preparado(i),
+                'sin_seguimiento': conjunto.sin_seguimiento(i),
+                'clave_diff': claves_diff.get(i),
+            }
+        
+        def desplazar(*argumentos):
+            total = len(vista['indices'])
+            if argumentos[0] == "moveto":
+                vista['primera'] = int(float(argumentos[1]) * total)
+            elif argumentos[0] == "scroll":
+                paso = filas_visibles() if argumentos[2] == "pages" else 1
+                vista['primera'] += int(argumentos[1]) * paso
+            dibujar()
+        
+        scrollbar.config(command=desplazar)
+        canvas.bind("<Configure>", lambda e: dibujar())
+        
+        def aplicar_filtro():
+            vista['mascara'] = conjunto.mascara_texto(filtro_var.get())
+            vista['indices'] = conjunto.indices(vista['mascara'])
+            vista['primera'] = 0
+            dibujar()
+            actualizar_contador()
+        
+        espera_filtro = [None]
+        
+        def filtro_cambiado(*_):
+            # Se espera a que el usuario deje de escribir para no filtrar en cada tecla
+            if espera_filtro[0] is not None:
+                dialog.after_cancel(espera_filtro[0])
+            espera_filtro[0] = dialog.after(250, aplicar_filtro)
+        
+        traza_filtro = filtro_var.trace_add("write", filtro_cambiado)
+        
+        # Vista previa del diff (se carga solo al seleccionar un archivo, por páginas)
+        preview_frame = Frame(dialog)
+        preview_frame.pack(side=BOTTOM, fill=BOTH, padx=20, pady=(0, 5))
+        
+        preview_titulo = Label(preview_frame, text="👁 Haz clic en un archivo para ver sus cambios",
+                               font=("Arial", 9, "bold"), fg="#666", anchor=W)
+        preview_titulo.pack(fill=X)
+        
+        preview = scrolledtext.ScrolledText(
+            preview_frame,
+            height=12,
+            wrap=NONE,
+            font=("Consolas", 9),
+            bg="#1e1e1e",
+            fg="#dddddd",
+            state=DISABLED
         )
+        preview.tag_config("añadida", foreground="#4caf50")
+        preview.tag_config("eliminada", foreground="#f44336")
+        preview.tag_config("hunk", foreground="#29b6f6")
+        preview.pack(fill=BOTH, expand=True)
+        
+        botones_preview = Frame(preview_frame)
+        botones_preview.pack(fill=X, pady=(3, 0))
+        btn_mas = Button(botones_preview, text="⬇ Cargar más líneas", font=("Arial", 9),
+                         state=DISABLED, cursor="hand2")
+        btn_mas.pack(side=RIGHT)
+        btn_fragmentos = Button(botones_preview, text="✂ Fragmentos", font=("Arial", 9),
+                                state=DISABLED, cursor="hand2")
+        btn_fragmentos.pack(side=RIGHT, padx=(0, 5))
+        # Archivos de los que ya se agregaron fragmentos: {ruta: líneas}
+        fragmentos_agregados = {}
+        
+        estado_preview = {'info': None, 'entrada': None, 'lector': None, 'mostradas': 0}
+        
+        def escribir_lineas(lineas):
+            preview.config(state=NORMAL)
+            for linea in lineas:
+                if linea.startswith('@@'):
+                    tag = "hunk"
+                elif linea.startswith('+') and not linea.startswith('+++'):
+                    tag = "añadida"
+                elif linea.startswith('-') and not linea.startswith('---'):
+                    tag = "eliminada"
+                else:
+                    tag = ()
+                preview.insert(END, linea + "\n", tag)
+            preview.config(state=DISABLED)
+        
+        def cerrar_lector():
+            if estado_preview['lector'] is not None:
+                estado_preview['lector'].cerrar()
+                estado_preview['lector'] = None
+        
+        def cargar_pagina():
+            entrada = estado_preview['entrada']
+            if entrada is None:
+                return
+            # Primero se muestran las líneas ya cacheadas; git solo se usa para lo que falte
+            if estado_preview['mostradas'] < len(entrada['lineas']):
+                pendientes = entrada['lineas'][estado_preview['mostradas']:estado_preview['mostradas'] + 200]
+            elif not entrada['completo']:
+                if estado_preview['lector'] is None:
+                    estado_preview['lector'] = LectorDiffPaginado(
+                        estado_preview['info'], saltar=len(entrada['lineas']))
+                pendientes = estado_preview['lector'].siguiente_pagina()
+                entrada['lineas'].extend(pendientes)
+                if estado_preview['lector'].terminado:
+                    entrada['completo'] = True
+                    cerrar_lector()
+            else:
+                pendientes = []
+            escribir_lineas(pendientes)
+            estado_preview['mostradas'] += len(pendientes)
+            hay_mas = estado_preview['mostradas'] < len(entrada['lineas']) or not entrada['completo']
+            btn_mas.config(state=NORMAL if hay_mas else DISABLED)
+        
+        def mostrar_diff(i):
+            cerrar_lector()
+            if i not in claves_diff:
+                # Aún sin estadísticas (o sin clave): se consulta solo este archivo
+                for datos in obtener_estadisticas_cambios(cwd, [conjunto.ruta(i)]):
+                    conjunto.guardar_estadisticas(i, datos['añadidas'], datos['eliminadas'], datos['binario'])
+                    claves_diff[i] = datos['clave_diff']
+            info = info_de(i)
+            if info['clave_diff'] is None:
+                info['clave_diff'] = (info['archivo'], None)
+            entrada = CACHE_DIFFS.obtener(info['clave_diff'])
+            if entrada is None:
+                entrada = CACHE_DIFFS.crear(info['clave_diff'])
+            estado_preview.update({'info': info, 'entrada': entrada, 'mostradas': 0})
+            preview_titulo.config(text=f"👁 {info['archivo']}  ({formatear_estadisticas(info) or info['estado'].strip()})")
+            preview.config(state=NORMAL)
+            preview.delete("1.0", END)
+            preview.config(state=DISABLED)
+            # Fragmentos solo de archivos con historial y con texto (lo demás se agrega entero)
+            btn_fragmentos.config(state=DISABLED if info['binario'] or info['sin_seguimiento'] else NORMAL)
+            if info['binario']:
+                escribir_lineas(["(archivo binario: no se puede mostrar el diff)"])
+                btn_mas.config(state=DISABLED)
+                return
+            cargar_pagina()
         
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+        btn_mas.config(command=cargar_pagina)
         
-        # Agregar archivos con checkboxes
-        archivos_lista = []
-        checkboxes_vars = {}
+        def abrir_fragmentos():
+            info = estado_preview['info']
+            if info is None:
+                return
+            lineas = self.seleccionar_fragmentos(cwd, info['archivo'], padre=dialog)
+            if not lineas:
+                return
+            fragmentos_agregados[info['archivo']] = fragmentos_agregados.get(info['archivo'], 0) + lineas
+            # Lo que queda del archivo no se agrega entero al aceptar
+            for i in conjunto.indices(conjunto.mascara_texto(info['archivo'])):
+                if conjunto.ruta(i) == info['archivo'] and conjunto.esta_seleccionado(i):
+                    conjunto.alternar(i)
+            dibujar()
+            actualizar_contador()
+            preview_titulo.config(text=f"👁 {info['archivo']}  (✂ {fragmentos_agregados[info['archivo']]} línea(s) ya agregadas)")
+        
+        btn_fragmentos.config(command=abrir_fragmentos)
+        
+        def clic(event):
+            fila = vista['primera'] + event.y // ALTO_FILA
+            if fila >= len(vista['indices']):
+                return
+            i = vista['indices'][fila]
+            if event.x < 30:
+                # La casilla alterna la selección; el resto de la fila muestra el diff
+                conjunto.alternar(i)
+                dibujar()
+                actualizar_contador()
+            else:
+                mostrar_diff(i)
         
-        for linea in cambios.strip().split('\n'):
-            if linea.strip():
-                archivo = linea[3:].strip()  # Quitar el estado (M, A, etc.)
-                archivos_lista.append(archivo)
-                
-                # Crear frame para cada archivo
-                file_frame = Frame(scrollable_frame, bg="white", relief=SOLID, borderwidth=1)
-                file_frame.pack(fill=X, padx=5, pady=3)
-                
-                # Checkbox
-                var = BooleanVar(value=True)  # Todos seleccionados por defecto
-                checkboxes_vars[archivo] = var
-                
-                checkbox = Checkbutton(
-                    file_frame,
-                    text=archivo,
-                    variable=var,
-                    font=("Consolas", 10),
-                    bg="white",
-                    anchor=W,
-                    justify=LEFT
-                )
-                checkbox.pack(fill=X, padx=10, pady=5)
+        canvas.bind("<Button-1>", clic)
         
         # Pack canvas y scrollbar
         canvas.pack(side=LEFT, fill=BOTH, expand=True)
@@ -1141,15 +3387,16 @@ class GitAutomationGUI:
         btn_frame = Frame(dialog)
         btn_frame.pack(pady=20)
         
-        # Botón seleccionar todos
+        # Seleccionar/deseleccionar todos actúan sobre lo que deja ver el filtro
         def seleccionar_todos():
-            for var in checkboxes_vars.values():
-                var.set(True)
+            conjunto.seleccionar_todo(vista['mascara'])
+            dibujar()
+            actualizar_contador()
         
-        # Botón deseleccionar todos
         def deseleccionar_todos():
-            for var in checkboxes_vars.values():
-                var.set(False)
+            conjunto.deseleccionar_todo(vista['mascara'])
+            dibujar()
+            actualizar_contador()
         
         Button(btn_frame, text="✓ Seleccionar Todos", command=seleccionar_todos,
                bg="#2196F3", fg="white", font=("Arial", 10), 
@@ -1162,9 +3409,8 @@ class GitAutomationGUI:
         resultado = [None]
         
         def aceptar():
-            seleccionados = [archivo for archivo, var in checkboxes_vars.items() if var.get()]
-            if seleccionados:
-                resultado[0] = seleccionados
+            if conjunto.contar_seleccionados() or fragmentos_agregados:
+                resultado[0] = conjunto.seleccionados()
                 dialog.destroy()
             else:
                 messagebox.showwarning("Advertencia", "Debes seleccionar al menos un archivo")
@@ -1180,50 +3426,79 @@ class GitAutomationGUI:
                bg="#f44336", fg="white", font=("Arial", 11), 
                padx=25, pady=10, cursor="hand2").pack(side=LEFT, padx=5)
         
-        # Habilitar scroll con rueda del mouse
+        actualizar_contador()
+        
+        # Habilitar scroll con rueda del mouse (en el diálogo, no en toda la aplicación:
+        # bind_all nunca se libera y dejaba viva la lista entera tras cerrar)
         def on_mousewheel(event):
-            canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+            if str(event.widget).startswith(str(preview)):
+                return
+            desplazar("scroll", int(-1*(event.delta/120)) * 3, "units")
         
-        canvas.bind_all("<MouseWheel>", on_mousewheel)
+        dialog.bind("<MouseWheel>", on_mousewheel)
         
         dialog.wait_window()
+        cerrar_lector()
+        # La traza del filtro vive en la variable (no en el diálogo): se quita a mano
+        filtro_var.trace_remove("write", traza_filtro)
         
-        if resultado[0]:
+        if resultado[0] is not None:
             self.log("\n" + "="*60, "info")
             self.log("➕ AGREGANDO ARCHIVOS ESPECÍFICOS", "info")
             self.log("="*60, "info")
             self.log(f"\n📁 Archivos seleccionados: {len(resultado[0])}", "info")
+            for archivo, lineas in fragmentos_agregados.items():
+                self.log(f"   ✂ {archivo}: {lineas} línea(s) ya agregadas por fragmentos", "info")
             
-            # Agregar cada archivo seleccionado
-            for archivo in resultado[0]:
-                self.log(f"   Agregando: {archivo}", "info")
-                ejecutar_comando(f'git add "{archivo}"')
+            if resultado[0]:
+                # Una sola llamada a git add (las rutas van por la entrada estándar)
+                for archivo in resultado[0][:20]:
+                    self.log(f"   Agregando: {archivo}", "info")
+                if len(resultado[0]) > 20:
+                    self.log(f"   ... y {len(resultado[0]) - 20} más", "info")
+                exito, _, error = git_operaciones.agregar_archivos(os.getcwd(), resultado[0])
+                if not exito:
+                    self.log(f"✗ Error al agregar: {error}", "error")
+                    return
+                
+                self.log("\n✓ Archivos agregados", "success")
+                guardar_operacion(f"Archivos agregados (específicos)", f"{len(resultado[0])} archivo(s): {', '.join(resultado[0][:5])}{'...' if len(resultado[0]) > 5 else ''}")
+            total_archivos = len(set(resultado[0]) | set(fragmentos_agregados))
             
-            self.log("\n✓ Archivos agregados", "success")
-            guardar_operacion(f"Archivos agregados (específicos)", f"{len(resultado[0])} archivo(s): {', '.join(resultado[0][:5])}{'...' if len(resultado[0]) > 5 else ''}")
+            # Mientras el usuario responde los diálogos se adelanta el trabajo que no depende de él
+            config = cargar_configuracion()
+            especulacion = self.iniciar_especulacion(os.getcwd(), config)
             
             # Preguntar si hacer commit
             respuesta = messagebox.askyesno(
                 "¿Guardar cambios?",
-                f"¿Deseas guardar estos {len(resultado[0])} archivo(s) con un commit?"
+                f"¿Deseas guardar estos {total_archivos} archivo(s) con un commit?"
             )
             
-            if respuesta:
-                mensaje = self.pedir_mensaje_commit()
-                if mensaje:
+            if respuesta and not self.verificar_antes_de_commit():
+                respuesta = False
+            
+            if not respuesta:
+                especulacion.descartar()
+            else:
+                mensaje = self.pedir_mensaje_commit(especulacion)
+                if not mensaje:
+                    especulacion.descartar()
+                else:
                     self.log(f"\n💾 Guardando con mensaje: {mensaje}", "info")
-                    exito, _, error = ejecutar_comando(f'git commit -m "{mensaje}"')
+                    self.log_resumen_cambios(especulacion)
+                    exito, _, error = git_operaciones.hacer_commit(os.getcwd(), mensaje)
                     if exito:
                         self.log("✓ Cambios guardados", "success")
                         guardar_operacion(f"Commit realizado (archivos específicos)", f"Mensaje: {mensaje}")
                         
                         # Preguntar push
-                        config = cargar_configuracion()
                         if config.get('url_remoto'):
                             # Seleccionar o crear rama
-                            rama_seleccionada = self.seleccionar_o_crear_rama()
+                            rama_seleccionada = self.seleccionar_o_crear_rama(especulacion.resultado('ramas'))
                             if not rama_seleccionada:
                                 self.log("   ⚠ Operación cancelada", "warning")
+                                especulacion.descartar()
                                 return
                             
                             self.log(f"   📍 Rama seleccionada: {rama_seleccionada}", "info")
@@ -1236,18 +3511,22 @@ class GitAutomationGUI:
                                 self.log("\n☁️ Subiendo a GitHub...", "info")
                                 self.log("   ⏳ Por favor espera, esto puede tardar unos segundos...", "info")
                                 self.log(f"   Comando: git push origin {rama_seleccionada}", "info")
+                                self.log_especulacion_remota(especulacion)
                                 self.root.update()  # Actualizar la interfaz para mostrar el mensaje
                                 
-                                # Ejecutar push en un hilo separado para no bloquear la interfaz
-                                def hacer_push_archivos():
+                                ruta_repo = self.ruta_proyecto_usuario
+                                
+                                # Ejecutar push como trabajo en segundo plano (con tiempo límite y cancelable)
+                                def hacer_push_archivos(trabajo):
                                     rama = rama_seleccionada
-                                    exito, salida, error = ejecutar_comando(f"git push origin {rama} 2>&1")
-                                    
-                                    # Si falla, intentar con master
-                                    if not exito and rama != "master":
-                                        self.root.after(0, lambda: self.log("   ⚠ Intentando con 'master'...", "warning"))
-                                        self.root.update()
-                                        exito, salida, error = ejecutar_comando("git push origin master 2>&1")
+                                    error_submodulos = self.subir_submodulos(ruta_repo)
+                                    if error_submodulos:
+                                        self.root.after(0, lambda: self.log("   ✗ No se subió el proyecto: falló un submódulo", "error"))
+                                        self.root.after(0, lambda: messagebox.showerror(
+                                            "Error", f"No se pudo subir un submódulo:\n\n{error_submodulos[:600]}"))
+                                        return
+                                    exito, salida, error, integracion = self.subir_sincronizado(ruta_repo, rama)
+                                    sin_red = not exito and es_error_de_red(error or salida)
                                     
                                     # Actualizar interfaz desde el hilo principal
                                     if exito:
@@ -1255,6 +3534,10 @@ class GitAutomationGUI:
                                         self.root.after(0, lambda: self.log("   ✓ Tu código ya está disponible en internet", "success"))
                                         guardar_operacion(f"Push realizado a GitHub (archivos específicos)", f"Rama: {rama}, Repositorio: {config.get('url_remoto', 'N/A')}")
                                         self.root.after(0, lambda: messagebox.showinfo("Éxito", "¡Cambios subidos a GitHub correctamente!\n\nTu código ya está disponible en internet."))
+                                    elif sin_red:
+                                        self.root.after(0, lambda: self.encolar_sin_conexion(ruta_repo, rama, error or salida))
+                                    elif integracion['accion'] == 'conflicto':
+                                        self.root.after(0, lambda: self.mostrar_conflicto_sincronizacion(rama, integracion))
                                     else:
                                         self.root.after(0, lambda: self.log("   ✗ Error al subir a GitHub", "error"))
                                         if error:
@@ -1262,23 +3545,19 @@ class GitAutomationGUI:
                                         self.root.after(0, lambda: self.log("   💡 Verifica tu conexión a internet y tus credenciales", "info"))
                                         self.root.after(0, lambda: messagebox.showerror("Error", f"No se pudo subir a GitHub.\n\nError: {error[:300] if error else 'Error desconocido'}\n\nVerifica tu conexión a internet y tus credenciales de GitHub."))
                                 
-                                # Iniciar el push en un hilo separado
-                                thread_push = threading.Thread(target=hacer_push_archivos, daemon=True)
-                                thread_push.start()
-                                
-                                # Actualizar la interfaz periódicamente mientras se ejecuta
-                                def actualizar_interfaz_push():
-                                    if thread_push.is_alive():
-                                        self.root.update()
-                                        self.root.after(100, actualizar_interfaz_push)
-                                
-                                actualizar_interfaz_push()
+                                # Encolar el push: se serializa con otras operaciones del mismo repositorio
+                                self.gestor_trabajos.encolar(
+                                    ruta_repo, f"Subir a GitHub ({rama_seleccionada})", hacer_push_archivos,
+                                    prioridad=PRIORIDAD_INTERACTIVA
+                                )
                             else:
                                 self.log("\n⚠ Push cancelado por el usuario", "warning")
+                                especulacion.descartar()
                         else:
                             self.log("\n⚠ No hay repositorio configurado para subir", "warning")
                     else:
                         self.log(f"✗ Error: {error}", "error")
+                        especulacion.descartar()
             
             self.log("\n" + "="*60, "success")
             self.log("✅ ¡COMPLETADO!", "success")
@@ -1286,6 +3565,15 @@ class GitAutomationGUI:
 
 
 def main():
+    ARRANQUE.marcar('modulos')
+    # Necesario para el pool de procesos de las verificaciones en el .exe de PyInstaller
+    import multiprocessing
+    multiprocessing.freeze_support()
+    # El mismo .exe sirve como servicio residente: Git-Automation.exe --servicio
+    if "--servicio" in sys.argv:
+        import git_servicio
+        git_servicio.servir()
+        return
     root = Tk()
     app = GitAutomationGUI(root)
     root.mainloop()
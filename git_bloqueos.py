@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Coordinación entre procesos sobre el mismo repositorio
+- Bloqueo consultivo (.git/git-automatizado/motor.lock) compartido por todas
+  las instancias de la aplicación: solo una escribe el índice a la vez.
+- Reintentos con espera exponencial y aleatoria cuando git dice que
+  .git/index.lock ya existe (otro git, por ejemplo el del IDE, lo tiene).
+- Detección de index.lock abandonados (un git que murió a medias): se avisa
+  y solo se borran cuando el usuario lo confirma, porque un git lento (un
+  rebase grande, un hook) puede tener el .lock más tiempo del esperado.
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import threading
+
+NOMBRE_BLOQUEO = "motor.lock"
+ESPERA_BLOQUEO = 60
+ESPERA_TOTAL_REINTENTOS = 30
+ESPERA_BASE = 0.1
+ESPERA_MAXIMA = 3.0
+# Un index.lock más viejo que esto se considera abandonado
+EDAD_LOCK_OBSOLETO = 300
+
+# Subcomandos que escriben el índice (o el árbol de trabajo y el índice a la vez)
+SUBCOMANDOS_ESCRITURA = {
+    'add', 'commit', 'rm', 'mv', 'reset', 'checkout', 'switch', 'restore',
+    'merge', 'rebase', 'pull', 'cherry-pick', 'revert', 'stash', 'update-index',
+    'apply', 'read-tree', 'sparse-checkout', 'am', 'clean', 'submodule',
+}
+
+_PATRON_INDEX_LOCK = re.compile(r"'([^']*\.lock)'")
+_local = threading.local()
+_estadisticas = {'esperas_bloqueo': 0, 'segundos_bloqueo': 0.0, 'reintentos_index_lock': 0,
+                 'locks_obsoletos_eliminados': 0}
+_cerrojo_estadisticas = threading.Lock()
+
+
+def _sumar(clave, valor=1):
+    with _cerrojo_estadisticas:
+        _estadisticas[clave] += valor
+
+
+def estadisticas():
+    """Contadores de contención desde que arrancó el proceso"""
+    with _cerrojo_estadisticas:
+        return dict(_estadisticas)
+
+
+def _bloquear(fd, bloqueante):
+    if sys.platform == 'win32':
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK if bloqueante else msvcrt.LK_NBLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_EX if bloqueante else fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def _desbloquear(fd):
+    if sys.platform == 'win32':
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class RepositorioOcupado(Exception):
+    """Otro proceso tiene el repositorio bloqueado más tiempo del permitido"""
+
+
+class BloqueoRepositorio:
+    """Bloqueo consultivo entre procesos sobre un repositorio (reentrante dentro del mismo hilo)"""
+
+    def __init__(self, git_dir, espera=ESPERA_BLOQUEO):
+        carpeta = os.path.join(git_dir, "git-automatizado")
+        self.ruta = os.path.join(carpeta, NOMBRE_BLOQUEO)
+        self.espera = espera
+        self._carpeta = carpeta
+
+    def _tenidos(self):
+        if not hasattr(_local, 'bloqueos'):
+            _local.bloqueos = {}
+        return _local.bloqueos
+
+    def __enter__(self):
+        tenidos = self._tenidos()
+        if self.ruta in tenidos:
+            fd, cuenta = tenidos[self.ruta]
+            tenidos[self.ruta] = (fd, cuenta + 1)
+            return self
+        os.makedirs(self._carpeta, exist_ok=True)
+        fd = os.open(self.ruta, os.O_RDWR | os.O_CREAT, 0o644)
+        inicio = time.monotonic()
+        intento = 0
+        esperado = False
+        while True:
+            try:
+                _bloquear(fd, False)
+                break
+            except OSError:
+                if not esperado:
+                    esperado = True
+                    _sumar('esperas_bloqueo')
+                if time.monotonic() - inicio > self.espera:
+                    os.close(fd)
+                    raise RepositorioOcupado(
+                        f"El repositorio está ocupado por otra operación (esperados {self.espera} s)")
+                time.sleep(espera_con_variacion(intento))
+                intento += 1
+        if esperado:
+            _sumar('segundos_bloqueo', time.monotonic() - inicio)
+        try:
+            os.ftruncate(fd, 0)
+            os.write(fd, f"{os.getpid()}\n".encode('ascii'))
+        except OSError:
+            pass
+        tenidos[self.ruta] = (fd, 1)
+        return self
+
+    def __exit__(self, *args):
+        tenidos = self._tenidos()
+        fd, cuenta = tenidos[self.ruta]
+        if cuenta > 1:
+            tenidos[self.ruta] = (fd, cuenta - 1)
+            return False
+        del tenidos[self.ruta]
+        try:
+            _desbloquear(fd)
+        except OSError:
+            pass
+        os.close(fd)
+        return False
+
+
+def espera_con_variacion(intento):
+    """Espera exponencial con variación aleatoria (evita que dos procesos reintenten a la vez)"""
+    base = min(ESPERA_MAXIMA, ESPERA_BASE * (2 ** intento))
+    return base * random.uniform(0.5, 1.5)
+
+
+def es_error_index_lock(texto):
+    """Indica si git falló porque otro proceso tiene un archivo .lock del repositorio"""
+    texto = (texto or "").lower()
+    return ".lock" in texto and ("file exists" in texto or "another git process" in texto)
+
+
+def ruta_lock_en_error(texto):
+    """Extrae la ruta del archivo .lock del mensaje de error de git"""
+    coincidencia = _PATRON_INDEX_LOCK.search(texto or "")
+    return coincidencia.group(1) if coincidencia else None
+
+
+def es_obsoleto(ruta_lock, edad_maxima=EDAD_LOCK_OBSOLETO):
+    """Si el .lock existe y es más viejo que edad_maxima (no se borra)"""
+    if not ruta_lock:
+        return False
+    try:
+        return time.time() - os.path.getmtime(ruta_lock) >= edad_maxima
+    except OSError:
+        return False
+
+
+def eliminar_lock(ruta_lock, edad_maxima=EDAD_LOCK_OBSOLETO):
+    """Borra un .lock abandonado tras la confirmación del usuario; True si se borró
+
+    Se vuelve a comprobar la edad: si el .lock se renovó mientras se
+    preguntaba es que hay un git vivo usándolo y no se toca.
+    """
+    if not es_obsoleto(ruta_lock, edad_maxima):
+        return False
+    try:
+        os.remove(ruta_lock)
+    except OSError:
+        return False
+    _sumar('locks_obsoletos_eliminados')
+    return True
+
+
+def locks_obsoletos(git_dir, edad_maxima=EDAD_LOCK_OBSOLETO):
+    """Archivos .lock de git (index, HEAD, refs) más viejos que edad_maxima"""
+    encontrados = []
+    candidatos = [os.path.join(git_dir, n) for n in ("index.lock", "HEAD.lock", "config.lock", "packed-refs.lock")]
+    for ruta in candidatos:
+        try:
+            if time.time() - os.path.getmtime(ruta) >= edad_maxima:
+                encontrados.append(ruta)
+        except OSError:
+            continue
+    return encontrados
+
+
+def con_reintentos(ejecutar, git_dir=None, espera_total=ESPERA_TOTAL_REINTENTOS):
+    """Llama a ejecutar() y la repite con espera mientras git choque con un .lock
+
+    ejecutar devuelve (exito, salida, error).
+    """
+    inicio = time.monotonic()
+    intento = 0
+    while True:
+        exito, salida, error = ejecutar()
+        texto = error if isinstance(error, str) else ""
+        if isinstance(salida, str):
+            texto += "\n" + salida
+        if exito or not es_error_index_lock(texto):
+            return exito, salida, error
+        # Un .lock abandonado no se va a liberar esperando: se devuelve el error
+        # enseguida y el usuario decide si borrarlo (ver locks_obsoletos)
+        if es_obsoleto(ruta_lock_en_error(texto)) or time.monotonic() - inicio > espera_total:
+            return exito, salida, error
+        _sumar('reintentos_index_lock')
+        time.sleep(espera_con_variacion(intento))
+        intento += 1
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Transferencia por bundles (enlaces lentos o sin conexión)
+Exporta solo los commits que le faltan al remoto como un "git bundle"
+incremental, calculado con las refs remotas que ya conocemos (las de
+refs/remotes/<remoto>/ y las de bundles ya entregados), para llevarlo en
+un USB o por transferencia de archivos. En el otro lado el bundle se
+verifica antes de aplicarlo. Cada exportación informa del tamaño del bundle
+frente a lo que costaría subirlo todo.
+
+Uso:
+    python git_bundles.py exportar --repo C:\\proyecto --salida cambios.bundle
+    python git_bundles.py entregado --repo C:\\proyecto --bundle cambios.bundle
+    python git_bundles.py verificar --repo D:\\copia --bundle cambios.bundle
+    python git_bundles.py aplicar --repo D:\\copia --bundle cambios.bundle
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+
+from git_trabajos import ejecutar_proceso, directorio_estado
+
+BUNDLES_FILE = "bundles.json"
+# Lo que ya se entregó por bundle cuenta como "lo tiene el remoto"
+PREFIJO_ENTREGADOS = "refs/git-automatizado/bundle"
+MAX_HISTORIAL = 50
+
+
+class ErrorBundle(Exception):
+    """No se pudo crear, verificar o aplicar un bundle"""
+
+
+def _git(repo, *argumentos, **opciones):
+    return ejecutar_proceso(["git"] + list(argumentos), cwd=repo, **opciones)
+
+
+def _formatear(tamano):
+    for unidad in ("B", "KB", "MB", "GB"):
+        if tamano < 1024 or unidad == "GB":
+            return f"{tamano:.0f} {unidad}" if unidad == "B" else f"{tamano:.1f} {unidad}"
+        tamano /= 1024
+
+
+def refs_conocidas(repo, remoto="origin"):
+    """Refs que sabemos que el remoto ya tiene: {ref: oid}"""
+    exito, salida, _ = _git(repo, "for-each-ref", "--format=%(objectname) %(refname)",
+                            f"refs/remotes/{remoto}/", f"{PREFIJO_ENTREGADOS}/{remoto}/")
+    refs = {}
+    for linea in salida.splitlines() if exito else []:
+        oid, _, ref = linea.partition(' ')
+        if not ref.endswith("/HEAD"):
+            refs[ref] = oid
+    return refs
+
+
+def ramas_locales(repo):
+    exito, salida, _ = _git(repo, "for-each-ref", "--format=%(refname)", "refs/heads/")
+    return salida.split() if exito else []
+
+
+def _uso_disco(repo, incluir, excluir=()):
+    """Bytes en disco de los objetos alcanzables desde incluir y no desde excluir (None si git es antiguo)"""
+    exito, salida, _ = _git(repo, "rev-list", "--objects", "--disk-usage", *incluir,
+                            *(["--not", *excluir] if excluir else []))
+    return int(salida) if exito and salida.strip().isdigit() else None
+
+
+def exportar(repo, salida, ramas=None, remoto="origin"):
+    """Crea un bundle con lo que falta en el remoto
+
+    Devuelve un informe {'bundle', 'ramas', 'commits', 'tamano', 'tamano_completo', ...}
+    o None si el remoto ya lo tiene todo.
+    """
+    ramas = [r if r.startswith("refs/") else f"refs/heads/{r}" for r in (ramas or ramas_locales(repo))]
+    if not ramas:
+        raise ErrorBundle("No hay ramas que exportar")
+    conocidas = list(refs_conocidas(repo, remoto).values())
+    exito, cuenta, _ = _git(repo, "rev-list", "--count", *ramas, *(["--not", *conocidas] if conocidas else []))
+    commits = int(cuenta) if exito and cuenta.strip().isdigit() else 0
+    if commits == 0:
+        return None
+    argumentos = ["bundle", "create", os.path.abspath(salida), *ramas]
+    if conocidas:
+        argumentos += ["--not", *conocidas]
+    exito, _, error = _git(repo, *argumentos)
+    if not exito:
+        raise ErrorBundle(error or "No se pudo crear el bundle")
+    informe = {
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'bundle': os.path.abspath(salida),
+        'remoto': remoto,
+        'ramas': ramas,
+        'commits': commits,
+        'incremental': bool(conocidas),
+        'tamano': os.path.getsize(salida),
+        # Lo que costaría subir las mismas ramas desde cero (push a un remoto vacío)
+        'tamano_completo': _uso_disco(repo, ramas),
+    }
+    _registrar(repo, dict(informe, operacion='exportar'))
+    return informe
+
+
+def verificar(repo, bundle):
+    """Comprueba que el bundle está completo y que el repositorio tiene sus requisitos
+
+    Devuelve {'valido', 'ramas': {ref: oid}, 'error'}.
+    """
+    if not os.path.isfile(bundle):
+        return {'valido': False, 'ramas': {}, 'error': f"No existe el archivo {bundle}"}
+    exito, salida, error = _git(repo, "bundle", "verify", os.path.abspath(bundle))
+    ramas = {}
+    exito_lista, lista, _ = _git(repo, "bundle", "list-heads", os.path.abspath(bundle))
+    for linea in lista.splitlines() if exito_lista else []:
+        oid, _, ref = linea.partition(' ')
+        ramas[ref] = oid
+    texto = f"{error}\n{salida}".strip()
+    return {'valido': exito, 'ramas': ramas, 'error': None if exito else texto}
+
+
+def _es_bare(repo):
+    exito, salida, _ = _git(repo, "rev-parse", "--is-bare-repository")
+    return exito and salida.strip() == "true"
+
+
+def aplicar(repo, bundle, destino=None):
+    """Verifica y aplica un bundle en el repositorio destino
+
+    En un repositorio bare (el "remoto" del otro lado) actualiza refs/heads/
+    solo si es avance rápido; en uno normal deja las ramas en refs/remotes/bundle/
+    para revisarlas o integrarlas. Devuelve {'ramas': {ref: oid}, 'salida'}.
+    """
+    verificacion = verificar(repo, bundle)
+    if not verificacion['valido']:
+        raise ErrorBundle(verificacion['error'] or "El bundle no es válido")
+    if destino is None:
+        destino = "refs/heads/*" if _es_bare(repo) else "refs/remotes/bundle/*"
+    exito, salida, error = _git(repo, "fetch", os.path.abspath(bundle), f"refs/heads/*:{destino}")
+    if not exito:
+        raise ErrorBundle(error or salida or "No se pudo aplicar el bundle")
+    _registrar(repo, {'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'operacion': 'aplicar',
+                      'bundle': os.path.abspath(bundle), 'ramas': list(verificacion['ramas']),
+                      'destino': destino})
+    return {'ramas': verificacion['ramas'], 'salida': (error or salida).strip()}
+
+
+def marcar_entregado(repo, bundle, remoto="origin"):
+    """Anota que el otro lado ya aplicó el bundle: el siguiente solo llevará lo nuevo"""
+    verificacion = verificar(repo, bundle)
+    for ref, oid in verificacion['ramas'].items():
+        if ref.startswith("refs/heads/"):
+            _git(repo, "update-ref", f"{PREFIJO_ENTREGADOS}/{remoto}/{ref[len('refs/heads/'):]}", oid)
+    return list(verificacion['ramas'])
+
+
+def _registrar(repo, datos):
+    ruta = os.path.join(directorio_estado(repo), BUNDLES_FILE)
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            historial = json.load(f)
+    except (OSError, ValueError):
+        historial = []
+    historial.append(datos)
+    temporal = ruta + ".tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(historial[-MAX_HISTORIAL:], f, indent=4, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def resumen(informe):
+    """Texto con el tamaño del bundle frente a un push completo"""
+    lineas = [f"{informe['commits']} commit(s) en {len(informe['ramas'])} rama(s)",
+              f"Bundle: {_formatear(informe['tamano'])}" + (" (incremental)" if informe['incremental'] else "")]
+    if informe.get('tamano_completo'):
+        ahorro = 100 - informe['tamano'] * 100 / informe['tamano_completo']
+        lineas.append(f"Push completo: {_formatear(informe['tamano_completo'])} (ahorro {ahorro:.0f}%)")
+    return lineas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportar/importar cambios como git bundle")
+    parser.add_argument("accion", choices=("exportar", "verificar", "aplicar", "entregado"))
+    parser.add_argument("--repo", default=".")
+    parser.add_argument("--bundle", "--salida", dest="bundle", required=True)
+    parser.add_argument("--rama", action="append", help="rama a exportar (por defecto todas)")
+    parser.add_argument("--remoto", default="origin")
+    args = parser.parse_args()
+    repo = os.path.abspath(args.repo)
+    try:
+        if args.accion == "exportar":
+            informe = exportar(repo, args.bundle, args.rama, args.remoto)
+            if informe is None:
+                print("✓ El remoto ya tiene todo: no hace falta bundle")
+            else:
+                print(f"✓ Bundle creado: {informe['bundle']}")
+                for linea in resumen(informe):
+                    print(f"   {linea}")
+        elif args.accion == "verificar":
+            resultado = verificar(repo, args.bundle)
+            print("✓ Bundle válido" if resultado['valido'] else f"✗ Bundle no válido:\n{resultado['error']}")
+            for ref, oid in resultado['ramas'].items():
+                print(f"   {oid[:10]} {ref}")
+            return 0 if resultado['valido'] else 1
+        elif args.accion == "aplicar":
+            resultado = aplicar(repo, args.bundle)
+            print(f"✓ Bundle aplicado ({len(resultado['ramas'])} rama(s))")
+            if resultado['salida']:
+                print(resultado['salida'])
+        else:
+            ramas = marcar_entregado(repo, args.bundle, args.remoto)
+            print(f"✓ Marcado como entregado: {', '.join(ramas) or '(sin ramas)'}")
+    except ErrorBundle as e:
+        print(f"✗ {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
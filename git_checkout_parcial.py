@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Checkout parcial por proyecto (git sparse-checkout en modo cono)
+En un monorepo cada "git status" y "git add ." recorren el árbol entero
+aunque solo se trabaje en dos carpetas. Con un perfil de checkout parcial
+en la carpeta del proyecto solo quedan esas carpetas (y los archivos de la
+raíz y de las carpetas que las contienen, como hace el modo cono); git
+status, el "git add" y el selector de archivos solo ven lo que está dentro.
+
+Los perfiles se guardan en el registro de proyectos:
+    "perfiles_sparse": {"frontend": ["apps/web", "libs/ui"]},
+    "perfil_sparse": "frontend"
+
+Al cambiar de perfil se mide antes y después cuántos archivos hay en la
+carpeta y cuánto tarda git status. Uso sin interfaz:
+    python git_checkout_parcial.py --repo C:\\monorepo --carpeta apps/web --carpeta libs/ui
+    python git_checkout_parcial.py --repo C:\\monorepo --completo
+"""
+
+import os
+import sys
+import time
+import argparse
+
+from git_trabajos import ejecutar_proceso
+
+REPETICIONES_STATUS = 3
+
+
+def _git(repo, *argumentos, **opciones):
+    return ejecutar_proceso(["git"] + list(argumentos), cwd=repo, **opciones)
+
+
+def normalizar_carpetas(carpetas):
+    """Carpetas del cono sin duplicados ni barras sobrantes (acepta texto con una por línea o comas)"""
+    if isinstance(carpetas, str):
+        carpetas = carpetas.replace(',', '\n').splitlines()
+    limpias = sorted({c.strip().replace('\\', '/').strip('/') for c in carpetas if c and c.strip().strip('/\\')})
+    # En modo cono una carpeta ya incluye todo lo que tiene debajo
+    return [c for c in limpias if not any(c.startswith(otra + '/') for otra in limpias)]
+
+
+def perfiles_del_proyecto(datos):
+    """({nombre: [carpetas]}, nombre del perfil activo o None) de los datos registrados del proyecto"""
+    perfiles = {nombre: normalizar_carpetas(carpetas)
+                for nombre, carpetas in (datos.get('perfiles_sparse') or {}).items()}
+    activo = datos.get('perfil_sparse')
+    return perfiles, activo if activo in perfiles else None
+
+
+def estado(repo):
+    """{'activo', 'cono', 'carpetas'} del checkout parcial actual"""
+    exito, salida, _ = _git(repo, "config", "--bool", "core.sparseCheckout")
+    activo = exito and salida.strip() == "true"
+    exito, salida, _ = _git(repo, "config", "--bool", "core.sparseCheckoutCone")
+    cono = exito and salida.strip() == "true"
+    carpetas = []
+    if activo:
+        exito, salida, _ = _git(repo, "sparse-checkout", "list")
+        if exito:
+            carpetas = [linea.strip() for linea in salida.splitlines() if linea.strip()]
+    return {'activo': activo, 'cono': cono, 'carpetas': carpetas}
+
+
+def carpetas_disponibles(repo, base=""):
+    """Subcarpetas de base (por defecto la raíz) según el último commit, estén o no en el cono"""
+    arbol = f"HEAD:{base.strip('/')}" if base.strip('/') else "HEAD"
+    exito, salida, _ = _git(repo, "ls-tree", "-d", "--name-only", "-z", arbol)
+    if not exito:
+        return []
+    prefijo = base.strip('/') + '/' if base.strip('/') else ""
+    return [prefijo + nombre for nombre in salida.split('\0') if nombre]
+
+
+def en_cono(ruta, carpetas):
+    """Si la ruta (relativa, con /) queda dentro del cono formado por carpetas"""
+    if not carpetas:
+        return True
+    ruta = ruta.replace('\\', '/')
+    directorio = ruta.rpartition('/')[0]
+    for carpeta in carpetas:
+        if ruta.startswith(carpeta + '/'):
+            return True
+        # Los archivos de la raíz y de las carpetas que contienen a las del cono también quedan
+        if directorio == "" or carpeta == directorio or carpeta.startswith(directorio + '/'):
+            return True
+    return False
+
+
+def cambios_fuera_del_cono(repo, carpetas):
+    """Archivos con cambios que quedarían fuera del cono (git los deja en disco y avisa)"""
+    exito, salida, _ = _git(repo, "status", "--porcelain", "-z", texto=False)
+    if not exito or not carpetas:
+        return []
+    fuera = []
+    campos = salida.split(b'\0')
+    i = 0
+    while i < len(campos):
+        campo = campos[i]
+        i += 1
+        if len(campo) < 4:
+            continue
+        # En renombres y copias el campo siguiente es la ruta de origen (sin "XY ")
+        if campo[:1] in (b'R', b'C') or campo[1:2] in (b'R', b'C'):
+            i += 1
+        ruta = campo[3:].decode('utf-8', 'surrogateescape')
+        if not en_cono(ruta, carpetas):
+            fuera.append(ruta)
+    return fuera
+
+
+def contar_archivos(repo):
+    """(archivos en la carpeta, archivos en el índice): las entradas skip-worktree no están en disco"""
+    exito, salida, _ = _git(repo, "ls-files", "-t", "-z", texto=False)
+    if not exito:
+        return None, None
+    presentes = total = 0
+    for entrada in salida.split(b'\0'):
+        if not entrada:
+            continue
+        total += 1
+        if not entrada.startswith(b'S '):
+            presentes += 1
+    return presentes, total
+
+
+def medir_status(repo, repeticiones=REPETICIONES_STATUS):
+    """Mediana de lo que tarda 'git status --porcelain' (segundos)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        _git(repo, "status", "--porcelain", texto=False)
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    return round(tiempos[len(tiempos) // 2], 3)
+
+
+def medir(repo):
+    presentes, total = contar_archivos(repo)
+    return {'archivos': presentes, 'total': total, 'status_segundos': medir_status(repo)}
+
+
+def aplicar(repo, carpetas, indice_disperso=True):
+    """Deja el checkout parcial con esas carpetas (lista vacía: checkout completo)
+
+    Devuelve (exito, error). Con indice_disperso el índice tampoco guarda
+    una entrada por cada archivo de fuera del cono (git 2.37 o posterior).
+    """
+    carpetas = normalizar_carpetas(carpetas)
+    if not carpetas:
+        exito, _, error = _git(repo, "sparse-checkout", "disable")
+        return exito, error
+    opciones = ["--cone"] + (["--sparse-index"] if indice_disperso else [])
+    exito, _, error = _git(repo, "sparse-checkout", "set", *opciones, *carpetas)
+    if not exito and ("unknown option" in error or "usage:" in error):
+        # git antiguo: "set" sin opciones, después de iniciar el modo cono
+        exito, _, error = _git(repo, "sparse-checkout", "init", "--cone")
+        if exito:
+            exito, _, error = _git(repo, "sparse-checkout", "set", *carpetas)
+    return exito, error
+
+
+def cambiar(repo, carpetas, indice_disperso=True):
+    """Aplica el perfil midiendo antes y después: {'exito', 'error', 'antes', 'despues'}"""
+    antes = medir(repo)
+    exito, error = aplicar(repo, carpetas, indice_disperso)
+    return {'exito': exito, 'error': error, 'antes': antes, 'despues': medir(repo) if exito else None}
+
+
+def describir_cambio(resultado):
+    """Líneas de texto con el cambio de archivos y de latencia de git status"""
+    antes, despues = resultado['antes'], resultado['despues']
+    if not resultado['exito'] or despues is None:
+        return [f"✗ No se pudo cambiar el checkout parcial: {(resultado['error'] or '').strip()[:300]}"]
+    lineas = []
+    if antes['archivos'] is not None and despues['archivos'] is not None:
+        lineas.append(f"📄 Archivos en la carpeta: {antes['archivos']:,} → {despues['archivos']:,} "
+                      f"(de {despues['total']:,} en el repositorio)".replace(',', '.'))
+    lineas.append(f"⏱ git status: {antes['status_segundos']:.3f} s → {despues['status_segundos']:.3f} s")
+    return lineas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkout parcial (sparse-checkout en modo cono) con medición")
+    parser.add_argument("--repo", default=".")
+    parser.add_argument("--carpeta", action="append", default=[], help="carpeta del cono (se puede repetir)")
+    parser.add_argument("--completo", action="store_true", help="volver al checkout completo")
+    parser.add_argument("--sin-indice-disperso", action="store_true")
+    args = parser.parse_args()
+    repo = os.path.abspath(args.repo)
+    if not args.carpeta and not args.completo:
+        actual = estado(repo)
+        print("Checkout parcial: " + (", ".join(actual['carpetas']) or "(solo la raíz)") if actual['activo']
+              else "Checkout completo")
+        medicion = medir(repo)
+        print(f"   📄 {medicion['archivos']} de {medicion['total']} archivo(s) en la carpeta · "
+              f"⏱ git status: {medicion['status_segundos']:.3f} s")
+        return 0
+    resultado = cambiar(repo, [] if args.completo else args.carpeta, not args.sin_indice_disperso)
+    for linea in describir_cambio(resultado):
+        print(linea)
+    return 0 if resultado['exito'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cola de salida para trabajar sin conexión
+Cuando un push falla por la red, los commits quedan pendientes por proyecto
+y rama. Un hilo en segundo plano comprueba la conexión y sube cada rama UNA
+sola vez con todos los commits acumulados. El estado y el historial de
+intentos se guardan en .git/git-automatizado/cola_push.json.
+"""
+
+import os
+import re
+import json
+import time
+import socket
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+
+from git_trabajos import ejecutar_proceso, directorio_estado, directorio_git, PRIORIDAD_FONDO
+from git_push_por_partes import progreso as progreso_por_partes, subir_por_partes
+
+COLA_FILE = "cola_push.json"
+INTERVALO_REVISION = 60
+ESPERA_MAXIMA = 1800
+MAX_INTENTOS_GUARDADOS = 20
+
+# Textos de git que indican un problema de red (no de permisos ni de historial).
+# "unable to access" no vale: git lo antepone también a los 401/403/404 de HTTP
+ERRORES_DE_RED = (
+    "could not resolve host",
+    "could not resolve hostname",
+    "failed to connect",
+    "connection timed out",
+    "connection refused",
+    "network is unreachable",
+    "operation timed out",
+    "connection reset",
+    "the remote end hung up unexpectedly",
+    "tiempo agotado",
+)
+
+# El servidor respondió: credenciales, permisos, repositorio inexistente o push demasiado grande.
+# Reintentar más tarde no lo arregla, aunque git añada después "the remote end hung up"
+_PATRON_RESPUESTA_SERVIDOR = re.compile(
+    r"returned error: 4\d\d|http 4\d\d|authentication failed|permission denied|repository not found")
+
+_cerrojo = threading.Lock()
+
+
+def es_error_de_red(texto):
+    """Indica si un error de push se debe a la red (no llegó respuesta del servidor)"""
+    texto = (texto or "").lower()
+    if _PATRON_RESPUESTA_SERVIDOR.search(texto):
+        return False
+    return any(patron in texto for patron in ERRORES_DE_RED)
+
+
+def _ruta_cola(repo):
+    return os.path.join(directorio_estado(repo), COLA_FILE)
+
+
+def cargar_cola(repo):
+    """Estado de la cola de un repositorio: {'ramas': {rama: {...}}}"""
+    ruta = os.path.join(directorio_git(repo), "git-automatizado", COLA_FILE)
+    if not os.path.exists(ruta):
+        return {'ramas': {}}
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            cola = json.load(f)
+        cola.setdefault('ramas', {})
+        return cola
+    except (OSError, ValueError):
+        return {'ramas': {}}
+
+
+def guardar_cola(repo, cola):
+    ruta = _ruta_cola(repo)
+    temporal = ruta + ".tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(cola, f, indent=4, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def registrar_pendiente(repo, rama, remoto="origin", commit=None, motivo=""):
+    """Anota que la rama tiene commits sin subir"""
+    if commit is None:
+        exito, commit, _ = ejecutar_proceso(["git", "rev-parse", "HEAD"], cwd=repo)
+        commit = commit if exito else None
+    with _cerrojo:
+        cola = cargar_cola(repo)
+        datos = cola['ramas'].setdefault(rama, {
+            'remoto': remoto,
+            'pendientes': [],
+            'estado': 'pendiente',
+            'intentos': [],
+            'creado': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        })
+        if commit and commit not in datos['pendientes']:
+            datos['pendientes'].append(commit)
+        datos['estado'] = 'pendiente'
+        datos['remoto'] = remoto
+        if motivo:
+            datos['ultimo_error'] = motivo[:500]
+        guardar_cola(repo, cola)
+    return datos
+
+
+def pendientes(repo):
+    """Ramas con push pendiente: {rama: número de commits}"""
+    cola = cargar_cola(repo)
+    return {
+        rama: len(datos['pendientes']) or 1
+        for rama, datos in cola['ramas'].items()
+        if datos.get('estado') != 'subido'
+    }
+
+
+def _host_y_puerto(url):
+    """Host y puerto de la URL de un remoto (None si es una ruta local)"""
+    if "://" in url:
+        partes = urlparse(url)
+        if partes.scheme == "file":
+            return None
+        puertos = {'https': 443, 'http': 80, 'ssh': 22, 'git': 9418}
+        return partes.hostname, partes.port or puertos.get(partes.scheme, 443)
+    if ":" in url and not os.path.isabs(url) and not (len(url) > 1 and url[1] == ":"):
+        # Formato scp: usuario@host:ruta
+        return url.split(":", 1)[0].split("@")[-1], 22
+    return None
+
+
+def hay_conexion(repo, remoto="origin", timeout=5):
+    """Comprueba rápidamente si se puede llegar al servidor del remoto (sin autenticar)"""
+    exito, url, _ = ejecutar_proceso(["git", "remote", "get-url", remoto], cwd=repo, timeout=15)
+    if not exito or not url:
+        return False
+    destino = _host_y_puerto(url.strip())
+    if destino is None:
+        return os.path.exists(url.strip())
+    try:
+        with socket.create_connection(destino, timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def empujar_rama(repo, rama):
+    """Sube la rama una vez con todo lo acumulado y registra el intento"""
+    datos = cargar_cola(repo)['ramas'].get(rama)
+    if not datos:
+        return True, ""
+    remoto = datos.get('remoto', 'origin')
+    inicio = time.time()
+    if progreso_por_partes(repo, rama, remoto):
+        # Había un push por partes a medias: continuar desde el último tramo aceptado
+        exito, salida, error = subir_por_partes(repo, rama, remoto)
+    else:
+        exito, salida, error = ejecutar_proceso(["git", "push", "--progress", remoto, rama], cwd=repo)
+    with _cerrojo:
+        cola = cargar_cola(repo)
+        datos = cola['ramas'].get(rama, datos)
+        datos['intentos'].append({
+            'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'exito': exito,
+            'commits': len(datos['pendientes']),
+            'segundos': round(time.time() - inicio, 2),
+            'error': "" if exito else (error or salida)[:500],
+        })
+        datos['intentos'] = datos['intentos'][-MAX_INTENTOS_GUARDADOS:]
+        if exito:
+            datos['estado'] = 'subido'
+            datos['subidos'] = len(datos['pendientes'])
+            datos['pendientes'] = []
+            datos.pop('ultimo_error', None)
+        else:
+            datos['estado'] = 'pendiente' if es_error_de_red(error or salida) else 'error'
+            datos['ultimo_error'] = (error or salida)[:500]
+        cola['ramas'][rama] = datos
+        guardar_cola(repo, cola)
+    return exito, error or salida
+
+
+def _espera_reintento(datos):
+    """Espera exponencial según los fallos seguidos de la rama"""
+    fallos = 0
+    for intento in reversed(datos.get('intentos', [])):
+        if intento['exito']:
+            break
+        fallos += 1
+    if fallos == 0:
+        return 0
+    return min(ESPERA_MAXIMA, 30 * (2 ** (fallos - 1)))
+
+
+class ColaPush:
+    """Hilo en segundo plano que sube las ramas pendientes cuando vuelve la conexión"""
+
+    def __init__(self, gestor_trabajos, obtener_repos, al_subir=None, intervalo=INTERVALO_REVISION):
+        self.gestor_trabajos = gestor_trabajos
+        self.obtener_repos = obtener_repos
+        self.al_subir = al_subir
+        self.intervalo = intervalo
+        self._ultimo_intento = {}
+        self._en_curso = set()
+        self._despertar = threading.Event()
+        self._detener = False
+        self._hilo = None
+
+    def iniciar(self):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._bucle, daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        self._detener = True
+        self._despertar.set()
+
+    def revisar_ahora(self):
+        """Fuerza una revisión inmediata (p. ej. tras encolar un push)"""
+        self._despertar.set()
+
+    def _bucle(self):
+        while not self._detener:
+            try:
+                self.revisar()
+            except Exception:
+                pass
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+
+    def revisar(self):
+        """Encola un push por cada rama pendiente cuyo servidor sea alcanzable"""
+        for repo in self.obtener_repos():
+            if not os.path.isdir(repo):
+                continue
+            ramas = {
+                rama: datos for rama, datos in cargar_cola(repo)['ramas'].items()
+                if datos.get('estado') == 'pendiente'
+            }
+            if not ramas:
+                continue
+            conexiones = {}
+            for rama, datos in ramas.items():
+                clave = (repo, rama)
+                if clave in self._en_curso:
+                    continue
+                if time.time() - self._ultimo_intento.get(clave, 0) < _espera_reintento(datos):
+                    continue
+                remoto = datos.get('remoto', 'origin')
+                if remoto not in conexiones:
+                    conexiones[remoto] = hay_conexion(repo, remoto)
+                if not conexiones[remoto]:
+                    continue
+                self._en_curso.add(clave)
+                self._ultimo_intento[clave] = time.time()
+                self.gestor_trabajos.encolar(
+                    repo, f"Subir pendientes ({rama})",
+                    lambda trabajo, r=repo, b=rama: empujar_rama(r, b),
+                    prioridad=PRIORIDAD_FONDO,
+                    al_terminar=lambda trabajo, c=clave: self._terminado(c, trabajo)
+                )
+
+    def _terminado(self, clave, trabajo):
+        self._en_curso.discard(clave)
+        if self.al_subir and trabajo.resultado:
+            exito, detalle = trabajo.resultado
+            self.al_subir(clave[0], clave[1], exito, detalle)
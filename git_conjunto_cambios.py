@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conjunto de cambios compacto (para árboles de trabajo enormes)
+En vez de una lista de textos, un dict de BooleanVar y varias copias de la
+salida de git, los archivos con cambios se guardan en columnas:
+
+- Rutas comprimidas por prefijo: cada carpeta se guarda una sola vez en una
+  tabla y cada entrada solo guarda el índice de su carpeta y su nombre, que
+  va en un único bloque de bytes con la posición donde termina.
+- Estados (columna del índice y del árbol de trabajo) en bytearray y líneas
+  añadidas/eliminadas en array('i'), cargadas solo cuando se necesitan.
+- Selección como mapa de bits (un entero de Python: bit i = entrada i).
+
+Filtrar, contar y seleccionar todo se hacen con operaciones de C
+(bytes.translate, int(.., 2), itertools.compress) y no entrada por entrada.
+500.000 entradas ocupan unas decenas de MB.
+"""
+
+import re
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_right
+from itertools import compress
+
+from git_trabajos import ejecutar_proceso
+
+SIN_CARGAR = -2
+BINARIO = -1
+
+# Tablas de traducción para pasar de "un byte 0/1 por entrada" a texto binario y al revés
+_A_TEXTO = bytes.maketrans(b'\x00\x01', b'01')
+_DESDE_TEXTO = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def _tabla(codigos):
+    """Tabla para translate: 1 en los códigos pedidos, 0 en el resto"""
+    tabla = bytearray(256)
+    for codigo in codigos.encode('ascii') if isinstance(codigos, str) else codigos:
+        tabla[codigo] = 1
+    return bytes(tabla)
+
+
+def _contar_bits(numero):
+    return numero.bit_count() if sys.version_info >= (3, 10) else bin(numero).count('1')
+
+
+def bits_desde_bytes(mascara):
+    """Mapa de bits (int) a partir de un byte 0/1 por entrada"""
+    if not mascara:
+        return 0
+    return int(bytes(mascara)[::-1].translate(_A_TEXTO), 2)
+
+
+def bytes_desde_bits(bits, total):
+    """Un byte 0/1 por entrada a partir de un mapa de bits"""
+    if total == 0:
+        return b''
+    return format(bits, f'0{total}b').encode('ascii')[::-1][:total].translate(_DESDE_TEXTO)
+
+
+def _plegar(texto):
+    """Texto para comparar sin distinguir mayúsculas (ASCII: lower, que es mucho más rápido)"""
+    if texto.isascii():
+        return texto.lower()
+    return unicodedata.normalize('NFC', texto).casefold()
+
+
+class ConjuntoCambios:
+    """Archivos con cambios en columnas compactas, con selección en mapa de bits"""
+
+    __slots__ = ('directorios', 'dir_de', 'nombres', 'fin_nombre', 'estado_indice', 'estado_trabajo',
+                 'anadidas', 'eliminadas', 'seleccion', '_plegados', '_fin_plegado')
+
+    def __init__(self):
+        self.directorios = [""]
+        self.dir_de = array('I')
+        self.nombres = bytearray()
+        self.fin_nombre = array('I')
+        self.estado_indice = bytearray()
+        self.estado_trabajo = bytearray()
+        self.anadidas = array('i')
+        self.eliminadas = array('i')
+        self.seleccion = 0
+        # Copia de los nombres para buscar sin distinguir mayúsculas (se arma al primer filtro)
+        self._plegados = None
+        self._fin_plegado = None
+
+    # --- Construcción ---------------------------------------------------------
+
+    @classmethod
+    def desde_status_z(cls, datos):
+        """Construye el conjunto desde la salida de 'git status --porcelain -z'"""
+        conjunto = cls()
+        indice_dirs = {b"": 0}
+        directorios = [b""]
+        dir_de, fin_nombre, nombres = conjunto.dir_de, conjunto.fin_nombre, conjunto.nombres
+        estado_indice, estado_trabajo = conjunto.estado_indice, conjunto.estado_trabajo
+        campos = datos.split(b'\0')
+        i = 0
+        total = len(campos)
+        while i < total:
+            campo = campos[i]
+            i += 1
+            if len(campo) < 4:
+                continue
+            estado_indice.append(campo[0])
+            estado_trabajo.append(campo[1])
+            carpeta, _, nombre = campo[3:].rpartition(b'/')
+            numero = indice_dirs.get(carpeta)
+            if numero is None:
+                numero = indice_dirs[carpeta] = len(directorios)
+                directorios.append(carpeta)
+            dir_de.append(numero)
+            nombres += nombre
+            fin_nombre.append(len(nombres))
+            # En renombres/copias el siguiente campo es la ruta de origen
+            if campo[0] in b'RC' or campo[1] in b'RC':
+                i += 1
+        conjunto.directorios = [d.decode('utf-8', 'surrogateescape') for d in directorios]
+        n = len(dir_de)
+        conjunto.anadidas = array('i', [SIN_CARGAR]) * n
+        conjunto.eliminadas = array('i', [SIN_CARGAR]) * n
+        conjunto.seleccionar_todo()
+        return conjunto
+
+    @classmethod
+    def desde_git(cls, cwd=None):
+        exito, datos, _ = ejecutar_proceso(["git", "status", "--porcelain", "-z"], cwd=cwd, texto=False)
+        return cls.desde_status_z(datos if exito else b'')
+
+    # --- Acceso ----------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.dir_de)
+
+    def _nombre_bytes(self, i):
+        inicio = self.fin_nombre[i - 1] if i else 0
+        return bytes(self.nombres[inicio:self.fin_nombre[i]])
+
+    def ruta(self, i):
+        carpeta = self.directorios[self.dir_de[i]]
+        nombre = self._nombre_bytes(i).decode('utf-8', 'surrogateescape')
+        return f"{carpeta}/{nombre}" if carpeta else nombre
+
+    def rutas(self, indices):
+        return [self.ruta(i) for i in indices]
+
+    def estado(self, i):
+        return chr(self.estado_indice[i]) + chr(self.estado_trabajo[i])
+
+    def sin_seguimiento(self, i):
+        return self.estado_indice[i] == ord('?')
+
+    def preparado(self, i):
+        return self.estado_indice[i] not in b' ?'
+
+    def estadisticas_cargadas(self, i):
+        return self.anadidas[i] != SIN_CARGAR
+
+    def guardar_estadisticas(self, i, anadidas, eliminadas, binario):
+        if binario:
+            self.anadidas[i] = self.eliminadas[i] = BINARIO
+        else:
+            self.anadidas[i] = anadidas if anadidas is not None else 0
+            self.eliminadas[i] = eliminadas if eliminadas is not None else 0
+
+    # --- Máscaras (un int con un bit por entrada) ------------------------------
+
+    def mascara_todos(self):
+        return (1 << len(self)) - 1
+
+    def mascara_estados(self, codigos, columna=None):
+        """Entradas cuyo estado (del índice, del árbol de trabajo o cualquiera) está en codigos"""
+        tabla = _tabla(codigos)
+        if columna == 'indice':
+            return bits_desde_bytes(self.estado_indice.translate(tabla))
+        if columna == 'trabajo':
+            return bits_desde_bytes(self.estado_trabajo.translate(tabla))
+        return (bits_desde_bytes(self.estado_indice.translate(tabla))
+                | bits_desde_bytes(self.estado_trabajo.translate(tabla)))
+
+    def _bloque_plegado(self):
+        """(bloque de nombres sin mayúsculas, posición donde termina cada nombre en ese bloque)
+
+        Si todos los nombres son ASCII basta bytes.lower() y las posiciones son
+        las mismas. Con acentos o eñes se pliega cada nombre con casefold (y
+        NFC, como escribe los nombres macOS en NFD): "Ñandu" y "ñandu" coinciden,
+        y como el largo puede cambiar (ß -> ss) se guardan posiciones propias.
+        """
+        if self._plegados is None:
+            if self.nombres.isascii():
+                self._plegados = bytes(self.nombres).lower()
+                self._fin_plegado = self.fin_nombre
+            else:
+                plegados = bytearray()
+                fin = array('I')
+                for i in range(len(self)):
+                    plegados += _plegar(self._nombre_bytes(i).decode('utf-8', 'surrogateescape')).encode(
+                        'utf-8', 'surrogateescape')
+                    fin.append(len(plegados))
+                self._plegados = bytes(plegados)
+                self._fin_plegado = fin
+        return self._plegados, self._fin_plegado
+
+    def mascara_texto(self, texto):
+        """Entradas cuya ruta contiene texto (sin distinguir mayúsculas, también con acentos y eñes)"""
+        texto = _plegar(texto.strip())
+        if not texto:
+            return self.mascara_todos()
+        # Carpetas: se comprueba cada una una sola vez y se expande con el índice de carpeta
+        carpetas = bytes(texto in _plegar(d) for d in self.directorios)
+        resultado = bytearray(map(carpetas.__getitem__, self.dir_de))
+        # Nombres: búsqueda en el bloque completo; cada coincidencia se ubica por bisección
+        plegados, fin_plegado = self._bloque_plegado()
+        buscado = texto.encode('utf-8', 'surrogateescape')
+        # Con lookahead se ven también las coincidencias solapadas (los nombres van sin separador)
+        patron = b'(?=' + re.escape(buscado) + b')'
+        inicio_entrada = 0
+        for coincidencia in re.finditer(patron, plegados):
+            inicio = coincidencia.start()
+            if inicio < inicio_entrada:
+                continue
+            i = bisect_right(fin_plegado, inicio)
+            # Que no cruce al nombre siguiente
+            if i < len(self) and inicio + len(buscado) <= fin_plegado[i]:
+                resultado[i] = 1
+                inicio_entrada = fin_plegado[i]
+        # Rutas que solo coinciden cruzando la barra (p. ej. "src/ma") se buscan aparte
+        if '/' in texto:
+            for i in compress(range(len(self)), bytes(resultado).translate(_tabla(b'\x00'))):
+                if texto in _plegar(self.ruta(i)):
+                    resultado[i] = 1
+        return bits_desde_bytes(resultado)
+
+    def indices(self, mascara):
+        """Índices de las entradas de la máscara, en orden (array compacto)"""
+        if mascara == self.mascara_todos():
+            return array('I', range(len(self)))
+        return array('I', compress(range(len(self)), bytes_desde_bits(mascara, len(self))))
+
+    def contar(self, mascara=None):
+        return _contar_bits(self.mascara_todos() if mascara is None else mascara)
+
+    # --- Selección ----------------------------------------------------------------
+
+    def seleccionar_todo(self, mascara=None):
+        self.seleccion |= self.mascara_todos() if mascara is None else mascara
+
+    def deseleccionar_todo(self, mascara=None):
+        self.seleccion &= ~(self.mascara_todos() if mascara is None else mascara)
+
+    def alternar(self, i):
+        self.seleccion ^= 1 << i
+
+    def esta_seleccionado(self, i):
+        return (self.seleccion >> i) & 1 == 1
+
+    def contar_seleccionados(self, mascara=None):
+        return _contar_bits(self.seleccion if mascara is None else self.seleccion & mascara)
+
+    def seleccionados(self):
+        """Rutas seleccionadas (solo se crean los textos al final)"""
+        return self.rutas(self.indices(self.seleccion))
+
+    def memoria(self):
+        """Bytes aproximados que ocupa el conjunto (sin contar el intérprete)"""
+        columnas = (self.dir_de, self.fin_nombre, self.anadidas, self.eliminadas)
+        total = sum(c.itemsize * len(c) for c in columnas)
+        total += len(self.nombres) + len(self.estado_indice) + len(self.estado_trabajo)
+        total += sum(sys.getsizeof(d) for d in self.directorios) + sys.getsizeof(self.directorios)
+        total += sys.getsizeof(self.seleccion)
+        return total
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Buscar repositorios git dentro de una carpeta
+Para dar de alta de una vez todos los proyectos de un equipo (p. ej. una
+carpeta con 200 clones) sin elegirlos uno a uno:
+
+- Recorre la carpeta en paralelo con os.scandir (varios hilos listando
+  carpetas a la vez, como git_directorios_pesados.py)
+- Al encontrar un ".git" la carpeta es un repositorio y no se baja más
+  (los submódulos y repositorios anidados van con su proyecto)
+- No entra en carpetas pesadas conocidas (node_modules, venv, build...),
+  ni en carpetas ocultas o del sistema, ni sigue enlaces simbólicos
+- Tiene límite de profundidad y de tiempo: si se acaba el tiempo devuelve
+  lo encontrado hasta entonces
+- La URL del remoto se lee directamente de .git/config, sin lanzar git
+
+Uso:
+    python git_descubrimiento.py C:\\dev --profundidad 4 --segundos 20
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from git_directorios_pesados import tipo_pesado
+
+PROFUNDIDAD_MAXIMA = 6
+LIMITE_SEGUNDOS = 20
+REMOTO_PREFERIDO = "origin"
+
+# Carpetas pesadas que no detecta tipo_pesado y que no contienen proyectos propios
+CARPETAS_PESADAS = {'site-packages', 'Pods', 'DerivedData'}
+# Carpetas de sistema de la raíz de cada unidad de Windows
+CARPETAS_RAIZ_UNIDAD = {'$Recycle.Bin', 'System Volume Information'}
+
+
+def _rutas_sistema():
+    """Rutas absolutas del sistema y de programas (enormes y sin proyectos), según la plataforma
+
+    Se comparan rutas completas y no nombres: una carpeta de proyectos
+    llamada "dev" o "Library" dentro de la carpeta de usuario sí se recorre.
+    """
+    rutas = [os.environ.get(variable) for variable in
+             ('SystemRoot', 'ProgramFiles', 'ProgramFiles(x86)', 'ProgramData', 'APPDATA', 'LOCALAPPDATA')]
+    inicio = os.path.expanduser("~")
+    rutas += [os.path.join(inicio, "AppData"), os.path.join(inicio, "Library")]
+    if sys.platform != 'win32':
+        rutas += ["/proc", "/sys", "/dev", "/run", "/snap", "/System", "/Library", "/Applications"]
+    return {os.path.normcase(os.path.abspath(ruta)) for ruta in rutas if ruta}
+
+
+RUTAS_SISTEMA = _rutas_sistema()
+
+_PATRON_SECCION = re.compile(r'^\s*\[\s*([^\s\]"]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+_PATRON_CLAVE = re.compile(r'^\s*([A-Za-z][A-Za-z0-9-]*)\s*(?:=\s*(.*))?$')
+
+
+def directorio_git(ruta):
+    """Carpeta con los datos de git del repositorio en ruta (resuelve ".git" como archivo)
+
+    En worktrees y submódulos ".git" es un archivo "gitdir: ..."; la
+    configuración compartida está en la carpeta que indica "commondir".
+    """
+    punto_git = os.path.join(ruta, ".git")
+    if os.path.isdir(punto_git):
+        return punto_git
+    try:
+        with open(punto_git, 'r', encoding='utf-8') as f:
+            contenido = f.read().strip()
+    except OSError:
+        return None
+    if not contenido.startswith("gitdir:"):
+        return None
+    destino = contenido[len("gitdir:"):].strip()
+    destino = os.path.normpath(os.path.join(ruta, destino))
+    try:
+        with open(os.path.join(destino, "commondir"), 'r', encoding='utf-8') as f:
+            destino = os.path.normpath(os.path.join(destino, f.read().strip()))
+    except OSError:
+        pass
+    return destino
+
+
+def _valor(texto):
+    """Valor de una línea de git config: sin comentarios ni comillas"""
+    resultado = []
+    entre_comillas = False
+    i = 0
+    while i < len(texto):
+        caracter = texto[i]
+        if caracter == '\\' and i + 1 < len(texto):
+            resultado.append({'n': '\n', 't': '\t'}.get(texto[i + 1], texto[i + 1]))
+            i += 2
+            continue
+        if caracter == '"':
+            entre_comillas = not entre_comillas
+        elif caracter in '#;' and not entre_comillas:
+            break
+        else:
+            resultado.append(caracter)
+        i += 1
+    return "".join(resultado).strip()
+
+
+def remotos_de_config(ruta_config):
+    """{nombre: url} de los [remote "..."] de un archivo de configuración de git"""
+    remotos = {}
+    seccion = subseccion = None
+    try:
+        with open(ruta_config, 'r', encoding='utf-8', errors='replace') as f:
+            for linea in f:
+                coincidencia = _PATRON_SECCION.match(linea)
+                if coincidencia:
+                    seccion = coincidencia.group(1).lower()
+                    subseccion = coincidencia.group(2)
+                    continue
+                if seccion != "remote" or subseccion is None:
+                    continue
+                coincidencia = _PATRON_CLAVE.match(linea)
+                if coincidencia and coincidencia.group(1).lower() == "url" and coincidencia.group(2):
+                    # Si hay varias url, la primera es la que usa git para fetch
+                    remotos.setdefault(subseccion, _valor(coincidencia.group(2)))
+    except OSError:
+        pass
+    return remotos
+
+
+def remoto_principal(ruta):
+    """(nombre, url) del remoto del repositorio (origin si existe), o (None, None)"""
+    carpeta_git = directorio_git(ruta)
+    if carpeta_git is None:
+        return None, None
+    remotos = remotos_de_config(os.path.join(carpeta_git, "config"))
+    if not remotos:
+        return None, None
+    nombre = REMOTO_PREFERIDO if REMOTO_PREFERIDO in remotos else sorted(remotos)[0]
+    return nombre, remotos[nombre]
+
+
+def _saltar(ruta, nombre, incluir_ocultas):
+    if nombre in CARPETAS_PESADAS or os.path.normcase(ruta) in RUTAS_SISTEMA:
+        return True
+    padre = os.path.dirname(ruta)
+    if nombre in CARPETAS_RAIZ_UNIDAD and os.path.dirname(padre) == padre:
+        return True
+    if nombre.startswith('.') and not incluir_ocultas:
+        return True
+    return tipo_pesado(ruta, nombre) is not None
+
+
+def _listar(ruta, profundidad, incluir_ocultas):
+    """Lista una carpeta: (ruta, profundidad, es_repositorio, subcarpetas a visitar, saltadas)"""
+    subcarpetas = []
+    saltadas = 0
+    try:
+        with os.scandir(ruta) as entradas:
+            entradas = list(entradas)
+    except OSError:
+        return ruta, profundidad, False, [], 0
+    for entrada in entradas:
+        if entrada.name == ".git":
+            # Repositorio: no se baja más
+            return ruta, profundidad, True, [], 0
+    for entrada in entradas:
+        try:
+            if not entrada.is_dir(follow_symlinks=False):
+                continue
+        except OSError:
+            continue
+        if _saltar(entrada.path, entrada.name, incluir_ocultas):
+            saltadas += 1
+        else:
+            subcarpetas.append(entrada.path)
+    return ruta, profundidad, False, subcarpetas, saltadas
+
+
+def buscar_repositorios(raiz, profundidad_maxima=PROFUNDIDAD_MAXIMA, limite_segundos=LIMITE_SEGUNDOS,
+                        max_hilos=None, incluir_ocultas=False, al_encontrar=None):
+    """Busca repositorios git bajo raiz
+
+    al_encontrar(repo) se llama (desde el hilo que busca) con cada repositorio
+    encontrado. Resultado: {'repositorios': [{'ruta', 'remoto', 'url'}],
+    'carpetas', 'saltadas', 'segundos', 'completo'}
+    """
+    inicio = time.perf_counter()
+    raiz = os.path.abspath(raiz)
+    repositorios = []
+    carpetas = saltadas = 0
+    completo = True
+
+    with ThreadPoolExecutor(max_workers=max_hilos or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        pendientes = {pool.submit(_listar, raiz, 0, incluir_ocultas)}
+        while pendientes:
+            if time.perf_counter() - inicio > limite_segundos:
+                completo = False
+                for futuro in pendientes:
+                    futuro.cancel()
+                break
+            hechos, pendientes = wait(pendientes, timeout=0.5, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                ruta, profundidad, es_repositorio, subcarpetas, saltadas_aqui = futuro.result()
+                carpetas += 1
+                saltadas += saltadas_aqui
+                if es_repositorio:
+                    remoto, url = remoto_principal(ruta)
+                    repo = {'ruta': os.path.normpath(ruta), 'remoto': remoto, 'url': url}
+                    repositorios.append(repo)
+                    if al_encontrar:
+                        al_encontrar(repo)
+                    continue
+                if profundidad >= profundidad_maxima:
+                    # Más abajo no se mira: cuenta como no completo solo si había dónde bajar
+                    completo = completo and not subcarpetas
+                    continue
+                for subcarpeta in subcarpetas:
+                    pendientes.add(pool.submit(_listar, subcarpeta, profundidad + 1, incluir_ocultas))
+
+    return {
+        'repositorios': sorted(repositorios, key=lambda r: r['ruta'].lower()),
+        'carpetas': carpetas,
+        'saltadas': saltadas,
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'completo': completo,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca repositorios git dentro de una carpeta")
+    parser.add_argument("raiz", nargs="?", default=os.path.expanduser("~"))
+    parser.add_argument("--profundidad", type=int, default=PROFUNDIDAD_MAXIMA)
+    parser.add_argument("--segundos", type=float, default=LIMITE_SEGUNDOS)
+    parser.add_argument("--ocultas", action="store_true", help="entrar también en carpetas ocultas")
+    parser.add_argument("--json", action="store_true", help="salida en JSON")
+    args = parser.parse_args()
+    resultado = buscar_repositorios(args.raiz, args.profundidad, args.segundos, incluir_ocultas=args.ocultas)
+    if args.json:
+        print(json.dumps(resultado, indent=4, ensure_ascii=False))
+        return 0
+    for repo in resultado['repositorios']:
+        print(f"📁 {repo['ruta']}" + (f"  ({repo['remoto']}: {repo['url']})" if repo['url'] else ""))
+    print(f"\n{len(resultado['repositorios'])} repositorio(s) en {resultado['segundos']} s · "
+          f"{resultado['carpetas']} carpeta(s) listadas, {resultado['saltadas']} saltada(s)"
+          + ("" if resultado['completo'] else " · búsqueda incompleta (límite de tiempo o profundidad)"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
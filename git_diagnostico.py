@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diagnóstico de memoria para sesiones largas
+La aplicación se queda abierta todo el día y cada diálogo crea sus widgets
+de nuevo. Para comprobar que nada se acumula se toman muestras periódicas:
+
+- memoria de Python (tracemalloc) y del proceso, con las líneas de código
+  que más han crecido desde la primera muestra y desde la anterior
+- widgets vivos por clase, callbacks 'after' pendientes y comandos de Tcl
+  creados desde Python (cada bind/command/trace es uno: si solo suben, algo
+  no se está liberando)
+- hilos vivos por nombre
+
+Es opcional (tracemalloc hace más lento el intérprete). Se activa en
+git_config.json, clave "diagnostico", o con la variable de entorno
+GIT_AUTOMATIZADO_DIAGNOSTICO=1:
+    {"activo": true, "intervalo_segundos": 60, "marcos": 10, "archivo": "..."}
+
+Cada muestra se añade como una línea JSON al archivo (por defecto
+~/.git-automatizado/diagnostico.jsonl). Para comprobar sin interfaz que las
+operaciones repetidas no hacen crecer la memoria:
+    python git_diagnostico.py --repo C:\\proyecto --repeticiones 50
+"""
+
+import gc
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+import tracemalloc
+from collections import Counter, deque
+
+from git_metricas import METRICAS, ruta_por_defecto
+
+VARIABLE_ACTIVAR = "GIT_AUTOMATIZADO_DIAGNOSTICO"
+INTERVALO = 60
+MARCOS = 10
+MUESTRAS_GUARDADAS = 240
+LINEAS_CRECIMIENTO = 10
+# Crecimiento por repetición (bytes) a partir del cual se considera que algo se acumula
+UMBRAL_POR_REPETICION = 4096
+
+# Comandos de Tcl que tkinter crea para callbacks de Python: "<id><nombre de la función>"
+_PATRON_COMANDO_PYTHON = re.compile(r"^\d+[A-Za-z_<]")
+_PATRON_NOMBRE_HILO = re.compile(r"^Thread-\d+ \((.+)\)$|^(.*?)[-_ ]?\d*$")
+
+# Lo que asigna el propio tracemalloc o el importador no es de la aplicación
+_FILTROS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def memoria_proceso():
+    """Memoria residente del proceso en bytes (None si no se puede saber)"""
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+
+            class ContadoresMemoria(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                    (nombre, ctypes.c_size_t) for nombre in (
+                        'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage',
+                        'QuotaPagedPoolUsage', 'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage',
+                        'PagefileUsage', 'PeakPagefileUsage')]
+
+            contadores = ContadoresMemoria()
+            contadores.cb = ctypes.sizeof(contadores)
+            proceso = ctypes.windll.kernel32.GetCurrentProcess()
+            if not ctypes.windll.psapi.GetProcessMemoryInfo(proceso, ctypes.byref(contadores), contadores.cb):
+                return None
+            return contadores.WorkingSetSize
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        return None
+
+
+def contar_widgets(raiz):
+    """(total, Counter por clase) de los widgets vivos bajo raiz"""
+    por_clase = Counter()
+    pendientes = [raiz]
+    while pendientes:
+        widget = pendientes.pop()
+        por_clase[widget.winfo_class()] += 1
+        pendientes.extend(widget.winfo_children())
+    return sum(por_clase.values()), por_clase
+
+
+def callbacks_pendientes(raiz):
+    """Callbacks programados con after() que aún no se han ejecutado"""
+    return len(raiz.tk.splitlist(raiz.tk.call('after', 'info')))
+
+
+def comandos_python(raiz):
+    """Comandos de Tcl que apuntan a funciones de Python (bind, command, trace...)"""
+    return sum(1 for nombre in raiz.tk.splitlist(raiz.tk.call('info', 'commands'))
+               if _PATRON_COMANDO_PYTHON.match(nombre))
+
+
+def hilos_por_nombre():
+    """Hilos vivos agrupados por nombre (sin el número que añade threading)"""
+    nombres = Counter()
+    for hilo in threading.enumerate():
+        coincidencia = _PATRON_NOMBRE_HILO.match(hilo.name)
+        nombres[(coincidencia.group(1) or coincidencia.group(2) or hilo.name) if coincidencia else hilo.name] += 1
+    return nombres
+
+
+def _lineas_crecimiento(instantanea, referencia, cantidad=LINEAS_CRECIMIENTO):
+    """Líneas de código cuya memoria más creció entre referencia e instantanea"""
+    lineas = []
+    for estadistica in instantanea.compare_to(referencia, 'lineno'):
+        if estadistica.size_diff <= 0:
+            continue
+        marco = estadistica.traceback[0]
+        lineas.append({
+            'lugar': f"{os.path.basename(marco.filename)}:{marco.lineno}",
+            'crecimiento': estadistica.size_diff,
+            'bloques': estadistica.count_diff,
+            'total': estadistica.size,
+        })
+        if len(lineas) >= cantidad:
+            break
+    return lineas
+
+
+class MonitorMemoria:
+    """Muestras periódicas de memoria, widgets, callbacks e hilos"""
+
+    def __init__(self):
+        self.activo = False
+        self.intervalo = INTERVALO
+        self.marcos = MARCOS
+        self.archivo = ruta_por_defecto("diagnostico.jsonl")
+        self.muestras = deque(maxlen=MUESTRAS_GUARDADAS)
+        self.inicio = None
+        self._raiz = None
+        self._programado = None
+        self._base = None
+        self._anterior = None
+        self._iniciado_aqui = False
+        self._muestreando = False
+        self._cerrojo = threading.Lock()
+        self._suscriptores = []
+
+    def configurar(self, config=None):
+        """Aplica la sección "diagnostico" de git_config.json; devuelve si hay que activarlo"""
+        config = config or {}
+        self.intervalo = max(5, int(config.get('intervalo_segundos', INTERVALO)))
+        self.marcos = max(1, int(config.get('marcos', MARCOS)))
+        if config.get('archivo'):
+            self.archivo = config['archivo']
+        return bool(config.get('activo')) or os.environ.get(VARIABLE_ACTIVAR) == "1"
+
+    # --- Suscriptores (el panel de diagnóstico) ------------------------------------
+
+    def suscribir(self, funcion):
+        """funcion(muestra) tras cada muestra, en el hilo de Tk; devuelve cómo anular la suscripción"""
+        self._suscriptores.append(funcion)
+        return lambda: self._suscriptores.remove(funcion) if funcion in self._suscriptores else None
+
+    # --- Ciclo de vida -------------------------------------------------------------
+
+    def iniciar(self, raiz=None):
+        if self.activo:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.marcos)
+            self._iniciado_aqui = True
+        self.activo = True
+        self.inicio = time.time()
+        self._raiz = raiz
+        gc.collect()
+        self._base = self._anterior = tracemalloc.take_snapshot().filter_traces(_FILTROS)
+        if raiz is not None:
+            self._programado = raiz.after(0, self._tick)
+
+    def detener(self):
+        if not self.activo:
+            return
+        self.activo = False
+        if self._raiz is not None and self._programado is not None:
+            try:
+                self._raiz.after_cancel(self._programado)
+            except Exception:
+                pass
+        self._programado = None
+        self._base = self._anterior = None
+        if self._iniciado_aqui:
+            tracemalloc.stop()
+            self._iniciado_aqui = False
+
+    # --- Muestras --------------------------------------------------------------------
+
+    def _datos_tk(self):
+        """Lo que hay que leer desde el hilo de Tk"""
+        raiz = self._raiz
+        if raiz is None:
+            return {}
+        total, por_clase = contar_widgets(raiz)
+        return {
+            'widgets': total,
+            'widgets_por_clase': dict(por_clase.most_common(12)),
+            'callbacks_after': callbacks_pendientes(raiz),
+            'comandos_python': comandos_python(raiz),
+        }
+
+    def _completar(self, muestra):
+        """Parte lenta de la muestra (tracemalloc y archivo): puede ir en otro hilo"""
+        gc.collect()
+        instantanea = tracemalloc.take_snapshot().filter_traces(_FILTROS)
+        actual, pico = tracemalloc.get_traced_memory()
+        muestra.update({
+            'memoria_python': actual,
+            'pico_python': pico,
+            'memoria_proceso': memoria_proceso(),
+            'objetos_gc': len(gc.get_objects()),
+            'hilos': threading.active_count(),
+            'hilos_por_nombre': dict(hilos_por_nombre()),
+            'crecimiento_desde_inicio': _lineas_crecimiento(instantanea, self._base),
+            'crecimiento_ultimo': _lineas_crecimiento(instantanea, self._anterior),
+        })
+        self._anterior = instantanea
+        with self._cerrojo:
+            self.muestras.append(muestra)
+        self._guardar(muestra)
+        return muestra
+
+    def muestrear(self):
+        """Toma una muestra completa ahora (desde el hilo de Tk o sin interfaz)"""
+        if not self.activo or self._muestreando:
+            return self.ultima()
+        muestra = {'ts': time.time(), 'segundos': round(time.time() - self.inicio, 1)}
+        muestra.update(self._datos_tk())
+        return self._completar(muestra)
+
+    def _tick(self):
+        """Muestra periódica: lo de Tk aquí; tracemalloc y el archivo en un hilo"""
+        self._programado = None
+        if not self.activo:
+            return
+        if not self._muestreando:
+            self._muestreando = True
+            muestra = {'ts': time.time(), 'segundos': round(time.time() - self.inicio, 1)}
+            muestra.update(self._datos_tk())
+
+            def completar():
+                try:
+                    self._completar(muestra)
+                finally:
+                    self._muestreando = False
+                self._avisar(muestra)
+
+            threading.Thread(target=completar, daemon=True, name="diagnostico").start()
+        self._programado = self._raiz.after(self.intervalo * 1000, self._tick)
+
+    def _avisar(self, muestra):
+        if self._raiz is None:
+            return
+        for funcion in list(self._suscriptores):
+            try:
+                self._raiz.after(0, lambda f=funcion: f(muestra))
+            except RuntimeError:
+                pass
+
+    def _guardar(self, muestra):
+        if not self.archivo:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.archivo)), exist_ok=True)
+            with open(self.archivo, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(muestra, ensure_ascii=False) + "\n")
+        except OSError:
+            pass
+
+    def exportar(self, ruta):
+        """Guarda todas las muestras de la sesión en un JSON"""
+        with self._cerrojo:
+            muestras = list(self.muestras)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump({'inicio': self.inicio, 'intervalo': self.intervalo, 'muestras': muestras,
+                       'tendencia': self.tendencia()}, f, indent=4, ensure_ascii=False)
+        return ruta
+
+    def ultima(self):
+        with self._cerrojo:
+            return self.muestras[-1] if self.muestras else None
+
+    def tendencia(self, clave='memoria_python', ultimas=None):
+        """Crecimiento por muestra (pendiente de mínimos cuadrados) de clave en las últimas muestras"""
+        with self._cerrojo:
+            valores = [m[clave] for m in self.muestras if m.get(clave) is not None]
+        if ultimas:
+            valores = valores[-ultimas:]
+        return pendiente(valores)
+
+
+def pendiente(valores):
+    """Pendiente de la recta que mejor ajusta los valores (0 con menos de 2)"""
+    n = len(valores)
+    if n < 2:
+        return 0.0
+    media_x = (n - 1) / 2
+    media_y = sum(valores) / n
+    numerador = sum((x - media_x) * (y - media_y) for x, y in enumerate(valores))
+    denominador = sum((x - media_x) ** 2 for x in range(n))
+    return numerador / denominador
+
+
+def medir_repeticiones(operacion, repeticiones=30, calentamiento=3, raiz=None):
+    """Repite operacion() y mide cuánto crece todo por repetición
+
+    Las primeras repeticiones (calentamiento) llenan cachés y no cuentan.
+    Devuelve {'memoria_python': bytes/repetición, 'widgets': ..., ...} y las
+    líneas de código que más crecieron.
+    """
+    iniciado_aqui = not tracemalloc.is_tracing()
+    if iniciado_aqui:
+        tracemalloc.start(MARCOS)
+    try:
+        for _ in range(calentamiento):
+            operacion()
+        series = {'memoria_python': []}
+        if raiz is not None:
+            series.update({'widgets': [], 'callbacks_after': [], 'comandos_python': []})
+        gc.collect()
+        inicial = tracemalloc.take_snapshot().filter_traces(_FILTROS)
+        for _ in range(repeticiones):
+            operacion()
+            gc.collect()
+            series['memoria_python'].append(tracemalloc.get_traced_memory()[0])
+            if raiz is not None:
+                raiz.update()
+                series['widgets'].append(contar_widgets(raiz)[0])
+                series['callbacks_after'].append(callbacks_pendientes(raiz))
+                series['comandos_python'].append(comandos_python(raiz))
+        final = tracemalloc.take_snapshot().filter_traces(_FILTROS)
+        return {
+            'repeticiones': repeticiones,
+            'por_repeticion': {clave: round(pendiente(valores), 1) for clave, valores in series.items()},
+            'crecimiento': _lineas_crecimiento(final, inicial, 5),
+        }
+    finally:
+        if iniciado_aqui:
+            tracemalloc.stop()
+
+
+def es_plano(resultado, umbral=UMBRAL_POR_REPETICION):
+    """Si una medición de medir_repeticiones no muestra acumulación"""
+    por_repeticion = resultado['por_repeticion']
+    if por_repeticion.get('memoria_python', 0) > umbral:
+        return False
+    # Widgets, callbacks y comandos de Tcl deberían volver exactamente a lo que había
+    return all(por_repeticion.get(clave, 0) < 0.5 for clave in ('widgets', 'callbacks_after', 'comandos_python'))
+
+
+def describir(nombre, resultado, umbral=UMBRAL_POR_REPETICION):
+    """Líneas de texto con el resultado de medir_repeticiones"""
+    por_repeticion = resultado['por_repeticion']
+    plano = es_plano(resultado, umbral)
+    lineas = [f"{'✓' if plano else '⚠'} {nombre}: {por_repeticion['memoria_python'] / 1024:+.1f} KB por repetición "
+              f"({resultado['repeticiones']} repeticiones)"]
+    for clave in ('widgets', 'callbacks_after', 'comandos_python'):
+        if clave in por_repeticion:
+            lineas.append(f"   {clave}: {por_repeticion[clave]:+.2f} por repetición")
+    if not plano:
+        for linea in resultado['crecimiento']:
+            lineas.append(f"   {linea['lugar']}: +{linea['crecimiento'] / 1024:.1f} KB ({linea['bloques']:+d} bloques)")
+    return lineas
+
+
+MONITOR = MonitorMemoria()
+
+
+def _metricas_de_diagnostico():
+    # Solo la última muestra: leer Tk desde el hilo que exporta no es seguro
+    muestra = MONITOR.ultima()
+    if not MONITOR.activo or muestra is None:
+        return []
+    metricas = []
+    for nombre, clave in (('memoria_python_bytes', 'memoria_python'), ('memoria_proceso_bytes', 'memoria_proceso'),
+                          ('widgets_tk', 'widgets'), ('callbacks_after_pendientes', 'callbacks_after'),
+                          ('comandos_python_tk', 'comandos_python'), ('hilos_activos', 'hilos')):
+        if muestra.get(clave) is not None:
+            metricas.append((nombre, 'gauge', muestra[clave], {}))
+    return metricas
+
+
+METRICAS.agregar_fuente(_metricas_de_diagnostico)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comprueba que repetir operaciones no hace crecer la memoria")
+    parser.add_argument("--repo", default=".")
+    parser.add_argument("--repeticiones", type=int, default=30)
+    parser.add_argument("--umbral", type=float, default=UMBRAL_POR_REPETICION,
+                        help="bytes por repetición a partir de los que se considera una fuga")
+    args = parser.parse_args()
+    repo = os.path.abspath(args.repo)
+
+    import git_operaciones
+    import git_parches
+    from git_conjunto_cambios import ConjuntoCambios
+
+    def leer_fragmentos():
+        lector = git_parches.LectorFragmentos(repo)
+        while lector.siguientes():
+            pass
+        lector.cerrar()
+
+    operaciones = (
+        ("Estado del repositorio", lambda: git_operaciones.estado(repo)),
+        ("Lista de cambios (selector)", lambda: ConjuntoCambios.desde_git(repo).seleccionados()),
+        ("Fragmentos del diff", leer_fragmentos),
+    )
+    todo_plano = True
+    for nombre, operacion in operaciones:
+        resultado = medir_repeticiones(operacion, args.repeticiones)
+        todo_plano = todo_plano and es_plano(resultado, args.umbral)
+        for linea in describir(nombre, resultado, args.umbral):
+            print(linea)
+    return 0 if todo_plano else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
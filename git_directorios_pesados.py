@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detección de carpetas pesadas antes de "git add ."
+Recorre el proyecto en paralelo con os.scandir, reconoce carpetas generadas
+conocidas (node_modules, venv, dist, build, __pycache__...) y cuenta sus
+archivos y bytes para proponer entradas de .gitignore.
+
+No se baja por carpetas que git ya ignora (se preguntan con un solo
+"git check-ignore" por tanda) y dentro de una carpeta pesada solo se
+cuentan archivos hasta MAX_ARCHIVOS_CONTEO: para avisar basta con saber que
+es grande, no hace falta recorrer un node_modules entero.
+
+Cada carpeta se guarda en caché con su mtime: solo se vuelven a listar las
+carpetas cuyo mtime cambió (se crearon o borraron entradas dentro). Si se
+acaba el tiempo se guarda lo leído hasta entonces.
+"""
+
+import os
+import json
+import time
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from git_trabajos import ejecutar_proceso, directorio_estado
+
+CACHE_DIRECTORIOS = "cache_directorios.json"
+
+# nombre o patrón -> (descripción, archivo que debe existir dentro para confirmar el tipo)
+PATRONES_PESADOS = {
+    'node_modules': ("Dependencias de Node.js", None),
+    'bower_components': ("Dependencias de Bower", None),
+    'venv': ("Entorno virtual de Python", None),
+    '.venv': ("Entorno virtual de Python", None),
+    'env': ("Entorno virtual de Python", "pyvenv.cfg"),
+    '__pycache__': ("Caché de Python", None),
+    '.pytest_cache': ("Caché de pytest", None),
+    '.mypy_cache': ("Caché de mypy", None),
+    '.ruff_cache': ("Caché de ruff", None),
+    '.tox': ("Entornos de tox", None),
+    '.nox': ("Entornos de nox", None),
+    '*.egg-info': ("Metadatos de paquete Python", None),
+    'dist': ("Archivos generados (distribución)", None),
+    'build': ("Archivos generados (compilación)", None),
+    'target': ("Compilados de Rust/Java", None),
+    '.gradle': ("Caché de Gradle", None),
+    '.next': ("Compilados de Next.js", None),
+    '.nuxt': ("Compilados de Nuxt", None),
+    '.parcel-cache': ("Caché de Parcel", None),
+    '.angular': ("Caché de Angular", None),
+    'coverage': ("Informes de cobertura", None),
+    'htmlcov': ("Informes de cobertura", None),
+    'bin': ("Compilados de .NET", "Debug"),
+    'obj': ("Compilados de .NET", "Debug"),
+}
+
+# Por debajo de esto no vale la pena molestar al usuario
+MIN_ARCHIVOS_AVISO = 50
+MIN_BYTES_AVISO = 5 * 1024 * 1024
+# Dentro de una carpeta pesada se deja de contar a partir de aquí
+MAX_ARCHIVOS_CONTEO = 5000
+
+
+def tipo_pesado(ruta, nombre):
+    """Descripción si la carpeta es de un tipo pesado conocido, None si no"""
+    for patron, (descripcion, marcador) in PATRONES_PESADOS.items():
+        if nombre == patron or ('*' in patron and fnmatch.fnmatch(nombre, patron)):
+            if marcador and not os.path.exists(os.path.join(ruta, marcador)):
+                continue
+            return descripcion
+    return None
+
+
+def _cargar_cache(repo):
+    ruta = os.path.join(directorio_estado(repo), CACHE_DIRECTORIOS)
+    if not os.path.exists(ruta):
+        return {}
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_cache(repo, cache):
+    ruta = os.path.join(directorio_estado(repo), CACHE_DIRECTORIOS)
+    try:
+        temporal = ruta + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+    except OSError:
+        pass
+
+
+def _listar_directorio(repo, relativa, cache):
+    """Cuenta los archivos directos de una carpeta; usa la caché si su mtime no cambió
+
+    Devuelve (relativa, datos, relistada) con datos = {'mtime', 'archivos', 'bytes', 'subdirs'}.
+    """
+    ruta = os.path.join(repo, relativa) if relativa else repo
+    try:
+        mtime = os.stat(ruta).st_mtime_ns
+    except OSError:
+        return relativa, None, False
+    previo = cache.get(relativa)
+    # Las entradas con 'acotado' son conteos de carpeta pesada (sin subcarpetas): no valen aquí
+    if previo and previo.get('mtime') == mtime and 'acotado' not in previo:
+        return relativa, previo, False
+    archivos = 0
+    total_bytes = 0
+    subdirs = []
+    try:
+        with os.scandir(ruta) as entradas:
+            for entrada in entradas:
+                try:
+                    if entrada.is_dir(follow_symlinks=False):
+                        subdirs.append(entrada.name)
+                    else:
+                        archivos += 1
+                        total_bytes += entrada.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    except OSError:
+        return relativa, None, False
+    return relativa, {'mtime': mtime, 'archivos': archivos, 'bytes': total_bytes, 'subdirs': subdirs}, True
+
+
+def _contar_pesada(repo, relativa, cache, maximo=MAX_ARCHIVOS_CONTEO):
+    """Cuenta archivos y bytes de una carpeta pesada hasta 'maximo' archivos (sin guardar sus subcarpetas)
+
+    Devuelve (relativa, datos, relistada) con datos = {'mtime', 'archivos', 'bytes',
+    'subdirs': [], 'acotado'}; acotado indica que había más archivos sin contar.
+    """
+    ruta = os.path.join(repo, relativa)
+    try:
+        mtime = os.stat(ruta).st_mtime_ns
+    except OSError:
+        return relativa, None, False
+    previo = cache.get(relativa)
+    if previo and previo.get('mtime') == mtime and 'acotado' in previo:
+        return relativa, previo, False
+    archivos = 0
+    total_bytes = 0
+    pila = [ruta]
+    while pila and archivos < maximo:
+        try:
+            with os.scandir(pila.pop()) as entradas:
+                for entrada in entradas:
+                    try:
+                        if entrada.is_dir(follow_symlinks=False):
+                            pila.append(entrada.path)
+                        else:
+                            archivos += 1
+                            total_bytes += entrada.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    datos = {'mtime': mtime, 'archivos': archivos, 'bytes': total_bytes, 'subdirs': [],
+             'acotado': bool(pila) or archivos > maximo}
+    return relativa, datos, True
+
+
+def _ignoradas(repo, rutas):
+    """Las rutas de carpeta (relativas) que git ignora, con una sola llamada a git check-ignore"""
+    if not rutas:
+        return set()
+    entrada = ''.join(r.replace(os.sep, '/') + '/\0' for r in rutas)
+    _, salida, _ = ejecutar_proceso(["git", "check-ignore", "-z", "--stdin"], cwd=repo, entrada=entrada)
+    ignoradas = {r.rstrip('/') for r in salida.split('\0') if r}
+    return {r for r in rutas if r.replace(os.sep, '/') in ignoradas}
+
+
+def explorar(repo, max_hilos=None, limite_segundos=30):
+    """Recorre el proyecto y devuelve las carpetas pesadas encontradas
+
+    Resultado: {'carpetas': [{'ruta', 'tipo', 'archivos', 'bytes', 'acotado'}], 'listadas',
+    'desde_cache', 'ignoradas', 'segundos', 'completo'}
+    """
+    inicio = time.perf_counter()
+    cache = _cargar_cache(repo)
+    nueva_cache = {}
+    hallazgos = {}
+    listadas = desde_cache = ignoradas = 0
+    completo = True
+
+    with ThreadPoolExecutor(max_workers=max_hilos or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        pendientes = {pool.submit(_listar_directorio, repo, '', cache)}
+        while pendientes:
+            if time.perf_counter() - inicio > limite_segundos:
+                completo = False
+                for futuro in pendientes:
+                    futuro.cancel()
+                break
+            hechos, pendientes = wait(pendientes, timeout=0.5, return_when=FIRST_COMPLETED)
+            hijas = []
+            for futuro in hechos:
+                relativa, datos, relistada = futuro.result()
+                if datos is None:
+                    continue
+                nueva_cache[relativa] = datos
+                if relistada:
+                    listadas += 1
+                else:
+                    desde_cache += 1
+                if relativa in hallazgos:
+                    hallazgos[relativa].update(archivos=datos['archivos'], bytes=datos['bytes'],
+                                               acotado=datos['acotado'])
+                    continue
+                hijas.extend(os.path.join(relativa, nombre) if relativa else nombre
+                             for nombre in datos['subdirs'] if nombre != '.git')
+            # Lo que git ya ignora no se recorre (y no hace falta avisar de ello)
+            descartadas = _ignoradas(repo, hijas)
+            ignoradas += len(descartadas)
+            for hija in hijas:
+                if hija in descartadas:
+                    continue
+                nombre = os.path.basename(hija)
+                descripcion = tipo_pesado(os.path.join(repo, hija), nombre)
+                if descripcion:
+                    hallazgos[hija] = {'ruta': hija.replace(os.sep, '/'), 'nombre': nombre,
+                                       'tipo': descripcion, 'archivos': 0, 'bytes': 0, 'acotado': False}
+                    pendientes.add(pool.submit(_contar_pesada, repo, hija, cache))
+                else:
+                    pendientes.add(pool.submit(_listar_directorio, repo, hija, cache))
+
+    if not completo:
+        # Lo que no se llegó a leer conserva lo de la vez anterior
+        nueva_cache = {**cache, **nueva_cache}
+    _guardar_cache(repo, nueva_cache)
+    return {
+        'carpetas': sorted(hallazgos.values(), key=lambda h: h['archivos'], reverse=True),
+        'listadas': listadas,
+        'desde_cache': desde_cache,
+        'ignoradas': ignoradas,
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'completo': completo,
+    }
+
+
+def filtrar_ignoradas(repo, carpetas):
+    """Quita las carpetas que git ya ignora (una sola llamada a git check-ignore)"""
+    if not carpetas:
+        return []
+    entrada = ''.join(c['ruta'] + '/\0' for c in carpetas)
+    exito, salida, _ = ejecutar_proceso(
+        ["git", "check-ignore", "-z", "--stdin"], cwd=repo, entrada=entrada
+    )
+    ignoradas = {r.rstrip('/') for r in salida.split('\0') if r}
+    return [c for c in carpetas if c['ruta'] not in ignoradas]
+
+
+def carpetas_a_avisar(repo, resultado):
+    """Carpetas pesadas no ignoradas y lo bastante grandes como para avisar"""
+    grandes = [
+        c for c in resultado['carpetas']
+        if c['archivos'] >= MIN_ARCHIVOS_AVISO or c['bytes'] >= MIN_BYTES_AVISO
+    ]
+    return filtrar_ignoradas(repo, grandes)
+
+
+def proponer_entradas_gitignore(carpetas):
+    """Entradas de .gitignore (sin repetir) para las carpetas encontradas"""
+    entradas = []
+    for carpeta in carpetas:
+        nombre = carpeta['nombre']
+        # Las carpetas genéricas (build, dist, bin...) se ignoran solo en su ubicación exacta
+        if nombre in ('dist', 'build', 'target', 'bin', 'obj', 'coverage', 'env'):
+            entrada = '/' + carpeta['ruta'] + '/'
+        else:
+            entrada = nombre + '/'
+        if entrada not in entradas:
+            entradas.append(entrada)
+    return entradas
+
+
+def agregar_a_gitignore(repo, entradas):
+    """Añade las entradas al .gitignore del proyecto (sin duplicar las que ya están)"""
+    ruta = os.path.join(repo, ".gitignore")
+    existentes = set()
+    contenido = ""
+    if os.path.exists(ruta):
+        with open(ruta, 'r', encoding='utf-8', errors='ignore') as f:
+            contenido = f.read()
+        existentes = {linea.strip() for linea in contenido.splitlines()}
+    nuevas = [e for e in entradas if e not in existentes and e.rstrip('/') not in existentes]
+    if not nuevas:
+        return []
+    with open(ruta, 'a', encoding='utf-8') as f:
+        if contenido and not contenido.endswith('\n'):
+            f.write('\n')
+        f.write("\n# Carpetas generadas (añadido por Git Automático)\n")
+        for entrada in nuevas:
+            f.write(entrada + "\n")
+    return nuevas
+
+
+def formatear_bytes(numero):
+    """Tamaño legible: 1.2 MB, 340 KB..."""
+    for unidad in ("B", "KB", "MB", "GB"):
+        if numero < 1024 or unidad == "GB":
+            return f"{numero:.0f} {unidad}" if unidad == "B" else f"{numero:.1f} {unidad}"
+        numero /= 1024
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Trabajo adelantado mientras el usuario escribe
+Entre "git add" y el push la aplicación espera al usuario en varios
+diálogos (mensaje del commit, rama, confirmación). Mientras tanto se
+calcula en segundo plano el resumen de cambios (diffstat), el índice de
+ramas y se refrescan las refs remotas (lo que además abre la conexión y
+pasa la autenticación), para que después de "Aceptar" solo quede enviar
+el pack. Nada de esto modifica el proyecto: el prefetch escribe en su
+propio espacio de refs, así que si el usuario cancela basta con ignorar
+los resultados.
+"""
+
+import re
+import time
+import threading
+
+from git_trabajos import ejecutar_proceso, PRIORIDAD_FONDO, ESTADOS_FINALES
+from git_sincronizacion import prefetch
+from git_metricas import METRICAS
+
+_PATRON_SHORTSTAT = re.compile(r"(\d+) files? changed(?:, (\d+) insertions?\(\+\))?(?:, (\d+) deletions?\(-\))?")
+
+
+def _git(repo, *argumentos):
+    # --no-optional-locks: leer sin refrescar el índice, para no competir con el commit
+    return ejecutar_proceso(["git", "--no-optional-locks"] + list(argumentos), cwd=repo)
+
+
+def resumen_cambios(repo):
+    """Resumen de lo preparado: {'archivos', 'inserciones', 'borrados', 'diffstat'}"""
+    exito, corto, _ = _git(repo, "diff", "--cached", "--shortstat")
+    coincidencia = _PATRON_SHORTSTAT.search(corto) if exito else None
+    archivos, inserciones, borrados = (int(g or 0) for g in coincidencia.groups()) if coincidencia else (0, 0, 0)
+    exito, diffstat, _ = _git(repo, "diff", "--cached", "--stat=100", "--stat-count=40")
+    return {
+        'archivos': archivos,
+        'inserciones': inserciones,
+        'borrados': borrados,
+        'diffstat': diffstat if exito else "",
+    }
+
+
+def indice_ramas(repo):
+    """Ramas locales (en orden alfabético, como 'git branch') y la rama actual"""
+    exito, salida, _ = _git(repo, "for-each-ref", "--format=%(refname:short)", "refs/heads/")
+    ramas = sorted(l.strip() for l in salida.splitlines() if l.strip()) if exito else []
+    exito, actual, _ = _git(repo, "symbolic-ref", "--short", "-q", "HEAD")
+    return {'ramas': ramas, 'actual': actual.strip() if exito and actual.strip() else None}
+
+
+class Especulacion:
+    """Tareas adelantadas de un repositorio mientras hay diálogos abiertos
+
+    Las tareas se encolan con prioridad de fondo en el gestor de trabajos,
+    así que un push interactivo pasa delante de las que aún no empezaron.
+    """
+
+    def __init__(self, gestor_trabajos, repo, remoto=None):
+        self.gestor_trabajos = gestor_trabajos
+        self.repo = repo
+        self.remoto = remoto
+        self._resultados = {}
+        self._tiempos = {}
+        self._trabajos = {}
+        self._listo = {}
+        self._descartada = False
+        self._cerrojo = threading.Lock()
+
+    def iniciar(self):
+        tareas = [
+            ('ramas', lambda: indice_ramas(self.repo)),
+            ('resumen', lambda: resumen_cambios(self.repo)),
+        ]
+        if self.remoto:
+            # Abre la conexión (DNS, TLS/SSH, credenciales) y deja los objetos en local
+            tareas.append(('remoto', lambda: prefetch(self.repo, self.remoto)))
+        for clave, funcion in tareas:
+            self._listo[clave] = threading.Event()
+            self._trabajos[clave] = self.gestor_trabajos.encolar(
+                self.repo, f"Adelantar: {clave}",
+                lambda trabajo, c=clave, f=funcion: self._ejecutar(c, f),
+                prioridad=PRIORIDAD_FONDO,
+                al_terminar=lambda trabajo, c=clave: self._listo[c].set()
+            )
+        return self
+
+    def _ejecutar(self, clave, funcion):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        segundos = time.perf_counter() - inicio
+        with self._cerrojo:
+            if not self._descartada:
+                self._resultados[clave] = resultado
+                self._tiempos[clave] = round(segundos, 2)
+        METRICAS.observar('especulacion_segundos', segundos, tarea=clave)
+        return resultado
+
+    def resultado(self, clave, esperar=0):
+        """Resultado de una tarea si ya terminó (None si no); puede esperar hasta N segundos"""
+        evento = self._listo.get(clave)
+        if evento is None:
+            return None
+        if esperar:
+            evento.wait(esperar)
+        with self._cerrojo:
+            return None if self._descartada else self._resultados.get(clave)
+
+    def listo(self, clave):
+        evento = self._listo.get(clave)
+        return evento is not None and evento.is_set()
+
+    def segundos(self, clave):
+        """Tiempo que tardó la tarea (el que el usuario se ahorró al no esperarla)"""
+        return self._tiempos.get(clave)
+
+    def descartar(self):
+        """El usuario canceló: ignora los resultados y quita de la cola lo que no empezó
+
+        Un prefetch que ya está corriendo se deja terminar: solo escribe en
+        refs/prefetch/ y le sirve al siguiente push.
+        """
+        with self._cerrojo:
+            if self._descartada:
+                return
+            self._descartada = True
+            self._resultados.clear()
+        for clave, trabajo in self._trabajos.items():
+            if trabajo.estado not in ESTADOS_FINALES and trabajo.inicio is None:
+                self.gestor_trabajos.cancelar(trabajo.id)
+        METRICAS.incrementar('especulacion_total', resultado='descartada')
+
+    def usar(self):
+        """Anota que el trabajo adelantado se aprovechó (para las métricas)"""
+        if not self._descartada:
+            METRICAS.incrementar('especulacion_total', resultado='usada')
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lectura directa de .git/index (sin lanzar git)
+Abre el índice con mmap en solo lectura (versiones 2, 3 y 4, saltando las
+extensiones) y compara los datos de stat guardados con los de os.scandir
+para obtener al instante la lista de archivos que "probablemente" cambiaron.
+Es una vista previa: git confirma después solo esas rutas. Los cambios ya
+agregados (índice frente a HEAD) no se ven comparando con la carpeta; esos
+los da "git diff --cached --name-only", que no toca el árbol de trabajo.
+"""
+
+import os
+import sys
+import mmap
+import stat
+import time
+import struct
+
+from git_trabajos import ejecutar_proceso, directorio_git
+
+FIRMA = b'DIRC'
+TAMANO_FIJO = 62          # ctime, mtime, dev, ino, modo, uid, gid, tamaño, sha1 y flags
+TAMANO_HASH = 20
+FLAG_EXTENDIDO = 0x4000
+FLAG_ASUMIR_VALIDO = 0x8000
+FLAG_EXT_SKIP_WORKTREE = 0x4000
+MASCARA_LONGITUD = 0x0FFF
+MODO_GITLINK = 0o160000
+MODO_ENLACE = 0o120000
+MODO_DIRECTORIO_SPARSE = 0o040000
+MAX_RUTAS_CONFIRMACION = 1000
+# Margen bajo el límite de la línea de comandos de Windows (32767 caracteres)
+MAX_CARACTERES_CONFIRMACION = 24000
+
+_CABECERA = struct.Struct('>4sII')
+# Solo se desempaquetan mtime (s, ns), modo, tamaño y flags; el resto se salta
+_ENTRADA = struct.Struct('>8xII8xI8xI20xH')
+
+
+class IndiceNoSoportado(Exception):
+    """El índice no se puede leer directamente (split index, formato desconocido...)"""
+
+
+def _leer_varint(datos, posicion):
+    """Entero de longitud variable de git (el de la compresión de rutas del índice v4)"""
+    byte = datos[posicion]
+    posicion += 1
+    valor = byte & 0x7f
+    while byte & 0x80:
+        byte = datos[posicion]
+        posicion += 1
+        valor = ((valor + 1) << 7) | (byte & 0x7f)
+    return valor, posicion
+
+
+def leer_indice(repo):
+    """Entradas del índice: lista de (ruta, mtime_s, mtime_ns, tamaño, modo, sin_worktree)
+
+    Usa mmap: solo se crean objetos para los campos que hacen falta.
+    Devuelve también la versión y el mtime del propio archivo index.
+    """
+    ruta = os.path.join(directorio_git(repo), "index")
+    with open(ruta, 'rb') as f:
+        info = os.fstat(f.fileno())
+        if info.st_size < _CABECERA.size + TAMANO_HASH:
+            raise IndiceNoSoportado("Índice vacío o incompleto")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            firma, version, cantidad = _CABECERA.unpack_from(datos, 0)
+            if firma != FIRMA or version not in (2, 3, 4):
+                raise IndiceNoSoportado(f"Formato de índice no soportado (versión {version})")
+            entradas = []
+            posicion = _CABECERA.size
+            anterior = b''
+            for _ in range(cantidad):
+                inicio = posicion
+                mtime_s, mtime_ns, modo, tamano, flags = _ENTRADA.unpack_from(datos, posicion)
+                posicion += TAMANO_FIJO
+                flags_ext = 0
+                if version >= 3 and flags & FLAG_EXTENDIDO:
+                    flags_ext = struct.unpack_from('>H', datos, posicion)[0]
+                    posicion += 2
+                if version == 4:
+                    quitar, posicion = _leer_varint(datos, posicion)
+                    fin = datos.find(b'\0', posicion)
+                    nombre = anterior[:len(anterior) - quitar] + datos[posicion:fin]
+                    posicion = fin + 1
+                else:
+                    longitud = flags & MASCARA_LONGITUD
+                    if longitud == MASCARA_LONGITUD:
+                        fin = datos.find(b'\0', posicion)
+                    else:
+                        fin = posicion + longitud
+                    nombre = datos[posicion:fin]
+                    # Relleno con NUL hasta múltiplo de 8 (al menos uno)
+                    posicion = inicio + ((fin - inicio + 8) & ~7)
+                anterior = nombre
+                etapa = (flags >> 12) & 0x3
+                sin_worktree = bool(flags_ext & FLAG_EXT_SKIP_WORKTREE) or bool(flags & FLAG_ASUMIR_VALIDO)
+                entradas.append((nombre, mtime_s, mtime_ns, tamano, modo, sin_worktree, etapa))
+            # Extensiones: se saltan, pero un split index no se puede leer solo
+            fin_extensiones = len(datos) - TAMANO_HASH
+            while posicion + 8 <= fin_extensiones:
+                firma_ext, tamano_ext = struct.unpack_from('>4sI', datos, posicion)
+                if firma_ext == b'link':
+                    raise IndiceNoSoportado("El índice está dividido (core.splitIndex)")
+                posicion += 8 + tamano_ext
+    return {'version': version, 'entradas': entradas, 'mtime_indice': info.st_mtime}
+
+
+def _listar_carpeta(carpeta, cache):
+    """Nombres de una carpeta con su stat (lstat), una sola vez por carpeta"""
+    contenido = cache.get(carpeta)
+    if contenido is None:
+        contenido = {}
+        try:
+            with os.scandir(carpeta) as it:
+                for entrada in it:
+                    contenido[entrada.name] = entrada
+        except OSError:
+            pass
+        cache[carpeta] = contenido
+    return contenido
+
+
+def vista_previa(repo):
+    """Archivos que probablemente cambiaron, sin lanzar git
+
+    Devuelve {'modificados', 'eliminados', 'nuevos_posibles', 'entradas',
+    'version', 'segundos'}. 'nuevos_posibles' son nombres que no están en el
+    índice dentro de carpetas con archivos rastreados (pueden estar ignorados).
+    Lanza IndiceNoSoportado (u OSError) si hay que usar git directamente.
+    """
+    inicio = time.perf_counter()
+    indice = leer_indice(repo)
+    comparar_modo = sys.platform != 'win32'
+    mtime_indice = int(indice['mtime_indice'])
+    # Todo en bytes (como están en el índice y como los da scandir con una ruta en bytes):
+    # solo se decodifican las rutas que se devuelven
+    raiz = os.fsencode(repo)
+    es_regular, es_enlace, tipo = stat.S_ISREG, stat.S_ISLNK, stat.S_IFMT
+    carpetas = {}
+    conocidos = {}
+    modificados = []
+    eliminados = []
+
+    carpeta_actual = None
+    for nombre, mtime_s, mtime_ns, tamano, modo, sin_worktree, etapa in indice['entradas']:
+        carpeta, _, base = nombre.rpartition(b'/')
+        # El índice está ordenado: casi siempre la carpeta es la de la entrada anterior
+        if carpeta != carpeta_actual:
+            carpeta_actual = carpeta
+            nombres_carpeta = conocidos.setdefault(carpeta, set())
+            listado = _listar_carpeta(os.path.join(raiz, carpeta) if carpeta else raiz, carpetas)
+            # Las carpetas padre también son "conocidas" para no marcarlas como nuevas
+            while carpeta:
+                padre, _, nombre_carpeta = carpeta.rpartition(b'/')
+                hermanos = conocidos.setdefault(padre, set())
+                if nombre_carpeta in hermanos:
+                    break
+                hermanos.add(nombre_carpeta)
+                carpeta = padre
+        nombres_carpeta.add(base)
+        if sin_worktree or modo == MODO_DIRECTORIO_SPARSE or modo == MODO_GITLINK:
+            continue
+        if etapa:
+            modificados.append(nombre)
+            continue
+        entrada = listado.get(base)
+        if entrada is None:
+            eliminados.append(nombre)
+            continue
+        try:
+            info = entrada.stat(follow_symlinks=False)
+        except OSError:
+            eliminados.append(nombre)
+            continue
+        if tipo(modo) == MODO_ENLACE:
+            cambiado = not es_enlace(info.st_mode)
+        else:
+            cambiado = not es_regular(info.st_mode)
+            if comparar_modo and not cambiado:
+                cambiado = bool(info.st_mode & 0o100) != bool(modo & 0o100)
+        segundos, nanos = divmod(info.st_mtime_ns, 1_000_000_000)
+        if (cambiado or (info.st_size & 0xFFFFFFFF) != tamano or segundos != mtime_s
+                or (mtime_ns and nanos != mtime_ns)
+                # "Racily clean": escrito en el mismo segundo que el índice, solo git puede saberlo
+                or mtime_s >= mtime_indice):
+            modificados.append(nombre)
+
+    nuevos = []
+    for carpeta, nombres in conocidos.items():
+        for nombre in _listar_carpeta(os.path.join(raiz, carpeta) if carpeta else raiz, carpetas):
+            if nombre not in nombres and not (carpeta == b"" and nombre == b".git"):
+                nuevos.append(carpeta + b"/" + nombre if carpeta else nombre)
+
+    def decodificar(rutas):
+        return [ruta.decode('utf-8', 'surrogateescape') for ruta in rutas]
+
+    return {
+        'modificados': decodificar(modificados),
+        'eliminados': decodificar(eliminados),
+        'nuevos_posibles': sorted(decodificar(nuevos)),
+        'entradas': len(indice['entradas']),
+        'version': indice['version'],
+        'segundos': round(time.perf_counter() - inicio, 4),
+    }
+
+
+def preparados(repo):
+    """Rutas con cambios ya agregados al índice (índice frente a HEAD, sin mirar la carpeta)"""
+    exito, salida, _ = ejecutar_proceso(
+        ["git", "diff", "--cached", "--name-only", "--no-renames", "-z"], cwd=repo, texto=False)
+    if not exito:
+        return []
+    return [ruta.decode('utf-8', 'surrogateescape') for ruta in salida.split(b'\0') if ruta]
+
+
+def confirmar(repo, previa, agregados=()):
+    """Confirma con git (limitado a las rutas candidatas) la vista previa
+
+    agregados son las rutas con cambios en el índice (ver preparados).
+    Devuelve las líneas de 'git status --porcelain' de los cambios reales.
+    'git status' no acepta --pathspec-from-file: si las rutas no caben en la
+    línea de comandos, o el status limitado falla, se usa el status completo.
+    """
+    candidatos = list(dict.fromkeys(
+        previa['modificados'] + previa['eliminados'] + previa['nuevos_posibles'] + list(agregados)))
+    if not candidatos:
+        return []
+    comando = ["git", "status", "--porcelain"]
+    rutas = [f":(literal){ruta}" for ruta in candidatos]
+    if len(rutas) <= MAX_RUTAS_CONFIRMACION and sum(len(r) + 3 for r in rutas) <= MAX_CARACTERES_CONFIRMACION:
+        exito, salida, _ = ejecutar_proceso(comando + ["--", *rutas], cwd=repo)
+        if exito:
+            return [linea for linea in salida.split('\n') if linea.strip()]
+    exito, salida, _ = ejecutar_proceso(comando, cwd=repo)
+    return [linea for linea in salida.split('\n') if linea.strip()] if exito else []
+
+
+def contar_cambios_rapido(repo):
+    """Número de archivos con cambios: vista previa + agregados + confirmación solo de los candidatos
+
+    Si el índice no se puede leer directamente usa 'git status' completo.
+    """
+    try:
+        previa = vista_previa(repo)
+    except (IndiceNoSoportado, OSError, ValueError, struct.error):
+        exito, salida, _ = ejecutar_proceso(["git", "status", "--porcelain"], cwd=repo)
+        return len([l for l in salida.split('\n') if l.strip()]) if exito else 0
+    return len(confirmar(repo, previa, preparados(repo)))
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Métricas de operaciones de Git
+Contadores e histogramas de latencia por tipo de operación y proyecto
+(add, commit, push, pushes alternativos, bytes subidos, tiempos agotados).
+Se exportan como archivo de texto de Prometheus (para el "textfile
+collector" de node-exporter) y como instantánea JSON: al cambiar una
+métrica y, aunque no pase nada, cada INTERVALO_EXPORTACION segundos desde
+un hilo propio (el archivo nunca queda viejo con la aplicación quieta).
+"""
+
+import os
+import re
+import json
+import time
+import tempfile
+import threading
+
+PREFIJO = "git_automatizado"
+LIMITES_HISTOGRAMA = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+INTERVALO_EXPORTACION = 15
+
+_PATRON_BYTES_PUSH = re.compile(r"Writing objects:[^\r\n]*?,\s*([\d.]+)\s*(bytes|KiB|MiB|GiB)")
+_MULTIPLICADORES = {'bytes': 1, 'KiB': 1024, 'MiB': 1024 ** 2, 'GiB': 1024 ** 3}
+
+DESCRIPCIONES = {
+    'operaciones_total': "Operaciones git ejecutadas por resultado",
+    'operacion_segundos': "Duración de las operaciones git",
+    'tiempos_agotados_total': "Operaciones git cortadas por tiempo límite",
+    'push_rechazado_total': "Pushes rechazados por no ser fast-forward (se integró y se reintentó)",
+    'prefetch_segundos': "Duración de los prefetch en segundo plano",
+    'especulacion_segundos': "Trabajo adelantado mientras había diálogos abiertos, por tarea",
+    'especulacion_total': "Trabajo adelantado aprovechado o descartado",
+    'bytes_subidos_total': "Bytes enviados por push",
+    'proceso_espera_segundos': "Espera de turno de los procesos git no interactivos (límite global)",
+    'procesos_git_activos': "Procesos git en marcha por clase (interactiva, lote, fondo)",
+    'procesos_git_limite': "Máximo de procesos git a la vez (los interactivos no esperan)",
+    'procesos_git_esperando': "Procesos git esperando turno",
+    'nucleos_disponibles': "Núcleos que puede usar la aplicación",
+    'politica_recursos': "Prioridad (nice), E/S e hilos de git por clase de trabajo",
+    'arranque_segundos': "Tiempo de arranque de la aplicación por fase (ventana, interactivo, estado)",
+    'memoria_python_bytes': "Memoria de Python según tracemalloc (solo con el diagnóstico activo)",
+    'memoria_proceso_bytes': "Memoria residente del proceso (solo con el diagnóstico activo)",
+    'widgets_tk': "Widgets de Tk vivos",
+    'callbacks_after_pendientes': "Callbacks after() de Tk pendientes",
+    'comandos_python_tk': "Comandos de Tcl que apuntan a funciones de Python (bind, command, trace)",
+    'hilos_activos': "Hilos vivos de la aplicación",
+}
+
+
+def bytes_de_push(texto):
+    """Bytes enviados según la línea 'Writing objects' de git push --progress (0 si no aparece)"""
+    coincidencias = _PATRON_BYTES_PUSH.findall(texto or "")
+    if not coincidencias:
+        return 0
+    numero, unidad = coincidencias[-1]
+    return int(float(numero) * _MULTIPLICADORES[unidad])
+
+
+def limpiar_progreso(texto):
+    """Quita las líneas de progreso (las que git reescribe con \\r) de la salida de git"""
+    lineas = []
+    for linea in (texto or "").split("\n"):
+        # De cada línea reescrita con \r solo interesa el estado final
+        partes = [p for p in linea.split("\r") if p.strip()]
+        if partes:
+            lineas.append(partes[-1])
+    return "\n".join(lineas).strip()
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(etiquetas):
+    if not etiquetas:
+        return ""
+    return "{" + ",".join(f'{clave}="{_escapar(valor)}"' for clave, valor in etiquetas) + "}"
+
+
+class Metricas:
+    """Registro de métricas en memoria, seguro entre hilos"""
+
+    def __init__(self):
+        self._contadores = {}
+        self._histogramas = {}
+        self._extra = []
+        self._cerrojo = threading.Lock()
+        self._ruta_textfile = None
+        self._ruta_json = None
+        self._ultima_exportacion = 0.0
+        self._parar_exportacion = None
+        self.inicio = time.time()
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._cerrojo:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+        self._exportar_si_toca()
+
+    def observar(self, nombre, segundos, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._cerrojo:
+            datos = self._histogramas.get(clave)
+            if datos is None:
+                datos = {'cubetas': [0] * len(LIMITES_HISTOGRAMA), 'suma': 0.0, 'cuenta': 0}
+                self._histogramas[clave] = datos
+            for i, limite in enumerate(LIMITES_HISTOGRAMA):
+                if segundos <= limite:
+                    datos['cubetas'][i] += 1
+            datos['suma'] += segundos
+            datos['cuenta'] += 1
+        self._exportar_si_toca()
+
+    def registrar_operacion(self, operacion, proyecto, segundos, exito, agotado=False, salida=""):
+        """Registra una operación git terminada (lo llama ejecutar_proceso)"""
+        resultado = "tiempo_agotado" if agotado else ("ok" if exito else "error")
+        self.incrementar('operaciones_total', operacion=operacion, proyecto=proyecto, resultado=resultado)
+        self.observar('operacion_segundos', segundos, operacion=operacion, proyecto=proyecto)
+        if agotado:
+            self.incrementar('tiempos_agotados_total', operacion=operacion, proyecto=proyecto)
+        if operacion == 'push' and exito:
+            enviados = bytes_de_push(salida)
+            if enviados:
+                self.incrementar('bytes_subidos_total', enviados, proyecto=proyecto)
+
+    def agregar_fuente(self, funcion):
+        """Añade una función que devuelve métricas extra [(nombre, tipo, valor, {etiquetas})] al exportar"""
+        self._extra.append(funcion)
+
+    def configurar_exportacion(self, ruta_textfile=None, ruta_json=None):
+        """Rutas donde se exportan las métricas automáticamente (cada INTERVALO_EXPORTACION s)
+
+        Sin rutas se detiene la exportación periódica.
+        """
+        with self._cerrojo:
+            self._ruta_textfile = ruta_textfile
+            self._ruta_json = ruta_json
+            activa = bool(ruta_textfile or ruta_json)
+            if activa and self._parar_exportacion is None:
+                self._parar_exportacion = threading.Event()
+                threading.Thread(target=self._bucle_exportacion, args=(self._parar_exportacion,),
+                                 daemon=True).start()
+            elif not activa and self._parar_exportacion is not None:
+                self._parar_exportacion.set()
+                self._parar_exportacion = None
+
+    def _bucle_exportacion(self, parar):
+        while not parar.wait(INTERVALO_EXPORTACION):
+            self._exportar_si_toca()
+
+    def _exportar_si_toca(self):
+        # Comprobar y anotar a la vez: dos hilos que llegan juntos no exportan los dos
+        with self._cerrojo:
+            if not self._ruta_textfile and not self._ruta_json:
+                return
+            ahora = time.time()
+            if ahora - self._ultima_exportacion < INTERVALO_EXPORTACION:
+                return
+            self._ultima_exportacion = ahora
+        try:
+            self.exportar()
+        except OSError:
+            pass
+
+    def exportar(self, ruta_textfile=None, ruta_json=None):
+        """Escribe las métricas en los archivos configurados (o en los indicados)"""
+        ruta_textfile = ruta_textfile or self._ruta_textfile
+        ruta_json = ruta_json or self._ruta_json
+        escritas = []
+        if ruta_textfile:
+            _escribir_atomico(ruta_textfile, self.texto_prometheus())
+            escritas.append(ruta_textfile)
+        if ruta_json:
+            _escribir_atomico(ruta_json, json.dumps(self.instantanea(), indent=4, ensure_ascii=False))
+            escritas.append(ruta_json)
+        return escritas
+
+    def _extras(self):
+        extras = []
+        for funcion in list(self._extra):
+            try:
+                extras.extend(funcion())
+            except Exception:
+                pass
+        return extras
+
+    def texto_prometheus(self):
+        """Métricas en el formato de texto de Prometheus"""
+        with self._cerrojo:
+            contadores = dict(self._contadores)
+            histogramas = {k: {'cubetas': list(v['cubetas']), 'suma': v['suma'], 'cuenta': v['cuenta']}
+                           for k, v in self._histogramas.items()}
+        lineas = []
+        vistos = set()
+
+        def cabecera(nombre, tipo):
+            if nombre not in vistos:
+                vistos.add(nombre)
+                ayuda = DESCRIPCIONES.get(nombre, nombre.replace('_', ' '))
+                lineas.append(f"# HELP {PREFIJO}_{nombre} {ayuda}")
+                lineas.append(f"# TYPE {PREFIJO}_{nombre} {tipo}")
+
+        for (nombre, etiquetas), valor in sorted(contadores.items()):
+            cabecera(nombre, "counter")
+            lineas.append(f"{PREFIJO}_{nombre}{_etiquetas(etiquetas)} {valor}")
+        for (nombre, etiquetas), datos in sorted(histogramas.items()):
+            cabecera(nombre, "histogram")
+            for limite, cuenta in zip(LIMITES_HISTOGRAMA, datos['cubetas']):
+                lineas.append(f"{PREFIJO}_{nombre}_bucket{_etiquetas(etiquetas + (('le', limite),))} {cuenta}")
+            lineas.append(f"{PREFIJO}_{nombre}_bucket{_etiquetas(etiquetas + (('le', '+Inf'),))} {datos['cuenta']}")
+            lineas.append(f"{PREFIJO}_{nombre}_sum{_etiquetas(etiquetas)} {round(datos['suma'], 6)}")
+            lineas.append(f"{PREFIJO}_{nombre}_count{_etiquetas(etiquetas)} {datos['cuenta']}")
+        for nombre, tipo, valor, etiquetas in self._extras():
+            cabecera(nombre, tipo)
+            lineas.append(f"{PREFIJO}_{nombre}{_etiquetas(tuple(sorted(etiquetas.items())))} {valor}")
+        cabecera('inicio_segundos', "gauge")
+        lineas.append(f"{PREFIJO}_inicio_segundos {round(self.inicio, 3)}")
+        return "\n".join(lineas) + "\n"
+
+    def instantanea(self):
+        """Métricas como diccionario (para JSON): contadores, y por histograma cuenta/suma/media/percentiles"""
+        with self._cerrojo:
+            contadores = dict(self._contadores)
+            histogramas = {k: {'cubetas': list(v['cubetas']), 'suma': v['suma'], 'cuenta': v['cuenta']}
+                           for k, v in self._histogramas.items()}
+        datos = {'generado': time.strftime('%Y-%m-%d %H:%M:%S'), 'contadores': [], 'histogramas': [], 'extra': []}
+        for (nombre, etiquetas), valor in sorted(contadores.items()):
+            datos['contadores'].append({'nombre': nombre, 'etiquetas': dict(etiquetas), 'valor': valor})
+        for (nombre, etiquetas), h in sorted(histogramas.items()):
+            datos['histogramas'].append({
+                'nombre': nombre,
+                'etiquetas': dict(etiquetas),
+                'cuenta': h['cuenta'],
+                'suma': round(h['suma'], 6),
+                'media': round(h['suma'] / h['cuenta'], 6) if h['cuenta'] else 0,
+                'p50': _percentil(h, 0.5),
+                'p95': _percentil(h, 0.95),
+                'cubetas': dict(zip([str(l) for l in LIMITES_HISTOGRAMA], h['cubetas'])),
+            })
+        for nombre, tipo, valor, etiquetas in self._extras():
+            datos['extra'].append({'nombre': nombre, 'tipo': tipo, 'etiquetas': etiquetas, 'valor': valor})
+        return datos
+
+    def reiniciar(self):
+        with self._cerrojo:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+
+def _percentil(histograma, fraccion):
+    """Percentil aproximado: límite superior de la cubeta donde cae"""
+    objetivo = histograma['cuenta'] * fraccion
+    for limite, cuenta in zip(LIMITES_HISTOGRAMA, histograma['cubetas']):
+        if cuenta >= objetivo and cuenta > 0:
+            return limite
+    return None if not histograma['cuenta'] else "+Inf"
+
+
+def _escribir_atomico(ruta, contenido):
+    """Escribe en un temporal único de la misma carpeta y lo renombra (nunca se lee a medias)"""
+    carpeta = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(carpeta, exist_ok=True)
+    # Nombre único: dos exportaciones a la vez no comparten el temporal. El
+    # collector de node-exporter solo lee *.prom, así que no ve el temporal
+    descriptor, temporal = tempfile.mkstemp(prefix=f".{os.path.basename(ruta)}.", suffix=".tmp", dir=carpeta)
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        # mkstemp crea el archivo solo para el dueño; el collector suele correr con otro usuario
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+
+
+def ruta_por_defecto(nombre):
+    """Carpeta de métricas del usuario (~/.git-automatizado/)"""
+    return os.path.join(os.path.expanduser("~"), ".git-automatizado", nombre)
+
+
+METRICAS = Metricas()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Operaciones de Git sin interfaz
+Las mismas operaciones que hace la interfaz (estado, agregar, commit, push),
+pero con la carpeta del repositorio como parámetro: sirven para scripts,
+pruebas de carga y para trabajar con varios repositorios a la vez.
+"""
+
+import os
+
+from git_trabajos import ejecutar_proceso
+from git_metricas import limpiar_progreso
+
+ERRORES_NO_FAST_FORWARD = ("non-fast-forward", "[rejected]", "fetch first", "updates were rejected")
+
+
+def _git(repo, *argumentos, **opciones):
+    return ejecutar_proceso(["git"] + list(argumentos), cwd=repo, **opciones)
+
+
+def cambios_pendientes(repo):
+    """Líneas "XY ruta" como las de 'git status --porcelain' (lista vacía si no hay cambios)
+
+    Se lee la salida con -z y en bytes: la columna X puede ser un espacio
+    (" M" = cambiado sin agregar) y recortar la salida la perdería; las
+    rutas no llegan entre comillas ni con escapes.
+    """
+    exito, salida, _ = _git(repo, "status", "--porcelain", "-z", texto=False)
+    if not exito:
+        return []
+    lineas = []
+    campos = salida.split(b'\0')
+    i = 0
+    while i < len(campos):
+        campo = campos[i]
+        i += 1
+        if len(campo) < 4:
+            continue
+        xy = campo[:2].decode('ascii', 'replace')
+        ruta = campo[3:].decode('utf-8', 'surrogateescape')
+        # En renombres y copias el campo siguiente es la ruta de origen
+        if campo[:1] in (b'R', b'C') or campo[1:2] in (b'R', b'C'):
+            origen = campos[i].decode('utf-8', 'surrogateescape') if i < len(campos) else ""
+            i += 1
+            ruta = f"{origen} -> {ruta}"
+        lineas.append(f"{xy} {ruta}")
+    return lineas
+
+
+def rama_actual(repo):
+    """Rama actual ('master' si no se puede saber, como obtener_rama_actual)"""
+    exito, rama, _ = _git(repo, "branch", "--show-current")
+    return rama.strip() if exito and rama.strip() else "master"
+
+
+def agregar_todo(repo):
+    """git add . en el repositorio"""
+    return _git(repo, "add", ".")
+
+
+def agregar_archivos(repo, archivos):
+    """git add de una lista de archivos (una sola llamada)
+
+    Las rutas van por la entrada estándar separadas por NUL: no hay límite de
+    longitud de la línea de comandos aunque sean cientos de miles.
+    """
+    if not archivos:
+        return True, "", ""
+    rutas = b'\0'.join(a.encode('utf-8', 'surrogateescape') for a in archivos)
+    return _git(repo, "add", "--pathspec-from-file=-", "--pathspec-file-nul", entrada=rutas)
+
+
+def hacer_commit(repo, mensaje):
+    """git commit -m mensaje (el mensaje va como argumento: admite comillas)"""
+    return _git(repo, "commit", "-m", mensaje)
+
+
+def es_rechazo_no_fast_forward(texto):
+    """Indica si el push fue rechazado porque el remoto tiene commits que no están en local"""
+    texto = (texto or "").lower()
+    return any(patron in texto for patron in ERRORES_NO_FAST_FORWARD)
+
+
+def subir_rama(repo, rama=None, remoto="origin"):
+    """git push remoto rama; devuelve (exito, salida limpia, error)"""
+    rama = rama or rama_actual(repo)
+    exito, salida, error = _git(repo, "push", "--progress", remoto, rama)
+    return exito, limpiar_progreso(salida), limpiar_progreso(error)
+
+
+def estado(repo):
+    """Resumen del repositorio: rama, cambios pendientes y remoto"""
+    exito_remoto, url, _ = _git(repo, "remote", "get-url", "origin")
+    cambios = cambios_pendientes(repo)
+    return {
+        'ruta': os.path.normpath(repo),
+        'es_repositorio': os.path.exists(os.path.join(repo, ".git")),
+        'rama': rama_actual(repo),
+        'cambios': len(cambios),
+        'archivos': cambios,
+        'remoto': url if exito_remoto else None,
+    }
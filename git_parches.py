@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agregar fragmentos (hunks) o líneas sueltas de un archivo
+El diff se lee de git poco a poco (nunca entero en memoria) y se parte en
+fragmentos; la interfaz pide los fragmentos por páginas a medida que el
+usuario baja. Con lo elegido se arma un único parche que se aplica al
+índice con un solo "git apply --cached", como hace "git add -p":
+
+- una línea '+' no elegida se quita del parche
+- una línea '-' no elegida se deja como contexto (sigue en el índice)
+- la última línea vieja de un archivo sin salto final ('-' seguida de
+  "\\ No newline at end of file") va junto con las '+' que vienen después
+  (y con la '+' que la repite con salto): si se dejara como contexto, la
+  '+' elegida quedaría pegada a ella
+
+Las rutas y el contenido se tratan como bytes (surrogateescape) para que el
+parche sea idéntico a lo que escribió git, aunque el archivo no sea UTF-8.
+"""
+
+import os
+import re
+import sys
+import subprocess
+
+from git_trabajos import ejecutar_proceso, STARTUPINFO, entorno_git
+
+_PATRON_FRAGMENTO = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@(.*)$")
+
+
+def _texto(linea):
+    return linea.decode('utf-8', 'surrogateescape')
+
+
+class Fragmento:
+    """Un hunk del diff con la selección de sus líneas '+' y '-'"""
+
+    __slots__ = ('archivo', 'cabecera', 'inicio_viejo', 'cuenta_vieja', 'inicio_nuevo', 'cuenta_nueva',
+                 'titulo', 'lineas', 'seleccion')
+
+    def __init__(self, archivo, cabecera, inicio_viejo, cuenta_vieja, inicio_nuevo, cuenta_nueva, titulo):
+        self.archivo = archivo
+        # Líneas "diff --git", "index", "---", "+++" del archivo (compartidas entre sus fragmentos)
+        self.cabecera = cabecera
+        self.inicio_viejo = inicio_viejo
+        self.cuenta_vieja = cuenta_vieja
+        self.inicio_nuevo = inicio_nuevo
+        self.cuenta_nueva = cuenta_nueva
+        self.titulo = titulo
+        self.lineas = []
+        self.seleccion = bytearray()
+
+    def agregar_linea(self, linea):
+        self.lineas.append(linea)
+        self.seleccion.append(0)
+
+    def es_cambio(self, i):
+        return self.lineas[i][:1] in ('+', '-')
+
+    def cambios(self):
+        return sum(1 for linea in self.lineas if linea[:1] in ('+', '-'))
+
+    def seleccionadas(self):
+        return sum(1 for i, elegida in enumerate(self.seleccion) if elegida and self.es_cambio(i))
+
+    def _final_sin_salto(self):
+        """Índice de la línea '-' seguida de "\\ No newline" (la última del archivo viejo), o None"""
+        for i in range(len(self.lineas) - 1):
+            if self.lineas[i][:1] == '-' and self.lineas[i + 1][:1] == '\\':
+                return i
+        return None
+
+    def _atar_final_sin_salto(self, quitada=False):
+        """Mantiene elegida la última línea vieja sin salto si hay una '+' elegida después
+
+        Con quitada=True es la línea '-' la que se acaba de desmarcar y son
+        las '+' de después las que se desmarcan con ella.
+        """
+        i = self._final_sin_salto()
+        if i is None:
+            return
+        posteriores = [j for j in range(i + 1, len(self.lineas)) if self.lineas[j][:1] == '+']
+        if quitada:
+            for j in posteriores:
+                self.seleccion[j] = 0
+        elif any(self.seleccion[j] for j in posteriores):
+            self.seleccion[i] = 1
+            # La misma línea con salto final ("-y" / "+y") se elige con ella: si no, "y" desaparecería
+            for j in posteriores:
+                if self.lineas[j][1:] == self.lineas[i][1:]:
+                    self.seleccion[j] = 1
+                    break
+
+    def alternar(self, i):
+        if self.es_cambio(i):
+            self.seleccion[i] ^= 1
+            self._atar_final_sin_salto(quitada=i == self._final_sin_salto() and not self.seleccion[i])
+
+    def seleccionar_todo(self, valor=True):
+        for i in range(len(self.lineas)):
+            self.seleccion[i] = 1 if valor and self.es_cambio(i) else 0
+
+    def cabecera_texto(self):
+        return f"@@ -{self.inicio_viejo},{self.cuenta_vieja} +{self.inicio_nuevo},{self.cuenta_nueva} @@{self.titulo}"
+
+    def parche(self, desplazamiento=0):
+        """Líneas del fragmento con solo lo elegido, o None si no se eligió nada
+
+        desplazamiento: líneas que los fragmentos anteriores del mismo archivo
+        añadieron (o quitaron) en el índice; mueve el inicio del lado nuevo.
+        """
+        if not self.seleccionadas():
+            return None
+        self._atar_final_sin_salto()
+        cuerpo = []
+        viejas = nuevas = 0
+        anterior_incluida = True
+        for linea, elegida in zip(self.lineas, self.seleccion):
+            tipo = linea[:1]
+            if tipo == '\\':
+                # "\ No newline at end of file" acompaña a la línea anterior
+                if anterior_incluida:
+                    cuerpo.append(linea)
+                continue
+            if tipo == '+' and not elegida:
+                anterior_incluida = False
+                continue
+            if tipo == '-' and not elegida:
+                linea = ' ' + linea[1:]
+                tipo = ' '
+            cuerpo.append(linea)
+            anterior_incluida = True
+            if tipo in (' ', '-'):
+                viejas += 1
+            if tipo in (' ', '+'):
+                nuevas += 1
+        # Sin líneas viejas el inicio indica "después de la línea N" (como hace git)
+        inicio_nuevo = self.inicio_viejo + desplazamiento + (0 if self.cuenta_vieja else 1)
+        cabecera = f"@@ -{self.inicio_viejo},{viejas} +{max(0, inicio_nuevo)},{nuevas} @@{self.titulo}"
+        return [cabecera] + cuerpo, nuevas - viejas
+
+
+def parsear_diff(lineas):
+    """Fragmentos de un diff unificado a partir de un iterable de líneas en bytes (sin cargarlo entero)
+
+    Los archivos binarios, los renombres sin cambios y los cambios de modo no
+    tienen fragmentos y se saltan.
+    """
+    archivo = None
+    cabecera = []
+    fragmento = None
+    en_cabecera = False
+    for crudo in lineas:
+        linea = _texto(crudo.rstrip(b'\n'))
+        if linea.startswith("diff --git "):
+            if fragmento is not None:
+                yield fragmento
+                fragmento = None
+            cabecera = [linea]
+            archivo = None
+            en_cabecera = True
+            continue
+        if en_cabecera:
+            coincidencia = _PATRON_FRAGMENTO.match(linea)
+            if coincidencia is None:
+                cabecera.append(linea)
+                if linea.startswith(("--- a/", "+++ b/")):
+                    # En archivos borrados "+++" es /dev/null: vale el nombre de "---"
+                    archivo = linea[6:]
+                continue
+            en_cabecera = False
+        coincidencia = _PATRON_FRAGMENTO.match(linea) if linea.startswith("@@") else None
+        if coincidencia is not None:
+            if fragmento is not None:
+                yield fragmento
+            viejo, cuenta_vieja, nuevo, cuenta_nueva, titulo = coincidencia.groups()
+            fragmento = Fragmento(archivo, cabecera, int(viejo), int(cuenta_vieja or 1),
+                                  int(nuevo), int(cuenta_nueva or 1), titulo)
+        elif fragmento is not None and linea[:1] in (' ', '+', '-', '\\'):
+            fragmento.agregar_linea(linea)
+    if fragmento is not None:
+        yield fragmento
+
+
+class LectorFragmentos:
+    """Lee 'git diff' de uno o más archivos y entrega los fragmentos por páginas"""
+
+    def __init__(self, repo, archivos=(), cached=False):
+        comando = ["git", "-c", "core.quotepath=off", "diff", "--no-color", "--no-ext-diff"]
+        if cached:
+            comando.append("--cached")
+        self._proceso = subprocess.Popen(
+            comando + ["--"] + list(archivos),
+            cwd=repo,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=entorno_git(),
+            startupinfo=STARTUPINFO,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        )
+        self._fragmentos = parsear_diff(self._proceso.stdout)
+        self.leidos = 0
+        self.terminado = False
+
+    def siguientes(self, cantidad=20):
+        """Hasta 'cantidad' fragmentos más (lista vacía cuando ya no quedan)"""
+        pagina = []
+        while len(pagina) < cantidad and not self.terminado:
+            try:
+                pagina.append(next(self._fragmentos))
+            except StopIteration:
+                self.terminado = True
+                self.cerrar()
+        self.leidos += len(pagina)
+        return pagina
+
+    def cerrar(self):
+        if self._proceso is None:
+            return
+        if self._proceso.poll() is None:
+            self._proceso.kill()
+        self._proceso.stdout.close()
+        self._proceso.wait()
+        self._proceso = None
+
+
+def construir_parche(fragmentos):
+    """Parche unificado con lo elegido de cada fragmento (texto; None si no hay nada elegido)"""
+    lineas = []
+    cabecera_actual = None
+    desplazamientos = {}
+    for fragmento in fragmentos:
+        desplazamiento = desplazamientos.get(fragmento.archivo, 0)
+        resultado = fragmento.parche(desplazamiento)
+        if resultado is None:
+            continue
+        cuerpo, diferencia = resultado
+        desplazamientos[fragmento.archivo] = desplazamiento + diferencia
+        if fragmento.cabecera is not cabecera_actual:
+            lineas.extend(fragmento.cabecera)
+            cabecera_actual = fragmento.cabecera
+        lineas.extend(cuerpo)
+    if not lineas:
+        return None
+    return "\n".join(lineas) + "\n"
+
+
+def aplicar_en_indice(repo, fragmentos):
+    """Agrega al índice solo lo elegido, con un único 'git apply --cached'
+
+    Devuelve (exito, lineas_agregadas, error).
+    """
+    parche = construir_parche(fragmentos)
+    if parche is None:
+        return False, 0, "No se eligió ninguna línea"
+    datos = parche.encode('utf-8', 'surrogateescape')
+    exito, _, error = ejecutar_proceso(
+        ["git", "apply", "--cached", "--recount", "--whitespace=nowarn", "-"],
+        cwd=repo, entrada=datos, texto=False
+    )
+    elegidas = sum(f.seleccionadas() for f in fragmentos)
+    return exito, elegidas if exito else 0, error
+
+
+def resumen(fragmentos):
+    """(fragmentos con algo elegido, líneas elegidas, líneas con cambios)"""
+    con_seleccion = sum(1 for f in fragmentos if f.seleccionadas())
+    return con_seleccion, sum(f.seleccionadas() for f in fragmentos), sum(f.cambios() for f in fragmentos)
+
+
+def archivos_con_fragmentos(fragmentos):
+    return sorted({f.archivo for f in fragmentos if f.seleccionadas()})
+
+
+if __name__ == "__main__":
+    # Uso de prueba: python git_parches.py <repo> <archivo>  (lista los fragmentos)
+    repo = sys.argv[1] if len(sys.argv) > 1 else "."
+    lector = LectorFragmentos(os.path.abspath(repo), sys.argv[2:])
+    while True:
+        pagina = lector.siguientes()
+        if not pagina:
+            break
+        for f in pagina:
+            print(f"{f.archivo}: {f.cabecera_texto()} ({f.cambios()} cambio(s))")
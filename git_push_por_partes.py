@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Push por partes para historiales muy grandes
+Recorre los commits que el remoto todavía no tiene (siguiendo el primer
+padre) y los sube en tramos de tamaño acotado: cada tramo es un push de un
+commit intermedio a refs/heads/<rama>. El último commit aceptado se guarda
+en .git/git-automatizado/push_por_partes.json, así que si algo falla el
+siguiente intento continúa desde ahí en lugar de volver a enviarlo todo.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+
+from git_trabajos import ejecutar_proceso, directorio_estado, trabajo_actual
+from git_metricas import limpiar_progreso
+
+PROGRESO_FILE = "push_por_partes.json"
+LIMITE_TRAMO = 100 * 1024 * 1024
+MAX_COMMITS_TRAMO = 500
+
+# Respuestas del servidor que indican que el push era demasiado grande. Los cortes
+# y los tiempos agotados son de red (ver git_cola_push.es_error_de_red): partir el
+# tramo no los arregla
+ERRORES_DE_TAMANO = (
+    "pack exceeds maximum allowed size",
+    "pack exceeds",
+    "exceeds maximum",
+    "http 413",
+    "request entity too large",
+)
+
+_cerrojo = threading.Lock()
+
+
+def es_error_de_tamano(texto):
+    """Indica si un push falló por ser demasiado grande para el servidor"""
+    texto = (texto or "").lower()
+    return any(patron in texto for patron in ERRORES_DE_TAMANO)
+
+
+def _ruta_progreso(repo):
+    return os.path.join(directorio_estado(repo), PROGRESO_FILE)
+
+
+def cargar_progreso(repo):
+    """Progreso guardado por '<remoto>/<rama>'"""
+    try:
+        with open(_ruta_progreso(repo), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_progreso(repo, datos):
+    ruta = _ruta_progreso(repo)
+    temporal = ruta + ".tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, indent=4, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def progreso(repo, rama, remoto="origin"):
+    """Progreso de un push por partes sin terminar (None si no hay)"""
+    return cargar_progreso(repo).get(f"{remoto}/{rama}")
+
+
+def _actualizar_progreso(repo, rama, remoto, datos):
+    with _cerrojo:
+        todo = cargar_progreso(repo)
+        clave = f"{remoto}/{rama}"
+        if datos is None:
+            todo.pop(clave, None)
+        else:
+            todo[clave] = datos
+        _guardar_progreso(repo, todo)
+
+
+def commits_sin_subir(repo, rama, remoto="origin", ya_aceptado=None):
+    """Commits de la rama que el remoto no tiene, del más antiguo al más nuevo (primer padre)"""
+    comando = ["git", "rev-list", "--reverse", "--first-parent", rama, "--not", f"--remotes={remoto}"]
+    if ya_aceptado:
+        comando.append(ya_aceptado)
+    exito, salida, _ = ejecutar_proceso(comando, cwd=repo)
+    if not exito:
+        return []
+    return salida.split()
+
+
+def tamanos_commits(repo, commits):
+    """Tamaño estimado (bytes en disco de los blobs nuevos) de cada commit
+
+    Un blob que aparece en varios commits solo cuenta en el primero.
+    """
+    if not commits:
+        return {}
+    exito, salida, _ = ejecutar_proceso(
+        ["git", "diff-tree", "--stdin", "-r", "-m", "--root", "--no-abbrev", "--no-renames"],
+        cwd=repo, entrada="\n".join(commits) + "\n")
+    if not exito:
+        return {c: 0 for c in commits}
+    blobs_por_commit = {c: [] for c in commits}
+    vistos = set()
+    actual = None
+    for linea in salida.splitlines():
+        if not linea.startswith(':'):
+            actual = linea.split()[0] if linea.strip() else actual
+            continue
+        campos = linea.split('\t', 1)[0].split()
+        # :modo_ant modo_nuevo oid_ant oid_nuevo estado
+        if len(campos) < 5 or campos[4].startswith('D') or not campos[1].startswith('10'):
+            continue
+        oid = campos[3]
+        if actual in blobs_por_commit and oid not in vistos:
+            vistos.add(oid)
+            blobs_por_commit[actual].append(oid)
+    if not vistos:
+        return {c: 0 for c in commits}
+    exito, salida, _ = ejecutar_proceso(
+        ["git", "cat-file", "--batch-check=%(objectname) %(objectsize:disk)"],
+        cwd=repo, entrada="\n".join(vistos) + "\n")
+    tamano_blob = {}
+    for linea in salida.splitlines() if exito else []:
+        partes = linea.split()
+        if len(partes) == 2 and partes[1].isdigit():
+            tamano_blob[partes[0]] = int(partes[1])
+    return {c: sum(tamano_blob.get(oid, 0) for oid in blobs) for c, blobs in blobs_por_commit.items()}
+
+
+def planificar(commits, tamanos, limite_bytes=LIMITE_TRAMO, max_commits=MAX_COMMITS_TRAMO):
+    """Divide los commits en tramos; devuelve [(último_commit, nº_commits, bytes)]"""
+    tramos = []
+    cuenta = 0
+    acumulado = 0
+    anterior = None
+    for commit in commits:
+        tamano = tamanos.get(commit, 0)
+        if cuenta and (acumulado + tamano > limite_bytes or cuenta >= max_commits):
+            tramos.append((anterior, cuenta, acumulado))
+            cuenta = 0
+            acumulado = 0
+        cuenta += 1
+        acumulado += tamano
+        anterior = commit
+    if cuenta:
+        tramos.append((anterior, cuenta, acumulado))
+    return tramos
+
+
+def conviene_por_partes(repo, rama, remoto="origin", limite_bytes=LIMITE_TRAMO, max_commits=MAX_COMMITS_TRAMO):
+    """True si hay un push por partes a medias o lo pendiente no cabe en un solo tramo"""
+    if progreso(repo, rama, remoto):
+        return True
+    commits = commits_sin_subir(repo, rama, remoto)
+    if len(commits) < 2:
+        return False
+    return len(planificar(commits, tamanos_commits(repo, commits), limite_bytes, max_commits)) > 1
+
+
+def _empujar(repo, remoto, origen, rama):
+    exito, salida, error = ejecutar_proceso(
+        ["git", "push", "--progress", remoto, f"{origen}:refs/heads/{rama}"], cwd=repo)
+    return exito, limpiar_progreso(salida), limpiar_progreso(error)
+
+
+def subir_por_partes(repo, rama, remoto="origin", limite_bytes=LIMITE_TRAMO,
+                     max_commits=MAX_COMMITS_TRAMO, al_avanzar=None):
+    """Sube la rama en tramos y devuelve (exito, salida, error)
+
+    al_avanzar(subidos, total, bytes_tramo) se llama tras cada tramo aceptado.
+    Si un tramo falla por tamaño se parte a la mitad; cualquier otro error
+    (también los de red) detiene la subida dejando el progreso guardado para
+    continuar después.
+    """
+    # Aquí y no arriba: git_cola_push importa este módulo
+    from git_cola_push import es_error_de_red
+    exito_tip, objetivo, _ = ejecutar_proceso(["git", "rev-parse", "--verify", rama], cwd=repo)
+    if not exito_tip:
+        return False, "", f"No existe la rama '{rama}'"
+    objetivo = objetivo.strip()
+    guardado = progreso(repo, rama, remoto)
+    ya_aceptado = guardado.get('ultimo_aceptado') if guardado else None
+    if ya_aceptado and not ejecutar_proceso(["git", "cat-file", "-e", ya_aceptado], cwd=repo)[0]:
+        ya_aceptado = None
+    commits = commits_sin_subir(repo, rama, remoto, ya_aceptado)
+    total = len(commits) + (guardado.get('subidos', 0) if guardado else 0)
+    subidos = total - len(commits)
+    salidas = []
+    tamanos = tamanos_commits(repo, commits)
+
+    while commits:
+        trabajo = trabajo_actual()
+        if trabajo is not None and trabajo.cancelado:
+            break
+        tramos = planificar(commits, tamanos, limite_bytes, max_commits)
+        ultimo, cuenta, bytes_tramo = tramos[0]
+        exito, salida, error = _empujar(repo, remoto, ultimo, rama)
+        if not exito:
+            texto = f"{error}\n{salida}"
+            if cuenta > 1 and not es_error_de_red(texto) and es_error_de_tamano(texto):
+                # El servidor no aceptó el tramo: probar con la mitad de commits
+                max_commits = max(1, cuenta // 2)
+                limite_bytes = max(1, bytes_tramo // 2)
+                continue
+            _actualizar_progreso(repo, rama, remoto, {
+                'objetivo': objetivo, 'ultimo_aceptado': ya_aceptado, 'subidos': subidos, 'total': total,
+                'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'ultimo_error': texto.strip()[:500],
+            })
+            return False, "\n".join(salidas + [salida]), error
+        salidas.append(salida)
+        ya_aceptado = ultimo
+        subidos += cuenta
+        commits = commits[cuenta:]
+        _actualizar_progreso(repo, rama, remoto, {
+            'objetivo': objetivo, 'ultimo_aceptado': ultimo, 'subidos': subidos, 'total': total,
+            'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        })
+        if al_avanzar:
+            al_avanzar(subidos, total, bytes_tramo)
+
+    if commits:
+        return False, "\n".join(salidas), "Subida por partes cancelada (se continuará desde el último tramo)"
+    # Push final normal: deja la rama remota en la punta y actualiza origin/<rama>
+    exito, salida, error = ejecutar_proceso(["git", "push", "--progress", remoto, rama], cwd=repo)
+    if exito:
+        _actualizar_progreso(repo, rama, remoto, None)
+    return exito, "\n".join(salidas + [limpiar_progreso(salida)]).strip(), limpiar_progreso(error)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Uso de recursos de los procesos git
+Un "git add ." o un push grande pueden acaparar disco y CPU y hacer que la
+interfaz (y el editor del usuario) vayan a saltos. Según la prioridad del
+trabajo que lanza cada proceso git:
+
+- interactiva (lo que el usuario está esperando): prioridad normal, sin
+  esperar turno y con todos los hilos que git quiera usar
+- lote (servicio, scripts): prioridad de CPU algo más baja
+- fondo (prefetch, cola sin conexión, limpieza): CPU y disco con prioridad
+  baja (nice/ionice en Linux y macOS, clase de prioridad en Windows)
+
+Además hay un límite global de procesos git a la vez (los interactivos no
+esperan turno) y los trabajos que no son interactivos usan menos hilos de
+git (pack.threads, index.threads) para dejar núcleos libres.
+
+La clase sale de la prioridad del trabajo (git_trabajos). El código que
+lanza git fuera de un trabajo (el servicio, la sincronización de todos los
+proyectos, los hilos de los espejos) la indica con con_clase(LOTE).
+
+Se configura en git_config.json, clave "recursos":
+    {"limite_procesos": 4, "hilos_git": "auto",
+     "fondo": {"nice": 10, "io": "baja"}, "lote": {"nice": 5, "io": "normal"}}
+"""
+
+import os
+import sys
+import time
+import shutil
+import threading
+import subprocess
+from contextlib import contextmanager
+
+from git_metricas import METRICAS
+
+INTERACTIVA = "interactiva"
+LOTE = "lote"
+FONDO = "fondo"
+CLASES = (INTERACTIVA, LOTE, FONDO)
+
+POLITICA_POR_DEFECTO = {
+    'limite_procesos': None,        # None: tantos como núcleos (mínimo 2)
+    'hilos_git': "auto",            # "auto", un número o None (no tocar la configuración de git)
+    LOTE: {'nice': 5, 'io': "normal"},
+    FONDO: {'nice': 10, 'io': "baja"},
+}
+
+_hilo_local = threading.local()
+
+# Prioridad de E/S en Linux: clase "best effort" nivel 7 (la más baja sin llegar a "idle")
+_IONICE = {'baja': ["-c", "2", "-n", "7"], 'inactiva': ["-c", "3"]}
+
+
+def nucleos_disponibles():
+    """Núcleos que puede usar este proceso (respeta la afinidad y los límites del contenedor)"""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except (AttributeError, OSError):
+        return max(1, os.cpu_count() or 1)
+
+
+def clase_actual():
+    """Clase indicada con con_clase en este hilo (None si no se indicó)"""
+    return getattr(_hilo_local, 'clase', None)
+
+
+@contextmanager
+def con_clase(clase):
+    """Los procesos git que se lancen en este hilo dentro del bloque usan esa clase"""
+    anterior = clase_actual()
+    _hilo_local.clase = clase
+    try:
+        yield
+    finally:
+        _hilo_local.clase = anterior
+
+
+class PoliticaRecursos:
+    """Prioridad, hilos de git y límite de procesos según la clase del trabajo"""
+
+    def __init__(self, config=None):
+        self.nucleos = nucleos_disponibles()
+        self._condicion = threading.Condition()
+        self._activos = {clase: 0 for clase in CLASES}
+        self._esperando = 0
+        self._nice = shutil.which("nice") if sys.platform != 'win32' else None
+        self._ionice = shutil.which("ionice") if sys.platform.startswith('linux') else None
+        self.configurar(config)
+
+    def configurar(self, config=None):
+        """Aplica la sección "recursos" de git_config.json (lo que falte queda por defecto)"""
+        config = config or {}
+        politica = {clave: (dict(valor) if isinstance(valor, dict) else valor)
+                    for clave, valor in POLITICA_POR_DEFECTO.items()}
+        for clave, valor in config.items():
+            if isinstance(valor, dict) and isinstance(politica.get(clave), dict):
+                politica[clave].update(valor)
+            else:
+                politica[clave] = valor
+        with self._condicion:
+            self.politica = politica
+            self.limite = int(politica['limite_procesos'] or max(2, self.nucleos))
+            self._condicion.notify_all()
+
+    # --- Límite de procesos -----------------------------------------------------
+
+    @contextmanager
+    def turno(self, clase):
+        """Espera un hueco para lanzar un proceso git (los interactivos no esperan)"""
+        inicio = time.perf_counter()
+        with self._condicion:
+            if clase != INTERACTIVA:
+                self._esperando += 1
+                try:
+                    while sum(self._activos.values()) >= self.limite:
+                        self._condicion.wait()
+                finally:
+                    self._esperando -= 1
+            self._activos[clase] += 1
+        espera = time.perf_counter() - inicio
+        if clase != INTERACTIVA:
+            METRICAS.observar('proceso_espera_segundos', espera, clase=clase)
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._activos[clase] -= 1
+                self._condicion.notify()
+
+    def activos(self):
+        with self._condicion:
+            return dict(self._activos)
+
+    # --- Prioridad e hilos -----------------------------------------------------------
+
+    def hilos_git(self, clase):
+        """Hilos para pack/index (None: lo que decida git)"""
+        valor = self.politica.get('hilos_git')
+        if clase == INTERACTIVA or valor in (None, False):
+            return None
+        if valor == "auto":
+            # Lo que no es interactivo deja la mitad de los núcleos libres
+            return max(1, self.nucleos // 2)
+        return max(1, int(valor))
+
+    def envolver(self, comando, clase):
+        """Antepone nice/ionice al comando en Linux y macOS (en Windows no cambia)"""
+        ajustes = self.politica.get(clase)
+        if clase == INTERACTIVA or not isinstance(ajustes, dict) or sys.platform == 'win32':
+            return comando
+        prefijo = []
+        if self._ionice and ajustes.get('io') in _IONICE:
+            prefijo += [self._ionice] + _IONICE[ajustes['io']]
+        if self._nice and ajustes.get('nice'):
+            prefijo += [self._nice, "-n", str(int(ajustes['nice']))]
+        if not prefijo:
+            return comando
+        if isinstance(comando, str):
+            return " ".join(prefijo) + " " + comando
+        return prefijo + list(comando)
+
+    def opciones_windows(self, clase):
+        """Clase de prioridad del proceso en Windows (se suma a creationflags)"""
+        ajustes = self.politica.get(clase)
+        if sys.platform != 'win32' or clase == INTERACTIVA or not isinstance(ajustes, dict):
+            return 0
+        if not ajustes.get('nice') and ajustes.get('io') not in _IONICE:
+            return 0
+        if ajustes.get('io') == 'inactiva':
+            return getattr(subprocess, 'IDLE_PRIORITY_CLASS', 0)
+        return getattr(subprocess, 'BELOW_NORMAL_PRIORITY_CLASS', 0)
+
+    def entorno(self, entorno, clase):
+        """Añade al entorno de git la configuración de hilos (GIT_CONFIG_COUNT, git 2.31+)"""
+        hilos = self.hilos_git(clase)
+        if hilos is None:
+            return entorno
+        numero = int(entorno.get('GIT_CONFIG_COUNT', 0) or 0)
+        for clave in ("pack.threads", "index.threads"):
+            entorno[f'GIT_CONFIG_KEY_{numero}'] = clave
+            entorno[f'GIT_CONFIG_VALUE_{numero}'] = str(hilos)
+            numero += 1
+        entorno['GIT_CONFIG_COUNT'] = str(numero)
+        return entorno
+
+    def resumen(self):
+        """Política en uso (para la interfaz y las métricas)"""
+        return {
+            'nucleos': self.nucleos,
+            'limite_procesos': self.limite,
+            'activos': self.activos(),
+            'esperando': self._esperando,
+            'hilos_git': {clase: self.hilos_git(clase) for clase in CLASES},
+            'nice': bool(self._nice) or sys.platform == 'win32',
+            'ionice': bool(self._ionice),
+        }
+
+
+POLITICA = PoliticaRecursos()
+
+
+def _metricas_de_recursos():
+    resumen = POLITICA.resumen()
+    metricas = [
+        ('procesos_git_limite', 'gauge', resumen['limite_procesos'], {}),
+        ('procesos_git_esperando', 'gauge', resumen['esperando'], {}),
+        ('nucleos_disponibles', 'gauge', resumen['nucleos'], {}),
+    ]
+    for clase in CLASES:
+        metricas.append(('procesos_git_activos', 'gauge', resumen['activos'][clase], {'clase': clase}))
+    for clase in CLASES:
+        ajustes = POLITICA.politica.get(clase) if clase != INTERACTIVA else None
+        metricas.append(('politica_recursos', 'gauge', 1, {
+            'clase': clase,
+            'nice': (ajustes or {}).get('nice', 0),
+            'io': (ajustes or {}).get('io', "normal"),
+            'hilos_git': resumen['hilos_git'][clase] or "git",
+        }))
+    return metricas
+
+
+METRICAS.agregar_fuente(_metricas_de_recursos)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Varios remotos por proyecto (principal y espejos)
+Cada proyecto puede subir a un remoto principal (origin, el de siempre) y a
+uno o más espejos (p. ej. un servidor interno). Cuando el principal acepta
+el push, ese mismo commit sale a los espejos a la vez, cada uno en su hilo y
+con su propio tiempo límite: un espejo lento nunca retrasa la confirmación
+del principal, y si el principal falla no se sube a ningún espejo.
+Los resultados (éxito y latencia) se informan por remoto.
+
+Uso (p. ej. para probarlo con varios repositorios bare locales):
+    python git_remotos.py --repo C:\\proyecto --espejo interno --espejo copia
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+from git_trabajos import ejecutar_proceso, clase_en_curso
+from git_recursos import con_clase
+from git_metricas import METRICAS, limpiar_progreso
+
+ROL_PRINCIPAL = "principal"
+ROL_ESPEJO = "espejo"
+ROLES = (ROL_PRINCIPAL, ROL_ESPEJO)
+REMOTO_PRINCIPAL = "origin"
+TIMEOUTS = {ROL_PRINCIPAL: 300, ROL_ESPEJO: 120}
+
+
+def _git(repo, *argumentos, **opciones):
+    return ejecutar_proceso(["git"] + list(argumentos), cwd=repo, **opciones)
+
+
+def remotos_del_proyecto(datos):
+    """Remotos registrados de un proyecto: [{'nombre', 'url', 'rol', 'timeout'}]
+
+    Los proyectos antiguos solo tienen 'url_remoto': es el principal (origin).
+    """
+    remotos = [dict(r) for r in datos.get('remotos', []) if r.get('nombre') and r.get('url')]
+    if not any(r.get('rol') == ROL_PRINCIPAL for r in remotos) and datos.get('url_remoto'):
+        remotos.insert(0, {'nombre': REMOTO_PRINCIPAL, 'url': datos['url_remoto'], 'rol': ROL_PRINCIPAL})
+    for remoto in remotos:
+        if remoto.get('rol') not in ROLES:
+            remoto['rol'] = ROL_ESPEJO
+    return remotos
+
+
+def espejos(remotos):
+    return [r for r in remotos if r['rol'] == ROL_ESPEJO]
+
+
+def con_principal(remotos, url):
+    """Lista de remotos con el principal apuntando a url (conserva los espejos)"""
+    resto = [r for r in remotos if r['rol'] != ROL_PRINCIPAL and r['nombre'] != REMOTO_PRINCIPAL]
+    if not url:
+        return resto
+    return [{'nombre': REMOTO_PRINCIPAL, 'url': url, 'rol': ROL_PRINCIPAL}] + resto
+
+
+def configurar(repo, remotos):
+    """Crea o actualiza en git los remotos de la lista; devuelve los errores"""
+    exito, salida, _ = _git(repo, "remote")
+    existentes = set(salida.split()) if exito else set()
+    errores = []
+    for remoto in remotos:
+        if remoto['nombre'] in existentes:
+            exito, _, error = _git(repo, "remote", "set-url", remoto['nombre'], remoto['url'])
+        else:
+            exito, _, error = _git(repo, "remote", "add", remoto['nombre'], remoto['url'])
+        if not exito:
+            errores.append(f"{remoto['nombre']}: {error}")
+    return errores
+
+
+def quitar(repo, nombre):
+    exito, _, error = _git(repo, "remote", "remove", nombre)
+    return None if exito else error
+
+
+def empujar(repo, remoto, referencia):
+    """Push a un remoto con su tiempo límite: {'nombre', 'rol', 'exito', 'segundos', 'error'}"""
+    timeout = remoto.get('timeout') or TIMEOUTS.get(remoto['rol'], TIMEOUTS[ROL_ESPEJO])
+    inicio = time.perf_counter()
+    try:
+        exito, salida, error = _git(repo, "push", "--progress", remoto['nombre'], referencia, timeout=timeout)
+    except Exception as e:
+        exito, salida, error = False, "", str(e)
+    segundos = time.perf_counter() - inicio
+    METRICAS.observar('push_remoto_segundos', segundos, remoto=remoto['nombre'], rol=remoto['rol'])
+    return {
+        'nombre': remoto['nombre'],
+        'rol': remoto['rol'],
+        'exito': exito,
+        'segundos': round(segundos, 2),
+        'error': "" if exito else limpiar_progreso(error or salida)[:500],
+    }
+
+
+class EnvioEspejos:
+    """Pushes a los espejos en curso (uno por hilo, independientes entre sí)"""
+
+    def __init__(self, repo, rama, remotos, al_terminar=None):
+        self.repo = repo
+        self.rama = rama
+        self.remotos = list(remotos)
+        self.al_terminar = al_terminar
+        self.resultados = {}
+        # Los hilos de los espejos heredan la clase de recursos de quien los lanza
+        self.clase = clase_en_curso()
+        self._hilos = []
+        self._cerrojo = threading.Lock()
+
+    def iniciar(self):
+        # El commit exacto de ahora: aunque la rama cambie después, todos reciben lo mismo
+        exito, oid, _ = _git(self.repo, "rev-parse", "--verify", "-q", self.rama)
+        referencia = f"{oid.strip() if exito else self.rama}:refs/heads/{self.rama}"
+        for remoto in self.remotos:
+            hilo = threading.Thread(target=self._empujar, args=(remoto, referencia), daemon=True)
+            self._hilos.append(hilo)
+            hilo.start()
+        return self
+
+    def _empujar(self, remoto, referencia):
+        with con_clase(self.clase):
+            resultado = empujar(self.repo, remoto, referencia)
+        with self._cerrojo:
+            self.resultados[remoto['nombre']] = resultado
+        if self.al_terminar:
+            try:
+                self.al_terminar(resultado)
+            except Exception:
+                pass
+
+    def esperar(self, timeout=None):
+        """Espera a que terminen (cada push ya tiene su propio tiempo límite)"""
+        limite = None if timeout is None else time.time() + timeout
+        for hilo in self._hilos:
+            hilo.join(None if limite is None else max(0, limite - time.time()))
+        return self.pendientes()
+
+    def pendientes(self):
+        with self._cerrojo:
+            return [r['nombre'] for r in self.remotos if r['nombre'] not in self.resultados]
+
+    def lista(self):
+        with self._cerrojo:
+            return [self.resultados[r['nombre']] for r in self.remotos if r['nombre'] in self.resultados]
+
+
+def subir_a_espejos(repo, rama, remotos, al_terminar=None):
+    """Empieza el push a los espejos de la lista y devuelve el EnvioEspejos (no espera)"""
+    return EnvioEspejos(repo, rama, espejos(remotos), al_terminar).iniciar()
+
+
+def subir_a_todos(repo, rama, remotos, al_terminar=None):
+    """Push al principal y, si lo acepta, a los espejos a la vez
+
+    Devuelve (resultado del principal, EnvioEspejos). El principal se
+    informa en cuanto termina, sin esperar a los espejos; si falla, el
+    EnvioEspejos queda vacío.
+    """
+    principal = next((r for r in remotos if r['rol'] == ROL_PRINCIPAL), None)
+    resultado = None
+    if principal is not None:
+        resultado = empujar(repo, principal, rama)
+        if al_terminar:
+            al_terminar(resultado)
+        if not resultado['exito']:
+            return resultado, EnvioEspejos(repo, rama, [])
+    return resultado, subir_a_espejos(repo, rama, remotos, al_terminar)
+
+
+def resumen(resultados, pendientes=()):
+    """Líneas de texto por remoto con su resultado y latencia"""
+    lineas = []
+    for r in resultados:
+        if r['exito']:
+            lineas.append(f"✓ {r['nombre']} ({r['rol']}): {r['segundos']} s")
+        else:
+            motivo = next((l for l in r['error'].splitlines() if l.strip()), "error desconocido")
+            lineas.append(f"✗ {r['nombre']} ({r['rol']}): {r['segundos']} s · {motivo[:200]}")
+    for nombre in pendientes:
+        lineas.append(f"… {nombre}: sigue subiendo")
+    return lineas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Push al remoto principal y después a sus espejos a la vez")
+    parser.add_argument("--repo", default=".")
+    parser.add_argument("--rama", help="rama a subir (por defecto la actual)")
+    parser.add_argument("--principal", default=REMOTO_PRINCIPAL)
+    parser.add_argument("--espejo", action="append", default=[], help="nombre de un remoto git usado como espejo")
+    parser.add_argument("--timeout-espejo", type=float, default=TIMEOUTS[ROL_ESPEJO])
+    args = parser.parse_args()
+    repo = os.path.abspath(args.repo)
+    rama = args.rama
+    if not rama:
+        exito, rama, _ = _git(repo, "symbolic-ref", "--short", "HEAD")
+        rama = rama.strip()
+    remotos = [{'nombre': args.principal, 'url': "", 'rol': ROL_PRINCIPAL}]
+    remotos += [{'nombre': n, 'url': "", 'rol': ROL_ESPEJO, 'timeout': args.timeout_espejo} for n in args.espejo]
+
+    def al_terminar(resultado):
+        print(resumen([resultado])[0], flush=True)
+
+    principal, envio = subir_a_todos(repo, rama, remotos, al_terminar)
+    pendientes = envio.esperar()
+    print("\nResultado por remoto:")
+    for linea in resumen([principal] + envio.lista(), pendientes):
+        print(f"   {linea}")
+    return 0 if principal['exito'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asesor de rendimiento de repositorios
+Inspecciona un repositorio (archivos, tamaño del índice, packs, historial),
+recomienda ajustes de git para repositorios grandes (untrackedCache,
+manyFiles, índice v4, split index, commit-graph...), los aplica guardando
+los valores anteriores para poder revertirlos y mide "git status" y
+"git add" antes y después.
+"""
+
+import os
+import sys
+import time
+import struct
+import statistics
+from datetime import datetime
+
+from git_trabajos import ejecutar_proceso, directorio_git
+
+# Umbrales (número de archivos rastreados / commits) para cada recomendación
+UMBRAL_UNTRACKED_CACHE = 2000
+UMBRAL_INDICE_V4 = 10000
+UMBRAL_MANY_FILES = 20000
+UMBRAL_SPLIT_INDEX = 50000
+UMBRAL_FSMONITOR = 50000
+UMBRAL_COMMIT_GRAPH = 1000
+UMBRAL_PACKS = 20
+
+
+def _git(repo, *argumentos, timeout=None):
+    return ejecutar_proceso(["git"] + list(argumentos), cwd=repo, timeout=timeout)
+
+
+def version_git():
+    """Versión de git como tupla (2, 39, 5)"""
+    exito, salida, _ = ejecutar_proceso(["git", "--version"], timeout=30)
+    numeros = []
+    if exito:
+        for parte in salida.split()[-1].split('.'):
+            if not parte.isdigit():
+                break
+            numeros.append(int(parte))
+    return tuple(numeros) or (0,)
+
+
+def version_indice(repo):
+    """Versión del archivo .git/index (2, 3 o 4), None si no existe"""
+    try:
+        with open(os.path.join(directorio_git(repo), "index"), 'rb') as f:
+            cabecera = f.read(12)
+        if len(cabecera) == 12 and cabecera[:4] == b'DIRC':
+            return struct.unpack('>I', cabecera[4:8])[0]
+    except OSError:
+        pass
+    return None
+
+
+def leer_config(repo, clave):
+    """Valor local de una clave de configuración (None si no está definida en el repositorio)"""
+    exito, valor, _ = _git(repo, "config", "--local", "--get", clave, timeout=30)
+    return valor if exito else None
+
+
+def inspeccionar(repo):
+    """Datos del repositorio que influyen en el rendimiento"""
+    _, archivos, _ = ejecutar_proceso(["git", "ls-files", "-z"], cwd=repo, texto=False)
+    _, objetos, _ = _git(repo, "count-objects", "-v")
+    _, profundidad, _ = _git(repo, "rev-list", "--count", "HEAD")
+    datos_objetos = {}
+    for linea in objetos.splitlines():
+        if ':' in linea:
+            clave, valor = linea.split(':', 1)
+            datos_objetos[clave.strip()] = valor.strip()
+    try:
+        tamano_indice = os.path.getsize(os.path.join(directorio_git(repo), "index"))
+    except OSError:
+        tamano_indice = 0
+    git_dir = directorio_git(repo)
+    return {
+        'archivos': archivos.count(b'\0'),
+        'tamano_indice': tamano_indice,
+        'version_indice': version_indice(repo),
+        'packs': int(datos_objetos.get('packs', 0) or 0),
+        'objetos_sueltos': int(datos_objetos.get('count', 0) or 0),
+        'tamano_packs_kb': int(datos_objetos.get('size-pack', 0) or 0),
+        'commits': int(profundidad) if profundidad.isdigit() else 0,
+        'commit_graph': os.path.exists(os.path.join(git_dir, "objects", "info", "commit-graph")) or
+                        os.path.isdir(os.path.join(git_dir, "objects", "info", "commit-graphs")),
+        'split_index': os.path.exists(os.path.join(git_dir, "sharedindex")) or
+                       any(n.startswith("sharedindex.") for n in _listar(git_dir)),
+        'version_git': version_git(),
+        'nucleos': os.cpu_count() or 1,
+    }
+
+
+def _listar(carpeta):
+    try:
+        return os.listdir(carpeta)
+    except OSError:
+        return []
+
+
+def recomendar(repo, info):
+    """Lista de ajustes recomendados: [{'clave', 'valor', 'motivo'}]"""
+    recomendaciones = []
+
+    def agregar(clave, valor, motivo, requiere=(0,)):
+        if info['version_git'] < requiere:
+            return
+        if leer_config(repo, clave) == valor:
+            return
+        recomendaciones.append({'clave': clave, 'valor': valor, 'motivo': motivo})
+
+    archivos = info['archivos']
+    if archivos >= UMBRAL_MANY_FILES:
+        agregar('feature.manyFiles', 'true',
+                f"{archivos} archivos: activa índice v4 y caché de no rastreados", (2, 24))
+    if archivos >= UMBRAL_UNTRACKED_CACHE:
+        agregar('core.untrackedCache', 'true',
+                "git status no vuelve a listar carpetas sin cambios", (2, 8))
+    if archivos >= UMBRAL_INDICE_V4 and info['version_indice'] != 4:
+        agregar('index.version', '4',
+                f"Índice de {info['tamano_indice'] // 1024} KB: las rutas se comprimen por prefijo", (2, 0))
+    if archivos >= UMBRAL_SPLIT_INDEX and not info['split_index']:
+        agregar('core.splitIndex', 'true',
+                "Cada 'git add' reescribe solo la parte del índice que cambió", (2, 9))
+    if archivos >= UMBRAL_FSMONITOR and sys.platform in ('win32', 'darwin'):
+        agregar('core.fsmonitor', 'true',
+                "El sistema avisa de los archivos modificados en lugar de revisarlos todos", (2, 37))
+    if info['commits'] >= UMBRAL_COMMIT_GRAPH:
+        agregar('core.commitGraph', 'true', f"{info['commits']} commits: recorrer el historial es más rápido", (2, 18))
+        agregar('fetch.writeCommitGraph', 'true', "Mantiene el commit-graph al día tras cada fetch", (2, 24))
+        if not info['commit_graph']:
+            recomendaciones.append({'clave': 'commit-graph', 'valor': 'escribir',
+                                    'motivo': "Genera el archivo commit-graph ahora"})
+    if info['packs'] >= UMBRAL_PACKS:
+        recomendaciones.append({'clave': 'repack', 'valor': 'incremental',
+                                'motivo': f"{info['packs']} packs: buscar objetos es más lento"})
+    return recomendaciones
+
+
+def aplicar(repo, recomendaciones):
+    """Aplica los ajustes y devuelve un registro con los valores anteriores (para revertir)"""
+    registro = {
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'ajustes': [],
+        'version_indice_anterior': version_indice(repo),
+        'errores': [],
+    }
+    for rec in recomendaciones:
+        clave, valor = rec['clave'], rec['valor']
+        if clave == 'commit-graph':
+            exito, _, error = _git(repo, "commit-graph", "write", "--reachable", "--changed-paths")
+            if not exito:
+                exito, _, error = _git(repo, "commit-graph", "write", "--reachable")
+        elif clave == 'repack':
+            exito, _, error = _git(repo, "repack", "-d", "--geometric=2")
+            if not exito:
+                exito, _, error = _git(repo, "repack", "-d")
+        else:
+            anterior = leer_config(repo, clave)
+            exito, _, error = _git(repo, "config", "--local", clave, valor, timeout=30)
+            if exito:
+                registro['ajustes'].append({'clave': clave, 'anterior': anterior, 'nuevo': valor})
+            # Algunos ajustes necesitan reescribir el índice para tener efecto inmediato
+            if exito and clave == 'index.version':
+                _git(repo, "update-index", "--index-version", valor)
+            elif exito and clave == 'core.splitIndex':
+                _git(repo, "update-index", "--split-index")
+            elif exito and clave == 'core.untrackedCache':
+                _git(repo, "update-index", "--untracked-cache")
+            elif exito and clave == 'feature.manyFiles':
+                _git(repo, "update-index", "--index-version", "4")
+        if not exito:
+            registro['errores'].append(f"{clave}: {error[:200]}")
+    return registro
+
+
+def revertir(repo, registro):
+    """Deshace los ajustes de configuración registrados por aplicar()"""
+    errores = []
+    for ajuste in reversed(registro.get('ajustes', [])):
+        clave, anterior = ajuste['clave'], ajuste['anterior']
+        if anterior is None:
+            exito, _, error = _git(repo, "config", "--local", "--unset", clave, timeout=30)
+        else:
+            exito, _, error = _git(repo, "config", "--local", clave, anterior, timeout=30)
+        if not exito and error:
+            errores.append(f"{clave}: {error[:200]}")
+        if clave == 'core.splitIndex':
+            _git(repo, "update-index", "--no-split-index")
+        elif clave == 'core.untrackedCache':
+            _git(repo, "update-index", "--no-untracked-cache")
+    anterior_indice = registro.get('version_indice_anterior')
+    if anterior_indice and anterior_indice != version_indice(repo):
+        _git(repo, "update-index", "--index-version", str(anterior_indice))
+    return errores
+
+
+def _cronometrar(repo, argumentos, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        ejecutar_proceso(["git"] + argumentos, cwd=repo, texto=False)
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def medir(repo, repeticiones=5):
+    """Mide 'git status' y 'git add' (en seco, sin tocar el índice); mediana en milisegundos"""
+    # Una ejecución previa para que la caché del sistema de archivos esté caliente
+    ejecutar_proceso(["git", "status", "--porcelain"], cwd=repo, texto=False)
+    resultados = {}
+    for nombre, argumentos in (
+        ('status', ["status", "--porcelain"]),
+        ('add', ["add", "--dry-run", "--all", "."]),
+    ):
+        tiempos = _cronometrar(repo, argumentos, repeticiones)
+        resultados[nombre] = {
+            'mediana_ms': round(statistics.median(tiempos) * 1000, 1),
+            'min_ms': round(min(tiempos) * 1000, 1),
+        }
+    return resultados
+
+
+def comparar(antes, despues):
+    """Líneas de texto con la mejora de cada operación"""
+    lineas = []
+    for nombre in antes:
+        a = antes[nombre]['mediana_ms']
+        d = despues[nombre]['mediana_ms']
+        cambio = (d - a) / a * 100 if a else 0
+        lineas.append(f"git {nombre}: {a:.0f} ms → {d:.0f} ms ({cambio:+.0f}%)")
+    return lineas
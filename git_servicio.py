@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servicio local residente (JSON-RPC)
+Un proceso en segundo plano que mantiene el motor "caliente": registro de
+proyectos, refs remotas y estado de cada repositorio en caché. La interfaz
+y los scripts se conectan como clientes y se ahorran arrancar Python,
+descomprimir el .exe e iniciar Tk en cada acción.
+
+Escucha solo en 127.0.0.1 (puerto elegido por el sistema) y exige el token
+guardado en ~/.git-automatizado/servicio.json. Protocolo: JSON-RPC 2.0, un
+mensaje JSON por línea.
+
+Uso:
+    pythonw git_servicio.py                      # iniciar el servicio
+    python git_servicio.py --llamar estado --ruta C:\\mi-proyecto
+    python git_servicio.py --llamar sincronizar_todo
+    python git_servicio.py --detener
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import secrets
+import argparse
+import threading
+import subprocess
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+
+import git_operaciones
+from git_trabajos import ejecutar_proceso, directorio_git
+from git_metricas import METRICAS, ruta_por_defecto
+from git_recursos import POLITICA, LOTE, con_clase
+from git_push_por_partes import conviene_por_partes, subir_por_partes, commits_sin_subir
+import git_submodulos
+import git_remotos
+
+ARCHIVO_SERVICIO = ruta_por_defecto("servicio.json")
+PROYECTOS_FILE = "proyectos_guardados.json"
+CONFIG_FILE = "git_config.json"
+VIGENCIA_ESTADO = 2.0
+VIGENCIA_REFS = 60.0
+MAX_SINCRONIZACIONES = 4
+ESPERA_ARRANQUE = 10
+# La interfaz no espera más que esto por una respuesta: si el servicio se cuelga, usa git directamente
+TIMEOUT_INTERFAZ = 5
+
+# Códigos de error JSON-RPC
+ERROR_PARSEO = -32700
+ERROR_METODO = -32601
+ERROR_PARAMETROS = -32602
+ERROR_INTERNO = -32603
+ERROR_GIT = -32000
+ERROR_TOKEN = -32001
+
+
+class ErrorServicio(Exception):
+    """Error devuelto por el servicio (o al no poder conectar con él)"""
+
+    def __init__(self, mensaje, codigo=ERROR_INTERNO):
+        super().__init__(mensaje)
+        self.codigo = codigo
+
+
+def carpeta_aplicacion():
+    """Carpeta del programa (donde están git_config.json y proyectos_guardados.json)"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def _configuracion():
+    """git_config.json de la carpeta del programa ({} si no existe)"""
+    try:
+        with open(os.path.join(carpeta_aplicacion(), CONFIG_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class CacheMotor:
+    """Cachés del servicio: registro de proyectos, estado por repositorio y refs remotas"""
+
+    def __init__(self, ruta_proyectos):
+        self.ruta_proyectos = ruta_proyectos
+        self._proyectos = {}
+        self._mtime_proyectos = None
+        self._estados = {}
+        self._refs = {}
+        self._cerrojo = threading.Lock()
+
+    def proyectos(self):
+        """Registro de proyectos (se relee solo si el archivo cambió)"""
+        try:
+            mtime = os.path.getmtime(self.ruta_proyectos)
+        except OSError:
+            return {}
+        with self._cerrojo:
+            if mtime != self._mtime_proyectos:
+                try:
+                    with open(self.ruta_proyectos, 'r', encoding='utf-8') as f:
+                        self._proyectos = json.load(f)
+                except (OSError, ValueError):
+                    self._proyectos = {}
+                self._mtime_proyectos = mtime
+            return dict(self._proyectos)
+
+    def _huella(self, repo):
+        """Cambia cuando git escribe el índice o mueve HEAD"""
+        git_dir = directorio_git(repo)
+        huella = []
+        for nombre in ("index", "HEAD"):
+            try:
+                huella.append(os.stat(os.path.join(git_dir, nombre)).st_mtime_ns)
+            except OSError:
+                huella.append(None)
+        return tuple(huella)
+
+    def estado(self, repo):
+        clave = os.path.normcase(os.path.normpath(repo))
+        huella = self._huella(repo)
+        with self._cerrojo:
+            guardado = self._estados.get(clave)
+        if guardado and guardado[1] == huella and time.monotonic() - guardado[0] < VIGENCIA_ESTADO:
+            METRICAS.incrementar('servicio_cache_total', cache='estado', resultado='acierto')
+            return dict(guardado[2], cache=True)
+        METRICAS.incrementar('servicio_cache_total', cache='estado', resultado='fallo')
+        datos = git_operaciones.estado(repo)
+        with self._cerrojo:
+            self._estados[clave] = (time.monotonic(), self._huella(repo), datos)
+        return dict(datos, cache=False)
+
+    def refs_remotas(self, repo, remoto="origin", refrescar=False):
+        clave = (os.path.normcase(os.path.normpath(repo)), remoto)
+        with self._cerrojo:
+            guardado = self._refs.get(clave)
+        if guardado and not refrescar and time.monotonic() - guardado[0] < VIGENCIA_REFS:
+            METRICAS.incrementar('servicio_cache_total', cache='refs', resultado='acierto')
+            return guardado[1]
+        METRICAS.incrementar('servicio_cache_total', cache='refs', resultado='fallo')
+        exito, salida, error = ejecutar_proceso(["git", "ls-remote", "--heads", "--tags", remoto], cwd=repo)
+        if not exito:
+            raise ErrorServicio(error or "No se pudo consultar el remoto", ERROR_GIT)
+        refs = {}
+        for linea in salida.splitlines():
+            partes = linea.split('\t')
+            if len(partes) == 2:
+                refs[partes[1]] = partes[0]
+        with self._cerrojo:
+            self._refs[clave] = (time.monotonic(), refs)
+        return refs
+
+    def invalidar(self, repo=None):
+        with self._cerrojo:
+            if repo is None:
+                self._estados.clear()
+                self._refs.clear()
+                return
+            clave = os.path.normcase(os.path.normpath(repo))
+            self._estados.pop(clave, None)
+            for clave_refs in [c for c in self._refs if c[0] == clave]:
+                del self._refs[clave_refs]
+
+
+class Motor:
+    """Métodos que expone el servicio (cada uno recibe parámetros con nombre)"""
+
+    def __init__(self, ruta_proyectos, al_detener=None):
+        self.cache = CacheMotor(ruta_proyectos)
+        self.inicio = time.time()
+        self.al_detener = al_detener
+
+    def _repo(self, ruta):
+        if not ruta or not os.path.isdir(ruta):
+            raise ErrorServicio(f"La carpeta no existe: {ruta}", ERROR_PARAMETROS)
+        return ruta
+
+    def ping(self):
+        return {'pid': os.getpid(), 'inicio': self.inicio, 'segundos': round(time.time() - self.inicio, 1)}
+
+    def proyectos(self):
+        return self.cache.proyectos()
+
+    def estado(self, ruta):
+        return self.cache.estado(self._repo(ruta))
+
+    def refs_remotas(self, ruta, remoto="origin", refrescar=False):
+        return self.cache.refs_remotas(self._repo(ruta), remoto, refrescar)
+
+    def preparar(self, ruta, archivos=None):
+        repo = self._repo(ruta)
+        if archivos:
+            exito, salida, error = git_operaciones.agregar_archivos(repo, archivos)
+        else:
+            exito, salida, error = git_operaciones.agregar_todo(repo)
+        self.cache.invalidar(repo)
+        if not exito:
+            raise ErrorServicio(error or salida, ERROR_GIT)
+        return {'preparados': len(archivos) if archivos else None}
+
+    def commit(self, ruta, mensaje):
+        repo = self._repo(ruta)
+        if not mensaje:
+            raise ErrorServicio("Falta el mensaje del commit", ERROR_PARAMETROS)
+        exito, salida, error = git_operaciones.hacer_commit(repo, mensaje)
+        self.cache.invalidar(repo)
+        if not exito:
+            raise ErrorServicio(error or salida, ERROR_GIT)
+        return {'salida': salida}
+
+    def push(self, ruta, rama=None, remoto="origin", esperar_espejos=False):
+        repo = self._repo(ruta)
+        rama = rama or git_operaciones.rama_actual(repo)
+        # Los submódulos primero: el proyecto no debe apuntar a commits que no están en ningún remoto
+        submodulos = git_submodulos.subir(repo)
+        errores = [f"{r['relativa']}: {r['error']}" for r in submodulos if r['error']]
+        if errores:
+            raise ErrorServicio("Falló un submódulo:\n" + "\n".join(errores), ERROR_GIT)
+        if conviene_por_partes(repo, rama, remoto):
+            exito, salida, error = subir_por_partes(repo, rama, remoto)
+        else:
+            exito, salida, error = git_operaciones.subir_rama(repo, rama, remoto)
+        self.cache.invalidar(repo)
+        if not exito:
+            raise ErrorServicio(error or salida, ERROR_GIT)
+        # Los espejos reciben el commit que aceptó el principal (nunca si falló);
+        # la respuesta no los espera salvo que se pida
+        datos = self.cache.proyectos().get(os.path.normpath(repo), {})
+        envio = git_remotos.subir_a_espejos(repo, rama, git_remotos.remotos_del_proyecto(datos))
+        pendientes = envio.esperar() if esperar_espejos else envio.pendientes()
+        return {'rama': rama, 'salida': salida, 'submodulos': submodulos,
+                'espejos': envio.lista(), 'espejos_pendientes': pendientes}
+
+    def sincronizar_todo(self, max_paralelos=MAX_SINCRONIZACIONES):
+        """Sube todos los proyectos registrados que tengan commits sin subir"""
+        candidatos = [
+            ruta for ruta in self.cache.proyectos()
+            if os.path.isdir(ruta) and os.path.exists(os.path.join(ruta, ".git"))
+        ]
+
+        def sincronizar(repo):
+            with con_clase(LOTE):
+                return sincronizar_uno(repo)
+
+        def sincronizar_uno(repo):
+            inicio = time.perf_counter()
+            rama = git_operaciones.rama_actual(repo)
+            if not commits_sin_subir(repo, rama):
+                return {'ruta': repo, 'rama': rama, 'resultado': 'al_dia'}
+            try:
+                self.push(repo, rama)
+                resultado = {'ruta': repo, 'rama': rama, 'resultado': 'subido'}
+            except ErrorServicio as e:
+                resultado = {'ruta': repo, 'rama': rama, 'resultado': 'error', 'error': str(e)[:500]}
+            resultado['segundos'] = round(time.perf_counter() - inicio, 2)
+            return resultado
+
+        with ThreadPoolExecutor(max_workers=max(1, int(max_paralelos))) as grupo:
+            return list(grupo.map(sincronizar, candidatos))
+
+    def invalidar(self, ruta=None):
+        self.cache.invalidar(ruta)
+        return True
+
+    def detener(self):
+        if self.al_detener:
+            threading.Thread(target=self.al_detener, daemon=True).start()
+        return True
+
+    METODOS = ('ping', 'proyectos', 'estado', 'refs_remotas', 'preparar', 'commit', 'push',
+               'sincronizar_todo', 'invalidar', 'detener')
+
+    def despachar(self, metodo, parametros):
+        if metodo not in self.METODOS:
+            raise ErrorServicio(f"Método desconocido: {metodo}", ERROR_METODO)
+        if not isinstance(parametros, dict):
+            raise ErrorServicio("Los parámetros deben ir por nombre", ERROR_PARAMETROS)
+        inicio = time.perf_counter()
+        try:
+            # Lo que pide un cliente del servicio corre como lote (ver git_recursos)
+            with con_clase(LOTE):
+                return getattr(self, metodo)(**parametros)
+        except TypeError as e:
+            raise ErrorServicio(str(e), ERROR_PARAMETROS)
+        finally:
+            METRICAS.observar('servicio_llamada_segundos', time.perf_counter() - inicio, metodo=metodo)
+
+
+class _Manejador(socketserver.StreamRequestHandler):
+    """Una conexión: lee peticiones línea a línea y responde en el mismo orden"""
+
+    def handle(self):
+        for linea in self.rfile:
+            if not linea.strip():
+                continue
+            respuesta = self.server.responder(linea)
+            self.wfile.write(json.dumps(respuesta, ensure_ascii=False).encode('utf-8') + b"\n")
+            self.wfile.flush()
+
+
+class ServidorLocal(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, motor, token, puerto=0):
+        super().__init__(("127.0.0.1", puerto), _Manejador)
+        self.motor = motor
+        self.token = token
+
+    def responder(self, linea):
+        try:
+            peticion = json.loads(linea)
+        except ValueError:
+            return {'jsonrpc': "2.0", 'id': None, 'error': {'code': ERROR_PARSEO, 'message': "JSON inválido"}}
+        id_peticion = peticion.get('id')
+        if not secrets.compare_digest(str(peticion.get('token', "")), self.token):
+            return {'jsonrpc': "2.0", 'id': id_peticion, 'error': {'code': ERROR_TOKEN, 'message': "Token inválido"}}
+        try:
+            resultado = self.motor.despachar(peticion.get('method'), peticion.get('params') or {})
+            return {'jsonrpc': "2.0", 'id': id_peticion, 'result': resultado}
+        except ErrorServicio as e:
+            return {'jsonrpc': "2.0", 'id': id_peticion, 'error': {'code': e.codigo, 'message': str(e)}}
+        except Exception as e:
+            return {'jsonrpc': "2.0", 'id': id_peticion, 'error': {'code': ERROR_INTERNO, 'message': str(e)}}
+
+
+def servir(ruta_proyectos=None, puerto=0):
+    """Inicia el servicio y bloquea hasta que se detiene"""
+    if conectar(TIMEOUT_INTERFAZ) is not None:
+        print("El servicio ya está en marcha")
+        return
+    ruta_proyectos = ruta_proyectos or os.path.join(carpeta_aplicacion(), PROYECTOS_FILE)
+    POLITICA.configurar(_configuracion().get('recursos'))
+    token = secrets.token_hex(16)
+    motor = Motor(ruta_proyectos)
+    servidor = ServidorLocal(motor, token, puerto)
+    motor.al_detener = servidor.shutdown
+    os.makedirs(os.path.dirname(ARCHIVO_SERVICIO), exist_ok=True)
+    temporal = ARCHIVO_SERVICIO + ".tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump({'puerto': servidor.server_address[1], 'token': token, 'pid': os.getpid(),
+                   'inicio': motor.inicio}, f)
+    if sys.platform != 'win32':
+        os.chmod(temporal, 0o600)
+    os.replace(temporal, ARCHIVO_SERVICIO)
+    try:
+        servidor.serve_forever()
+    finally:
+        servidor.server_close()
+        try:
+            with open(ARCHIVO_SERVICIO, 'r', encoding='utf-8') as f:
+                if json.load(f).get('pid') == os.getpid():
+                    os.remove(ARCHIVO_SERVICIO)
+        except (OSError, ValueError):
+            pass
+
+
+class ClienteServicio:
+    """Conexión con el servicio; llamar() envía una petición y espera la respuesta"""
+
+    def __init__(self, puerto, token, timeout=None):
+        self.token = token
+        self._socket = socket.create_connection(("127.0.0.1", puerto), timeout=5)
+        self._socket.settimeout(timeout)
+        self._archivo = self._socket.makefile('rwb')
+        self._siguiente_id = 0
+        self._cerrojo = threading.Lock()
+
+    def llamar(self, metodo, **parametros):
+        with self._cerrojo:
+            self._siguiente_id += 1
+            peticion = {'jsonrpc': "2.0", 'id': self._siguiente_id, 'method': metodo,
+                        'params': parametros, 'token': self.token}
+            try:
+                self._archivo.write(json.dumps(peticion, ensure_ascii=False).encode('utf-8') + b"\n")
+                self._archivo.flush()
+                linea = self._archivo.readline()
+            except socket.timeout:
+                # La respuesta puede llegar tarde y se leería como la de la petición siguiente
+                self.cerrar()
+                raise ErrorServicio(f"El servicio no respondió a '{metodo}' a tiempo")
+            except OSError as e:
+                raise ErrorServicio(f"Se perdió la conexión con el servicio: {e}")
+        if not linea:
+            raise ErrorServicio("El servicio cerró la conexión")
+        respuesta = json.loads(linea)
+        if 'error' in respuesta:
+            raise ErrorServicio(respuesta['error'].get('message', ""), respuesta['error'].get('code', ERROR_INTERNO))
+        return respuesta.get('result')
+
+    def cerrar(self):
+        try:
+            self._archivo.close()
+            self._socket.close()
+        except OSError:
+            pass
+
+
+def conectar(timeout=None):
+    """Cliente conectado al servicio en marcha, o None si no hay servicio"""
+    try:
+        with open(ARCHIVO_SERVICIO, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        cliente = ClienteServicio(datos['puerto'], datos['token'], timeout)
+    except (OSError, ValueError, KeyError):
+        return None
+    try:
+        cliente.llamar('ping')
+    except (ErrorServicio, ValueError):
+        cliente.cerrar()
+        return None
+    return cliente
+
+
+def iniciar_en_segundo_plano(timeout=None):
+    """Lanza el servicio en un proceso aparte y espera a poder conectarse"""
+    if getattr(sys, 'frozen', False):
+        comando = [sys.executable, "--servicio"]
+    else:
+        comando = [sys.executable, os.path.abspath(__file__)]
+    opciones = {'stdin': subprocess.DEVNULL, 'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL,
+                'cwd': carpeta_aplicacion()}
+    if sys.platform == 'win32':
+        opciones['creationflags'] = subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        opciones['start_new_session'] = True
+    subprocess.Popen(comando, **opciones)
+    limite = time.monotonic() + ESPERA_ARRANQUE
+    while time.monotonic() < limite:
+        cliente = conectar(timeout)
+        if cliente is not None:
+            return cliente
+        time.sleep(0.2)
+    return None
+
+
+def asegurar_servicio(timeout=None):
+    """Cliente del servicio, arrancándolo si no estaba en marcha
+
+    timeout: segundos máximos por llamada (None espera lo que haga falta,
+    como los scripts; la interfaz usa TIMEOUT_INTERFAZ).
+    """
+    return conectar(timeout) or iniciar_en_segundo_plano(timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de Git Automatizado")
+    parser.add_argument("--proyectos", help="archivo del registro de proyectos")
+    parser.add_argument("--puerto", type=int, default=0)
+    parser.add_argument("--llamar", metavar="METODO", help="llamar a un método del servicio en marcha")
+    parser.add_argument("--ruta", help="carpeta del proyecto (para --llamar)")
+    parser.add_argument("--parametros", default="{}", help="parámetros extra en JSON (para --llamar)")
+    parser.add_argument("--detener", action="store_true", help="detener el servicio en marcha")
+    args = parser.parse_args()
+
+    if args.llamar or args.detener:
+        cliente = conectar() if args.detener else asegurar_servicio()
+        if cliente is None:
+            print("✗ El servicio no está en marcha" if args.detener else "✗ No se pudo iniciar el servicio")
+            return 1
+        parametros = json.loads(args.parametros)
+        if args.ruta:
+            parametros['ruta'] = os.path.abspath(args.ruta)
+        try:
+            resultado = cliente.llamar('detener' if args.detener else args.llamar, **parametros)
+        except ErrorServicio as e:
+            print(f"✗ {e}")
+            return 1
+        finally:
+            cliente.cerrar()
+        print(json.dumps(resultado, indent=4, ensure_ascii=False))
+        return 0
+
+    servir(args.proyectos, args.puerto)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
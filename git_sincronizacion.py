@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sincronización antes de subir: fetch → rebase (o merge) → push
+El push nunca descargaba nada, así que cualquier cambio en el remoto lo
+hacía fallar como "no fast-forward" (y luego se probaba a ciegas con main y
+master). Aquí un hilo en segundo plano descarga cada cierto tiempo las
+ramas remotas en un espacio aparte (refs/prefetch/remotes/<remoto>/, el
+mismo que usa "git maintenance"), sin tocar refs/remotes/ ni las ramas
+del usuario. Al subir, el fetch de la rama ya encuentra los objetos en
+local y es casi gratis; los commits locales se colocan encima de lo nuevo
+y solo entonces se hace el push. Si hay conflictos se deshace todo y se
+informa de qué archivos chocan.
+"""
+
+import os
+import json
+import time
+import threading
+from datetime import datetime
+
+from git_trabajos import ejecutar_proceso, directorio_estado, directorio_git, PRIORIDAD_FONDO
+from git_operaciones import es_rechazo_no_fast_forward
+from git_cola_push import hay_conexion
+from git_metricas import METRICAS
+
+PREFIJO_PREFETCH = "refs/prefetch/remotes"
+SINCRONIZACION_FILE = "sincronizacion.json"
+INTERVALO_PREFETCH = 900
+MODOS = ("rebase", "merge")
+
+_cerrojo = threading.Lock()
+
+
+def _git(repo, *argumentos, **opciones):
+    return ejecutar_proceso(["git"] + list(argumentos), cwd=repo, **opciones)
+
+
+def _ruta_estado(repo, crear=False):
+    if crear:
+        return os.path.join(directorio_estado(repo), SINCRONIZACION_FILE)
+    return os.path.join(directorio_git(repo), "git-automatizado", SINCRONIZACION_FILE)
+
+
+def cargar_estado(repo):
+    """Último prefetch por remoto: {'prefetch': {remoto: {'fecha', 'ts', 'segundos', 'error'}}}"""
+    try:
+        with open(_ruta_estado(repo), 'r', encoding='utf-8') as f:
+            estado = json.load(f)
+    except (OSError, ValueError):
+        estado = {}
+    estado.setdefault('prefetch', {})
+    return estado
+
+
+def _anotar_prefetch(repo, remoto, segundos, error):
+    with _cerrojo:
+        estado = cargar_estado(repo)
+        estado['prefetch'][remoto] = {
+            'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'ts': time.time(),
+            'segundos': round(segundos, 2),
+            'error': (error or "")[:300],
+        }
+        ruta = _ruta_estado(repo, crear=True)
+        temporal = ruta + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, indent=4, ensure_ascii=False)
+        os.replace(temporal, ruta)
+
+
+def prefetch(repo, remoto="origin", timeout=None):
+    """Descarga las ramas del remoto en refs/prefetch/remotes/<remoto>/ (no toca nada más)
+
+    Devuelve (exito, error).
+    """
+    inicio = time.perf_counter()
+    exito, _, error = _git(repo, "fetch", "--quiet", "--prune", "--no-tags", "--no-write-fetch-head",
+                           remoto, f"+refs/heads/*:{PREFIJO_PREFETCH}/{remoto}/*", timeout=timeout)
+    segundos = time.perf_counter() - inicio
+    METRICAS.observar('prefetch_segundos', segundos, proyecto=os.path.basename(os.path.normpath(repo)))
+    _anotar_prefetch(repo, remoto, segundos, None if exito else error)
+    return exito, None if exito else error
+
+
+def actualizar_upstream(repo, rama, remoto="origin"):
+    """Fetch de la rama remota a refs/remotes/<remoto>/<rama> justo antes del push
+
+    Tras un prefetch los objetos ya están en local y solo se negocian refs.
+    Devuelve (oid, error); oid es None si la rama todavía no existe en el remoto.
+    """
+    exito, salida, error = _git(repo, "fetch", "--no-tags", remoto,
+                                f"+refs/heads/{rama}:refs/remotes/{remoto}/{rama}")
+    if not exito:
+        if "couldn't find remote ref" in (error or salida).lower():
+            return None, None
+        return None, error or salida or "No se pudo consultar el remoto"
+    exito, oid, _ = _git(repo, "rev-parse", "--verify", "-q", f"refs/remotes/{remoto}/{rama}")
+    return (oid.strip() if exito else None), None
+
+
+def _rama_actual(repo):
+    exito, rama, _ = _git(repo, "symbolic-ref", "--short", "-q", "HEAD")
+    return rama.strip() if exito else None
+
+
+def archivos_en_conflicto(repo):
+    exito, salida, _ = _git(repo, "diff", "--name-only", "--diff-filter=U")
+    return [linea for linea in salida.splitlines() if linea.strip()] if exito else []
+
+
+def integrar(repo, rama, remoto="origin", modo="rebase"):
+    """Trae lo nuevo de la rama remota y coloca encima los commits locales
+
+    Devuelve {'accion', 'adelante', 'atras', 'conflictos', 'error', 'segundos'}:
+    accion es 'nueva' (la rama no existe en el remoto), 'al_dia', 'avance'
+    (solo había cambios remotos), 'rebase', 'merge', 'otra_rama',
+    'conflicto' (se deshizo todo; ver 'conflictos') o 'error'.
+    """
+    inicio = time.perf_counter()
+    resultado = {'accion': None, 'adelante': 0, 'atras': 0, 'conflictos': [], 'error': None}
+
+    def terminar(accion, error=None):
+        resultado['accion'] = accion
+        resultado['error'] = error
+        resultado['segundos'] = round(time.perf_counter() - inicio, 2)
+        return resultado
+
+    if modo not in MODOS:
+        return terminar('error', f"Modo de sincronización desconocido: {modo}")
+    oid, error = actualizar_upstream(repo, rama, remoto)
+    if error:
+        return terminar('error', error)
+    if oid is None:
+        return terminar('nueva')
+    if _rama_actual(repo) != rama:
+        # Solo se puede integrar en la rama que está abierta; el push dirá si hace falta
+        return terminar('otra_rama')
+    upstream = f"refs/remotes/{remoto}/{rama}"
+    exito, cuentas, error = _git(repo, "rev-list", "--left-right", "--count", f"HEAD...{upstream}")
+    if not exito:
+        return terminar('error', error)
+    adelante, atras = (int(n) for n in cuentas.split())
+    resultado['adelante'], resultado['atras'] = adelante, atras
+    if atras == 0:
+        return terminar('al_dia')
+    if adelante == 0:
+        exito, salida, error = _git(repo, "merge", "--ff-only", "--autostash", upstream)
+        return terminar('avance') if exito else terminar('error', error or salida)
+
+    if modo == "rebase":
+        exito, salida, error = _git(repo, "rebase", "--autostash", upstream)
+    else:
+        exito, salida, error = _git(repo, "merge", "--no-edit", "--autostash", upstream)
+    if exito:
+        return terminar(modo)
+    conflictos = archivos_en_conflicto(repo)
+    # Dejar el repositorio como estaba: el usuario decide cómo resolver
+    _git(repo, modo, "--abort")
+    if conflictos:
+        resultado['conflictos'] = conflictos
+        return terminar('conflicto', error or salida)
+    return terminar('error', error or salida)
+
+
+def describir(resultado, rama, remoto="origin"):
+    """Texto corto para el registro de la interfaz"""
+    accion = resultado['accion']
+    if accion == 'nueva':
+        return f"La rama '{rama}' todavía no existe en {remoto}: se creará"
+    if accion == 'al_dia':
+        return f"{remoto}/{rama} no tiene nada nuevo"
+    if accion == 'avance':
+        return f"Se descargaron {resultado['atras']} commit(s) de {remoto}/{rama}"
+    if accion in MODOS:
+        verbo = "colocaron encima de" if accion == 'rebase' else "unieron con"
+        return (f"{remoto}/{rama} tenía {resultado['atras']} commit(s) nuevo(s): "
+                f"tus {resultado['adelante']} commit(s) se {verbo} ellos ({accion})")
+    if accion == 'otra_rama':
+        return f"'{rama}' no es la rama abierta: se sube sin integrar"
+    if accion == 'conflicto':
+        return f"Conflicto con {remoto}/{rama} en {len(resultado['conflictos'])} archivo(s)"
+    return f"No se pudo sincronizar con {remoto}/{rama}: {resultado['error']}"
+
+
+def sincronizar(repo, rama, empujar, remoto="origin", modo="rebase", reintentos=1):
+    """fetch → rebase/merge → push, repitiendo si otro push se coló entre medias
+
+    empujar() hace el push y devuelve (exito, salida, error).
+    Devuelve (exito, salida, error, integracion); si la integración falla
+    no se intenta el push.
+    """
+    for intento in range(reintentos + 1):
+        integracion = integrar(repo, rama, remoto, modo)
+        if integracion['accion'] in ('conflicto', 'error'):
+            return False, "", integracion['error'] or "", integracion
+        exito, salida, error = empujar()
+        if exito or not es_rechazo_no_fast_forward(f"{error}\n{salida}"):
+            return exito, salida, error, integracion
+        METRICAS.incrementar('push_rechazado_total', proyecto=os.path.basename(os.path.normpath(repo)))
+    return exito, salida, error, integracion
+
+
+class PrefetchPeriodico:
+    """Hilo en segundo plano que hace prefetch de los proyectos cada cierto tiempo"""
+
+    def __init__(self, gestor_trabajos, obtener_repos, intervalo=INTERVALO_PREFETCH, remoto="origin"):
+        self.gestor_trabajos = gestor_trabajos
+        self.obtener_repos = obtener_repos
+        self.intervalo = intervalo
+        self.remoto = remoto
+        self._en_curso = set()
+        self._despertar = threading.Event()
+        self._detener = False
+        self._hilo = None
+
+    def iniciar(self):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._bucle, daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        self._detener = True
+        self._despertar.set()
+
+    def revisar_ahora(self):
+        self._despertar.set()
+
+    def _bucle(self):
+        while not self._detener:
+            try:
+                self.revisar()
+            except Exception:
+                pass
+            # Se revisa más a menudo que el intervalo para repartir los proyectos
+            self._despertar.wait(min(self.intervalo, 60))
+            self._despertar.clear()
+
+    def revisar(self):
+        """Encola un prefetch (prioridad de fondo) por cada proyecto que lo necesite"""
+        for repo in self.obtener_repos():
+            if repo in self._en_curso or not os.path.isdir(os.path.join(repo, ".git")):
+                continue
+            anterior = cargar_estado(repo)['prefetch'].get(self.remoto, {})
+            if time.time() - anterior.get('ts', 0) < self.intervalo:
+                continue
+            if not hay_conexion(repo, self.remoto):
+                continue
+            self._en_curso.add(repo)
+            self.gestor_trabajos.encolar(
+                repo, "Prefetch", lambda trabajo, r=repo: prefetch(r, self.remoto),
+                prioridad=PRIORIDAD_FONDO,
+                al_terminar=lambda trabajo, r=repo: self._en_curso.discard(r)
+            )
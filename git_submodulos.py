@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Commit y push de proyectos con submódulos
+"git add ." en el proyecto principal solo guarda el puntero del submódulo:
+sus propios cambios nunca se guardaban ni se subían. Aquí se descubren los
+submódulos (también anidados), se hace commit y push en orden de
+dependencia (primero los más profundos; los del mismo nivel en paralelo) y
+solo después se sigue con el proyecto principal. Cada módulo informa de
+su tiempo.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from git_trabajos import ejecutar_proceso
+from git_metricas import limpiar_progreso
+
+MAX_PARALELOS = 4
+
+
+def _git(repo, *argumentos):
+    return ejecutar_proceso(["git"] + list(argumentos), cwd=repo)
+
+
+def _nombres_por_ruta(repo):
+    """{ruta relativa: nombre} según el .gitmodules del repositorio"""
+    exito, salida, _ = _git(repo, "config", "-f", ".gitmodules", "--get-regexp", r"^submodule\..*\.path$")
+    nombres = {}
+    for linea in salida.splitlines() if exito else []:
+        clave, _, ruta = linea.partition(' ')
+        nombres[ruta.strip()] = clave[len("submodule."):-len(".path")]
+    return nombres
+
+
+def descubrir(repo, nivel=1, prefijo=""):
+    """Submódulos inicializados (recursivo): [{'ruta', 'relativa', 'nombre', 'nivel', 'padre'}]
+
+    'relativa' es la ruta desde el proyecto principal (p. ej. "libs/base/utilidades").
+    """
+    if not os.path.exists(os.path.join(repo, ".gitmodules")):
+        return []
+    exito, salida, _ = _git(repo, "submodule", "status")
+    if not exito:
+        return []
+    nombres = _nombres_por_ruta(repo)
+    modulos = []
+    for linea in salida.splitlines():
+        linea = linea.rstrip()
+        # " <sha> ruta (descripción)"; '-' = sin inicializar
+        if not linea or linea[0] == '-':
+            continue
+        partes = linea[1:].split(' ', 1)
+        if len(partes) < 2:
+            continue
+        relativa = partes[1].rsplit(' (', 1)[0]
+        ruta = os.path.normpath(os.path.join(repo, relativa))
+        modulos.append({
+            'ruta': ruta,
+            'relativa': prefijo + relativa,
+            'nombre': nombres.get(relativa, relativa),
+            'nivel': nivel,
+            'padre': repo,
+        })
+        modulos.extend(descubrir(ruta, nivel + 1, f"{prefijo}{relativa}/"))
+    return modulos
+
+
+def por_niveles(modulos):
+    """Niveles del más profundo al más superficial: [[módulos del nivel N], ..., [nivel 1]]"""
+    niveles = {}
+    for modulo in modulos:
+        niveles.setdefault(modulo['nivel'], []).append(modulo)
+    return [niveles[n] for n in sorted(niveles, reverse=True)]
+
+
+def _en_paralelo(funcion, modulos, max_paralelos):
+    """Procesa el proyecto nivel a nivel; se detiene en el primer nivel con errores"""
+    resultados = []
+    for nivel in por_niveles(modulos):
+        with ThreadPoolExecutor(max_workers=max(1, min(max_paralelos, len(nivel)))) as grupo:
+            hechos = list(grupo.map(funcion, nivel))
+        resultados.extend(hechos)
+        if any(r.get('error') for r in hechos):
+            break
+    return resultados
+
+
+def hacer_commits(repo, mensaje, max_paralelos=MAX_PARALELOS, modulos=None):
+    """Commit de los submódulos con cambios (los más profundos primero)
+
+    Devuelve una lista de {'relativa', 'commit', 'segundos', 'error'}.
+    """
+    modulos = descubrir(repo) if modulos is None else modulos
+
+    def commit(modulo):
+        inicio = time.perf_counter()
+        resultado = {'relativa': modulo['relativa'], 'commit': False, 'error': None}
+        exito, cambios, error = _git(modulo['ruta'], "status", "--porcelain")
+        if not exito:
+            resultado['error'] = error or "No se pudo leer el estado"
+        elif cambios.strip():
+            _git(modulo['ruta'], "add", ".")
+            exito, salida, error = _git(modulo['ruta'], "commit", "-m", mensaje)
+            if exito:
+                resultado['commit'] = True
+            elif "nothing to commit" not in (salida + error).lower():
+                resultado['error'] = error or salida
+        resultado['segundos'] = round(time.perf_counter() - inicio, 2)
+        return resultado
+
+    resultados = _en_paralelo(commit, modulos, max_paralelos)
+    # El proyecto principal debe registrar los nuevos punteros
+    rutas = [m['relativa'] for m in modulos if m['nivel'] == 1]
+    if rutas and not any(r['error'] for r in resultados):
+        _git(repo, "add", "--", *rutas)
+    return resultados
+
+
+def rama_destino(modulo):
+    """Rama del remoto a la que subir un submódulo (aunque tenga HEAD separado)"""
+    exito, rama, _ = _git(modulo['ruta'], "symbolic-ref", "--short", "-q", "HEAD")
+    if exito and rama.strip():
+        return rama.strip()
+    exito, rama, _ = _git(modulo['padre'], "config", "-f", ".gitmodules", f"submodule.{modulo['nombre']}.branch")
+    if exito and rama.strip() and rama.strip() != '.':
+        return rama.strip()
+    exito, rama, _ = _git(modulo['ruta'], "symbolic-ref", "--short", "-q", "refs/remotes/origin/HEAD")
+    if exito and rama.strip():
+        return rama.strip().split('/', 1)[-1]
+    return None
+
+
+def subir(repo, max_paralelos=MAX_PARALELOS, modulos=None):
+    """Push de los submódulos con commits que el remoto no tiene (los más profundos primero)
+
+    Devuelve una lista de {'relativa', 'rama', 'push', 'segundos', 'error'}.
+    Si alguno falla, el proyecto principal NO debe subirse: apuntaría a
+    commits que nadie más puede descargar.
+    """
+    modulos = descubrir(repo) if modulos is None else modulos
+
+    def push(modulo):
+        inicio = time.perf_counter()
+        resultado = {'relativa': modulo['relativa'], 'rama': None, 'push': False, 'error': None}
+        exito, sin_subir, _ = _git(modulo['ruta'], "rev-list", "--count", "HEAD", "--not", "--remotes=origin")
+        if exito and sin_subir.strip() == "0":
+            resultado['segundos'] = round(time.perf_counter() - inicio, 2)
+            return resultado
+        rama = rama_destino(modulo)
+        resultado['rama'] = rama
+        if not rama:
+            resultado['error'] = "HEAD separado y no se sabe a qué rama subir (define 'branch' en .gitmodules)"
+        else:
+            exito, salida, error = _git(modulo['ruta'], "push", "--progress", "origin", f"HEAD:refs/heads/{rama}")
+            if exito:
+                resultado['push'] = True
+            else:
+                resultado['error'] = limpiar_progreso(error or salida)
+        resultado['segundos'] = round(time.perf_counter() - inicio, 2)
+        return resultado
+
+    return _en_paralelo(push, modulos, max_paralelos)
+
+
+def resumen(resultados):
+    """Líneas de texto por módulo: qué se hizo y cuánto tardó"""
+    lineas = []
+    for r in resultados:
+        if r.get('error'):
+            lineas.append(f"✗ {r['relativa']}: {r['error'][:200]} ({r['segundos']} s)")
+        elif r.get('commit'):
+            lineas.append(f"✓ {r['relativa']}: commit ({r['segundos']} s)")
+        elif r.get('push'):
+            lineas.append(f"✓ {r['relativa']}: subido a '{r['rama']}' ({r['segundos']} s)")
+        else:
+            lineas.append(f"· {r['relativa']}: sin cambios ({r['segundos']} s)")
+    return lineas
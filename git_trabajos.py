@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gestor de trabajos de Git
+Ejecuta las operaciones en cola con prioridades, tiempos límite y cancelación.
+Los trabajos de un mismo repositorio se ejecutan de uno en uno; los de
+repositorios distintos, en paralelo.
+"""
+
+import os
+import sys
+import time
+import heapq
+import itertools
+import contextlib
+import threading
+import subprocess
+
+from git_bloqueos import BloqueoRepositorio, RepositorioOcupado, SUBCOMANDOS_ESCRITURA, con_reintentos
+from git_bloqueos import estadisticas as estadisticas_bloqueos
+from git_metricas import METRICAS
+from git_recursos import POLITICA, INTERACTIVA, LOTE, FONDO, clase_actual
+
+# Para Windows: ocultar ventana de consola
+if sys.platform == 'win32':
+    STARTUPINFO = subprocess.STARTUPINFO()
+    STARTUPINFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    STARTUPINFO.wShowWindow = subprocess.SW_HIDE
+else:
+    STARTUPINFO = None
+
+# Tiempo límite (segundos) según el subcomando de git
+TIMEOUTS_POR_COMANDO = {
+    'push': 300,
+    'pull': 300,
+    'fetch': 180,
+    'clone': 900,
+    'ls-remote': 60,
+    'gc': 900,
+    'repack': 900,
+    'commit-graph': 600,
+}
+TIMEOUT_POR_DEFECTO = 120
+
+PRIORIDAD_INTERACTIVA = 0
+PRIORIDAD_NORMAL = 10
+PRIORIDAD_FONDO = 20
+
+# Estados de un trabajo
+EN_COLA = "en_cola"
+EJECUTANDO = "ejecutando"
+COMPLETADO = "completado"
+FALLIDO = "fallido"
+CANCELADO = "cancelado"
+TIEMPO_AGOTADO = "tiempo_agotado"
+
+ESTADOS_FINALES = (COMPLETADO, FALLIDO, CANCELADO, TIEMPO_AGOTADO)
+
+_hilo_local = threading.local()
+
+
+class TrabajoCancelado(Exception):
+    """Se lanza dentro de un trabajo cuando el usuario lo cancela"""
+
+
+def subcomando_git(comando):
+    """Devuelve el subcomando de git de un comando ('push', 'add'...) o None"""
+    partes = comando.split() if isinstance(comando, str) else list(comando)
+    if not partes or os.path.basename(partes[0]).lower() not in ("git", "git.exe"):
+        return None
+    i = 1
+    # Saltar opciones globales como "-c clave=valor" o "-C ruta"
+    while i < len(partes) and partes[i].startswith('-'):
+        i += 2 if partes[i] in ('-c', '-C') else 1
+    return partes[i] if i < len(partes) else None
+
+
+def timeout_para(comando):
+    """Tiempo límite que corresponde a un comando"""
+    return TIMEOUTS_POR_COMANDO.get(subcomando_git(comando), TIMEOUT_POR_DEFECTO)
+
+
+def entorno_git():
+    """Entorno para los procesos git: nunca esperar credenciales en una terminal invisible"""
+    entorno = dict(os.environ)
+    entorno['GIT_TERMINAL_PROMPT'] = '0'
+    return entorno
+
+
+def matar_arbol_procesos(proceso):
+    """Termina un proceso y todos sus hijos (git lanza ssh, credential helpers, etc.)"""
+    if proceso.poll() is not None:
+        return
+    try:
+        if sys.platform == 'win32':
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(proceso.pid)],
+                capture_output=True,
+                startupinfo=STARTUPINFO,
+                creationflags=subprocess.CREATE_NO_WINDOW
+            )
+        else:
+            import signal
+            os.killpg(os.getpgid(proceso.pid), signal.SIGKILL)
+    except (OSError, ProcessLookupError):
+        pass
+    try:
+        proceso.kill()
+    except OSError:
+        pass
+
+
+def clase_de_prioridad(prioridad):
+    """Clase de recursos (ver git_recursos) según la prioridad del trabajo; sin trabajo es interactiva"""
+    if prioridad is None or prioridad <= PRIORIDAD_INTERACTIVA:
+        return INTERACTIVA
+    return FONDO if prioridad >= PRIORIDAD_FONDO else LOTE
+
+
+def clase_en_curso():
+    """Clase de recursos de este hilo: la indicada con con_clase, la del trabajo o interactiva"""
+    clase = clase_actual()
+    if clase is not None:
+        return clase
+    trabajo = trabajo_actual()
+    return clase_de_prioridad(trabajo.prioridad if trabajo is not None else None)
+
+
+def trabajo_actual():
+    """Trabajo que se está ejecutando en este hilo (None si no hay)"""
+    return getattr(_hilo_local, 'trabajo', None)
+
+
+def ejecutar_proceso(comando, cwd=None, timeout=None, entrada=None, texto=True):
+    """Ejecuta un comando con tiempo límite; devuelve (exito, salida, error)
+
+    Si se llama desde un trabajo, el proceso queda registrado en él para que
+    cancelarlo mate todo el árbol de procesos. Los comandos git que escriben el
+    índice toman el bloqueo del repositorio (compartido con otras instancias) y
+    se reintentan con espera si otro git tiene index.lock.
+    """
+    if timeout is None:
+        timeout = timeout_para(comando)
+    subcomando = subcomando_git(comando)
+    if subcomando is None:
+        return _ejecutar_una_vez(comando, cwd, timeout, entrada, texto)
+
+    repo = cwd or os.getcwd()
+    git_dir = directorio_git(repo)
+
+    def ejecutar():
+        return _ejecutar_una_vez(comando, cwd, timeout, entrada, texto)
+
+    inicio = time.perf_counter()
+    if subcomando not in SUBCOMANDOS_ESCRITURA or not os.path.isdir(git_dir):
+        exito, salida, error = con_reintentos(ejecutar, git_dir)
+    else:
+        try:
+            with BloqueoRepositorio(git_dir):
+                exito, salida, error = con_reintentos(ejecutar, git_dir)
+        except RepositorioOcupado as e:
+            exito, salida, error = False, "" if texto else b"", str(e)
+    METRICAS.registrar_operacion(
+        subcomando,
+        os.path.basename(os.path.normpath(os.path.abspath(repo))),
+        time.perf_counter() - inicio,
+        exito,
+        agotado=error.startswith("Tiempo agotado"),
+        salida=(salida if texto else "") + "\n" + error
+    )
+    return exito, salida, error
+
+
+def _ejecutar_una_vez(comando, cwd, timeout, entrada, texto):
+    trabajo = trabajo_actual()
+    if trabajo is not None and trabajo.cancelado:
+        raise TrabajoCancelado()
+
+    # Prioridad, hilos de git y turno según quién lanza el proceso (ver git_recursos)
+    clase = clase_en_curso()
+    es_git = subcomando_git(comando) is not None
+    entorno = entorno_git()
+    if es_git:
+        entorno = POLITICA.entorno(entorno, clase)
+        comando = POLITICA.envolver(comando, clase)
+
+    if sys.platform == 'win32':
+        opciones = {
+            'startupinfo': STARTUPINFO,
+            'creationflags': (subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP
+                              | (POLITICA.opciones_windows(clase) if es_git else 0)),
+        }
+    else:
+        # Grupo de procesos propio para poder matar también a los hijos
+        opciones = {'start_new_session': True}
+
+    with POLITICA.turno(clase) if es_git else contextlib.nullcontext():
+        return _lanzar(comando, cwd, timeout, entrada, texto, entorno, opciones, trabajo)
+
+
+def _lanzar(comando, cwd, timeout, entrada, texto, entorno, opciones, trabajo):
+    # Pudo cancelarse mientras esperaba turno
+    if trabajo is not None and trabajo.cancelado:
+        raise TrabajoCancelado()
+    try:
+        proceso = subprocess.Popen(
+            comando,
+            shell=isinstance(comando, str),
+            cwd=cwd,
+            stdin=subprocess.PIPE if entrada is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=entorno,
+            **opciones
+        )
+    except OSError as e:
+        return False, "" if texto else b"", str(e)
+
+    if trabajo is not None:
+        trabajo._registrar_proceso(proceso)
+    agotado = False
+    try:
+        datos_entrada = entrada
+        if texto and isinstance(entrada, str):
+            datos_entrada = entrada.encode('utf-8')
+        try:
+            salida, error = proceso.communicate(datos_entrada, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            agotado = True
+            matar_arbol_procesos(proceso)
+            salida, error = proceso.communicate()
+    finally:
+        if trabajo is not None:
+            trabajo._registrar_proceso(None)
+
+    error = (error or b"").decode('utf-8', errors='ignore').strip()
+    if texto:
+        salida = (salida or b"").decode('utf-8', errors='ignore').strip()
+    if trabajo is not None and trabajo.cancelado:
+        raise TrabajoCancelado()
+    if agotado:
+        if trabajo is not None:
+            trabajo.tiempo_agotado = True
+        return False, salida, f"Tiempo agotado ({timeout} s): {error}".strip()
+    return proceso.returncode == 0, salida, error
+
+
+class Trabajo:
+    """Una operación encolada sobre un repositorio"""
+
+    def __init__(self, id_trabajo, repo, descripcion, funcion, prioridad):
+        self.id = id_trabajo
+        self.repo = repo
+        self.descripcion = descripcion
+        self.funcion = funcion
+        self.prioridad = prioridad
+        self.estado = EN_COLA
+        self.resultado = None
+        self.error = None
+        self.cancelado = False
+        self.tiempo_agotado = False
+        self.creado = time.time()
+        self.inicio = None
+        self.fin = None
+        self._proceso = None
+        self._finalizado = False
+        self._cerrojo = threading.Lock()
+
+    def _registrar_proceso(self, proceso):
+        with self._cerrojo:
+            self._proceso = proceso
+
+    def cancelar(self):
+        """Marca el trabajo como cancelado y mata el proceso git que esté corriendo"""
+        with self._cerrojo:
+            self.cancelado = True
+            proceso = self._proceso
+        if proceso is not None:
+            matar_arbol_procesos(proceso)
+
+    def duracion(self):
+        if self.inicio is None:
+            return 0.0
+        return (self.fin or time.time()) - self.inicio
+
+    def resumen(self):
+        """Estado del trabajo como diccionario (para la interfaz)"""
+        return {
+            'id': self.id,
+            'repo': self.repo,
+            'descripcion': self.descripcion,
+            'prioridad': self.prioridad,
+            'estado': self.estado,
+            'duracion': round(self.duracion(), 2),
+            'error': self.error,
+        }
+
+
+class GestorTrabajos:
+    """Cola de trabajos con prioridad, serializada por repositorio y paralela entre repositorios"""
+
+    def __init__(self, max_repos_paralelos=4):
+        self._colas = {}
+        self._hilos = {}
+        self._trabajos = {}
+        self._suscriptores = []
+        self._contador = itertools.count(1)
+        self._cerrojo = threading.Lock()
+        self._limite_repos = threading.BoundedSemaphore(max_repos_paralelos)
+
+    def suscribir(self, callback):
+        """Registra una función que recibe el trabajo cada vez que cambia de estado
+
+        Se llama desde el hilo del trabajo: la interfaz debe usar root.after().
+        """
+        self._suscriptores.append(callback)
+
+    def _notificar(self, trabajo):
+        for callback in list(self._suscriptores):
+            try:
+                callback(trabajo)
+            except Exception:
+                pass
+
+    def encolar(self, repo, descripcion, funcion, prioridad=PRIORIDAD_NORMAL, al_terminar=None):
+        """Encola funcion(trabajo) para el repositorio dado y devuelve el Trabajo"""
+        repo = os.path.normcase(os.path.abspath(repo))
+        with self._cerrojo:
+            trabajo = Trabajo(next(self._contador), repo, descripcion, funcion, prioridad)
+            trabajo.al_terminar = al_terminar
+            self._trabajos[trabajo.id] = trabajo
+            heapq.heappush(self._colas.setdefault(repo, []), (prioridad, trabajo.id, trabajo))
+            if repo not in self._hilos:
+                hilo = threading.Thread(target=self._procesar_repo, args=(repo,), daemon=True)
+                self._hilos[repo] = hilo
+                hilo.start()
+        self._notificar(trabajo)
+        return trabajo
+
+    def _siguiente(self, repo):
+        descartados = []
+        siguiente = None
+        with self._cerrojo:
+            cola = self._colas.get(repo)
+            while cola:
+                _, _, trabajo = heapq.heappop(cola)
+                if not trabajo.cancelado:
+                    # Ya no está en cola: cancelar() no lo da por terminado, lo corta _ejecutar
+                    trabajo.estado = EJECUTANDO
+                    siguiente = trabajo
+                    break
+                trabajo.estado = CANCELADO
+                descartados.append(trabajo)
+            else:
+                # Sin trabajos pendientes: el hilo del repositorio termina
+                self._colas.pop(repo, None)
+                self._hilos.pop(repo, None)
+        # Fuera del cerrojo: al_terminar puede encolar otro trabajo
+        for trabajo in descartados:
+            self._finalizar(trabajo)
+        return siguiente
+
+    def _finalizar(self, trabajo):
+        """Llama a al_terminar y avisa a los suscriptores, una sola vez por trabajo
+
+        Vale para los que terminan de ejecutarse y para los cancelados en
+        cola: quien espera al_terminar (cola sin conexión, prefetch,
+        especulación) siempre se entera.
+        """
+        with trabajo._cerrojo:
+            if trabajo._finalizado:
+                return
+            trabajo._finalizado = True
+        if trabajo.al_terminar:
+            try:
+                trabajo.al_terminar(trabajo)
+            except Exception:
+                pass
+        self._notificar(trabajo)
+
+    def _procesar_repo(self, repo):
+        while True:
+            trabajo = self._siguiente(repo)
+            if trabajo is None:
+                return
+            with self._limite_repos:
+                self._ejecutar(trabajo)
+
+    def _ejecutar(self, trabajo):
+        trabajo.estado = EJECUTANDO
+        trabajo.inicio = time.time()
+        self._notificar(trabajo)
+        _hilo_local.trabajo = trabajo
+        try:
+            trabajo.resultado = trabajo.funcion(trabajo)
+            if trabajo.cancelado:
+                trabajo.estado = CANCELADO
+            elif trabajo.tiempo_agotado:
+                trabajo.estado = TIEMPO_AGOTADO
+            else:
+                trabajo.estado = COMPLETADO
+        except TrabajoCancelado:
+            trabajo.estado = CANCELADO
+        except Exception as e:
+            trabajo.estado = FALLIDO
+            trabajo.error = str(e)
+        finally:
+            _hilo_local.trabajo = None
+            trabajo.fin = time.time()
+        self._finalizar(trabajo)
+
+    def cancelar(self, id_trabajo):
+        """Cancela un trabajo en cola o en ejecución"""
+        trabajo = self._trabajos.get(id_trabajo)
+        if trabajo is None or trabajo.estado in ESTADOS_FINALES:
+            return False
+        trabajo.cancelar()
+        with self._cerrojo:
+            en_cola = trabajo.estado == EN_COLA
+            if en_cola:
+                trabajo.estado = CANCELADO
+                trabajo.fin = time.time()
+        if en_cola:
+            # Sigue en el montículo: _siguiente lo descarta sin volver a finalizarlo
+            self._finalizar(trabajo)
+        return True
+
+    def cancelar_repo(self, repo):
+        """Cancela todos los trabajos pendientes o activos de un repositorio"""
+        repo = os.path.normcase(os.path.abspath(repo))
+        cancelados = 0
+        for trabajo in self.activos():
+            if trabajo.repo == repo and self.cancelar(trabajo.id):
+                cancelados += 1
+        return cancelados
+
+    def activos(self):
+        """Trabajos en cola o en ejecución"""
+        return [t for t in list(self._trabajos.values()) if t.estado not in ESTADOS_FINALES]
+
+    def trabajos(self):
+        """Resumen de todos los trabajos conocidos, del más reciente al más antiguo"""
+        return [t.resumen() for t in sorted(self._trabajos.values(), key=lambda t: t.id, reverse=True)]
+
+    def limpiar_terminados(self, conservar=50):
+        """Olvida los trabajos terminados más antiguos"""
+        with self._cerrojo:
+            terminados = sorted(
+                (t for t in self._trabajos.values() if t.estado in ESTADOS_FINALES),
+                key=lambda t: t.id
+            )
+            for trabajo in terminados[:max(0, len(terminados) - conservar)]:
+                del self._trabajos[trabajo.id]
+
+
+def directorio_git(repo):
+    """Ruta del directorio .git de un repositorio (sigue el archivo 'gitdir:' de worktrees y submódulos)"""
+    ruta = os.path.join(repo, ".git")
+    if os.path.isfile(ruta):
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                linea = f.readline().strip()
+            if linea.startswith("gitdir:"):
+                destino = linea[len("gitdir:"):].strip()
+                return os.path.normpath(os.path.join(repo, destino))
+        except OSError:
+            pass
+    return ruta
+
+
+def directorio_estado(repo):
+    """Carpeta (dentro de .git) donde la herramienta guarda cachés y estado del repositorio"""
+    ruta = os.path.join(directorio_git(repo), "git-automatizado")
+    os.makedirs(ruta, exist_ok=True)
+    return ruta
+
+
+def _metricas_de_bloqueos():
+    datos = estadisticas_bloqueos()
+    return [
+        ('bloqueo_esperas_total', 'counter', datos['esperas_bloqueo'], {}),
+        ('bloqueo_espera_segundos_total', 'counter', round(datos['segundos_bloqueo'], 3), {}),
+        ('index_lock_reintentos_total', 'counter', datos['reintentos_index_lock'], {}),
+        ('locks_obsoletos_eliminados_total', 'counter', datos['locks_obsoletos_eliminados'], {}),
+    ]
+
+
+METRICAS.agregar_fuente(_metricas_de_bloqueos)
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verificaciones previas al commit
+Ejecuta linters, formateadores y buscadores de secretos sobre los archivos
+preparados (staged), repartidos en un pool de procesos. El veredicto de cada
+herramienta se guarda en caché por ruta e id de blob (las reglas por
+carpeta o por archivo hacen que el mismo contenido pase en un sitio y falle
+en otro) y por una huella de la herramienta (comando, versión y sus archivos de configuración), así que los
+archivos que no cambiaron nunca se vuelven a revisar y cambiar la
+configuración del linter invalida sus veredictos. La caché se poda: se
+quitan las huellas viejas de cada herramienta y, pasado MAX_ENTRADAS_CACHE,
+lo que lleva más tiempo sin usarse.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import shlex
+import shutil
+import fnmatch
+import tempfile
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from git_trabajos import ejecutar_proceso, directorio_estado, STARTUPINFO
+
+CACHE_VERIFICACIONES = "cache_verificaciones.json"
+TAMANO_LOTE = 20
+TIMEOUT_HERRAMIENTA = 300
+MAX_SALIDA = 4000
+MAX_ENTRADAS_CACHE = 20000
+
+# Configuración que cambia el veredicto de las herramientas habituales (en la raíz del proyecto).
+# Cada verificación puede añadir los suyos con "configuracion": ["reglas.yml"]
+ARCHIVOS_CONFIGURACION = (
+    "setup.cfg", "tox.ini", "pyproject.toml", ".flake8", ".pylintrc", "pylintrc", "mypy.ini",
+    ".mypy.ini", "ruff.toml", ".ruff.toml", ".editorconfig", "package.json", ".eslintrc",
+    ".eslintrc.js", ".eslintrc.cjs", ".eslintrc.json", ".eslintrc.yml", ".eslintrc.yaml",
+    "eslint.config.js", "eslint.config.mjs", ".prettierrc", ".prettierrc.json", ".prettierrc.yml",
+    ".gitleaks.toml", ".secrets.baseline", ".stylelintrc", ".stylelintrc.json",
+)
+
+_versiones = {}
+
+
+def cargar_verificaciones(config):
+    """Lista de verificaciones configuradas en git_config.json (clave 'verificaciones')
+
+    Cada verificación: {"nombre": "flake8", "comando": "flake8 {archivos}",
+    "version": "flake8 --version", "extensiones": [".py"]}
+    """
+    verificaciones = []
+    for v in config.get('verificaciones', []) or []:
+        if not isinstance(v, dict) or not v.get('nombre') or not v.get('comando'):
+            continue
+        if v.get('activa', True):
+            verificaciones.append(v)
+    return verificaciones
+
+
+def _dividir_comando(comando):
+    if isinstance(comando, list):
+        return list(comando)
+    return shlex.split(comando, posix=(os.name != 'nt'))
+
+
+def _ejecutable(comando):
+    partes = _dividir_comando(comando)
+    return shutil.which(partes[0]) if partes else None
+
+
+def version_herramienta(verificacion):
+    """Versión de la herramienta (se recalcula solo si cambia el ejecutable)"""
+    comando_version = verificacion.get('version')
+    if not comando_version:
+        return verificacion.get('version_fija', 'sin-version')
+    ejecutable = _ejecutable(comando_version)
+    try:
+        marca = os.stat(ejecutable).st_mtime_ns if ejecutable else None
+    except OSError:
+        marca = None
+    clave = (str(comando_version), ejecutable, marca)
+    if clave not in _versiones:
+        exito, salida, error = ejecutar_proceso(_dividir_comando(comando_version), timeout=60)
+        texto = (salida or error).splitlines()
+        _versiones[clave] = texto[0].strip() if exito and texto else "desconocida"
+    return _versiones[clave]
+
+
+def huella_verificacion(repo, verificacion, version):
+    """Resumen de todo lo que decide el veredicto de una herramienta salvo el archivo revisado
+
+    Comando, filtros, versión y el contenido de los archivos de configuración
+    que existan en la raíz del proyecto.
+    """
+    h = hashlib.sha1()
+    h.update(json.dumps([verificacion.get('comando'), verificacion.get('extensiones'),
+                         verificacion.get('patrones'), version], sort_keys=True).encode('utf-8'))
+    for nombre in ARCHIVOS_CONFIGURACION + tuple(verificacion.get('configuracion') or ()):
+        try:
+            with open(os.path.join(repo, nombre), 'rb') as f:
+                contenido = f.read()
+        except OSError:
+            continue
+        h.update(b'\0' + nombre.encode('utf-8') + b'\0' + hashlib.sha1(contenido).digest())
+    return h.hexdigest()[:16]
+
+
+def aplica_a(verificacion, archivo):
+    """Indica si la verificación se aplica a un archivo (por extensión o patrón)"""
+    extensiones = verificacion.get('extensiones')
+    patrones = verificacion.get('patrones')
+    if not extensiones and not patrones:
+        return True
+    if extensiones and os.path.splitext(archivo)[1].lower() in [e.lower() for e in extensiones]:
+        return True
+    return bool(patrones) and any(fnmatch.fnmatch(archivo, p) for p in patrones)
+
+
+def archivos_preparados(repo):
+    """Archivos preparados para el commit con el id de su blob: {archivo: oid}"""
+    exito, salida, _ = ejecutar_proceso(
+        ["git", "diff", "--cached", "--raw", "--no-abbrev", "-z", "--diff-filter=ACMR"],
+        cwd=repo, texto=False
+    )
+    preparados = {}
+    if not exito:
+        return preparados
+    campos = salida.split(b'\0')
+    i = 0
+    while i < len(campos):
+        cabecera = campos[i]
+        i += 1
+        if not cabecera.startswith(b':'):
+            continue
+        partes = cabecera[1:].split()
+        if len(partes) < 5:
+            continue
+        if partes[4][:1] in (b'R', b'C'):
+            ruta = campos[i + 1]
+            i += 2
+        else:
+            ruta = campos[i]
+            i += 1
+        # Los submódulos (modo 160000) no tienen contenido que revisar
+        if partes[1] == b'160000':
+            continue
+        preparados[ruta.decode('utf-8', errors='surrogateescape')] = partes[3].decode('ascii')
+    return preparados
+
+
+def extraer_preparados(repo, archivos, destino):
+    """Copia el contenido del índice (no el del disco) a una carpeta temporal con una sola llamada a git
+
+    Los archivos conservan su ruta relativa dentro de destino.
+    """
+    if not archivos:
+        return True
+    prefijo = destino.rstrip("\\/") + "/"
+    entrada = b''.join(a.encode('utf-8', errors='surrogateescape') + b'\0' for a in archivos)
+    exito, _, _ = ejecutar_proceso(
+        ["git", "checkout-index", "--force", "-z", "--stdin", f"--prefix={prefijo}"],
+        cwd=repo, entrada=entrada, texto=False
+    )
+    return exito
+
+
+def _cargar_cache(repo):
+    ruta = os.path.join(directorio_estado(repo), CACHE_VERIFICACIONES)
+    if not os.path.exists(ruta):
+        return {}
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_cache(repo, cache):
+    ruta = os.path.join(directorio_estado(repo), CACHE_VERIFICACIONES)
+    try:
+        temporal = ruta + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+    except OSError:
+        pass
+
+
+def _podar_cache(cache, vigentes, maximo=MAX_ENTRADAS_CACHE):
+    """Quita las huellas viejas de las herramientas en uso y deja las 'maximo' entradas más recientes
+
+    vigentes: {nombre: huella} de las verificaciones de esta pasada.
+    Cada clave es "nombre|huella|archivo|oid" y cada entrada [exito, salida, último uso].
+    """
+    for clave in list(cache):
+        nombre, _, resto = clave.partition('|')
+        huella = resto.partition('|')[0]
+        if nombre in vigentes and huella != vigentes[nombre]:
+            del cache[clave]
+    if len(cache) > maximo:
+        recientes = sorted(cache, key=lambda c: cache[c][2] if len(cache[c]) > 2 else 0, reverse=True)
+        for clave in recientes[maximo:]:
+            del cache[clave]
+    return cache
+
+
+def _correr(argumentos, cwd):
+    try:
+        resultado = subprocess.run(
+            argumentos,
+            cwd=cwd,
+            capture_output=True,
+            timeout=TIMEOUT_HERRAMIENTA,
+            startupinfo=STARTUPINFO,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        )
+        salida = (resultado.stdout + resultado.stderr).decode('utf-8', errors='ignore').strip()
+        return resultado.returncode == 0, salida
+    except subprocess.TimeoutExpired:
+        return False, f"Tiempo agotado ({TIMEOUT_HERRAMIENTA} s)"
+    except OSError as e:
+        return False, f"No se pudo ejecutar: {e}"
+
+
+def _armar_comando(comando, rutas):
+    """Sustituye {archivos} (todas las rutas) o {archivo} (una) en el comando"""
+    argumentos = []
+    for parte in _dividir_comando(comando):
+        if parte == "{archivos}":
+            argumentos.extend(rutas)
+        elif "{archivo}" in parte:
+            argumentos.append(parte.replace("{archivo}", rutas[0]))
+        else:
+            argumentos.append(parte)
+    if "{archivos}" not in str(comando) and "{archivo}" not in str(comando):
+        argumentos.extend(rutas)
+    return argumentos
+
+
+def verificar_lote(comando, archivos, carpeta, cwd):
+    """Se ejecuta en un proceso del pool: revisa un lote y devuelve (veredictos, segundos)
+
+    Si el lote completo pasa, todos los archivos pasan. Si falla, se revisa cada
+    archivo por separado para saber exactamente cuáles fallan (y cachearlos bien).
+    """
+    inicio = time.perf_counter()
+    rutas = [os.path.join(carpeta, a) for a in archivos]
+    veredictos = {}
+    por_archivo = "{archivo}" in str(comando)
+    if not por_archivo:
+        exito, salida = _correr(_armar_comando(comando, rutas), cwd)
+        if exito:
+            veredictos = {a: (True, "") for a in archivos}
+        elif len(archivos) == 1:
+            veredictos = {archivos[0]: (False, salida[:MAX_SALIDA])}
+    for archivo, ruta in zip(archivos, rutas):
+        if archivo in veredictos:
+            continue
+        exito, salida = _correr(_armar_comando(comando, [ruta]), cwd)
+        veredictos[archivo] = (exito, "" if exito else salida.replace(carpeta + os.sep, "")[:MAX_SALIDA])
+    return veredictos, time.perf_counter() - inicio
+
+
+def _crear_pool(max_procesos):
+    try:
+        return ProcessPoolExecutor(max_workers=max_procesos)
+    except (OSError, NotImplementedError):
+        # Sin soporte de multiprocessing (entornos restringidos): usar hilos
+        return ThreadPoolExecutor(max_workers=max_procesos)
+
+
+def ejecutar_verificaciones(repo, verificaciones, max_procesos=None, tamano_lote=TAMANO_LOTE):
+    """Revisa los archivos preparados con cada herramienta y devuelve un informe
+
+    Informe: {'ok': bool, 'tiempo_total': s, 'herramientas': {nombre: {
+    'archivos', 'desde_cache', 'fallidos': [(archivo, salida)], 'tiempo'}}}
+    """
+    inicio = time.perf_counter()
+    informe = {'ok': True, 'tiempo_total': 0.0, 'herramientas': {}}
+    if not verificaciones:
+        return informe
+    preparados = archivos_preparados(repo)
+    cache = _cargar_cache(repo)
+
+    # Separar lo que ya está en caché de lo que hay que revisar
+    pendientes = {}
+    vigentes = {}
+    ahora = int(time.time())
+    for v in verificaciones:
+        nombre = v['nombre']
+        version = version_herramienta(v)
+        huella = vigentes[nombre] = huella_verificacion(repo, v, version)
+        datos = {'archivos': 0, 'desde_cache': 0, 'fallidos': [], 'tiempo': 0.0, 'version': version}
+        informe['herramientas'][nombre] = datos
+        for archivo, oid in preparados.items():
+            if not aplica_a(v, archivo):
+                continue
+            datos['archivos'] += 1
+            clave = f"{nombre}|{huella}|{archivo}|{oid}"
+            if clave in cache:
+                datos['desde_cache'] += 1
+                exito, salida = cache[clave][:2]
+                cache[clave] = [exito, salida, ahora]
+                if not exito:
+                    datos['fallidos'].append((archivo, salida))
+            else:
+                pendientes.setdefault(nombre, (v, huella, []))[2].append(archivo)
+
+    if pendientes:
+        necesarios = sorted({a for _, _, archivos in pendientes.values() for a in archivos})
+        # La copia va dentro del .git del proyecto: las herramientas que buscan su
+        # configuración subiendo desde el archivo (ruff, eslint, prettier...)
+        # encuentran la del proyecto, como al revisar el archivo en su sitio
+        with tempfile.TemporaryDirectory(prefix="verificar-", dir=directorio_estado(repo)) as carpeta:
+            if not extraer_preparados(repo, necesarios, carpeta):
+                informe['ok'] = False
+                informe['error'] = "No se pudo leer el contenido preparado"
+                return informe
+            max_procesos = max_procesos or min(os.cpu_count() or 1, 8)
+            with _crear_pool(max_procesos) as pool:
+                futuros = {}
+                for nombre, (v, huella, archivos) in pendientes.items():
+                    for i in range(0, len(archivos), tamano_lote):
+                        lote = archivos[i:i + tamano_lote]
+                        futuro = pool.submit(verificar_lote, v['comando'], lote, carpeta, repo)
+                        futuros[futuro] = (nombre, huella)
+                for futuro in as_completed(futuros):
+                    nombre, huella = futuros[futuro]
+                    datos = informe['herramientas'][nombre]
+                    try:
+                        veredictos, segundos = futuro.result()
+                    except Exception as e:
+                        datos['fallidos'].append(("*", f"Error interno: {e}"))
+                        continue
+                    datos['tiempo'] += segundos
+                    for archivo, (exito, salida) in veredictos.items():
+                        cache[f"{nombre}|{huella}|{archivo}|{preparados[archivo]}"] = [exito, salida, ahora]
+                        if not exito:
+                            datos['fallidos'].append((archivo, salida))
+    # También sin pendientes: se guarda el último uso de lo leído de la caché
+    _guardar_cache(repo, _podar_cache(cache, vigentes))
+
+    for datos in informe['herramientas'].values():
+        datos['tiempo'] = round(datos['tiempo'], 3)
+        if datos['fallidos']:
+            informe['ok'] = False
+    informe['tiempo_total'] = round(time.perf_counter() - inicio, 3)
+    return informe
+
+
+def resumen_informe(informe):
+    """Líneas de texto con el resultado de cada herramienta"""
+    lineas = []
+    for nombre, datos in informe['herramientas'].items():
+        icono = "✗" if datos['fallidos'] else "✓"
+        lineas.append(
+            f"{icono} {nombre}: {datos['archivos']} archivo(s), "
+            f"{datos['desde_cache']} en caché, {len(datos['fallidos'])} con problemas, "
+            f"{datos['tiempo']:.2f} s"
+        )
+    return lineas
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ramas como carpetas (git worktree)
+En proyectos grandes cambiar de rama con checkout reescribe miles de
+archivos e invalida las cachés de compilación. Con esta opción cada rama
+se abre en su propia carpeta (un worktree enlazado, junto al proyecto en
+"<proyecto>.worktrees/<rama>"), así que cambiar de rama es cambiar de
+carpeta. Los worktrees que crea la aplicación se anotan con su último uso
+y se eliminan solos cuando llevan tiempo sin usarse y no tienen cambios.
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from datetime import datetime
+
+from git_trabajos import ejecutar_proceso, directorio_estado
+
+WORKTREES_FILE = "worktrees.json"
+DIAS_SIN_USO = 14
+
+_cerrojo = threading.Lock()
+
+
+def _git(repo, *argumentos):
+    return ejecutar_proceso(["git"] + list(argumentos), cwd=repo)
+
+
+def listar(repo):
+    """Worktrees del repositorio: [{'ruta', 'rama', 'head', 'principal', 'bloqueado', 'podable'}]"""
+    exito, salida, _ = _git(repo, "worktree", "list", "--porcelain")
+    if not exito:
+        return []
+    worktrees = []
+    actual = None
+    for linea in salida.splitlines() + [""]:
+        if not linea.strip():
+            if actual:
+                worktrees.append(actual)
+            actual = None
+            continue
+        clave, _, valor = linea.partition(' ')
+        if clave == 'worktree':
+            actual = {'ruta': os.path.normpath(valor), 'rama': None, 'head': None,
+                      'principal': not worktrees, 'bloqueado': False, 'podable': False}
+        elif actual is None:
+            continue
+        elif clave == 'HEAD':
+            actual['head'] = valor
+        elif clave == 'branch':
+            actual['rama'] = valor[len("refs/heads/"):] if valor.startswith("refs/heads/") else valor
+        elif clave == 'locked':
+            actual['bloqueado'] = True
+        elif clave == 'prunable':
+            actual['podable'] = True
+    return worktrees
+
+
+def repositorio_principal(repo):
+    """Carpeta del worktree principal (el propio repo si no es un worktree enlazado)"""
+    worktrees = listar(repo)
+    return worktrees[0]['ruta'] if worktrees else os.path.normpath(repo)
+
+
+def carpeta_para_rama(principal, rama):
+    """Carpeta donde la aplicación crea el worktree de una rama"""
+    nombre = re.sub(r'[^\w.-]+', '-', rama).strip('-') or "rama"
+    return os.path.join(os.path.normpath(principal) + ".worktrees", nombre)
+
+
+def _ruta_registro(principal):
+    return os.path.join(directorio_estado(principal), WORKTREES_FILE)
+
+
+def cargar_registro(principal):
+    """Worktrees creados por la aplicación: {ruta: {'rama', 'creado', 'ultimo_uso'}}"""
+    try:
+        with open(_ruta_registro(principal), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_registro(principal, registro):
+    ruta = _ruta_registro(principal)
+    temporal = ruta + ".tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(registro, f, indent=4, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def marcar_uso(principal, ruta, rama=None):
+    """Anota que se usó un worktree gestionado (para no podarlo)"""
+    ruta = os.path.normpath(ruta)
+    with _cerrojo:
+        registro = cargar_registro(principal)
+        if ruta not in registro and rama is None:
+            return
+        ahora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        datos = registro.setdefault(ruta, {'rama': rama, 'creado': ahora})
+        if rama:
+            datos['rama'] = rama
+        datos['ultimo_uso'] = ahora
+        datos['ultimo_uso_ts'] = time.time()
+        _guardar_registro(principal, registro)
+
+
+def abrir_rama(repo, rama, crear=False, base="HEAD"):
+    """Carpeta con la rama; crea el worktree (y la rama si crear=True) si hace falta
+
+    Devuelve (ruta, error). No toca el árbol de trabajo de la carpeta actual.
+    """
+    principal = repositorio_principal(repo)
+    for worktree in listar(principal):
+        if worktree['rama'] == rama and os.path.isdir(worktree['ruta']):
+            marcar_uso(principal, worktree['ruta'])
+            return worktree['ruta'], None
+    destino = carpeta_para_rama(principal, rama)
+    if os.path.exists(destino):
+        return None, f"La carpeta {destino} ya existe y no es un worktree de '{rama}'"
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    if crear:
+        exito, _, error = _git(principal, "worktree", "add", "-b", rama, destino, base)
+    else:
+        exito, _, error = _git(principal, "worktree", "add", destino, rama)
+    if not exito:
+        return None, error or "No se pudo crear el worktree"
+    marcar_uso(principal, destino, rama)
+    return destino, None
+
+
+def podar(repo, dias_sin_uso=DIAS_SIN_USO, actual=None):
+    """Elimina los worktrees de la aplicación sin usar hace más de N días y sin cambios
+
+    Nunca toca el worktree principal, el actual ni los que tienen cambios o
+    están bloqueados. Devuelve la lista de rutas eliminadas.
+    """
+    principal = repositorio_principal(repo)
+    _git(principal, "worktree", "prune")
+    limite = time.time() - dias_sin_uso * 86400
+    actual = os.path.normcase(os.path.normpath(actual)) if actual else None
+    existentes = {os.path.normcase(w['ruta']): w for w in listar(principal)}
+    eliminados = []
+    with _cerrojo:
+        registro = cargar_registro(principal)
+        for ruta, datos in list(registro.items()):
+            worktree = existentes.get(os.path.normcase(ruta))
+            if worktree is None:
+                # Ya no existe (borrado a mano o podado por git)
+                del registro[ruta]
+                continue
+            if worktree['principal'] or worktree['bloqueado'] or os.path.normcase(ruta) == actual:
+                continue
+            if datos.get('ultimo_uso_ts', 0) > limite:
+                continue
+            exito, cambios, _ = _git(ruta, "status", "--porcelain")
+            if not exito or cambios.strip():
+                continue
+            # Sin --force: git se niega si queda algo sin guardar
+            exito, _, _ = _git(principal, "worktree", "remove", ruta)
+            if exito:
+                del registro[ruta]
+                eliminados.append(ruta)
+        _guardar_registro(principal, registro)
+    return eliminados
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de carga: muchos usuarios subiendo al mismo remoto
+Crea un repositorio bare local, N clones (uno por cliente simulado) y hace
+que cada cliente edite archivos al azar y ejecute agregar + commit + push a
+un ritmo configurable. Informa rendimiento, percentiles de latencia, pushes
+rechazados por no ser fast-forward y contención de bloqueos.
+
+Uso:
+    python prueba_carga.py --clientes 8 --operaciones 20 --tasa 1
+    python prueba_carga.py --clientes 16 --duracion 60 --compartido 0.2 --json informe.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import statistics
+
+from git_trabajos import ejecutar_proceso
+from git_bloqueos import estadisticas as estadisticas_bloqueos
+import git_operaciones
+
+ERRORES_BLOQUEO_REMOTO = ("cannot lock ref", "unable to create", "index.lock", "failed to lock")
+
+
+def _git(repo, *argumentos):
+    return ejecutar_proceso(["git"] + list(argumentos), cwd=repo)
+
+
+def preparar(directorio, clientes):
+    """Crea el remoto bare con un commit inicial y un clon por cliente"""
+    remoto = os.path.join(directorio, "remoto.git")
+    _git(directorio, "init", "--bare", "-q", remoto)
+    semilla = os.path.join(directorio, "semilla")
+    _git(directorio, "clone", "-q", remoto, semilla)
+    _configurar_usuario(semilla, "semilla")
+    with open(os.path.join(semilla, "compartido.txt"), 'w', encoding='utf-8') as f:
+        f.write("línea inicial\n")
+    _git(semilla, "add", ".")
+    _git(semilla, "commit", "-q", "-m", "Commit inicial")
+    rama = git_operaciones.rama_actual(semilla)
+    _git(semilla, "push", "-q", "origin", rama)
+    clones = []
+    for i in range(clientes):
+        clon = os.path.join(directorio, f"cliente_{i:03d}")
+        _git(directorio, "clone", "-q", remoto, clon)
+        _configurar_usuario(clon, f"cliente{i}")
+        clones.append(clon)
+    return remoto, clones, rama
+
+
+def _configurar_usuario(repo, nombre):
+    _git(repo, "config", "user.name", nombre)
+    _git(repo, "config", "user.email", f"{nombre}@prueba.local")
+
+
+def _editar_al_azar(repo, id_cliente, aleatorio, fraccion_compartido):
+    """Crea o modifica archivos propios del cliente (o, a veces, el archivo compartido)"""
+    if aleatorio.random() < fraccion_compartido:
+        ruta = os.path.join(repo, "compartido.txt")
+    else:
+        carpeta = os.path.join(repo, f"cliente_{id_cliente:03d}")
+        os.makedirs(carpeta, exist_ok=True)
+        ruta = os.path.join(carpeta, f"archivo_{aleatorio.randrange(10)}.txt")
+    with open(ruta, 'a', encoding='utf-8') as f:
+        f.write(f"{id_cliente} {time.time()} {aleatorio.random()}\n")
+
+
+class Cliente(threading.Thread):
+    """Un usuario simulado con su propio clon"""
+
+    def __init__(self, id_cliente, repo, rama, args, fin, resultados):
+        super().__init__(daemon=True)
+        self.id_cliente = id_cliente
+        self.repo = repo
+        self.rama = rama
+        self.args = args
+        self.fin = fin
+        self.resultados = resultados
+        self.aleatorio = random.Random(args.semilla * 1000 + id_cliente)
+
+    def run(self):
+        hechas = 0
+        while not self.fin.is_set() and (self.args.duracion or hechas < self.args.operaciones):
+            # Llegadas de Poisson: espera exponencial con la tasa pedida
+            if self.args.tasa > 0:
+                self.fin.wait(self.aleatorio.expovariate(self.args.tasa))
+                if self.fin.is_set():
+                    break
+            self.ciclo()
+            hechas += 1
+
+    def ciclo(self):
+        registro = {'cliente': self.id_cliente, 'inicio': time.perf_counter()}
+        _editar_al_azar(self.repo, self.id_cliente, self.aleatorio, self.args.compartido)
+
+        t = time.perf_counter()
+        git_operaciones.agregar_todo(self.repo)
+        registro['add'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        exito, _, _ = git_operaciones.hacer_commit(self.repo, f"Cambio del cliente {self.id_cliente}")
+        registro['commit'] = time.perf_counter() - t
+        if not exito:
+            registro['resultado'] = 'sin_commit'
+            self.resultados.append(registro)
+            return
+
+        t = time.perf_counter()
+        exito, salida, error = git_operaciones.subir_rama(self.repo, self.rama)
+        registro['push'] = time.perf_counter() - t
+        texto = f"{salida}\n{error}".lower()
+        registro['rechazos'] = 0
+        registro['bloqueo_remoto'] = any(p in texto for p in ERRORES_BLOQUEO_REMOTO)
+        intentos = 0
+        # Tras un rechazo, ponerse al día (pull --rebase) y volver a intentar
+        while not exito and intentos < self.args.reintentos:
+            if git_operaciones.es_rechazo_no_fast_forward(texto):
+                registro['rechazos'] += 1
+                exito_pull, _, _ = _git(self.repo, "pull", "--rebase", "-q", "origin", self.rama)
+                if not exito_pull:
+                    # Conflicto: el cliente descarta su cambio y sigue desde el remoto
+                    _git(self.repo, "rebase", "--abort")
+                    _git(self.repo, "reset", "-q", "--hard", f"origin/{self.rama}")
+                    registro['conflicto'] = True
+                    break
+            elif any(p in texto for p in ERRORES_BLOQUEO_REMOTO):
+                registro['bloqueo_remoto'] = True
+                time.sleep(self.aleatorio.uniform(0.05, 0.3))
+            else:
+                break
+            intentos += 1
+            t = time.perf_counter()
+            exito, salida, error = git_operaciones.subir_rama(self.repo, self.rama)
+            registro['push'] += time.perf_counter() - t
+            texto = f"{salida}\n{error}".lower()
+        registro['resultado'] = 'ok' if exito else 'fallido'
+        registro['total'] = time.perf_counter() - registro['inicio']
+        self.resultados.append(registro)
+
+
+def percentiles(valores):
+    """p50, p90, p99 y máximo en milisegundos"""
+    if not valores:
+        return {}
+    ordenados = sorted(valores)
+
+    def p(fraccion):
+        indice = min(len(ordenados) - 1, int(round(fraccion * (len(ordenados) - 1))))
+        return round(ordenados[indice] * 1000, 1)
+
+    return {'p50': p(0.5), 'p90': p(0.9), 'p99': p(0.99), 'max': round(ordenados[-1] * 1000, 1),
+            'media': round(statistics.mean(ordenados) * 1000, 1)}
+
+
+def informe(resultados, segundos, args, bloqueos_inicio):
+    exitosos = [r for r in resultados if r.get('resultado') == 'ok']
+    bloqueos = estadisticas_bloqueos()
+    return {
+        'clientes': args.clientes,
+        'segundos': round(segundos, 2),
+        'ciclos': len(resultados),
+        'pushes_exitosos': len(exitosos),
+        'pushes_fallidos': sum(1 for r in resultados if r.get('resultado') == 'fallido'),
+        'rendimiento_pushes_por_segundo': round(len(exitosos) / segundos, 3) if segundos else 0,
+        'rechazos_no_fast_forward': sum(r.get('rechazos', 0) for r in resultados),
+        'conflictos_de_rebase': sum(1 for r in resultados if r.get('conflicto')),
+        'contencion_bloqueo_remoto': sum(1 for r in resultados if r.get('bloqueo_remoto')),
+        'contencion_index_lock': bloqueos['reintentos_index_lock'] - bloqueos_inicio['reintentos_index_lock'],
+        'esperas_bloqueo_local': bloqueos['esperas_bloqueo'] - bloqueos_inicio['esperas_bloqueo'],
+        'latencia_ms': {
+            paso: percentiles([r[paso] for r in resultados if paso in r])
+            for paso in ('add', 'commit', 'push', 'total')
+        },
+    }
+
+
+def imprimir_informe(datos):
+    print("=" * 60)
+    print(f"  PRUEBA DE CARGA: {datos['clientes']} cliente(s), {datos['segundos']} s")
+    print("=" * 60)
+    print(f"Ciclos: {datos['ciclos']}  ·  pushes OK: {datos['pushes_exitosos']}  ·  fallidos: {datos['pushes_fallidos']}")
+    print(f"Rendimiento: {datos['rendimiento_pushes_por_segundo']} push/s")
+    print(f"Rechazos non-fast-forward: {datos['rechazos_no_fast_forward']}  ·  conflictos: {datos['conflictos_de_rebase']}")
+    print(f"Contención: bloqueo remoto {datos['contencion_bloqueo_remoto']}, "
+          f"index.lock {datos['contencion_index_lock']}, esperas locales {datos['esperas_bloqueo_local']}")
+    print("Latencias (ms):")
+    for paso, p in datos['latencia_ms'].items():
+        if p:
+            print(f"  {paso:7s} p50={p['p50']:>8}  p90={p['p90']:>8}  p99={p['p99']:>8}  max={p['max']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga con muchos clientes contra un remoto local")
+    parser.add_argument("--clientes", type=int, default=8, help="número de clientes simulados")
+    parser.add_argument("--operaciones", type=int, default=10, help="ciclos por cliente (si no hay --duracion)")
+    parser.add_argument("--duracion", type=float, default=0, help="segundos de prueba (ignora --operaciones)")
+    parser.add_argument("--tasa", type=float, default=1.0, help="ciclos por segundo por cliente (0 = sin pausa)")
+    parser.add_argument("--compartido", type=float, default=0.0,
+                        help="fracción de ediciones sobre un archivo común (provoca conflictos)")
+    parser.add_argument("--reintentos", type=int, default=5, help="reintentos de push tras un rechazo")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--directorio", help="carpeta de trabajo (por defecto, una temporal que se borra)")
+    parser.add_argument("--json", help="guardar el informe en este archivo JSON")
+    args = parser.parse_args()
+
+    directorio = args.directorio or tempfile.mkdtemp(prefix="prueba-carga-")
+    os.makedirs(directorio, exist_ok=True)
+    try:
+        print(f"Preparando {args.clientes} clon(es) en {directorio}...")
+        _, clones, rama = preparar(directorio, args.clientes)
+        fin = threading.Event()
+        resultados = []
+        bloqueos_inicio = estadisticas_bloqueos()
+        clientes = [Cliente(i, clon, rama, args, fin, resultados) for i, clon in enumerate(clones)]
+        inicio = time.perf_counter()
+        for cliente in clientes:
+            cliente.start()
+        if args.duracion:
+            fin.wait(args.duracion)
+            fin.set()
+        for cliente in clientes:
+            cliente.join()
+        datos = informe(resultados, time.perf_counter() - inicio, args, bloqueos_inicio)
+        imprimir_informe(datos)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(datos, f, indent=4, ensure_ascii=False)
+    finally:
+        if not args.directorio:
+            shutil.rmtree(directorio, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas del filtro de texto de git_conjunto_cambios.py
+    python -m unittest test_git_conjunto_cambios
+"""
+
+import unicodedata
+import unittest
+
+from git_conjunto_cambios import ConjuntoCambios
+
+
+def conjunto(*rutas):
+    """Conjunto como lo daría 'git status --porcelain -z' con esas rutas modificadas"""
+    datos = b''.join(b' M ' + ruta.encode('utf-8', 'surrogateescape') + b'\0' for ruta in rutas)
+    return ConjuntoCambios.desde_status_z(datos)
+
+
+def filtrar(cambios, texto):
+    return cambios.rutas(cambios.indices(cambios.mascara_texto(texto)))
+
+
+class PruebaFiltroTexto(unittest.TestCase):
+    def test_ascii(self):
+        cambios = conjunto("src/Main.py", "src/util.py", "README.md")
+        self.assertEqual(filtrar(cambios, "main"), ["src/Main.py"])
+        self.assertEqual(filtrar(cambios, "SRC/U"), ["src/util.py"])
+
+    def test_eñe_y_acentos_sin_distinguir_mayusculas(self):
+        cambios = conjunto("Ñandu.txt", "docs/Canción.md", "CAMIÓN.py", "otro.txt")
+        self.assertEqual(filtrar(cambios, "ñandu"), ["Ñandu.txt"])
+        self.assertEqual(filtrar(cambios, "CANCIÓN"), ["docs/Canción.md"])
+        self.assertEqual(filtrar(cambios, "camión"), ["CAMIÓN.py"])
+        # Las coincidencias que siguen a un nombre con acentos no se desplazan
+        self.assertEqual(filtrar(cambios, "otro"), ["otro.txt"])
+
+    def test_carpetas_con_acentos(self):
+        cambios = conjunto("Música/a.txt", "musica/b.txt")
+        self.assertEqual(filtrar(cambios, "MÚSICA/"), ["Música/a.txt"])
+
+    def test_nombres_en_nfd(self):
+        # macOS guarda los nombres descompuestos (n + tilde combinada)
+        cambios = conjunto(unicodedata.normalize('NFD', "Año.txt"), "b.txt")
+        self.assertEqual(len(filtrar(cambios, "año")), 1)
+
+    def test_cambio_de_largo_al_plegar(self):
+        # "ß" se pliega a "ss": las posiciones del bloque plegado son propias
+        cambios = conjunto("Straße.txt", "siguiente.txt")
+        self.assertEqual(filtrar(cambios, "strasse"), ["Straße.txt"])
+        self.assertEqual(filtrar(cambios, "siguiente"), ["siguiente.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
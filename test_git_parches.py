@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de git_parches.py contra un repositorio temporal
+    python -m unittest test_git_parches
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+import git_parches
+
+ENTORNO = dict(os.environ, GIT_AUTHOR_NAME="prueba", GIT_AUTHOR_EMAIL="prueba@example.com",
+               GIT_COMMITTER_NAME="prueba", GIT_COMMITTER_EMAIL="prueba@example.com")
+
+
+class RepoTemporal(unittest.TestCase):
+    """Repositorio con a.txt confirmado con 'inicial' y modificado en disco con 'nuevo'"""
+    inicial = b""
+    nuevo = b""
+
+    def setUp(self):
+        self.repo = tempfile.mkdtemp(prefix="git_parches_")
+        self.git("init", "-q")
+        self.escribir(self.inicial)
+        self.git("add", "a.txt")
+        self.git("commit", "-q", "-m", "inicial")
+        self.escribir(self.nuevo)
+
+    def tearDown(self):
+        shutil.rmtree(self.repo, ignore_errors=True)
+
+    def git(self, *argumentos):
+        return subprocess.run(["git"] + list(argumentos), cwd=self.repo, env=ENTORNO,
+                              check=True, capture_output=True).stdout
+
+    def escribir(self, contenido):
+        with open(os.path.join(self.repo, "a.txt"), 'wb') as f:
+            f.write(contenido)
+
+    def fragmentos(self):
+        lector = git_parches.LectorFragmentos(self.repo, ["a.txt"])
+        fragmentos = lector.siguientes(100)
+        lector.cerrar()
+        return fragmentos
+
+
+class PruebaFinalSinSalto(RepoTemporal):
+    inicial = b"x\ny"
+    nuevo = b"x\ny\nz"
+
+    def test_elegir_solo_la_linea_nueva(self):
+        # -y / \ No newline / +y / +z: elegir solo "+z" arrastra "-y" y "+y" (y con salto final)
+        fragmentos = self.fragmentos()
+        fragmento = fragmentos[0]
+        ultima_mas = max(i for i, linea in enumerate(fragmento.lineas) if linea.startswith('+'))
+        fragmento.alternar(ultima_mas)
+        exito, _, error = git_parches.aplicar_en_indice(self.repo, fragmentos)
+        self.assertTrue(exito, error)
+        indice = self.git("show", ":a.txt")
+        self.assertEqual(indice, b"x\ny\nz")
+
+    def test_desmarcar_la_linea_vieja_desmarca_las_nuevas(self):
+        fragmento = self.fragmentos()[0]
+        fragmento.seleccionar_todo()
+        fragmento.alternar(fragmento._final_sin_salto())
+        self.assertIsNone(fragmento.parche())
+
+
+class PruebaVariosFragmentos(RepoTemporal):
+    # Dos fragmentos en el mismo archivo: se agregan dos líneas arriba y se cambia una abajo
+    lineas = [f"l{i}".encode() for i in range(1, 21)]
+    inicial = b"\n".join(lineas) + b"\n"
+    nuevo = b"\n".join(lineas[:2] + [b"a1", b"a2"] + lineas[2:17] + [b"L18"] + lineas[18:]) + b"\n"
+
+    def test_elegir_parte_del_primero_mueve_el_segundo(self):
+        primero, segundo = self.fragmentos()
+        # Del primero solo "+a1": el segundo empieza una línea más abajo en el índice, no dos
+        primero.alternar(primero.lineas.index("+a1"))
+        segundo.seleccionar_todo()
+        parche = git_parches.construir_parche([primero, segundo])
+        cabeceras = [linea for linea in parche.split("\n") if linea.startswith("@@")]
+        self.assertEqual(cabeceras[1].split()[2], f"+{segundo.inicio_viejo + 1},{segundo.cuenta_nueva}")
+
+        exito, _, error = git_parches.aplicar_en_indice(self.repo, [primero, segundo])
+        self.assertTrue(exito, error)
+        esperado = self.lineas[:2] + [b"a1"] + self.lineas[2:17] + [b"L18"] + self.lineas[18:]
+        self.assertEqual(self.git("show", ":a.txt"), b"\n".join(esperado) + b"\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la cola de trabajos de git_trabajos.py
+    python -m unittest test_git_trabajos
+"""
+
+import tempfile
+import threading
+import unittest
+
+from git_trabajos import GestorTrabajos, CANCELADO, COMPLETADO
+
+ESPERA = 5
+
+
+class PruebaCancelarEnCola(unittest.TestCase):
+    def setUp(self):
+        self.repo = tempfile.mkdtemp(prefix="git_trabajos_")
+        self.gestor = GestorTrabajos()
+        self.soltar = threading.Event()
+        self.primero_terminado = threading.Event()
+        # El primer trabajo ocupa el repositorio hasta que se suelte
+        self.primero = self.gestor.encolar(self.repo, "bloquea", lambda t: self.soltar.wait(ESPERA),
+                                           al_terminar=lambda t: self.primero_terminado.set())
+
+    def tearDown(self):
+        self.soltar.set()
+
+    def test_cancelar_en_cola_llama_a_al_terminar(self):
+        llamadas = []
+        terminado = threading.Event()
+
+        def al_terminar(trabajo):
+            llamadas.append(trabajo.estado)
+            terminado.set()
+
+        segundo = self.gestor.encolar(self.repo, "en cola", lambda t: "no debe correr", al_terminar=al_terminar)
+        self.assertTrue(self.gestor.cancelar(segundo.id))
+        self.assertTrue(terminado.wait(ESPERA))
+        self.assertEqual(llamadas, [CANCELADO])
+        self.assertIsNone(segundo.resultado)
+
+        # Al sacarlo de la cola no se vuelve a llamar
+        self.soltar.set()
+        self.assertTrue(self.primero_terminado.wait(ESPERA))
+        self.assertEqual(self.primero.estado, COMPLETADO)
+        self.assertEqual(llamadas, [CANCELADO])
+
+    def test_cancelar_repo_avisa_a_todos_los_de_la_cola(self):
+        avisados = []
+        for i in range(3):
+            self.gestor.encolar(self.repo, f"fondo {i}", lambda t: None,
+                                al_terminar=lambda t, i=i: avisados.append(i))
+        self.gestor.cancelar_repo(self.repo)
+        self.assertEqual(sorted(avisados), [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()